@@ -0,0 +1,360 @@
+# src/amostragem.py
+"""
+Amostragem para as simulações de risco: quase-Monte Carlo e redução de variância.
+
+    pseudo       números pseudoaleatórios (np.random.Generator)
+    sobol        sequência de Sobol, com deslocamento digital aleatório
+    halton       sequência de Halton, com deslocamento aleatório mod 1
+    antiteticas  metade dos pontos espelhada (u, 1-u) -> (z, -z)
+    controle     variável de controle: a parte linear do tributo no câmbio, cuja
+                 média e quantis são conhecidos analiticamente no modelo lognormal
+
+O Amostrador tem standard_normal/random/uniform/integers como um Generator,
+então pode ser passado no lugar de `rng` para risco_cambial.simular_risco_carteira;
+analise_simulacoes_v2.simular_lote aceita `amostrador=`. O deslocamento
+aleatório torna as sequências QMC estimadores sem viés: o erro padrão sai
+de réplicas independentes (relatorio_convergencia).
+
+Só as primeiras 16 dimensões de cada ponto são QMC; as demais são
+pseudoaleatórias (QMC completado). Sobol não tem números de direção além
+disso aqui, e Halton com primos grandes dá projeções degeneradas (dimensões
+vizinhas quase iguais). Quem gera os pontos põe primeiro as dimensões que
+mais pesam no resultado: risco_cambial.ModeloGBM usa ponte browniana, e aí
+o câmbio no último prazo de cada moeda vem das primeiras dimensões.
+
+Uso:
+    python src/amostragem.py          # relatório de convergência (US$ 100 mil, 30 dias)
+"""
+import math
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from icms_rj import icms_importacao_rj_lote
+
+PROJECT_ROOT = Path(__file__).parent.parent
+SAIDA = PROJECT_ROOT / "output" / "convergencia_amostragem.csv"
+
+METODOS = ("pseudo", "sobol", "halton")
+BITS_SOBOL = 32
+
+# Joe & Kuo: (grau s, coeficientes a, m_1..m_s) das dimensões 2..16; a 1ª é van der Corput
+_DIRECOES_SOBOL = [
+    (1, 0, (1,)), (2, 1, (1, 3)), (3, 1, (1, 3, 1)), (3, 2, (1, 1, 1)),
+    (4, 1, (1, 1, 3, 3)), (4, 4, (1, 3, 5, 13)), (5, 2, (1, 1, 5, 5, 17)),
+    (5, 4, (1, 1, 5, 5, 5)), (5, 7, (1, 1, 7, 11, 19)), (5, 11, (1, 1, 5, 1, 1)),
+    (5, 13, (1, 1, 1, 3, 11)), (5, 14, (1, 3, 5, 5, 31)), (6, 1, (1, 3, 3, 9, 7, 49)),
+    (6, 13, (1, 1, 1, 15, 21, 21)), (6, 16, (1, 3, 1, 13, 27, 49)),
+]
+MAX_DIMENSOES_SOBOL = len(_DIRECOES_SOBOL) + 1
+MAX_DIMENSOES_HALTON = 16  # bases até 53; daí em diante as projeções 2D degeneram
+
+
+# ===========================
+# SEQUÊNCIAS
+# ===========================
+
+def _numeros_direcao(dimensoes: int) -> np.ndarray:
+    """v[d, k] = m_k · 2^(B-k), em inteiros de B bits"""
+    if dimensoes > MAX_DIMENSOES_SOBOL:
+        raise ValueError(f"Sobol suporta até {MAX_DIMENSOES_SOBOL} dimensões (use 'halton')")
+    v = np.zeros((dimensoes, BITS_SOBOL), dtype=np.uint64)
+    v[0] = [1 << (BITS_SOBOL - k) for k in range(1, BITS_SOBOL + 1)]
+    for d in range(1, dimensoes):
+        s, a, m_iniciais = _DIRECOES_SOBOL[d - 1]
+        m = list(m_iniciais)
+        for k in range(s, BITS_SOBOL):
+            novo = m[k - s] ^ (m[k - s] << s)
+            for i in range(1, s):
+                if (a >> (s - 1 - i)) & 1:
+                    novo ^= m[k - i] << i
+            m.append(novo)
+        v[d] = [m[k] << (BITS_SOBOL - 1 - k) for k in range(BITS_SOBOL)]
+    return v
+
+
+def sobol(n: int, dimensoes: int, inicio: int = 0, deslocamento=None) -> np.ndarray:
+    """
+    Pontos `inicio`..`inicio+n-1` da sequência de Sobol (n x dimensoes) em (0, 1).
+
+    deslocamento: inteiros de B bits por dimensão (XOR), para Sobol aleatorizado.
+    """
+    v = _numeros_direcao(dimensoes)
+    indices = np.arange(inicio, inicio + n, dtype=np.uint64)
+    gray = indices ^ (indices >> np.uint64(1))
+    inteiros = np.zeros((n, dimensoes), dtype=np.uint64)
+    for bit in range(int(inicio + n).bit_length()):
+        ligado = ((gray >> np.uint64(bit)) & np.uint64(1)).astype(bool)
+        inteiros[ligado] ^= v[:, bit]
+    if deslocamento is not None:
+        inteiros ^= np.asarray(deslocamento, dtype=np.uint64)
+    # Centro da célula: nunca exatamente 0 ou 1
+    return (inteiros.astype(np.float64) + 0.5) / 2.0 ** BITS_SOBOL
+
+
+def _primos(quantidade: int) -> list:
+    primos, candidato = [], 2
+    while len(primos) < quantidade:
+        if all(candidato % p for p in primos if p * p <= candidato):
+            primos.append(candidato)
+        candidato += 1
+    return primos
+
+
+def halton(n: int, dimensoes: int, inicio: int = 0, deslocamento=None) -> np.ndarray:
+    """Sequência de Halton (inverso radical na base do d-ésimo primo), pulando o ponto 0"""
+    indices = np.arange(inicio + 1, inicio + n + 1, dtype=np.int64)
+    pontos = np.empty((n, dimensoes))
+    for d, base in enumerate(_primos(dimensoes)):
+        resto = indices.copy()
+        valor = np.zeros(n)
+        fator = 1.0 / base
+        while resto.any():
+            valor += (resto % base) * fator
+            resto //= base
+            fator /= base
+        pontos[:, d] = valor
+    if deslocamento is not None:
+        pontos = (pontos + deslocamento) % 1.0
+    return np.clip(pontos, 1e-16, 1 - 1e-16)
+
+
+def normal_inversa(u) -> np.ndarray:
+    """Φ⁻¹(u) pela aproximação racional de Acklam (erro relativo < 1,2e-9)"""
+    a = (-3.969683028665376e+01, 2.209460984245205e+02, -2.759285104469687e+02,
+         1.383577518672690e+02, -3.066479806614716e+01, 2.506628277459239e+00)
+    b = (-5.447609879822406e+01, 1.615858368580409e+02, -1.556989798598866e+02,
+         6.680131188771972e+01, -1.328068155288572e+01)
+    c = (-7.784894002430293e-03, -3.223964580411365e-01, -2.400758277161838e+00,
+         -2.549732539343734e+00, 4.374664141464968e+00, 2.938163982698783e+00)
+    d = (7.784695709041462e-03, 3.224671290700398e-01, 2.445134137142996e+00,
+         3.754408661907416e+00)
+    u = np.asarray(u, dtype=float)
+    z = np.empty_like(u)
+    baixo = u < 0.02425
+    alto = u > 1 - 0.02425
+    meio = ~(baixo | alto)
+
+    q = u[meio] - 0.5
+    r = q * q
+    z[meio] = (((((a[0] * r + a[1]) * r + a[2]) * r + a[3]) * r + a[4]) * r + a[5]) * q / \
+              (((((b[0] * r + b[1]) * r + b[2]) * r + b[3]) * r + b[4]) * r + 1)
+    for mascara, sinal, cauda in ((baixo, 1.0, u[baixo]), (alto, -1.0, 1 - u[alto])):
+        q = np.sqrt(-2 * np.log(cauda))
+        z[mascara] = sinal * (((((c[0] * q + c[1]) * q + c[2]) * q + c[3]) * q + c[4]) * q + c[5]) / \
+                     ((((d[0] * q + d[1]) * q + d[2]) * q + d[3]) * q + 1)
+    return z
+
+
+# ===========================
+# AMOSTRADOR
+# ===========================
+
+class Amostrador:
+    """
+    Fonte de sorteios com a interface usada pelas simulações (subconjunto de
+    np.random.Generator). Chamadas sucessivas continuam a mesma sequência,
+    então gerar em lotes dá os mesmos pontos que gerar tudo de uma vez.
+
+    Com Sobol/Halton, dimensões além de MAX_DIMENSOES_* são pseudoaleatórias.
+    """
+
+    def __init__(self, metodo: str = "pseudo", antiteticas: bool = False, seed=None):
+        if metodo not in METODOS:
+            raise ValueError(f"Método desconhecido: {metodo} (use um de {METODOS})")
+        self.metodo = metodo
+        self.antiteticas = antiteticas
+        self.rng = np.random.default_rng(seed)
+        self._proximo = 0
+        self._deslocamentos = {}
+
+    def _deslocamento(self, dimensoes: int):
+        if dimensoes not in self._deslocamentos:
+            if self.metodo == "sobol":
+                self._deslocamentos[dimensoes] = self.rng.integers(
+                    0, 2 ** BITS_SOBOL, dimensoes, dtype=np.uint64)
+            else:
+                self._deslocamentos[dimensoes] = self.rng.random(dimensoes)
+        return self._deslocamentos[dimensoes]
+
+    def _base(self, n: int, dimensoes: int) -> np.ndarray:
+        if self.metodo == "pseudo":
+            return self.rng.random((n, dimensoes))
+        if self.metodo == "sobol":
+            gerador, dimensoes_qmc = sobol, min(dimensoes, MAX_DIMENSOES_SOBOL)
+        else:
+            gerador, dimensoes_qmc = halton, min(dimensoes, MAX_DIMENSOES_HALTON)
+        pontos = gerador(n, dimensoes_qmc, self._proximo, self._deslocamento(dimensoes_qmc))
+        self._proximo += n
+        if dimensoes_qmc < dimensoes:
+            pontos = np.hstack([pontos, self.rng.random((n, dimensoes - dimensoes_qmc))])
+        return pontos
+
+    def uniformes(self, n: int, dimensoes: int) -> np.ndarray:
+        """n pontos em (0, 1)^dimensoes"""
+        if not self.antiteticas:
+            return self._base(n, dimensoes)
+        metade = self._base((n + 1) // 2, dimensoes)
+        return np.concatenate([metade, 1.0 - metade])[:n]
+
+    def normais(self, n: int, dimensoes: int) -> np.ndarray:
+        return normal_inversa(self.uniformes(n, dimensoes))
+
+    # --- interface de np.random.Generator ---
+
+    @staticmethod
+    def _forma(size):
+        forma = (size,) if np.isscalar(size) else tuple(size)
+        return forma, forma[0], int(np.prod(forma[1:], dtype=np.int64))
+
+    def random(self, size):
+        forma, n, dimensoes = self._forma(size)
+        return self.uniformes(n, dimensoes).reshape(forma)
+
+    def standard_normal(self, size):
+        forma, n, dimensoes = self._forma(size)
+        return self.normais(n, dimensoes).reshape(forma)
+
+    def uniform(self, low=0.0, high=1.0, size=None):
+        return low + (np.asarray(high) - low) * self.random(size)
+
+    def integers(self, low, high=None, size=None, dtype=np.int64):
+        if high is None:
+            low, high = 0, low
+        return (low + np.floor(self.random(size) * (high - low))).astype(dtype)
+
+
+# ===========================
+# ESTIMADORES
+# ===========================
+
+def coeficiente_controle(y, controle) -> float:
+    """b ótimo = cov(y, x) / var(x)"""
+    x = np.asarray(controle, dtype=float)
+    variancia = x.var()
+    return float(np.cov(y, x, bias=True)[0, 1] / variancia) if variancia > 0 else 0.0
+
+
+def estimar_media(y, controle=None, media_controle: float = None) -> float:
+    """Média de y; com controle: ȳ - b·(x̄ - E[x])"""
+    y = np.asarray(y, dtype=float)
+    if controle is None:
+        return float(y.mean())
+    b = coeficiente_controle(y, controle)
+    return float(y.mean() - b * (np.mean(controle) - media_controle))
+
+
+def estimar_quantil(y, p: float, controle=None, quantil_controle: float = None) -> float:
+    """Quantil p de y; com controle: q̂_y - b·(q̂_x - q_x)"""
+    y = np.asarray(y, dtype=float)
+    if controle is None:
+        return float(np.quantile(y, p))
+    b = coeficiente_controle(y, controle)
+    return float(np.quantile(y, p) - b * (np.quantile(controle, p) - quantil_controle))
+
+
+# ===========================
+# RISCO DO ICMS DE UMA OPERAÇÃO (notebook 02)
+# ===========================
+
+class RiscoICMS:
+    """
+    Tributo de uma importação com câmbio lognormal no fechamento:
+    S_T = S_0 · exp(-σ²T/2 + σ√T·Z). O tributo é ~linear no câmbio (só os
+    arredondamentos em centavos fogem disso), então x = coeficiente · S_T é
+    uma variável de controle com média e quantis exatos.
+    """
+
+    def __init__(self, valor_fob_usd: float = 100_000, spot: float = 5.60,
+                 volatilidade_diaria: float = 0.01, dias: int = 30,
+                 metrica: str = "icms_devido", **aliquotas):
+        self.valor_fob_usd = valor_fob_usd
+        self.spot = spot
+        self.sigma = volatilidade_diaria * math.sqrt(dias)
+        self.metrica = metrica
+        self.aliquotas = aliquotas
+        # Derivada do tributo em relação ao câmbio, sem o efeito dos centavos
+        escala = 1e6
+        self.coeficiente = float(icms_importacao_rj_lote(valor_fob_usd * escala, 1.0, **aliquotas)[metrica][0]) / escala
+
+    def cambios(self, z) -> np.ndarray:
+        return self.spot * np.exp(-0.5 * self.sigma ** 2 + self.sigma * np.asarray(z))
+
+    def tributo(self, cambio) -> np.ndarray:
+        return icms_importacao_rj_lote(self.valor_fob_usd, cambio, **self.aliquotas)[self.metrica]
+
+    @property
+    def media_controle(self) -> float:
+        return self.coeficiente * self.spot
+
+    def quantil_controle(self, p: float) -> float:
+        z = float(normal_inversa(np.array([p]))[0])
+        return self.coeficiente * self.spot * math.exp(-0.5 * self.sigma ** 2 + self.sigma * z)
+
+    def estimar(self, amostrador: Amostrador, n: int, p: float = 0.99, controle: bool = False) -> tuple:
+        """(média, quantil p) do tributo com n caminhos"""
+        cambio = self.cambios(amostrador.normais(n, 1)[:, 0])
+        y = self.tributo(cambio)
+        if not controle:
+            return estimar_media(y), estimar_quantil(y, p)
+        x = self.coeficiente * cambio
+        return (estimar_media(y, x, self.media_controle),
+                estimar_quantil(y, p, x, self.quantil_controle(p)))
+
+
+CONFIGURACOES = {
+    # nome: (método, antitéticas, controle)
+    "pseudo": ("pseudo", False, False),
+    "antiteticas": ("pseudo", True, False),
+    "controle": ("pseudo", False, True),
+    "halton": ("halton", False, False),
+    "sobol": ("sobol", False, False),
+    "sobol+controle": ("sobol", False, True),
+}
+
+
+def relatorio_convergencia(problema: RiscoICMS = None, tamanhos=tuple(2 ** k for k in range(8, 15)),
+                           configuracoes=CONFIGURACOES, replicas: int = 32, p: float = 0.99,
+                           seed: int = 0) -> pd.DataFrame:
+    """
+    Erro padrão da média e do VaR(p) x número de caminhos, por configuração.
+
+    Cada ponto roda `replicas` estimativas independentes (sementes/deslocamentos
+    diferentes); o erro padrão é o desvio entre elas. `ganho` = (ep_pseudo / ep)²,
+    quantas vezes mais caminhos o pseudoaleatório puro precisaria para o mesmo erro.
+    """
+    problema = problema or RiscoICMS()
+    sementes = np.random.SeedSequence(seed).spawn(replicas)
+    linhas = []
+    for n in tamanhos:
+        for nome, (metodo, antiteticas, controle) in configuracoes.items():
+            estimativas = np.array([
+                problema.estimar(Amostrador(metodo, antiteticas, semente), n, p, controle)
+                for semente in sementes
+            ])
+            linhas.append({
+                "configuracao": nome, "caminhos": n,
+                "media": estimativas[:, 0].mean(), "ep_media": estimativas[:, 0].std(ddof=1),
+                f"var_{p * 100:g}": estimativas[:, 1].mean(), f"ep_var_{p * 100:g}": estimativas[:, 1].std(ddof=1),
+            })
+    df = pd.DataFrame(linhas)
+    if "pseudo" in configuracoes:
+        referencia = df[df["configuracao"] == "pseudo"].set_index("caminhos")
+        for coluna in ("ep_media", f"ep_var_{p * 100:g}"):
+            base = df["caminhos"].map(referencia[coluna])
+            df[coluna.replace("ep_", "ganho_")] = (base / df[coluna]) ** 2
+    return df
+
+
+# === EXECUÇÃO ===
+if __name__ == "__main__":
+    print("📉 Convergência: erro padrão x caminhos (ICMS de US$ 100 mil, câmbio em 30 dias)")
+    relatorio = relatorio_convergencia()
+    pd.options.display.float_format = "{:,.2f}".format
+    for n, grupo in relatorio.groupby("caminhos"):
+        print(f"\n🎲 {n} caminhos")
+        print(grupo.drop(columns="caminhos").to_string(index=False))
+    SAIDA.parent.mkdir(exist_ok=True)
+    relatorio.to_csv(SAIDA, index=False, encoding="utf-8")
+    print(f"\n📁 Relatório salvo em {SAIDA}")
@@ -5,49 +5,21 @@ import matplotlib.pyplot as plt
 import os
 from datetime import datetime
 
-print("🔍 Carregando dados REAIS da Receita Federal...")
+from base_receita_federal import carregar_empresas_rf
+from analise_simulacoes_v2 import ROTULOS_ICT, codificar_ict
+from motor_tributario import MotorTributario, regras_taxas_fixas, arredondar_decimal
 
 # CAMINHO CORRETO - baseado na sua estrutura
+# (aceita padrão glob para o dump completo, ex.: "./data/Empresas*")
 CAMINHO_CORRETO = "./data/empresas_rf.txt"
-
-try:
-    df_real = pd.read_csv(
-        CAMINHO_CORRETO,
-        sep=';',
-        encoding='latin1',
-        header=None,
-        names=[
-            'cnpj_basico',
-            'razao_social',
-            'natureza_juridica',
-            'qualificacao_responsavel', 
-            'capital_social',
-            'porte_empresa',
-            'ente_federativo'
-        ],
-        on_bad_lines='skip',
-        nrows=10000,  # Vamos começar com 10k empresas
-        low_memory=False
-    )
-    
-    print(f"✅ SUCESSO! {len(df_real)} empresas reais carregadas!")
-    
-    # Converte capital_social
-    df_real['capital_social'] = pd.to_numeric(
-        df_real['capital_social'].str.replace(',', '.'), 
-        errors='coerce'
-    ).fillna(0.0)
-    
-    print("\n📊 Estatísticas dos dados REAIS:")
-    print(f"   - Capital social médio: R$ {df_real['capital_social'].mean():,.2f}")
-    print(f"   - Capital social máximo: R$ {df_real['capital_social'].max():,.2f}")
-    print(f"   - Portes de empresa: {df_real['porte_empresa'].value_counts().to_dict()}")
-    
-except Exception as e:
-    print(f"❌ ERRO: {e}")
-    exit(1)
+CAMINHO_CACHE = "./data/cache/empresas_rf.feather"
 
 # FUNÇÕES PARA SIMULAR IMPORTAÇÕES BASEADAS EM DADOS REAIS
+
+# Tributos com taxas realistas: II 2%, IPI 5%, PIS/COFINS 3.4% (motor canônico)
+TAXAS_REAIS = {'ii_fixo': 0.02, 'ipi_fixo': 0.05, 'pis_cofins_fixo': 0.034}
+MOTOR_TAXAS_REAIS = MotorTributario(regras_taxas_fixas(TAXAS_REAIS))
+
 def calcular_ict(total_tributos: float, valor_fob_brl: float, benchmark: float = 0.35) -> float:
     if valor_fob_brl == 0:
         return 0.0
@@ -89,15 +61,14 @@ def simular_operacoes_reais(df_empresas, n_operacoes=1000):
         valor_fob_usd = max(5000, min(valor_fob_usd, 5000000))
         
         cambio = np.random.uniform(4.8, 5.8)
-        valor_fob_brl = valor_fob_usd * cambio
         
         # Tributos com taxas realistas
-        ii_valor = valor_fob_brl * 0.02    # II 2%
-        ipi_valor = valor_fob_brl * 0.05   # IPI 5% 
-        pis_cofins_valor = valor_fob_brl * 0.034  # PIS/COFINS 3.4%
-        icms_valor = valor_fob_brl * np.random.choice([0.07, 0.12, 0.17])
-        
-        total_tributos = ii_valor + ipi_valor + pis_cofins_valor + icms_valor
+        tributos = MOTOR_TAXAS_REAIS.calcular(
+            valor_fob_usd, cambio,
+            aliquota_icms=np.random.choice([0.07, 0.12, 0.17])
+        )
+        valor_fob_brl = float(tributos['valor_brl'][0])
+        total_tributos = float(tributos['total_tributos'][0])
         ict = calcular_ict(total_tributos, valor_fob_brl, 0.35)
         
         operacao = {
@@ -118,22 +89,90 @@ def simular_operacoes_reais(df_empresas, n_operacoes=1000):
     print(f"✅ {len(operacoes)} operações simuladas baseadas em empresas REAIS!")
     return operacoes
 
-# EXECUTA A SIMULAÇÃO COM DADOS REAIS
-operacoes_reais = simular_operacoes_reais(df_real, 1000)
-
-if operacoes_reais:
-    # Converte para DataFrame para análise
-    df_operacoes = pd.DataFrame(operacoes_reais)
+def simular_operacoes_reais_lote(df_empresas, n_operacoes=1000, seed=None, rng=None) -> pd.DataFrame:
+    """
+    Versão vetorizada de simular_operacoes_reais: sorteia todas as empresas
+    de uma vez (rng.integers), junta as colunas como arrays e calcula FOB,
+    tributos e ICT do lote inteiro. Retorna um DataFrame com as mesmas colunas.
+    """
+    if rng is None:
+        rng = np.random.default_rng(seed)
+    print(f"\n💥 Simulando {n_operacoes} operações baseadas em dados REAIS (lote)...")
+    
+    empresas_com_capital = df_empresas[df_empresas['capital_social'] > 0]
+    if len(empresas_com_capital) == 0:
+        print("❌ Nenhuma empresa com capital social > 0 encontrada!")
+        return pd.DataFrame()
     
-    print(f"\n🎯 RESULTADOS BASEADOS EM DADOS REAIS:")
-    print(f"   📊 ICT Médio: {df_operacoes['ict'].mean():.2f}")
-    print(f"   💰 Carga Tributária Média: R$ {df_operacoes['total_tributos'].mean():,.0f}")
-    print(f"   🚨 Operações Críticas: {len(df_operacoes[df_operacoes['ict'] >= 1.5])}")
-    print(f"   💸 Capital Social Médio das empresas: R$ {df_operacoes['capital_social_real'].mean():,.0f}")
+    # Seleciona as empresas REAIS de todas as operações de uma vez
+    indices = rng.integers(0, len(empresas_com_capital), n_operacoes)
+    empresas = empresas_com_capital.iloc[indices].reset_index(drop=True)
+    capital = empresas['capital_social'].to_numpy(dtype=float)
     
-    # Salva resultados
-    df_operacoes.to_csv("./output/operacoes_reais_simuladas.csv", index=False)
-    print(f"\n📁 Resultados salvos em: ./output/operacoes_reais_simuladas.csv")
+    # Baseia o valor FOB no capital social REAL (10-300% do capital, em USD)
+    fator_importacao = rng.uniform(0.1, 3.0, n_operacoes)
+    valor_fob_usd = np.clip(capital * fator_importacao / 5.3, 5000, 5000000)
+    cambio = rng.uniform(4.8, 5.8, n_operacoes)
     
-else:
-    print("❌ Não foi possível gerar operações.")
\ No newline at end of file
+    tributos = MOTOR_TAXAS_REAIS.calcular(
+        valor_fob_usd, cambio,
+        aliquota_icms=rng.choice([0.07, 0.12, 0.17], n_operacoes)
+    )
+    valor_fob_brl = tributos['valor_brl']
+    total_tributos = tributos['total_tributos']
+    with np.errstate(divide='ignore', invalid='ignore'):
+        carga = np.where(valor_fob_brl == 0, 0.0, total_tributos / valor_fob_brl)
+    ict = arredondar_decimal(carga / 0.35, 3)
+    
+    razao = empresas['razao_social'].astype(str)
+    razao_curta = razao.str.slice(0, 30) + np.where(razao.str.len() > 30, "...", "")
+    
+    df_operacoes = pd.DataFrame({
+        "cnpj_basico": empresas['cnpj_basico'],
+        "razao_social": razao_curta,
+        "capital_social_real": capital,
+        "porte_empresa": empresas['porte_empresa'],
+        "valor_fob_usd": arredondar_decimal(valor_fob_usd, 2),
+        "cambio": arredondar_decimal(cambio, 2),
+        "valor_fob_brl": arredondar_decimal(valor_fob_brl, 2),
+        "total_tributos": arredondar_decimal(total_tributos, 2),
+        "ncm": rng.choice(["8471", "8517", "9022"], n_operacoes),
+        "ict": ict,
+        "classificacao_ict": pd.Categorical.from_codes(codificar_ict(ict), ROTULOS_ICT)
+    })
+    print(f"✅ {len(df_operacoes)} operações simuladas baseadas em empresas REAIS!")
+    return df_operacoes
+
+if __name__ == "__main__":
+    print("🔍 Carregando dados REAIS da Receita Federal...")
+
+    try:
+        df_real = carregar_empresas_rf(CAMINHO_CORRETO, cache=CAMINHO_CACHE)
+        
+        print(f"✅ SUCESSO! {len(df_real)} empresas reais carregadas!")
+        
+        print("\n📊 Estatísticas dos dados REAIS:")
+        print(f"   - Capital social médio: R$ {df_real['capital_social'].mean():,.2f}")
+        print(f"   - Capital social máximo: R$ {df_real['capital_social'].max():,.2f}")
+        print(f"   - Portes de empresa: {df_real['porte_empresa'].value_counts().to_dict()}")
+        
+    except Exception as e:
+        print(f"❌ ERRO: {e}")
+        exit(1)
+
+    # EXECUTA A SIMULAÇÃO COM DADOS REAIS (lote vetorizado)
+    df_operacoes = simular_operacoes_reais_lote(df_real, 1000)
+
+    if not df_operacoes.empty:
+        print(f"\n🎯 RESULTADOS BASEADOS EM DADOS REAIS:")
+        print(f"   📊 ICT Médio: {df_operacoes['ict'].mean():.2f}")
+        print(f"   💰 Carga Tributária Média: R$ {df_operacoes['total_tributos'].mean():,.0f}")
+        print(f"   🚨 Operações Críticas: {len(df_operacoes[df_operacoes['ict'] >= 1.5])}")
+        print(f"   💸 Capital Social Médio das empresas: R$ {df_operacoes['capital_social_real'].mean():,.0f}")
+
+        # Salva resultados
+        df_operacoes.to_csv("./output/operacoes_reais_simuladas.csv", index=False)
+        print(f"\n📁 Resultados salvos em: ./output/operacoes_reais_simuladas.csv")
+
+    else:
+        print("❌ Não foi possível gerar operações.")
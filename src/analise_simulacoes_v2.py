@@ -11,8 +11,13 @@ matplotlib.use('Agg')
 import matplotlib.pyplot as plt
 import numpy as np
 import os
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 
+from motor_tributario import MotorTributario, regras_taxas_fixas, arredondar_decimal
+from relatorio_html import Modelo, cabecalho, escrever_relatorio
+
 # ===========================
 # FUNÇÕES CORE
 # ===========================
@@ -22,6 +27,15 @@ def criar_diretorio_saida(config: dict):
     os.makedirs(config['output_dir'], exist_ok=True)
     print(f"📁 Diretório de saída: {config['output_dir']}")
 
+_motores = {}
+
+def motor_taxas_fixas(config: dict) -> MotorTributario:
+    """Motor tributário com as taxas fixas do config (compilado uma vez por config)"""
+    chave = tuple(sorted(config['taxas'].items()))
+    if chave not in _motores:
+        _motores[chave] = MotorTributario(regras_taxas_fixas(config['taxas']))
+    return _motores[chave]
+
 def gerar_importacao(config: dict) -> dict:
     """Gera uma operação de importação simulada compatível com seu config"""
     # Usa faixas do seu config para gerar valores realistas
@@ -37,31 +51,39 @@ def gerar_importacao(config: dict) -> dict:
     # Usa NCMs do seu foco
     ncm = str(np.random.choice(config['ncm_foco']))
     
-    # Cálculos com suas taxas fixas
-    valor_fob_brl = valor_fob_usd * cambio
-    ii_valor = valor_fob_brl * config['taxas']['ii_fixo']
-    ipi_valor = valor_fob_brl * config['taxas']['ipi_fixo']
-    pis_cofins_valor = valor_fob_brl * config['taxas']['pis_cofins_fixo']
-    
     # ICMS varia por estado (simulação)
-    aliquota_icms = np.random.choice([0.12, 0.17, 0.18])
-    icms_valor = valor_fob_brl * aliquota_icms
+    aliquota_icms = np.random.choice(ALIQUOTAS_ICMS_SIMULADAS)
     
-    total_tributos = ii_valor + ipi_valor + pis_cofins_valor + icms_valor
+    # Cálculos com suas taxas fixas (motor tributário canônico)
+    r = motor_taxas_fixas(config).calcular(valor_fob_usd, cambio, aliquota_icms=aliquota_icms)
     
     return {
         "valor_fob_usd": round(valor_fob_usd, 2),
         "cambio": round(cambio, 2),
-        "valor_fob_brl": round(valor_fob_brl, 2),
-        "ii_valor": round(ii_valor, 2),
-        "ipi_valor": round(ipi_valor, 2),
-        "pis_cofins_valor": round(pis_cofins_valor, 2),
-        "icms_valor": round(icms_valor, 2),
-        "total_tributos": round(total_tributos, 2),
+        "valor_fob_brl": round(float(r['valor_brl'][0]), 2),
+        "ii_valor": round(float(r['ii_valor'][0]), 2),
+        "ipi_valor": round(float(r['ipi_valor'][0]), 2),
+        "pis_cofins_valor": round(float(r['pis_cofins_valor'][0]), 2),
+        "icms_valor": round(float(r['icms_devido'][0]), 2),
+        "total_tributos": round(float(r['total_tributos'][0]), 2),
         "ncm": ncm,
         "aliquota_icms": aliquota_icms
     }
 
+# Faixas do ICT (limite inferior de cada categoria, em ordem crescente)
+LIMITES_ICT = [0.5, 1.0, 1.5, 2.0]
+ROTULOS_ICT = ["🔵 Baixo", "🟢 Moderado", "🟡 Alto", "🔴 Crítico", "🚨 ARROMBADO"]
+
+ALIQUOTAS_ICMS_SIMULADAS = [0.12, 0.17, 0.18]
+
+RECOMENDACOES = [
+    "🚨 URGENTE: Drawback + Revisão NCM + Consultoria Jurídica",
+    "🔴 Revisar: Drawback + Otimização ICMS",
+    "🟡 Estudar Drawback - Valor elevado",
+    "🟢 Computadores - Verificar reduções setoriais",
+    "✅ Dentro dos parâmetros",
+]
+
 def calcular_ict(total_tributos: float, valor_fob_brl: float, benchmark: float = 0.20) -> float:
     """Calcula o Índice de Carga Tributária com SEU benchmark"""
     if valor_fob_brl == 0:
@@ -71,16 +93,7 @@ def calcular_ict(total_tributos: float, valor_fob_brl: float, benchmark: float =
 
 def classificar_ict(ict: float) -> str:
     """Classifica o ICT em categorias"""
-    if ict >= 2.0:
-        return "🚨 ARROMBADO"
-    elif ict >= 1.5:
-        return "🔴 Crítico"
-    elif ict >= 1.0:
-        return "🟡 Alto"
-    elif ict >= 0.5:
-        return "🟢 Moderado"
-    else:
-        return "🔵 Baixo"
+    return ROTULOS_ICT[int(np.digitize(ict, LIMITES_ICT))]
 
 def classificar_carga_tributaria(total_tributos: float, faixas: list) -> str:
     """Classifica pela carga tributária total baseado nas suas faixas"""
@@ -103,37 +116,366 @@ def recomendar_estrategia(operacao: dict, config: dict) -> str:
     )
     
     if classificacao_carga == "ARROMBADO" or ict >= 2.0:
-        return "🚨 URGENTE: Drawback + Revisão NCM + Consultoria Jurídica"
+        return RECOMENDACOES[0]
     elif classificacao_carga == "FODA" or ict >= 1.5:
-        return "🔴 Revisar: Drawback + Otimização ICMS"
+        return RECOMENDACOES[1]
     elif valor_fob_usd > 1000000:
-        return "🟡 Estudar Drawback - Valor elevado"
+        return RECOMENDACOES[2]
     elif "8471" in operacao.get('ncm', ''):
-        return "🟢 Computadores - Verificar reduções setoriais"
+        return RECOMENDACOES[3]
+    else:
+        return RECOMENDACOES[4]
+
+# ===========================
+# MOTOR VETORIZADO
+# ===========================
+
+CAMPOS_OPERACAO = [
+    "valor_fob_usd", "cambio", "valor_fob_brl", "ii_valor", "ipi_valor",
+    "pis_cofins_valor", "icms_valor", "total_tributos", "ncm", "aliquota_icms",
+    "ict", "classificacao_ict", "classificacao_carga", "recomendacao"
+]
+
+class LoteSimulacao:
+    """
+    Lote de operações simuladas em formato colunar (um array por campo).
+
+    Campos categóricos (ncm e classificações) ficam como códigos inteiros em
+    `colunas` e os textos em `rotulos` — os dicts por operação só são criados
+    quando alguém chama materializar().
+    """
+
+    def __init__(self, colunas: dict, rotulos: dict):
+        self.colunas = colunas
+        self.rotulos = rotulos
+
+    def __len__(self):
+        return len(self.colunas['total_tributos'])
+
+    def coluna_texto(self, campo: str) -> np.ndarray:
+        """Coluna categórica decodificada (array de strings)"""
+        return np.asarray(self.rotulos[campo], dtype=object)[self.colunas[campo]]
+
+    def materializar(self, inicio: int = 0, fim: int = None) -> list:
+        """Converte as operações [inicio, fim) em dicts, como gerar_importacao"""
+        fatia = slice(inicio, fim)
+        valores = []
+        for campo in CAMPOS_OPERACAO:
+            if campo in self.rotulos:
+                valores.append(self.coluna_texto(campo)[fatia].tolist())
+            else:
+                valores.append(self.colunas[campo][fatia].tolist())
+        return [dict(zip(CAMPOS_OPERACAO, linha)) for linha in zip(*valores)]
+
+def codificar_ict(ict: np.ndarray) -> np.ndarray:
+    """classificar_ict vetorizado: índice em ROTULOS_ICT"""
+    return np.digitize(ict, LIMITES_ICT).astype(np.int8)
+
+def codificar_carga_tributaria(total_tributos: np.ndarray, faixas: list) -> np.ndarray:
+    """classificar_carga_tributaria vetorizado: índice da faixa (len(faixas) = INDEFINIDO)"""
+    condicoes = []
+    for min_val, max_val, _ in faixas:
+        if max_val is None:
+            condicoes.append(total_tributos >= min_val)
+        else:
+            condicoes.append((min_val <= total_tributos) & (total_tributos < max_val))
+    return np.select(condicoes, np.arange(len(faixas)), default=len(faixas)).astype(np.int8)
+
+def rotulos_carga(faixas: list) -> list:
+    return [classificacao for _, _, classificacao in faixas] + ["INDEFINIDO"]
+
+def codificar_recomendacao(ict, valor_fob_usd, codigo_carga, ncm_8471, faixas) -> np.ndarray:
+    """recomendar_estrategia vetorizado: índice em RECOMENDACOES"""
+    rotulos = rotulos_carga(faixas)
+    def eh(classificacao):
+        return np.isin(codigo_carga, [i for i, r in enumerate(rotulos) if r == classificacao])
+    condicoes = [
+        eh("ARROMBADO") | (ict >= 2.0),
+        eh("FODA") | (ict >= 1.5),
+        valor_fob_usd > 1000000,
+        ncm_8471,
+    ]
+    return np.select(condicoes, np.arange(4), default=4).astype(np.int8)
+
+def simular_lote(n: int, config: dict, rng: np.random.Generator = None,
+                 seed: int = None, amostrador=None) -> LoteSimulacao:
+    """
+    Simula n operações de uma vez, com os mesmos passos de gerar_importacao
+    + calcular_ict + classificações + recomendar_estrategia, em arrays.
+
+    Os sorteios vêm de `rng` (ou de np.random.default_rng(seed)), então o
+    resultado é reprodutível para uma mesma semente. Com um
+    amostragem.Amostrador (Sobol/Halton/antitéticas), cada operação é um
+    ponto de 5 dimensões da sequência.
+    """
+    if rng is None:
+        rng = np.random.default_rng(seed)
+    faixas = config['faixas_valor_fob']
+    ncm_foco = [str(ncm) for ncm in config['ncm_foco']]
+    minimos = np.array([f[0] for f in faixas[:-1]], dtype=float)
+    maximos = np.array([f[1] for f in faixas[:-1]], dtype=float)
+
+    # Sorteios (a última faixa, sem teto, fica de fora como em gerar_importacao)
+    if amostrador is None:
+        indice_faixa = rng.integers(0, len(faixas) - 1, n)
+        valor_fob_usd = rng.uniform(minimos[indice_faixa], maximos[indice_faixa])
+        cambio = rng.uniform(4.5, 6.5, n)
+        codigo_ncm = rng.integers(0, len(ncm_foco), n).astype(np.int16)
+        aliquota_icms = rng.choice(ALIQUOTAS_ICMS_SIMULADAS, n)
     else:
-        return "✅ Dentro dos parâmetros"
+        u = amostrador.uniformes(n, 5)
+        indice_faixa = (u[:, 0] * (len(faixas) - 1)).astype(np.int64)
+        valor_fob_usd = minimos[indice_faixa] + u[:, 1] * (maximos[indice_faixa] - minimos[indice_faixa])
+        cambio = 4.5 + 2.0 * u[:, 2]
+        codigo_ncm = (u[:, 3] * len(ncm_foco)).astype(np.int16)
+        aliquota_icms = np.asarray(ALIQUOTAS_ICMS_SIMULADAS)[(u[:, 4] * len(ALIQUOTAS_ICMS_SIMULADAS)).astype(np.int64)]
+
+    # Tributos (motor canônico) e arredondamento como em gerar_importacao
+    r = motor_taxas_fixas(config).calcular(valor_fob_usd, cambio, aliquota_icms=aliquota_icms)
+    colunas = {
+        "valor_fob_usd": arredondar_decimal(valor_fob_usd, 2),
+        "cambio": arredondar_decimal(cambio, 2),
+        "valor_fob_brl": arredondar_decimal(r['valor_brl'], 2),
+        "ii_valor": arredondar_decimal(r['ii_valor'], 2),
+        "ipi_valor": arredondar_decimal(r['ipi_valor'], 2),
+        "pis_cofins_valor": arredondar_decimal(r['pis_cofins_valor'], 2),
+        "icms_valor": arredondar_decimal(r['icms_devido'], 2),
+        "total_tributos": arredondar_decimal(r['total_tributos'], 2),
+        "ncm": codigo_ncm,
+        "aliquota_icms": aliquota_icms,
+    }
+    del r
+
+    # ICT e classificações
+    brl = colunas['valor_fob_brl']
+    with np.errstate(divide='ignore', invalid='ignore'):
+        carga = np.where(brl == 0, 0.0, colunas['total_tributos'] / brl)
+    colunas['ict'] = arredondar_decimal(carga / config['benchmark_ict'], 3)
+    colunas['classificacao_ict'] = codificar_ict(colunas['ict'])
+    colunas['classificacao_carga'] = codificar_carga_tributaria(colunas['total_tributos'], faixas)
+    ncm_8471 = np.array(["8471" in ncm for ncm in ncm_foco])[codigo_ncm]
+    colunas['recomendacao'] = codificar_recomendacao(
+        colunas['ict'], colunas['valor_fob_usd'], colunas['classificacao_carga'], ncm_8471, faixas
+    )
+
+    rotulos = {
+        'ncm': ncm_foco,
+        'classificacao_ict': ROTULOS_ICT,
+        'classificacao_carga': rotulos_carga(faixas),
+        'recomendacao': RECOMENDACOES,
+    }
+    return LoteSimulacao(colunas, rotulos)
+
+# ===========================
+# SIMULAÇÃO EM STREAMING
+# ===========================
+
+def limites_histograma(config: dict, bins: int = 50) -> np.ndarray:
+    """
+    Bordas fixas do histograma de tributos: de 0 ao maior total possível
+    no gerador (maior FOB x maior câmbio x soma das maiores alíquotas).
+    Bordas fixas permitem acumular e somar histogramas de vários lotes.
+    """
+    taxas = config['taxas']
+    maior_fob = max(f[1] for f in config['faixas_valor_fob'][:-1])
+    maior_carga = (taxas['ii_fixo'] + taxas['ipi_fixo'] + taxas['pis_cofins_fixo']
+                   + max(ALIQUOTAS_ICMS_SIMULADAS))
+    return np.linspace(0.0, maior_fob * 6.5 * maior_carga, bins + 1)
+
+class AgregadorSimulacao:
+    """
+    Estatísticas da simulação acumuladas lote a lote, em memória constante:
+    contagens por classificação, somas para as médias e histograma de tributos.
+    """
+
+    def __init__(self, config: dict, bins: int = 50):
+        self.rotulos_carga = rotulos_carga(config['faixas_valor_fob'])
+        self.limites_histograma = limites_histograma(config, bins)
+        self.n = 0
+        self.soma_tributos = 0.0
+        self.soma_ict = 0.0
+        self.contagens_carga = np.zeros(len(self.rotulos_carga), dtype=np.int64)
+        self.contagens_ict = np.zeros(len(ROTULOS_ICT), dtype=np.int64)
+        self.histograma = np.zeros(bins, dtype=np.int64)
+
+    def atualizar(self, lote: LoteSimulacao):
+        self._acumular(
+            lote.colunas['total_tributos'], lote.colunas['ict'],
+            lote.colunas['classificacao_carga'], lote.colunas['classificacao_ict']
+        )
+
+    def _acumular(self, tributos, ict, codigo_carga, codigo_ict):
+        self.n += len(tributos)
+        self.soma_tributos += float(tributos.sum())
+        self.soma_ict += float(ict.sum())
+        self.contagens_carga += np.bincount(codigo_carga, minlength=len(self.contagens_carga))
+        self.contagens_ict += np.bincount(codigo_ict, minlength=len(self.contagens_ict))
+        # Valores fora do intervalo caem no primeiro/último bin
+        inicio, fim = self.limites_histograma[0], self.limites_histograma[-1]
+        bins = len(self.histograma)
+        indice = ((tributos - inicio) * (bins / (fim - inicio))).astype(np.int64)
+        np.clip(indice, 0, bins - 1, out=indice)
+        self.histograma += np.bincount(indice, minlength=bins)
+
+    def combinar(self, outro: "AgregadorSimulacao"):
+        """Soma as estatísticas de outro agregador (mesmo config) a este"""
+        self.n += outro.n
+        self.soma_tributos += outro.soma_tributos
+        self.soma_ict += outro.soma_ict
+        self.contagens_carga += outro.contagens_carga
+        self.contagens_ict += outro.contagens_ict
+        self.histograma += outro.histograma
+        return self
+
+    @classmethod
+    def de_operacoes(cls, importacoes: list, config: dict, bins: int = 50):
+        """Agregador a partir de uma lista de dicts (saída de foder_sistema_com_simulacoes)"""
+        agregado = cls(config, bins)
+        if importacoes:
+            agregado._acumular(
+                np.array([op['total_tributos'] for op in importacoes], dtype=float),
+                np.array([op['ict'] for op in importacoes], dtype=float),
+                np.array([agregado.rotulos_carga.index(op['classificacao_carga']) for op in importacoes]),
+                np.array([ROTULOS_ICT.index(op['classificacao_ict']) for op in importacoes]),
+            )
+        return agregado
+
+    @property
+    def media_tributos(self) -> float:
+        return self.soma_tributos / self.n if self.n else 0.0
+
+    @property
+    def media_ict(self) -> float:
+        return self.soma_ict / self.n if self.n else 0.0
+
+    def contagem_carga(self, classificacao: str) -> int:
+        return int(self.contagens_carga[self.rotulos_carga.index(classificacao)])
+
+    def contagem_ict(self, classificacao: str) -> int:
+        return int(self.contagens_ict[ROTULOS_ICT.index(classificacao)])
+
+class EscritorOperacoes:
+    """
+    Grava lotes de operações incrementalmente em CSV ou Parquet
+    (formato pela extensão do arquivo). Parquet requer o pacote pyarrow.
+    """
+
+    def __init__(self, caminho: str):
+        self.caminho = caminho
+        self.parquet = caminho.endswith('.parquet')
+        self._arquivo = None
+        self._writer = None
+
+    def escrever(self, lote: LoteSimulacao):
+        df = pd.DataFrame({
+            campo: (pd.Categorical.from_codes(lote.colunas[campo], lote.rotulos[campo])
+                    if campo in lote.rotulos else lote.colunas[campo])
+            for campo in CAMPOS_OPERACAO
+        })
+        if self.parquet:
+            try:
+                import pyarrow as pa
+                import pyarrow.parquet as pq
+            except ImportError:
+                raise ImportError("Saída Parquet requer o pacote pyarrow (pip install pyarrow)")
+            tabela = pa.Table.from_pandas(df, preserve_index=False)
+            if self._writer is None:
+                self._writer = pq.ParquetWriter(self.caminho, tabela.schema)
+            self._writer.write_table(tabela)
+        else:
+            if self._arquivo is None:
+                self._arquivo = open(self.caminho, 'w', newline='', encoding='utf-8')
+                df.to_csv(self._arquivo, index=False)
+            else:
+                df.to_csv(self._arquivo, index=False, header=False)
+
+    def fechar(self):
+        if self._writer is not None:
+            self._writer.close()
+        if self._arquivo is not None:
+            self._arquivo.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fechar()
+
+def simular_em_streaming(n: int, config: dict, caminho_saida: str = None,
+                         tamanho_chunk: int = 100_000, seed: int = None,
+                         rng: np.random.Generator = None, amostrador=None) -> AgregadorSimulacao:
+    """
+    Simula n operações em lotes de `tamanho_chunk`, gravando cada lote no
+    arquivo de saída (CSV/Parquet, opcional) e atualizando o agregador.
+
+    A memória fica limitada ao tamanho do lote, qualquer que seja n.
+    """
+    if rng is None:
+        rng = np.random.default_rng(seed)
+    agregado = AgregadorSimulacao(config)
+    escritor = EscritorOperacoes(caminho_saida) if caminho_saida else None
+    try:
+        restante = n
+        while restante > 0:
+            lote = simular_lote(min(tamanho_chunk, restante), config, rng=rng, amostrador=amostrador)
+            agregado.atualizar(lote)
+            if escritor is not None:
+                escritor.escrever(lote)
+            restante -= len(lote)
+    finally:
+        if escritor is not None:
+            escritor.fechar()
+    return agregado
+
+# ===========================
+# SIMULAÇÃO PARALELA
+# ===========================
+
+def _simular_fatia(n, config, semente, tamanho_chunk, caminho_saida):
+    """Executado em cada processo: uma fatia da simulação com sua própria semente"""
+    rng = np.random.default_rng(semente)
+    return simular_em_streaming(n, config, caminho_saida, tamanho_chunk=tamanho_chunk, rng=rng)
+
+def caminho_parte(caminho: str, indice: int) -> str:
+    """'saida.csv' -> 'saida.parte03.csv'"""
+    base, extensao = os.path.splitext(caminho)
+    return f"{base}.parte{indice:02d}{extensao}"
+
+def simular_em_paralelo(n: int, config: dict, workers: int = None, seed=None,
+                        tamanho_chunk: int = 100_000,
+                        caminho_saida: str = None) -> AgregadorSimulacao:
+    """
+    Divide n simulações entre `workers` processos e combina os agregados.
+
+    Cada processo recebe um fluxo independente de SeedSequence(seed).spawn(),
+    e os agregados são somados sempre na ordem dos processos: para a mesma
+    semente e o mesmo número de workers o resultado é idêntico bit a bit.
+    Com caminho_saida, cada processo grava seu próprio arquivo (caminho_parte).
+    """
+    workers = workers or os.cpu_count() or 1
+    sementes = np.random.SeedSequence(seed).spawn(workers)
+    tamanhos = [n // workers + (1 if i < n % workers else 0) for i in range(workers)]
+    partes = [caminho_parte(caminho_saida, i) if caminho_saida else None for i in range(workers)]
+    argumentos = (tamanhos, [config] * workers, sementes, [tamanho_chunk] * workers, partes)
+
+    if workers == 1:
+        parciais = list(map(_simular_fatia, *argumentos))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            parciais = list(executor.map(_simular_fatia, *argumentos))
+
+    agregado = AgregadorSimulacao(config)
+    for parcial in parciais:
+        agregado.combinar(parcial)
+    return agregado
 
 # ===========================
 # FUNÇÕES PRINCIPAIS
 # ===========================
 
-def foder_sistema_com_simulacoes(n: int, config: dict) -> list:
+def foder_sistema_com_simulacoes(n: int, config: dict, seed: int = None) -> list:
     print(f"💥 Iniciando {n} simulações do Tributec...")
-    importacoes = []
-    for i in range(n):
-        op = gerar_importacao(config)
-        op['ict'] = calcular_ict(
-            op['total_tributos'],
-            op['valor_fob_brl'],
-            config['benchmark_ict']
-        )
-        op['classificacao_ict'] = classificar_ict(op['ict'])
-        op['classificacao_carga'] = classificar_carga_tributaria(
-            op['total_tributos'], 
-            config['faixas_valor_fob']
-        )
-        op['recomendacao'] = recomendar_estrategia(op, config)
-        importacoes.append(op)
+    importacoes = simular_lote(n, config, seed=seed).materializar()
     print(f"✅ {len(importacoes)} operações simuladas com sucesso!")
     return importacoes
 
@@ -160,7 +502,16 @@ def plotar_distribuicao(importacoes: list, caminho: str, faixas: list):
     
     # Histograma
     plt.hist(tributos, bins=50, alpha=0.7, color='#1f77b4', edgecolor='black')
-    
+    _finalizar_grafico_faixas(caminho, faixas)
+
+def plotar_distribuicao_agregada(agregado, caminho: str, faixas: list):
+    """Mesmo gráfico de plotar_distribuicao, a partir do histograma já acumulado"""
+    plt.figure(figsize=(12, 7))
+    plt.stairs(agregado.histograma, agregado.limites_histograma, fill=True,
+               alpha=0.7, color='#1f77b4', edgecolor='black')
+    _finalizar_grafico_faixas(caminho, faixas)
+
+def _finalizar_grafico_faixas(caminho: str, faixas: list):
     # Linhas das faixas do seu config
     cores = ['green', 'orange', 'red', 'purple']
     for i, (min_val, max_val, label) in enumerate(faixas):
@@ -181,84 +532,89 @@ def plotar_distribuicao(importacoes: list, caminho: str, faixas: list):
     plt.close()
     print(f"🖼️ Gráfico salvo: {caminho}")
 
-def gerar_relatorio_html(importacoes: list, config: dict, caminho: str):
-    tributos = [op['total_tributos'] for op in importacoes]
-    icts = [op['ict'] for op in importacoes]
-    
-    media_tributos = sum(tributos) / len(tributos)
-    media_ict = sum(icts) / len(icts)
-    
-    # Contagens baseadas nas SUAS faixas
-    leve = len([op for op in importacoes if op['classificacao_carga'] == 'LEVE'])
-    medio = len([op for op in importacoes if op['classificacao_carga'] == 'MÉDIO'])
-    foda = len([op for op in importacoes if op['classificacao_carga'] == 'FODA'])
-    arrombado = len([op for op in importacoes if op['classificacao_carga'] == 'ARROMBADO'])
-    
-    criticos_ict = len([op for op in importacoes if op['classificacao_ict'] in ['🚨 ARROMBADO', '🔴 Crítico']])
-
-    html = f"""
-    <!DOCTYPE html>
-    <html>
-    <head>
-        <meta charset="utf-8">
-        <title>Relatório Tributec — {datetime.now():%Y-%m-%d}</title>
-        <style>
-            body {{ font-family: 'Segoe UI', sans-serif; max-width: 1000px; margin: 20px auto; }}
-            .card {{ background: #f8f9fa; padding: 15px; border-radius: 8px; margin: 10px 0; }}
-            .alerta {{ color: #d9534f; font-weight: bold; }}
-            .critico {{ color: #ff6b35; font-weight: bold; }}
-            .ok {{ color: #5cb85c; font-weight: bold; }}
-            .grid {{ display: grid; grid-template-columns: 1fr 1fr; gap: 15px; }}
-        </style>
-    </head>
-    <body>
-        <h1>🎯 Relatório Tributec — Config Personalizada</h1>
-        <p><em>Gerado em {datetime.now():%d/%m/%Y às %H:%M}</em></p>
-
-        <div class="grid">
-            <div class="card">
-                <h2>📊 Resumo por Carga</h2>
-                <p><strong>LEVE:</strong> <span class="ok">{leve} ({leve/len(importacoes)*100:.1f}%)</span></p>
-                <p><strong>MÉDIO:</strong> <span>{medio} ({medio/len(importacoes)*100:.1f}%)</span></p>
-                <p><strong>FODA:</strong> <span class="critico">{foda} ({foda/len(importacoes)*100:.1f}%)</span></p>
-                <p><strong>ARROMBADO:</strong> <span class="alerta">{arrombado} ({arrombado/len(importacoes)*100:.1f}%)</span></p>
-            </div>
-
-            <div class="card">
-                <h2>📈 Métricas ICT</h2>
-                <p><strong>ICT Médio:</strong> {media_ict:.2f}</p>
-                <p><strong>Benchmark:</strong> {config['benchmark_ict']}</p>
-                <p><strong>Críticos/Arrombados:</strong> <span class="alerta">{criticos_ict}</span></p>
-                <p><strong>Carga Média:</strong> R$ {media_tributos:,.0f}</p>
-            </div>
-        </div>
+# 📄 Modelo do relatório HTML (compilado uma vez, ver relatorio_html.py)
+CSS_SIMULACOES = """        body { font-family: 'Segoe UI', sans-serif; max-width: 1000px; margin: 20px auto; }
+        .card { background: #f8f9fa; padding: 15px; border-radius: 8px; margin: 10px 0; }
+        .alerta { color: #d9534f; font-weight: bold; }
+        .critico { color: #ff6b35; font-weight: bold; }
+        .ok { color: #5cb85c; font-weight: bold; }
+        .grid { display: grid; grid-template-columns: 1fr 1fr; gap: 15px; }
+"""
 
-        <div class="card">
-            <h2>📊 Gráfico - Suas Faixas</h2>
-            <img src="distribuicao_tributos.png" width="100%">
-        </div>
+RELATORIO_AGREGADO = Modelo("""    <h1>🎯 Relatório Tributec — Config Personalizada</h1>
+    <p><em>Gerado em {gerado_em}</em></p>
 
+    <div class="grid">
         <div class="card">
-            <h2>🔍 NCMs em Foco</h2>
-            <p><strong>Setores analisados:</strong> {', '.join(config['ncm_foco'])}</p>
-            <p><strong>Taxas aplicadas:</strong> II {config['taxas']['ii_fixo']*100}%, IPI {config['taxas']['ipi_fixo']*100}%, PIS/COFINS {config['taxas']['pis_cofins_fixo']*100}%</p>
+            <h2>📊 Resumo por Carga</h2>
+            <p><strong>LEVE:</strong> <span class="ok">{leve} ({pct_leve:.1f}%)</span></p>
+            <p><strong>MÉDIO:</strong> <span>{medio} ({pct_medio:.1f}%)</span></p>
+            <p><strong>FODA:</strong> <span class="critico">{foda} ({pct_foda:.1f}%)</span></p>
+            <p><strong>ARROMBADO:</strong> <span class="alerta">{arrombado} ({pct_arrombado:.1f}%)</span></p>
         </div>
 
         <div class="card">
-            <h2>🎯 Recomendações Estratégicas</h2>
-            <p>Operações <span class="alerta">ARROMBADAS</span>: Prioridade máxima para drawback e revisão jurídica</p>
-            <p>Setor <strong>{config['ncm_foco'][0]}</strong>: Verificar incentivos fiscais setoriais</p>
-            <p>Potencial de economia: <strong>R$ {(arrombado * 250000 + foda * 80000):,.0f}</strong></p>
+            <h2>📈 Métricas ICT</h2>
+            <p><strong>ICT Médio:</strong> {media_ict:.2f}</p>
+            <p><strong>Benchmark:</strong> {benchmark}</p>
+            <p><strong>Críticos/Arrombados:</strong> <span class="alerta">{criticos_ict}</span></p>
+            <p><strong>Carga Média:</strong> R$ {media_tributos:,.0f}</p>
         </div>
+    </div>
 
-        <footer style="text-align: center; margin-top: 30px; color: #666;">
-            <p>Tributec v2.0 — Config personalizada — "Sistema fodido com sucesso!"</p>
-        </footer>
-    </body>
-    </html>
-    """
-    with open(caminho, 'w', encoding='utf-8') as f:
-        f.write(html)
+    <div class="card">
+        <h2>📊 Gráfico - Suas Faixas</h2>
+        <img src="distribuicao_tributos.png" width="100%">
+    </div>
+
+    <div class="card">
+        <h2>🔍 NCMs em Foco</h2>
+        <p><strong>Setores analisados:</strong> {ncms}</p>
+        <p><strong>Taxas aplicadas:</strong> II {ii}%, IPI {ipi}%, PIS/COFINS {pis_cofins}%</p>
+    </div>
+
+    <div class="card">
+        <h2>🎯 Recomendações Estratégicas</h2>
+        <p>Operações <span class="alerta">ARROMBADAS</span>: Prioridade máxima para drawback e revisão jurídica</p>
+        <p>Setor <strong>{ncm_principal}</strong>: Verificar incentivos fiscais setoriais</p>
+        <p>Potencial de economia: <strong>R$ {potencial:,.0f}</strong></p>
+    </div>
+
+    <footer style="text-align: center; margin-top: 30px; color: #666;">
+        <p>Tributec v2.0 — Config personalizada — "Sistema fodido com sucesso!"</p>
+    </footer>
+""")
+
+def gerar_relatorio_html(importacoes: list, config: dict, caminho: str):
+    agregado = AgregadorSimulacao.de_operacoes(importacoes, config)
+    gerar_relatorio_html_agregado(agregado, config, caminho)
+
+def gerar_relatorio_html_agregado(agregado, config: dict, caminho: str):
+    """Relatório HTML a partir das contagens e somas acumuladas (AgregadorSimulacao)"""
+    total = agregado.n
+    media_tributos = agregado.media_tributos
+    media_ict = agregado.media_ict
+    
+    # Contagens baseadas nas SUAS faixas
+    leve = agregado.contagem_carga('LEVE')
+    medio = agregado.contagem_carga('MÉDIO')
+    foda = agregado.contagem_carga('FODA')
+    arrombado = agregado.contagem_carga('ARROMBADO')
+    
+    criticos_ict = agregado.contagem_ict('🚨 ARROMBADO') + agregado.contagem_ict('🔴 Crítico')
+
+    inicio = cabecalho(f"Relatório Tributec — {datetime.now():%Y-%m-%d}", CSS_SIMULACOES)
+    pct = lambda n: n / total * 100
+    taxas = config['taxas']
+    corpo = RELATORIO_AGREGADO(
+        gerado_em=f"{datetime.now():%d/%m/%Y às %H:%M}",
+        leve=leve, medio=medio, foda=foda, arrombado=arrombado,
+        pct_leve=pct(leve), pct_medio=pct(medio), pct_foda=pct(foda), pct_arrombado=pct(arrombado),
+        media_ict=media_ict, benchmark=config['benchmark_ict'], criticos_ict=criticos_ict,
+        media_tributos=media_tributos, ncms=', '.join(config['ncm_foco']), ncm_principal=config['ncm_foco'][0],
+        ii=taxas['ii_fixo'] * 100, ipi=taxas['ipi_fixo'] * 100, pis_cofins=taxas['pis_cofins_fixo'] * 100,
+        potencial=arrombado * 250000 + foda * 80000)
+    escrever_relatorio(caminho, inicio + corpo, (), "</body>\n</html>\n")
     print(f"📄 Relatório HTML gerado: {caminho}")
 
 # ===========================
@@ -279,17 +635,33 @@ if __name__ == "__main__":
     # Prepara saída
     criar_diretorio_saida(config)
 
-    # Simula
-    importacoes = foder_sistema_com_simulacoes(config['simulacoes'], config)
-
     # Gera artefatos
     csv_path = f"{config['output_dir']}simulacoes_com_ict.csv"
     png_path = f"{config['output_dir']}distribuicao_tributos.png"
     html_path = f"{config['output_dir']}relatorio.html"
 
-    salvar_csv(importacoes, csv_path)
-    plotar_distribuicao(importacoes, png_path, config['faixas_valor_fob'])
-    gerar_relatorio_html(importacoes, config, html_path)
+    # Simula em lotes: o CSV é gravado aos poucos e só as estatísticas ficam em memória
+    workers = config.get('workers', 1)
+    print(f"💥 Iniciando {config['simulacoes']} simulações do Tributec (streaming, {workers} processo(s))...")
+    if workers > 1:
+        agregado = simular_em_paralelo(
+            config['simulacoes'], config, workers=workers,
+            seed=config.get('seed'),
+            tamanho_chunk=config.get('tamanho_chunk', 100_000),
+            caminho_saida=csv_path
+        )
+        csv_path = f"{caminho_parte(csv_path, 0)} ... {caminho_parte(csv_path, workers - 1)}"
+    else:
+        agregado = simular_em_streaming(
+            config['simulacoes'], config, csv_path,
+            tamanho_chunk=config.get('tamanho_chunk', 100_000),
+            seed=config.get('seed')
+        )
+    print(f"✅ {agregado.n} operações simuladas com sucesso!")
+    print(f"📁 CSV salvo: {csv_path}")
+
+    plotar_distribuicao_agregada(agregado, png_path, config['faixas_valor_fob'])
+    gerar_relatorio_html_agregado(agregado, config, html_path)
 
     print("\n🎯 TRIBUTEC v2.0 — EXECUTADO COM SUA CONFIG!")
     print(f"📊 {config['simulacoes']} simulações com benchmark ICT {config['benchmark_ict']}")
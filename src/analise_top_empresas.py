@@ -1,179 +1,116 @@
 # arquivo: analise_top_empresas.py
+"""
+Motor de cenários de otimização tributária para as empresas com maior potencial.
+
+Cada cenário é declarativo: a economia é uma combinação linear de colunas
+das operações (ex.: 1% do valor FOB em R$ no drawback, 30% da carga total).
+Todos os cenários são avaliados para todas as empresas de uma vez, como uma
+matriz empresas x cenários (uma multiplicação de matrizes), e o top N sai
+de np.argpartition — serve para ranquear milhões de empresas, não só cinco.
+"""
+import sys
+
+import numpy as np
 import pandas as pd
 import matplotlib
 matplotlib.use('Agg')
 import matplotlib.pyplot as plt
 from datetime import datetime
 
-# DEFINIÇÃO DA FUNÇÃO NO TOPO
-def calcular_ict(total_tributos, valor_fob_brl, benchmark=0.35):
-    if valor_fob_brl == 0:
-        return 0.0
-    return round((total_tributos / valor_fob_brl) / benchmark, 3)
-
-print("🎯 ANALISANDO TOP 5 EMPRESAS COM MAIOR POTENCIAL...")
-
-# Carrega os dados
-df_operacoes = pd.read_csv('./output/operacoes_reais_simuladas.csv')
-
-# Seleciona as top 5 por capital social
-top_5 = df_operacoes.nlargest(5, 'capital_social_real')
-
-print(f"📊 TOP 5 EMPRESAS IDENTIFICADAS:")
-for i, (_, emp) in enumerate(top_5.iterrows(), 1):
-    print(f"   {i}. {emp['razao_social']} - R$ {emp['capital_social_real']:,.0f}")
-
-# Análise detalhada das top 5
-analise_detalhada = []
-
-for _, empresa in top_5.iterrows():
-    # Simula cenários de otimização
-    carga_atual = empresa['total_tributos']
-    
-    # Cenário 1: Drawback (reduz II em 50%)
-    ii_otimizado = empresa['valor_fob_brl'] * 0.01  # II de 2% para 1%
-    carga_drawback = carga_atual - (empresa['valor_fob_brl'] * 0.01)
-    
-    # Cenário 2: Benefício ICMS (reduz ICMS em 30%)
-    icms_otimizado = empresa['valor_fob_brl'] * 0.119  # ICMS médio de 17% para 11.9%
-    carga_icms = carga_atual - (empresa['valor_fob_brl'] * 0.051)
-    
-    # Cenário 3: Otimização completa
-    carga_otimizada = carga_atual * 0.7  # Redução de 30%
-    
-    analise = {
-        'razao_social': empresa['razao_social'],
-        'cnpj_basico': empresa['cnpj_basico'],
-        'capital_social': empresa['capital_social_real'],
-        'porte': empresa['porte_empresa'],
-        'valor_fob_usd': empresa['valor_fob_usd'],
-        'valor_fob_brl': empresa['valor_fob_brl'],
-        'carga_atual': carga_atual,
-        'ict_atual': empresa['ict'],
-        # Cenários de otimização
-        'economia_drawback': carga_atual - carga_drawback,
-        'economia_icms': carga_atual - carga_icms,
-        'economia_total': carga_atual - carga_otimizada,
-        'carga_otimizada': carga_otimizada,
-        'ict_otimizado': calcular_ict(carga_otimizada, empresa['valor_fob_brl'], 0.35)
-    }
-    analise_detalhada.append(analise)
-
-# Cria DataFrame da análise
-df_analise = pd.DataFrame(analise_detalhada)
-
-# Gera relatório específico
-html_content = f"""
-<!DOCTYPE html>
-<html>
-<head>
-    <meta charset="utf-8">
-    <title>Análise Estratégica - Top 5 Empresas</title>
-    <style>
-        body {{ 
-            font-family: 'Segoe UI', Arial, sans-serif; 
-            max-width: 1200px; 
-            margin: 0 auto; 
-            padding: 20px;
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            color: #333;
-        }}
-        .container {{
-            background: white;
-            border-radius: 15px;
-            padding: 30px;
-            box-shadow: 0 10px 30px rgba(0,0,0,0.2);
-        }}
-        .header {{
-            text-align: center;
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            color: white;
-            padding: 20px;
-            border-radius: 10px;
-            margin-bottom: 30px;
-        }}
-        .empresa-card {{
+from motor_tributario import arredondar_decimal
+from relatorio_html import (CSS_BASE, LINHAS_POR_PAGINA, Bruto, Modelo, cabecalho,
+                            escrever_relatorio, registros)
+
+# 🎯 CENÁRIOS: economia = Σ coluna × coeficiente (limitada à carga atual)
+CENARIOS_PADRAO = [
+    # Drawback: II de 2% para 1% do valor FOB
+    {'nome': 'drawback', 'rotulo': 'Drawback (II)', 'coeficientes': {'valor_fob_brl': 0.01}},
+    # Benefício ICMS: ICMS médio de 17% para 11,9% do valor FOB
+    {'nome': 'icms', 'rotulo': 'Benefício ICMS', 'coeficientes': {'valor_fob_brl': 0.051}},
+    # Otimização completa: redução de 30% da carga
+    {'nome': 'total', 'rotulo': 'Otimização Total', 'coeficientes': {'total_tributos': 0.30}},
+]
+CENARIO_OTIMIZADO = 'total'  # cenário que define carga e ICT otimizados
+BENCHMARK_ICT = 0.35
+
+# 📄 MODELOS DO RELATÓRIO HTML (compilados uma vez, ver relatorio_html.py)
+CSS_TOP_EMPRESAS = CSS_BASE + """        .empresa-card {
             background: #f8f9fa;
             padding: 20px;
             border-radius: 10px;
             margin: 15px 0;
             border-left: 5px solid #3498db;
             box-shadow: 0 4px 6px rgba(0,0,0,0.1);
-        }}
-        .metric-grid {{
+        }
+        .metric-grid {
             display: grid;
             grid-template-columns: repeat(auto-fit, minmax(200px, 1fr));
             gap: 15px;
             margin: 15px 0;
-        }}
-        .metric {{
+        }
+        .metric {
             background: white;
             padding: 15px;
             border-radius: 8px;
             text-align: center;
             box-shadow: 0 2px 4px rgba(0,0,0,0.1);
-        }}
-        .metric-value {{
+        }
+        .metric-value {
             font-size: 1.8em;
             font-weight: bold;
             color: #2c3e50;
-        }}
-        .metric-label {{
+        }
+        .metric-label {
             font-size: 0.9em;
             color: #7f8c8d;
-        }}
-        .economia {{
+        }
+        .economia {
             background: #d4edda;
             border-left: 5px solid #28a745;
-        }}
-        .recomendacao {{
+        }
+        .recomendacao {
             background: #e8f4fd;
             padding: 15px;
             border-radius: 8px;
             margin: 10px 0;
-        }}
-        .destaque {{
-            background: linear-gradient(135deg, #ffd89b 0%, #19547b 100%);
-            color: white;
-            padding: 15px;
-            border-radius: 10px;
-            text-align: center;
-            margin: 20px 0;
-        }}
-    </style>
-</head>
-<body>
-    <div class="container">
+        }
+"""
+
+INICIO_TOP = Modelo("""    <div class="container">
         <div class="header">
-            <h1>🎯 ANÁLISE ESTRATÉGICA - TOP 5 EMPRESAS</h1>
+            <h1>🎯 ANÁLISE ESTRATÉGICA - TOP {n} EMPRESAS</h1>
             <p>Foco em otimização tributária para empresas de alto potencial</p>
-            <p><em>Gerado em {datetime.now().strftime('%d/%m/%Y às %H:%M')}</em></p>
+            <p><em>Gerado em {gerado_em}</em></p>
         </div>
 
         <div class="destaque">
             <h2>💰 POTENCIAL DE ECONOMIA IDENTIFICADO</h2>
-            <p>Análise de cenários de otimização para as 5 empresas com maior capital social</p>
+            <p>Análise de cenários de otimização para as {n} empresas com {criterio}</p>
         </div>
-"""
+""")
+
+CARTAO_CENARIO = Modelo("""                    <div class="metric economia">
+                        <div class="metric-value">R$ {valor:,.0f}</div>
+                        <div class="metric-label">{rotulo}</div>
+                    </div>
+""")
 
-# Adiciona análise de cada empresa
-for i, emp in df_analise.iterrows():
-    html_content += f"""
+CARTAO_EMPRESA = Modelo("""
         <div class="empresa-card">
-            <h3>🏢 {emp['razao_social']}</h3>
-            <p><strong>CNPJ Básico:</strong> {emp['cnpj_basico']} | <strong>Porte:</strong> {emp['porte']} | <strong>Capital Social:</strong> R$ {emp['capital_social']:,.0f}</p>
-            
+            <h3>🏢 {razao_social}</h3>
+            <p><strong>CNPJ Básico:</strong> {cnpj_basico} | <strong>Porte:</strong> {porte} | <strong>Capital Social:</strong> R$ {capital_social:,.0f}</p>
+
             <div class="metric-grid">
                 <div class="metric">
-                    <div class="metric-value">R$ {emp['valor_fob_brl']:,.0f}</div>
+                    <div class="metric-value">R$ {valor_fob_brl:,.0f}</div>
                     <div class="metric-label">Valor FOB (R$)</div>
                 </div>
                 <div class="metric">
-                    <div class="metric-value">{emp['ict_atual']:.2f}</div>
+                    <div class="metric-value">{ict_atual:.2f}</div>
                     <div class="metric-label">ICT Atual</div>
                 </div>
                 <div class="metric">
-                    <div class="metric-value">R$ {emp['carga_atual']:,.0f}</div>
+                    <div class="metric-value">R$ {carga_atual:,.0f}</div>
                     <div class="metric-label">Carga Tributária</div>
                 </div>
             </div>
@@ -181,20 +118,8 @@ for i, emp in df_analise.iterrows():
             <div class="recomendacao">
                 <h4>🎯 CENÁRIOS DE OTIMIZAÇÃO:</h4>
                 <div class="metric-grid">
-                    <div class="metric economia">
-                        <div class="metric-value">R$ {emp['economia_drawback']:,.0f}</div>
-                        <div class="metric-label">Drawback (II)</div>
-                    </div>
-                    <div class="metric economia">
-                        <div class="metric-value">R$ {emp['economia_icms']:,.0f}</div>
-                        <div class="metric-label">Benefício ICMS</div>
-                    </div>
-                    <div class="metric economia">
-                        <div class="metric-value">R$ {emp['economia_total']:,.0f}</div>
-                        <div class="metric-label">Otimização Total</div>
-                    </div>
-                    <div class="metric">
-                        <div class="metric-value">{emp['ict_otimizado']:.2f}</div>
+{cartoes}                    <div class="metric">
+                        <div class="metric-value">{ict_otimizado:.2f}</div>
                         <div class="metric-label">ICT Otimizado</div>
                     </div>
                 </div>
@@ -202,39 +127,30 @@ for i, emp in df_analise.iterrows():
 
             <div class="recomendacao">
                 <h4>📋 RECOMENDAÇÕES ESPECÍFICAS:</h4>
-"""
+{recomendacoes}            </div>
+        </div>
+""")
 
-    # Recomendações personalizadas por empresa
-    if emp['capital_social'] > 5000000:
-        html_content += f"""
-                <p>✅ <strong>HOLDING</strong> - Estruturação societária para otimização</p>
+# Recomendações personalizadas por faixa de capital social
+RECOMENDACOES = {
+    'grande': Bruto("""                <p>✅ <strong>HOLDING</strong> - Estruturação societária para otimização</p>
                 <p>✅ <strong>DRAWBACK</strong> - Isenção de II e IPI para importações</p>
                 <p>✅ <strong>CONVÊNIOS ICMS</strong> - Negociação interestadual</p>
                 <p>✅ <strong>REGRIME TRIBUTÁRIO</strong> - Lucro Real com planejamento</p>
-"""
-    elif emp['capital_social'] > 1000000:
-        html_content += f"""
-                <p>✅ <strong>REGIME TRIBUTÁRIO</strong> - Revisão Lucro Real vs Presumido</p>
+"""),
+    'media': Bruto("""                <p>✅ <strong>REGIME TRIBUTÁRIO</strong> - Revisão Lucro Real vs Presumido</p>
                 <p>✅ <strong>BENEFÍCIOS FISCAIS</strong> - Incentivos setoriais</p>
                 <p>✅ <strong>PLANEJAMENTO</strong> - Estratégia de desembaraço</p>
                 <p>✅ <strong>CRÉDITOS FISCAIS</strong> - Aproveitamento de PIS/COFINS</p>
-"""
-    else:
-        html_content += f"""
-                <p>✅ <strong>SIMPLES NACIONAL</strong> - Verificar elegibilidade</p>
+"""),
+    'pequena': Bruto("""                <p>✅ <strong>SIMPLES NACIONAL</strong> - Verificar elegibilidade</p>
                 <p>✅ <strong>CRÉDITOS FISCAIS</strong> - Aproveitamento de PIS/COFINS</p>
                 <p>✅ <strong>CONSULTORIA</strong> - Análise específica do negócio</p>
                 <p>✅ <strong>DOCUMENTAÇÃO</strong> - Regularização fiscal</p>
-"""
-
-    html_content += f"""
-            </div>
-        </div>
-"""
+"""),
+}
 
-# Resumo executivo
-total_economia = df_analise['economia_total'].sum()
-html_content += f"""
+FIM_TOP = Modelo("""
         <div class="empresa-card" style="background: linear-gradient(135deg, #ffd89b 0%, #19547b 100%); color: white;">
             <h2>💰 RESUMO EXECUTIVO</h2>
             <div class="metric-grid">
@@ -243,11 +159,11 @@ html_content += f"""
                     <div class="metric-label" style="color: white;">ECONOMIA TOTAL POTENCIAL</div>
                 </div>
                 <div class="metric" style="background: rgba(255,255,255,0.2);">
-                    <div class="metric-value" style="color: white;">5</div>
+                    <div class="metric-value" style="color: white;">{n}</div>
                     <div class="metric-label" style="color: white;">EMPRESAS ANALISADAS</div>
                 </div>
                 <div class="metric" style="background: rgba(255,255,255,0.2);">
-                    <div class="metric-value" style="color: white;">{df_analise['ict_otimizado'].mean():.2f}</div>
+                    <div class="metric-value" style="color: white;">{ict_medio:.2f}</div>
                     <div class="metric-label" style="color: white;">ICT MÉDIO OTIMIZADO</div>
                 </div>
             </div>
@@ -255,7 +171,7 @@ html_content += f"""
 
         <div class="recomendacao">
             <h3>🚀 PRÓXIMOS PASSOS RECOMENDADOS:</h3>
-            <p>1. <strong>Contatar ICO.N HOLDING</strong> - Maior potencial (R$ {df_analise.iloc[0]['economia_total']:,.0f})</p>
+            <p>1. <strong>Contatar {maior}</strong> - Maior potencial (R$ {economia_maior:,.0f})</p>
             <p>2. <strong>Estudo de Drawback</strong> - Para empresas acima de R$ 1 milhão</p>
             <p>3. <strong>Análise de regime tributário</strong> - Otimização legal</p>
             <p>4. <strong>Consultoria especializada</strong> - Implementação das estratégias</p>
@@ -269,19 +185,166 @@ html_content += f"""
     </div>
 </body>
 </html>
-"""
+""")
+
+# DEFINIÇÃO DA FUNÇÃO NO TOPO
+def calcular_ict(total_tributos, valor_fob_brl, benchmark=BENCHMARK_ICT):
+    """ICT de uma operação ou de arrays inteiros (0 quando o valor FOB é 0)"""
+    total_tributos = np.asarray(total_tributos, dtype=float)
+    valor_fob_brl = np.asarray(valor_fob_brl, dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ict = np.where(valor_fob_brl == 0, 0.0, (total_tributos / valor_fob_brl) / benchmark)
+    ict = arredondar_decimal(np.atleast_1d(ict), 3).reshape(ict.shape)  # mesmo resultado do round() nos empates
+    return float(ict) if ict.ndim == 0 else ict
+
+def matriz_coeficientes(cenarios: list) -> tuple:
+    """(colunas usadas, matriz colunas x cenários) a partir da lista declarativa"""
+    colunas = list(dict.fromkeys(c for cenario in cenarios for c in cenario['coeficientes']))
+    pesos = np.zeros((len(colunas), len(cenarios)))
+    for j, cenario in enumerate(cenarios):
+        for coluna, coeficiente in cenario['coeficientes'].items():
+            pesos[colunas.index(coluna), j] = coeficiente
+    return colunas, pesos
+
+def matriz_economias(df: pd.DataFrame, cenarios: list = CENARIOS_PADRAO) -> np.ndarray:
+    """Economia de cada empresa (linha) em cada cenário (coluna)"""
+    colunas, pesos = matriz_coeficientes(cenarios)
+    economias = df[colunas].to_numpy(dtype=float) @ pesos
+    carga = df['total_tributos'].to_numpy(dtype=float)
+    return np.minimum(economias, carga[:, None])  # não se economiza mais do que se paga
+
+def indices_top(valores, n: int) -> np.ndarray:
+    """Índices dos n maiores valores, do maior pro menor (argpartition: O(len) + O(n log n))"""
+    valores = np.asarray(valores, dtype=float)
+    if n >= len(valores):
+        selecionados = np.arange(len(valores))
+    else:
+        selecionados = np.sort(np.argpartition(-valores, n - 1)[:n])
+    return selecionados[np.argsort(-valores[selecionados], kind='stable')]
+
+def agregar_por_empresa(df_operacoes: pd.DataFrame, cenarios: list = CENARIOS_PADRAO) -> pd.DataFrame:
+    """
+    Uma linha por cnpj_basico: valores e tributos somados (mais as colunas
+    usadas pelos cenários), dados cadastrais da primeira operação e o ICT
+    recalculado sobre os totais. As operações sorteiam empresas com
+    reposição, então a mesma empresa aparece em várias linhas.
+    """
+    colunas_cenarios = [c for c in matriz_coeficientes(cenarios)[0] if c in df_operacoes.columns]
+    somadas = list(dict.fromkeys(['valor_fob_usd', 'valor_fob_brl', 'total_tributos'] + colunas_cenarios))
+    cadastrais = ['razao_social', 'capital_social_real', 'porte_empresa']
+    por_empresa = df_operacoes.groupby('cnpj_basico', sort=False, observed=True)
+    empresas = por_empresa[somadas].sum().join(por_empresa[cadastrais].first())
+    empresas['operacoes'] = por_empresa.size()
+    empresas['ict'] = calcular_ict(empresas['total_tributos'], empresas['valor_fob_brl'])
+    return empresas.reset_index()[['cnpj_basico'] + cadastrais + somadas + ['ict', 'operacoes']]
+
+def avaliar_cenarios(df: pd.DataFrame, cenarios: list = CENARIOS_PADRAO,
+                     cenario_otimizado: str = CENARIO_OTIMIZADO) -> pd.DataFrame:
+    """Todas as linhas x todos os cenários, com carga e ICT otimizados (linhas = empresas, ver agregar_por_empresa)"""
+    economias = matriz_economias(df, cenarios)
+    carga = df['total_tributos'].to_numpy(dtype=float)
+    brl = df['valor_fob_brl'].to_numpy(dtype=float)
+    nomes = [c['nome'] for c in cenarios]
+    carga_otimizada = carga - economias[:, nomes.index(cenario_otimizado)]
+    analise = pd.DataFrame({
+        'razao_social': df['razao_social'].to_numpy(),
+        'cnpj_basico': df['cnpj_basico'].to_numpy(),
+        'capital_social': df['capital_social_real'].to_numpy(),
+        'porte': df['porte_empresa'].to_numpy(),
+        'valor_fob_usd': df['valor_fob_usd'].to_numpy(),
+        'valor_fob_brl': brl,
+        'carga_atual': carga,
+        'ict_atual': df['ict'].to_numpy(),
+        # Cenários de otimização
+        **{f'economia_{nome}': economias[:, j] for j, nome in enumerate(nomes)},
+        'carga_otimizada': carga_otimizada,
+        'ict_otimizado': calcular_ict(carga_otimizada, brl, BENCHMARK_ICT),
+    }, index=df.index)
+    return analise
+
+def analisar_top_empresas(df_operacoes: pd.DataFrame, n: int = 5, cenarios: list = CENARIOS_PADRAO,
+                          ordenar_por: str = 'capital_social_real',
+                          cenario_otimizado: str = CENARIO_OTIMIZADO) -> pd.DataFrame:
+    """
+    Top N empresas (distintas) com os cenários avaliados.
+
+    As operações são somadas por cnpj_basico antes de montar a matriz de
+    economias, então cada empresa aparece uma única vez no ranking.
+
+    ordenar_por: coluna das empresas (ex.: 'capital_social_real') ou do
+    resultado (ex.: 'economia_total' para ranquear pelo potencial de economia).
+    """
+    df_operacoes = agregar_por_empresa(df_operacoes, cenarios)
+    nomes = [f"economia_{c['nome']}" for c in cenarios]
+    if ordenar_por in df_operacoes.columns:
+        criterio = df_operacoes[ordenar_por].to_numpy(dtype=float)
+    elif ordenar_por in nomes:
+        # Só a matriz de economias para todas; o DataFrame completo só para as N escolhidas
+        criterio = matriz_economias(df_operacoes, cenarios)[:, nomes.index(ordenar_por)]
+    else:
+        analise = avaliar_cenarios(df_operacoes, cenarios, cenario_otimizado)
+        top = indices_top(analise[ordenar_por].to_numpy(dtype=float), n)
+        return analise.iloc[top].reset_index(drop=True)
+    top = indices_top(criterio, n)
+    return avaliar_cenarios(df_operacoes.iloc[top], cenarios, cenario_otimizado).reset_index(drop=True)
+
+def recomendacoes_por_capital(capital_social: float) -> str:
+    """Bloco de recomendações conforme a faixa de capital social"""
+    if capital_social > 5000000:
+        return RECOMENDACOES['grande']
+    if capital_social > 1000000:
+        return RECOMENDACOES['media']
+    return RECOMENDACOES['pequena']
+
+def cartoes_empresas(df_analise: pd.DataFrame, cenarios: list = CENARIOS_PADRAO):
+    """Gerador: um cartão HTML por empresa, na ordem do DataFrame"""
+    for emp in registros(df_analise):
+        cartoes = ''.join(CARTAO_CENARIO(valor=emp[f"economia_{c['nome']}"], rotulo=c['rotulo'])
+                          for c in cenarios)
+        yield CARTAO_EMPRESA(**emp, cartoes=Bruto(cartoes),
+                             recomendacoes=recomendacoes_por_capital(emp['capital_social']))
+
+def gerar_relatorio_html(df_analise: pd.DataFrame, caminho: str, cenarios: list = CENARIOS_PADRAO,
+                         cenario_otimizado: str = CENARIO_OTIMIZADO,
+                         criterio: str = 'maior capital social', linhas_por_pagina: int = None) -> list:
+    """Relatório HTML com um cartão por empresa (gravado em streaming; retorna os arquivos)"""
+    n = len(df_analise)
+    economia = df_analise[f'economia_{cenario_otimizado}']
+    inicio = cabecalho(f"Análise Estratégica - Top {n} Empresas", CSS_TOP_EMPRESAS) + INICIO_TOP(
+        n=n, gerado_em=datetime.now().strftime('%d/%m/%Y às %H:%M'), criterio=criterio)
+    fim = FIM_TOP(total_economia=economia.sum(), n=n, ict_medio=df_analise['ict_otimizado'].mean(),
+                  maior=df_analise['razao_social'].iloc[0], economia_maior=economia.iloc[0])
+    return escrever_relatorio(caminho, inicio, cartoes_empresas(df_analise, cenarios), fim,
+                              linhas_por_pagina=linhas_por_pagina)
+
+# --- EXECUÇÃO PRINCIPAL ---
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    ordenar_por = sys.argv[2] if len(sys.argv) > 2 else 'capital_social_real'
+    print(f"🎯 ANALISANDO TOP {n} EMPRESAS COM MAIOR POTENCIAL...")
+
+    # Carrega os dados
+    df_operacoes = pd.read_csv('./output/operacoes_reais_simuladas.csv')
+
+    # Seleciona as top N (por capital social, ou pelo potencial de economia)
+    df_analise = analisar_top_empresas(df_operacoes, n, ordenar_por=ordenar_por)
+
+    print(f"📊 TOP {n} EMPRESAS IDENTIFICADAS:")
+    for i, (razao, capital) in enumerate(zip(df_analise['razao_social'], df_analise['capital_social']), 1):
+        print(f"   {i}. {razao} - R$ {capital:,.0f}")
 
-# Salva o relatório
-with open('./output/analise_top_empresas.html', 'w', encoding='utf-8') as f:
-    f.write(html_content)
+    criterio = 'maior capital social' if ordenar_por == 'capital_social_real' else f'maior {ordenar_por}'
+    paginas = gerar_relatorio_html(df_analise, './output/analise_top_empresas.html', criterio=criterio,
+                                   linhas_por_pagina=LINHAS_POR_PAGINA)
 
-# Salva CSV com análise detalhada
-df_analise.to_csv('./output/detalhes_top_empresas.csv', index=False)
+    # Salva CSV com análise detalhada
+    df_analise.to_csv('./output/detalhes_top_empresas.csv', index=False)
 
-print("✅ ANÁLISE DAS TOP 5 EMPRESAS CONCLUÍDA!")
-print("📁 Arquivos gerados:")
-print("   - ./output/analise_top_empresas.html")
-print("   - ./output/detalhes_top_empresas.csv")
-print(f"💰 Economia total potencial: R$ {total_economia:,.0f}")
-print("\n🎯 ABRA A ANÁLISE:")
-print("   start ./output/analise_top_empresas.html")
\ No newline at end of file
+    total_economia = df_analise[f'economia_{CENARIO_OTIMIZADO}'].sum()
+    print(f"✅ ANÁLISE DAS TOP {n} EMPRESAS CONCLUÍDA!")
+    print("📁 Arquivos gerados:")
+    print("   - ./output/analise_top_empresas.html" + (f" (+{len(paginas) - 1} páginas)" if len(paginas) > 1 else ""))
+    print("   - ./output/detalhes_top_empresas.csv")
+    print(f"💰 Economia total potencial: R$ {total_economia:,.0f}")
+    print("\n🎯 ABRA A ANÁLISE:")
+    print("   start ./output/analise_top_empresas.html")
@@ -0,0 +1,254 @@
+# base_receita_federal.py
+"""
+Carregador rápido da base de Empresas da Receita Federal (dados abertos do CNPJ).
+
+O dump oficial vem em vários arquivos CSV (';', latin1, sem cabeçalho) com
+dezenas de milhões de linhas. Aqui ele é lido em chunks com tipos explícitos
+(CNPJ básico int64, porte/natureza categóricos, capital social com vírgula
+decimal convertido direto pelo parser C do pandas) e gravado chunk a chunk,
+uma única vez, num cache Feather que as execuções seguintes abrem via
+memory-map, com as categóricas já codificadas em dicionário. O cache guarda
+a lista de arquivos fonte (com tamanho e data) e é refeito quando ela muda.
+
+O cache requer o pacote pyarrow; sem ele a base é lida do CSV a cada vez.
+"""
+
+import glob
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+COLUNAS_EMPRESAS = [
+    'cnpj_basico',
+    'razao_social',
+    'natureza_juridica',
+    'qualificacao_responsavel',
+    'capital_social',
+    'porte_empresa',
+    'ente_federativo'
+]
+
+TIPOS_EMPRESAS = {
+    'cnpj_basico': 'int64',
+    'razao_social': 'str',
+    'natureza_juridica': 'Int16',
+    'qualificacao_responsavel': 'Int16',
+    'capital_social': 'float64',  # "1000,00" -> 1000.0 (decimal=',')
+    'porte_empresa': 'Int8',      # "00", "01", "03", "05" -> 0, 1, 3, 5
+    'ente_federativo': 'category'
+}
+
+COLUNAS_CATEGORICAS = ['natureza_juridica', 'qualificacao_responsavel', 'porte_empresa']
+
+FORMATO_CACHE = 2  # 2: categóricas com dicionário no arquivo Arrow
+
+
+def listar_arquivos(caminhos) -> list:
+    """Aceita um caminho, um padrão glob ('data/Empresas*') ou uma lista deles"""
+    if isinstance(caminhos, (str, Path)):
+        caminhos = [caminhos]
+    arquivos = []
+    for caminho in caminhos:
+        encontrados = sorted(glob.glob(str(caminho)))
+        arquivos.extend(encontrados)
+    if not arquivos:
+        raise FileNotFoundError(f"Nenhum arquivo da base RF encontrado em: {caminhos}")
+    return arquivos
+
+
+def _ler_chunks(arquivos: list, tamanho_chunk: int, nrows: int = None, filtro=None):
+    """Gerador: um DataFrame por chunk, com os tipos de TIPOS_EMPRESAS"""
+    restante = nrows
+    for arquivo in arquivos:
+        leitor = pd.read_csv(
+            arquivo,
+            sep=';',
+            encoding='latin1',
+            header=None,
+            names=COLUNAS_EMPRESAS,
+            dtype=TIPOS_EMPRESAS,
+            decimal=',',
+            on_bad_lines='skip',
+            chunksize=tamanho_chunk,
+            nrows=restante
+        )
+        for chunk in leitor:
+            if restante is not None:
+                restante -= len(chunk)
+            chunk['capital_social'] = chunk['capital_social'].fillna(0.0)
+            yield chunk if filtro is None else chunk[filtro(chunk)]
+        if restante is not None and restante <= 0:
+            break
+
+
+def _tipos_finais(df: pd.DataFrame) -> pd.DataFrame:
+    """Categorias como inteiros simples (nulos viram categoria ausente)"""
+    df['ente_federativo'] = df['ente_federativo'].astype('string').astype('category')
+    for coluna in COLUNAS_CATEGORICAS:
+        codigos = np.asarray(df[coluna].dropna().unique(), dtype=TIPOS_EMPRESAS[coluna].lower())
+        df[coluna] = pd.Categorical(df[coluna], categories=sorted(codigos))
+    return df
+
+
+def _vazio() -> pd.DataFrame:
+    return pd.DataFrame({c: pd.Series(dtype=t) for c, t in TIPOS_EMPRESAS.items()})
+
+
+def ler_empresas_rf(caminhos, tamanho_chunk: int = 1_000_000, nrows: int = None,
+                    filtro=None) -> pd.DataFrame:
+    """
+    Lê os arquivos de Empresas da RF em chunks, já com os tipos finais.
+
+    nrows limita o total de linhas lidas (útil para testes rápidos).
+    filtro(chunk) -> máscara booleana é aplicado a cada chunk antes de
+    guardá-lo, então só as linhas que passam ficam em memória. Para o dump
+    inteiro sem filtro, prefira carregar_empresas_rf com cache, que grava os
+    chunks direto no arquivo colunar.
+    """
+    partes = list(_ler_chunks(listar_arquivos(caminhos), tamanho_chunk, nrows, filtro))
+    if not partes:
+        return _vazio()
+    df = pd.concat(partes, ignore_index=True)
+    del partes
+    return _tipos_finais(df)
+
+
+def _esquema_arrow():
+    import pyarrow as pa
+    return pa.schema([
+        ('cnpj_basico', pa.int64()),
+        ('razao_social', pa.string()),
+        ('natureza_juridica', pa.int16()),
+        ('qualificacao_responsavel', pa.int16()),
+        ('capital_social', pa.float64()),
+        ('porte_empresa', pa.int8()),
+        ('ente_federativo', pa.string()),
+    ])
+
+
+def _tipo_indices(n: int):
+    import pyarrow as pa
+    return next(t for t, limite in ((pa.int8(), 2 ** 7), (pa.int16(), 2 ** 15), (pa.int32(), 2 ** 31))
+                if n < limite)
+
+
+def gravar_cache(arquivos: list, cache: Path, tamanho_chunk: int = 1_000_000) -> int:
+    """
+    Converte os CSVs para o cache Feather (Arrow IPC) chunk a chunk: a
+    memória usada é a de um chunk, não a do dump inteiro. Retorna as linhas.
+
+    As colunas categóricas são gravadas com dicionário, para a leitura já
+    sair em pd.Categorical. O formato de arquivo IPC exige o mesmo dicionário
+    em todos os lotes e ele só é conhecido no fim, então os chunks passam
+    antes por um arquivo bruto, relido lote a lote via memory-map.
+    """
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    esquema = _esquema_arrow()
+    categoricas = COLUNAS_CATEGORICAS + ['ente_federativo']
+    valores = {coluna: set() for coluna in categoricas}
+    cache.parent.mkdir(parents=True, exist_ok=True)
+    bruto = cache.with_suffix('.bruto.tmp')
+    temporario = cache.with_suffix('.tmp')
+    linhas = 0
+    # Sem compressão: é o que permite o memory-map na leitura
+    with pa.OSFile(str(bruto), 'wb') as destino, pa.ipc.new_file(destino, esquema) as escritor:
+        for chunk in _ler_chunks(arquivos, tamanho_chunk):
+            chunk['ente_federativo'] = chunk['ente_federativo'].astype('string')
+            for coluna in categoricas:
+                valores[coluna].update(chunk[coluna].dropna().unique().tolist())
+            escritor.write_table(pa.Table.from_pandas(chunk, schema=esquema, preserve_index=False))
+            linhas += len(chunk)
+
+    dicionarios = {coluna: pa.array(sorted(valores[coluna]), type=esquema.field(coluna).type)
+                   for coluna in categoricas}
+    esquema_final = pa.schema([
+        pa.field(campo.name, pa.dictionary(_tipo_indices(len(dicionarios[campo.name])), campo.type))
+        if campo.name in dicionarios else campo
+        for campo in esquema
+    ])
+    with pa.memory_map(str(bruto)) as origem, pa.OSFile(str(temporario), 'wb') as destino, \
+            pa.ipc.new_file(destino, esquema_final) as escritor:
+        leitor = pa.ipc.open_file(origem)
+        for i in range(leitor.num_record_batches):
+            lote = leitor.get_batch(i)
+            colunas = []
+            for campo in esquema_final:
+                coluna = lote.column(campo.name)
+                if campo.name in dicionarios:
+                    indices = pc.index_in(coluna, value_set=dicionarios[campo.name]).cast(campo.type.index_type)
+                    coluna = pa.DictionaryArray.from_arrays(indices, dicionarios[campo.name])
+                colunas.append(coluna)
+            escritor.write_batch(pa.record_batch(colunas, schema=esquema_final))
+    os.remove(bruto)
+    os.replace(temporario, cache)
+    meta = {'formato': FORMATO_CACHE, 'arquivos': _assinatura(arquivos)}
+    _arquivo_meta(cache).write_text(json.dumps(meta), encoding='utf-8')
+    return linhas
+
+
+def _arquivo_meta(cache: Path) -> Path:
+    return cache.with_name(cache.name + '.meta.json')
+
+
+def _assinatura(arquivos: list) -> list:
+    """Arquivos fonte do cache: caminho absoluto, tamanho e mtime"""
+    assinatura = []
+    for arquivo in arquivos:
+        info = os.stat(arquivo)
+        assinatura.append([os.path.abspath(arquivo), info.st_size, info.st_mtime_ns])
+    return assinatura
+
+
+def _cache_valido(cache: Path, arquivos: list) -> bool:
+    """O cache vale só no formato atual e para os mesmos arquivos, tamanhos e datas"""
+    meta = _arquivo_meta(cache)
+    if not cache.exists() or not meta.exists():
+        return False
+    try:
+        esperado = {'formato': FORMATO_CACHE, 'arquivos': _assinatura(arquivos)}
+        return json.loads(meta.read_text(encoding='utf-8')) == esperado
+    except ValueError:
+        return False
+
+
+def carregar_empresas_rf(caminhos, cache=None, tamanho_chunk: int = 1_000_000,
+                         nrows: int = None) -> pd.DataFrame:
+    """
+    Carrega a base de Empresas, usando o cache Feather quando estiver em dia.
+
+    Na primeira execução (ou se o conjunto de arquivos fonte mudou: outro
+    caminho, arquivo novo/removido, tamanho ou data diferentes) os CSVs são
+    convertidos chunk a chunk para o cache; a leitura é sempre um
+    memory-map do arquivo colunar.
+
+    As categóricas saem do cache já como pd.Categorical (só os códigos são
+    copiados). As colunas numéricas sem nulos são copiadas apenas para juntar
+    os lotes do arquivo; num cache de um lote só, vêm direto do memory-map.
+    """
+    arquivos = listar_arquivos(caminhos)
+    if cache is None or nrows is not None:
+        return ler_empresas_rf(arquivos, tamanho_chunk=tamanho_chunk, nrows=nrows)
+
+    try:
+        import pyarrow.feather as feather
+    except ImportError:
+        print("⚠️ pyarrow não instalado: lendo a base RF sem cache colunar.")
+        return ler_empresas_rf(arquivos, tamanho_chunk=tamanho_chunk)
+
+    cache = Path(cache)
+    if not _cache_valido(cache, arquivos):
+        if gravar_cache(arquivos, cache, tamanho_chunk) == 0:
+            return _vazio()
+    tabela = feather.read_table(cache, memory_map=True)
+    df = tabela.to_pandas(split_blocks=True)
+    # Mesmo dtype das categorias de ler_empresas_rf (o Arrow devolve str/object)
+    ente = df['ente_federativo'].cat
+    df['ente_federativo'] = pd.Categorical.from_codes(
+        ente.codes, dtype=pd.CategoricalDtype(ente.categories.astype('string'))
+    )
+    return df
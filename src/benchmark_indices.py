@@ -0,0 +1,122 @@
+# src/benchmark_indices.py
+"""
+Benchmark recall@k x latência dos tipos de índice FAISS contra o flat.
+
+Usa os vetores do índice atual (index/index.faiss) quando existir, ou um
+corpus sintético agrupado. As perguntas são vetores do próprio corpus com
+ruído; a "verdade" é a busca exata do IndexFlatL2.
+
+Uso:
+    python src/benchmark_indices.py                 # índice atual ou 50.000 sintéticos
+    python src/benchmark_indices.py 200000 384      # n e dimensão do sintético
+"""
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import faiss
+
+from indices_faiss import bytes_indice, construir_indice, ajustar_busca, vetores_armazenados
+
+PROJECT_ROOT = Path(__file__).parent.parent
+INDEX_DIR = PROJECT_ROOT / "index"
+SAIDA = PROJECT_ROOT / "output" / "benchmark_indices.csv"
+
+K = 4
+N_PERGUNTAS = 500
+
+# (tipo, parâmetros de construção, valores de busca a varrer)
+CONFIGURACOES = [
+    ("flat", {}, [{}]),
+    ("ivf_flat", {}, [{"nprobe": p} for p in (1, 4, 16, 64)]),
+    ("ivf_pq", {}, [{"nprobe": p} for p in (4, 16, 64)]),
+    ("hnsw", {"hnsw_m": 32}, [{"ef_search": e} for e in (16, 64, 256)]),
+]
+
+
+def corpus_sintetico(n: int, dimensao: int, grupos: int = 200, seed: int = 0) -> np.ndarray:
+    """Vetores em torno de `grupos` centros (parecido com embeddings por tema)"""
+    rng = np.random.default_rng(seed)
+    centros = rng.standard_normal((grupos, dimensao)).astype(np.float32)
+    vetores = centros[rng.integers(0, grupos, n)] + 0.3 * rng.standard_normal((n, dimensao)).astype(np.float32)
+    return vetores / np.linalg.norm(vetores, axis=1, keepdims=True)
+
+
+def vetores_do_indice_atual():
+    arquivo = INDEX_DIR / "index.faiss"
+    if not arquivo.exists():
+        return None
+    indice = faiss.read_index(str(arquivo))
+    try:
+        vetores = vetores_armazenados(indice, 0, indice.ntotal)
+    except RuntimeError:
+        print("⚠️ Índice atual não permite reconstruir os vetores: usando corpus sintético.")
+        return None
+    print(f"📂 Usando os {indice.ntotal} vetores de {arquivo}")
+    return vetores
+
+
+def perguntas_com_ruido(vetores: np.ndarray, n: int, seed: int = 1) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    base = vetores[rng.choice(len(vetores), min(n, len(vetores)), replace=False)]
+    ruido = 0.05 * rng.standard_normal(base.shape).astype(np.float32)
+    return np.ascontiguousarray(base + ruido, dtype=np.float32)
+
+
+def recall_em_k(encontrados: np.ndarray, verdade: np.ndarray) -> float:
+    acertos = sum(len(set(e) & set(v)) for e, v in zip(encontrados, verdade))
+    return acertos / verdade.size
+
+
+def executar_benchmark(vetores: np.ndarray, k: int = K, n_perguntas: int = N_PERGUNTAS) -> pd.DataFrame:
+    perguntas = perguntas_com_ruido(vetores, n_perguntas)
+    exato = construir_indice(vetores, "flat")
+    _, verdade = exato.search(perguntas, k)
+
+    linhas = []
+    for tipo, parametros, buscas in CONFIGURACOES:
+        inicio = time.perf_counter()
+        indice = construir_indice(vetores, tipo, **parametros)
+        tempo_construcao = time.perf_counter() - inicio
+        memoria_mb = bytes_indice(indice) / 1e6
+        for busca in buscas:
+            ajustar_busca(indice, **busca)
+            latencias = []
+            encontrados = []
+            for pergunta in perguntas:
+                t0 = time.perf_counter()
+                _, ids = indice.search(pergunta[None, :], k)
+                latencias.append(time.perf_counter() - t0)
+                encontrados.append(ids[0])
+            linhas.append({
+                "tipo": tipo,
+                "parametros": ", ".join(f"{c}={v}" for c, v in {**parametros, **busca}.items()) or "-",
+                f"recall@{k}": round(recall_em_k(np.array(encontrados), verdade), 4),
+                "latencia_p50_ms": round(float(np.median(latencias)) * 1000, 3),
+                "latencia_p95_ms": round(float(np.percentile(latencias, 95)) * 1000, 3),
+                "construcao_s": round(tempo_construcao, 2),
+                "memoria_mb": round(memoria_mb, 1),
+            })
+            print(f"  {linhas[-1]['tipo']:<9} {linhas[-1]['parametros']:<22} "
+                  f"recall@{k}={linhas[-1][f'recall@{k}']:.3f}  p50={linhas[-1]['latencia_p50_ms']:.3f} ms")
+    return pd.DataFrame(linhas)
+
+
+# === EXECUÇÃO ===
+if __name__ == "__main__":
+    argumentos = [int(a) for a in sys.argv[1:]]
+    vetores = None if argumentos else vetores_do_indice_atual()
+    if vetores is None:
+        n = argumentos[0] if argumentos else 50_000
+        dimensao = argumentos[1] if len(argumentos) > 1 else 384
+        print(f"🧪 Corpus sintético: {n} vetores x {dimensao} dimensões")
+        vetores = corpus_sintetico(n, dimensao)
+
+    print(f"⏱️ Medindo recall@{K} e latência ({N_PERGUNTAS} perguntas)...")
+    resultado = executar_benchmark(vetores)
+    SAIDA.parent.mkdir(exist_ok=True)
+    resultado.to_csv(SAIDA, index=False, encoding="utf-8")
+    print(f"\n{resultado.to_string(index=False)}")
+    print(f"\n📁 Resultado salvo em {SAIDA}")
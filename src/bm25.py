@@ -0,0 +1,162 @@
+# src/bm25.py
+"""
+Índice invertido BM25 para texto legal, usado junto com o FAISS.
+
+A busca densa erra referências exatas ("art. 14 da Lei 2.657/96", NCM
+8471.30.12) quando k é pequeno. Aqui a tokenização preserva esses termos:
+
+    "art. 14"     -> 'art_14' (e '14')
+    "2.657/96"    -> '2657/96', '2657', '96'
+    "8471.30.12"  -> '84713012', '8471', '30', '12'
+
+Os resultados lexicais e densos são combinados por Reciprocal Rank Fusion
+(fundir_rrf) e reordenados para priorizar chunks que contêm todos os termos
+exatos da pergunta (números, artigos, NCMs).
+
+O índice aceita inclusão e remoção por id, acompanhando a atualização
+incremental do create_index.py.
+"""
+
+import heapq
+import math
+import pickle
+import re
+import unicodedata
+from collections import Counter, defaultdict
+
+STOPWORDS = {
+    "a", "o", "as", "os", "de", "da", "do", "das", "dos", "e", "em", "no", "na",
+    "nos", "nas", "um", "uma", "para", "por", "com", "que", "se", "ao", "aos",
+    "ou", "qual", "quais", "como", "sobre", "pelo", "pela", "sao", "ser",
+}
+
+_ARTIGO = re.compile(r"\bart(?:igo)?s?\.?\s*(\d+)")
+_NUMERO = re.compile(r"\d+(?:[./-]\d+)*")
+_PALAVRA = re.compile(r"[a-z]+")
+
+
+def normalizar(texto: str) -> str:
+    """Minúsculas e sem acentos ('Alíquota' -> 'aliquota')"""
+    decomposto = unicodedata.normalize("NFKD", texto.lower())
+    return "".join(c for c in decomposto if not unicodedata.combining(c))
+
+
+def tokenizar(texto: str) -> list:
+    texto = normalizar(texto)
+    tokens = [f"art_{n}" for n in _ARTIGO.findall(texto)]
+    for numero in _NUMERO.findall(texto):
+        # Pontos entre dígitos são separador de milhar/NCM: 2.657 = 2657
+        sem_pontos = numero.replace(".", "")
+        tokens.append(sem_pontos)
+        partes = re.split(r"[./-]", numero)
+        if len(partes) > 1:
+            tokens.extend(partes)
+            if "/" in sem_pontos or "-" in sem_pontos:
+                tokens.extend(p for p in re.split(r"[/-]", sem_pontos) if p not in partes)
+    tokens.extend(p for p in _PALAVRA.findall(texto) if len(p) > 1 and p not in STOPWORDS)
+    return tokens
+
+
+def termos_exatos(tokens: list) -> set:
+    """Tokens com dígitos (artigos, leis, NCMs): os que a busca densa costuma perder"""
+    return {t for t in tokens if any(c.isdigit() for c in t)}
+
+
+class IndiceBM25:
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.postings = defaultdict(dict)  # termo -> {id: frequência}
+        self.tamanhos = {}                 # id -> nº de tokens
+        self.termos_doc = {}               # id -> termos distintos (para remover)
+        self.total_tokens = 0
+
+    def __len__(self):
+        return len(self.tamanhos)
+
+    def __contains__(self, id_doc):
+        return id_doc in self.tamanhos
+
+    def adicionar(self, id_doc: str, texto: str):
+        if id_doc in self.tamanhos:
+            self.remover(id_doc)
+        tokens = tokenizar(texto)
+        frequencias = Counter(tokens)
+        for termo, tf in frequencias.items():
+            self.postings[termo][id_doc] = tf
+        self.tamanhos[id_doc] = len(tokens)
+        self.termos_doc[id_doc] = frozenset(frequencias)
+        self.total_tokens += len(tokens)
+
+    def remover(self, id_doc: str):
+        if id_doc not in self.tamanhos:
+            return
+        for termo in self.termos_doc.pop(id_doc):
+            documentos = self.postings[termo]
+            documentos.pop(id_doc, None)
+            if not documentos:
+                del self.postings[termo]
+        self.total_tokens -= self.tamanhos.pop(id_doc)
+
+    def buscar(self, consulta: str, k: int = 10) -> list:
+        """[(id, score)] dos k melhores documentos para a consulta"""
+        n = len(self.tamanhos)
+        if n == 0:
+            return []
+        media = self.total_tokens / n
+        scores = defaultdict(float)
+        for termo in set(tokenizar(consulta)):
+            documentos = self.postings.get(termo)
+            if not documentos:
+                continue
+            df = len(documentos)
+            idf = math.log(1 + (n - df + 0.5) / (df + 0.5))
+            for id_doc, tf in documentos.items():
+                norma = self.k1 * (1 - self.b + self.b * self.tamanhos[id_doc] / media)
+                scores[id_doc] += idf * tf * (self.k1 + 1) / (tf + norma)
+        return heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+
+    def contem_todos(self, id_doc: str, termos: set) -> bool:
+        return termos <= self.termos_doc.get(id_doc, frozenset())
+
+    def salvar(self, caminho):
+        with open(caminho, "wb") as f:
+            pickle.dump({"k1": self.k1, "b": self.b, "postings": dict(self.postings),
+                         "tamanhos": self.tamanhos, "termos_doc": self.termos_doc,
+                         "total_tokens": self.total_tokens}, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @classmethod
+    def carregar(cls, caminho) -> "IndiceBM25":
+        with open(caminho, "rb") as f:
+            dados = pickle.load(f)
+        indice = cls(dados["k1"], dados["b"])
+        indice.postings = defaultdict(dict, dados["postings"])
+        indice.tamanhos = dados["tamanhos"]
+        indice.termos_doc = dados["termos_doc"]
+        indice.total_tokens = dados["total_tokens"]
+        return indice
+
+
+def fundir_rrf(*rankings, k: int = 60) -> list:
+    """Reciprocal Rank Fusion: ids ordenados por soma de 1/(k + posição)"""
+    scores = defaultdict(float)
+    for ranking in rankings:
+        for posicao, id_doc in enumerate(ranking, 1):
+            scores[id_doc] += 1.0 / (k + posicao)
+    return sorted(scores, key=lambda id_doc: -scores[id_doc])
+
+
+def buscar_hibrido(indice: IndiceBM25, consulta: str, ids_densos: list, k: int = 4,
+                   candidatos: int = 20) -> list:
+    """
+    Funde a busca densa (ids já ordenados) com o BM25 e devolve os k ids finais.
+
+    Reordenação local: entre os candidatos fundidos, os que contêm todos os
+    termos exatos da pergunta sobem para o topo (a ordem RRF desempata).
+    """
+    lexicos = [id_doc for id_doc, _ in indice.buscar(consulta, candidatos)]
+    fundidos = fundir_rrf(ids_densos[:candidatos], lexicos)
+    exatos = termos_exatos(tokenizar(consulta))
+    if exatos:
+        fundidos.sort(key=lambda id_doc: not indice.contem_todos(id_doc, exatos))
+    return fundidos[:k]
@@ -0,0 +1,235 @@
+# src/cache_embeddings.py
+"""
+Cache persistente de embeddings, endereçado por conteúdo.
+
+Cada texto vira a chave sha256(modelo, tipo, texto). Os vetores ficam numa
+matriz float32 em disco aberta via memory-map (vetores.f32) e o mapa
+chave -> linha num arquivo de índice (indice.json), em ordem LRU. Quando a
+capacidade enche, a entrada usada há mais tempo cede a sua linha.
+
+CacheEmbeddings embrulha qualquer backend com embed_documents/embed_query
+(OpenAIEmbeddings, por exemplo), então reconstruções do índice e perguntas
+repetidas não chamam a API para textos já embedados.
+
+EmbeddingsDeterministicos é um embedder local (hashing de palavras), útil
+para testar o pipeline sem rede.
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+import numpy as np
+
+try:
+    from langchain.embeddings.base import Embeddings
+except ImportError:  # langchain é opcional para usar o cache
+    Embeddings = object
+
+
+def chave_embedding(modelo: str, texto: str, tipo: str = "documento") -> str:
+    return hashlib.sha256(f"{modelo}\0{tipo}\0{texto}".encode("utf-8")).hexdigest()
+
+
+class CacheEmbeddings(Embeddings):
+    """
+    Embeddings com cache em disco (memmap float32 + índice LRU).
+
+    O índice é gravado a cada `salvar_a_cada` lotes com faltas (e em
+    salvar(), chamado no fim da indexação), não a cada lote. Para que uma
+    queda entre duas gravações não deixe chaves apontando para vetores
+    trocados, linhas que ainda aparecem no último índice gravado nunca são
+    sobrescritas: vetores novos vão para linhas livres (a matriz tem uma
+    folga além da capacidade) e as linhas despejadas só voltam a ser usadas
+    depois que o índice sem elas foi publicado.
+    """
+
+    def __init__(self, backend, modelo: str, diretorio, capacidade: int = 50_000,
+                 salvar_a_cada: int = 20):
+        self.backend = backend
+        self.modelo = modelo
+        self.capacidade = capacidade
+        self.linhas = capacidade + max(1, capacidade // 10)  # folga para os vetores novos
+        self.salvar_a_cada = salvar_a_cada
+        nome = re.sub(r"[^\w.-]", "_", modelo)
+        self.diretorio = Path(diretorio) / nome
+        self.diretorio.mkdir(parents=True, exist_ok=True)
+        self._arquivo_vetores = self.diretorio / "vetores.f32"
+        self._arquivo_indice = self.diretorio / "indice.json"
+        self._lock = threading.Lock()
+
+        self.dimensao = None
+        self._vetores = None
+        self._slots = OrderedDict()  # chave -> linha da matriz (mais antiga primeiro)
+        self._livres = []
+        self._publicados = set()     # linhas referenciadas pelo índice gravado
+        self._despejados = []        # linhas publicadas cujas chaves saíram do cache
+        self._lotes_sem_salvar = 0
+        self.acertos = 0
+        self.faltas = 0
+        self._abrir()
+
+    def _abrir(self):
+        if not self._arquivo_indice.exists() or not self._arquivo_vetores.exists():
+            return
+        meta = json.loads(self._arquivo_indice.read_text(encoding="utf-8"))
+        if meta["modelo"] != self.modelo:
+            raise ValueError(f"Cache em {self.diretorio} é do modelo {meta['modelo']}, não {self.modelo}")
+        self.dimensao = meta["dimensao"]
+        linhas_disco = meta.get("linhas", meta["capacidade"])
+        self._vetores = np.memmap(self._arquivo_vetores, dtype=np.float32, mode="r+",
+                                  shape=(linhas_disco, self.dimensao))
+        entradas = meta["entradas"]
+        if linhas_disco != self.linhas:
+            # Capacidade mudou: copia as entradas mais recentes para uma matriz nova
+            manter = entradas[-self.capacidade:]
+            antigos = np.array(self._vetores[[slot for _, slot in manter]]) if manter else None
+            self._criar_matriz()
+            entradas = []
+            for i, (chave, _) in enumerate(manter):
+                self._vetores[i] = antigos[i]
+                entradas.append((chave, i))
+            self._slots = OrderedDict(entradas)
+            self._salvar()
+        self._slots = OrderedDict(entradas)
+        self._publicados = set(self._slots.values())
+        self._livres = [i for i in range(self.linhas - 1, -1, -1) if i not in self._publicados]
+
+    def _criar_matriz(self):
+        self._vetores = np.memmap(self._arquivo_vetores, dtype=np.float32, mode="w+",
+                                  shape=(self.linhas, self.dimensao))
+        self._livres = list(range(self.linhas - 1, -1, -1))
+
+    def _salvar(self):
+        """Publica o índice (chamado com o lock): vetores no disco antes, índice atômico depois"""
+        self._vetores.flush()
+        meta = {"modelo": self.modelo, "dimensao": self.dimensao, "capacidade": self.capacidade,
+                "linhas": self.linhas, "entradas": list(self._slots.items())}
+        temporario = self._arquivo_indice.with_suffix(".tmp")
+        temporario.write_text(json.dumps(meta), encoding="utf-8")
+        os.replace(temporario, self._arquivo_indice)
+        # O índice publicado não cita mais as linhas despejadas: podem ser reusadas
+        self._publicados = set(self._slots.values())
+        self._livres.extend(self._despejados)
+        self._despejados = []
+        self._lotes_sem_salvar = 0
+
+    def salvar(self):
+        """Grava os vetores e o índice LRU"""
+        with self._lock:
+            if self._vetores is not None:
+                self._salvar()
+
+    def __len__(self):
+        return len(self._slots)
+
+    def _buscar(self, chaves: list) -> dict:
+        encontrados = {}
+        with self._lock:
+            for chave in chaves:
+                slot = self._slots.get(chave)
+                if slot is not None:
+                    self._slots.move_to_end(chave)
+                    encontrados[chave] = np.array(self._vetores[slot])
+        return encontrados
+
+    def vetores_guardados(self, textos: list, tipo: str = "documento") -> list:
+        """Vetores originais (float32) já em cache para `textos`; None onde faltar"""
+        chaves = [chave_embedding(self.modelo, t, tipo) for t in textos]
+        encontrados = self._buscar(list(dict.fromkeys(chaves)))
+        return [encontrados.get(c) for c in chaves]
+
+    def _linha_livre(self) -> int:
+        if len(self._slots) >= self.capacidade:
+            _, slot = self._slots.popitem(last=False)  # despeja a LRU
+            (self._despejados if slot in self._publicados else self._livres).append(slot)
+        if not self._livres:
+            self._salvar()  # folga esgotada: publica para liberar as linhas despejadas
+        return self._livres.pop()
+
+    def _guardar(self, chaves: list, vetores: list):
+        with self._lock:
+            if self._vetores is None:
+                self.dimensao = len(vetores[0])
+                self._criar_matriz()
+            for chave, vetor in zip(chaves, vetores):
+                if chave in self._slots:
+                    continue
+                slot = self._linha_livre()
+                self._vetores[slot] = vetor
+                self._slots[chave] = slot
+            self._lotes_sem_salvar += 1
+            if self._lotes_sem_salvar >= self.salvar_a_cada:
+                self._salvar()
+
+    def _embed(self, textos: list, tipo: str) -> list:
+        chaves = [chave_embedding(self.modelo, t, tipo) for t in textos]
+        encontrados = self._buscar(list(dict.fromkeys(chaves)))
+        faltando = {}
+        for chave, texto in zip(chaves, textos):
+            if chave not in encontrados:
+                faltando.setdefault(chave, texto)
+        self.acertos += len(textos) - sum(1 for c in chaves if c in faltando)
+        self.faltas += len(faltando)
+
+        if faltando:
+            # Chamada ao backend fora do lock: outras threads seguem usando o cache
+            if tipo == "pergunta" and len(faltando) == 1:
+                novos = [self.backend.embed_query(t) for t in faltando.values()]
+            else:
+                novos = self.backend.embed_documents(list(faltando.values()))
+            novos = [np.asarray(v, dtype=np.float32) for v in novos]
+            self._guardar(list(faltando), novos)
+            encontrados.update(zip(faltando, novos))
+        return [encontrados[c].tolist() for c in chaves]
+
+    def embed_documents(self, texts: list) -> list:
+        return self._embed(list(texts), "documento")
+
+    def embed_query(self, text: str) -> list:
+        return self._embed([text], "pergunta")[0]
+
+    def embed_queries(self, texts: list) -> list:
+        """
+        Várias perguntas numa única chamada ao backend (via embed_documents).
+
+        Vale para backends em que pergunta e documento usam o mesmo modelo,
+        como a OpenAI; é o que o servidor RAG usa para agrupar perguntas.
+        """
+        return self._embed(list(texts), "pergunta")
+
+
+class EmbeddingsDeterministicos(Embeddings):
+    """
+    Embedder local e determinístico: hashing de palavras normalizado (L2).
+
+    Textos com palavras em comum ficam próximos, o suficiente para exercitar
+    cache, índice e recuperação offline. Conta chamadas e textos embedados.
+    """
+
+    def __init__(self, dimensao: int = 256):
+        self.dimensao = dimensao
+        self.chamadas = 0
+        self.textos_embedados = 0
+
+    def _vetor(self, texto: str) -> list:
+        v = np.zeros(self.dimensao, dtype=np.float32)
+        for palavra in re.findall(r"\w+", texto.lower()):
+            h = int.from_bytes(hashlib.blake2b(palavra.encode("utf-8"), digest_size=8).digest(), "little")
+            v[h % self.dimensao] += 1.0 if (h >> 63) else -1.0
+        norma = np.linalg.norm(v)
+        return (v / norma if norma else v).tolist()
+
+    def embed_documents(self, texts: list) -> list:
+        self.chamadas += 1
+        self.textos_embedados += len(texts)
+        return [self._vetor(t) for t in texts]
+
+    def embed_query(self, text: str) -> list:
+        self.chamadas += 1
+        self.textos_embedados += 1
+        return self._vetor(text)
@@ -0,0 +1,180 @@
+# src/cache_respostas.py
+"""
+Cache de respostas do RAG para perguntas repetidas.
+
+A chave é a pergunta normalizada (minúsculas, sem acentos e pontuação) mais
+a versão do índice, gravada pelo create_index.py em index/versao.txt a cada
+atualização. Quando o índice muda, as respostas antigas deixam de valer e
+são descartadas.
+
+Opcionalmente, perguntas quase iguais ("qual o prazo do drawback?" x
+"prazo do drawback, qual é?") também acertam o cache, por similaridade de
+cosseno entre os embeddings das perguntas, desde que citem exatamente os
+mesmos termos com dígitos: "art. 14" e "art. 15", ou duas NCMs, têm
+embeddings quase iguais e respostas diferentes.
+
+As respostas guardam as fontes (documento e página) junto com o texto. O
+JSON leva só perguntas e respostas; os vetores ficam num .npy ao lado, uma
+linha por entrada, gravada no lugar (memmap) sem reescrever as outras.
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+from pathlib import Path
+
+import numpy as np
+
+from bm25 import normalizar, termos_exatos, tokenizar
+
+LIMIAR_SEMANTICO = 0.95
+MAX_ENTRADAS = 1000
+
+
+def normalizar_pergunta(pergunta: str) -> str:
+    texto = re.sub(r"[^\w\s/.-]", " ", normalizar(pergunta))
+    return " ".join(texto.split()).strip(" .-")
+
+
+def termos_da_pergunta(pergunta: str) -> list:
+    """Artigos, leis e NCMs citados: precisam bater para um acerto semântico"""
+    return sorted(termos_exatos(tokenizar(pergunta)))
+
+
+def versao_do_manifesto(manifesto: dict) -> str:
+    """Versão do índice: hash do manifesto (muda a cada inclusão/remoção)"""
+    return hashlib.sha256(json.dumps(manifesto, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+
+
+class CacheRespostas:
+    def __init__(self, arquivo, arquivo_versao, limiar_semantico: float = LIMIAR_SEMANTICO,
+                 max_entradas: int = MAX_ENTRADAS):
+        """limiar_semantico=None desliga a busca por perguntas parecidas"""
+        self.arquivo = Path(arquivo)
+        self.arquivo_vetores = self.arquivo.with_suffix(".npy")
+        self.arquivo_versao = Path(arquivo_versao)
+        self.limiar_semantico = limiar_semantico
+        self.max_entradas = max_entradas
+        self._lock = threading.Lock()
+        self._mtime_versao = None
+        self.versao = None
+        self.entradas = {}  # pergunta normalizada -> {"resposta": {...}, "termos": [...], "linha": n}
+        # Uma linha por entrada (+1 folga); uma linha liberada só é reusada
+        # depois que o JSON sem a entrada antiga foi gravado
+        self._vetores = None
+        self._livres = []
+        self._liberadas = []
+        if self.arquivo.exists():
+            dados = json.loads(self.arquivo.read_text(encoding="utf-8"))
+            self.versao = dados["versao"]
+            self.entradas = dados["entradas"]
+            for entrada in self.entradas.values():
+                entrada.pop("vetor", None)  # formato antigo, com o vetor dentro do JSON
+        if self.arquivo_vetores.exists():
+            vetores = np.load(self.arquivo_vetores, mmap_mode="r+")
+            if vetores.ndim == 2 and len(vetores) == self.max_entradas + 1:
+                self._vetores = vetores
+        self._conferir_versao()
+        self._liberar_linhas_sem_entrada()
+
+    def _liberar_linhas_sem_entrada(self):
+        if self._vetores is None:
+            for entrada in self.entradas.values():
+                entrada["linha"] = None
+            self._livres = []
+        else:
+            usadas = {e.get("linha") for e in self.entradas.values()}
+            self._livres = [linha for linha in range(len(self._vetores)) if linha not in usadas]
+        self._liberadas = []
+
+    def _ler_versao(self):
+        if not self.arquivo_versao.exists():
+            return None
+        return self.arquivo_versao.read_text(encoding="utf-8").strip()
+
+    def _conferir_versao(self):
+        """Descarta tudo se o índice foi reconstruído desde a última consulta"""
+        mtime = self.arquivo_versao.stat().st_mtime if self.arquivo_versao.exists() else None
+        if mtime == self._mtime_versao and self._mtime_versao is not None:
+            return
+        self._mtime_versao = mtime
+        versao = self._ler_versao()
+        if versao != self.versao:
+            self.versao = versao
+            self.entradas = {}
+            self._liberar_linhas_sem_entrada()
+
+    def __len__(self):
+        return len(self.entradas)
+
+    def buscar(self, pergunta: str, vetor: list = None):
+        """Resposta guardada para a pergunta (ou uma quase igual), ou None"""
+        with self._lock:
+            self._conferir_versao()
+            if self.versao is None:
+                return None
+            entrada = self.entradas.get(normalizar_pergunta(pergunta))
+            if entrada is None and vetor is not None and self.limiar_semantico is not None:
+                entrada = self._mais_parecida(vetor, termos_da_pergunta(pergunta))
+            return None if entrada is None else dict(entrada["resposta"], pergunta=pergunta)
+
+    def _mais_parecida(self, vetor: list, termos: list):
+        candidatas = [e for e in self.entradas.values()
+                      if e.get("linha") is not None and e.get("termos") == termos]
+        if not candidatas:
+            return None
+        matriz = np.asarray(self._vetores[[e["linha"] for e in candidatas]], dtype=np.float32)
+        v = np.asarray(vetor, dtype=np.float32)
+        if matriz.shape[1] != len(v):
+            return None
+        similaridades = matriz @ v / (np.linalg.norm(matriz, axis=1) * np.linalg.norm(v) + 1e-12)
+        melhor = int(np.argmax(similaridades))
+        return candidatas[melhor] if similaridades[melhor] >= self.limiar_semantico else None
+
+    def guardar(self, pergunta: str, resposta: dict, vetor: list = None, versao: str = None):
+        """`versao`: versão do índice que gerou a resposta; se já não for a atual, nada é guardado"""
+        with self._lock:
+            self._conferir_versao()
+            if self.versao is None or (versao is not None and versao != self.versao):
+                return
+            chave = normalizar_pergunta(pergunta)
+            antiga = self.entradas.pop(chave, None)
+            if antiga is not None:
+                self._liberar(antiga)
+            self.entradas[chave] = {
+                "resposta": resposta,
+                "termos": termos_da_pergunta(pergunta),
+                "linha": None if vetor is None else self._gravar_vetor(vetor),
+            }
+            while len(self.entradas) > self.max_entradas:
+                self._liberar(self.entradas.pop(next(iter(self.entradas))))  # a mais antiga sai primeiro
+            self._salvar()
+            self._livres.extend(self._liberadas)
+            self._liberadas = []
+
+    def _liberar(self, entrada: dict):
+        if entrada.get("linha") is not None:
+            self._liberadas.append(entrada["linha"])
+
+    def _gravar_vetor(self, vetor: list) -> int:
+        v = np.asarray(vetor, dtype=np.float32)
+        if self._vetores is None or self._vetores.shape[1] != len(v):
+            self.arquivo_vetores.parent.mkdir(parents=True, exist_ok=True)
+            self._vetores = np.lib.format.open_memmap(self.arquivo_vetores, mode="w+", dtype=np.float32,
+                                                      shape=(self.max_entradas + 1, len(v)))
+            for entrada in self.entradas.values():
+                entrada["linha"] = None
+            self._livres, self._liberadas = list(range(len(self._vetores))), []
+        linha = self._livres.pop()
+        self._vetores[linha] = v
+        self._vetores.flush()
+        return linha
+
+    def _salvar(self):
+        self.arquivo.parent.mkdir(parents=True, exist_ok=True)
+        temporario = self.arquivo.with_suffix(".tmp")
+        temporario.write_text(json.dumps({"versao": self.versao, "entradas": self.entradas},
+                                         ensure_ascii=False), encoding="utf-8")
+        os.replace(temporario, self.arquivo)
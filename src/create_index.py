@@ -1,13 +1,54 @@
 # src/create_index.py
+"""
+Cria/atualiza o índice FAISS a partir dos documentos de 'data/'.
+
+Por padrão a atualização é incremental: um manifesto (index/manifesto.json)
+guarda o hash de cada arquivo e os ids dos seus chunks. Só arquivos novos ou
+alterados são carregados, divididos e enviados para embedding; chunks que
+sumiram (arquivo apagado ou trecho alterado) têm os vetores removidos do
+índice, que é atualizado no lugar. PDFs corrompidos ou só com imagem
+(relatório do verificar_pdfs.py) ficam de fora. O índice lexical BM25 (index/bm25.pkl),
+usado na busca híbrida, acompanha as mesmas inclusões e remoções.
+
+Os arquivos são lidos e divididos num pool de processos; os chunks vão sendo
+agrupados em lotes de embedding enviados em paralelo (com limite de
+requisições simultâneas) enquanto os arquivos seguintes ainda são lidos, e
+cada lote embedado vai direto para o FAISS e o BM25: a memória não cresce
+com o número de chunks novos.
+
+O tipo do índice (flat, ivf_flat, ivf_pq, hnsw) é escolhido em TIPO_INDICE;
+IVF/PQ são treinados com os primeiros AMOSTRA_TREINO vetores e retreinados
+quando o corpus passa de FATOR_RETREINO vezes o do treino; HNSW, que não
+remove vetores, é reconstruído a partir dos vetores que já estão no índice.
+Trocar o tipo ou os parâmetros força reconstrução. Veja benchmark_indices.py
+para escolher.
+
+Uso:
+    python src/create_index.py              # incremental
+    python src/create_index.py --completo   # reconstrói do zero
+"""
+import hashlib
+import json
 import os
-import glob
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from pathlib import Path
-from python_dotenv import load_dotenv
+from dotenv import load_dotenv
+
+import numpy as np
 
 from langchain.document_loaders import TextLoader, PyPDFLoader, CSVLoader
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain.embeddings import OpenAIEmbeddings
 from langchain.vectorstores import FAISS
+from langchain.docstore.in_memory import InMemoryDocstore
+
+from bm25 import IndiceBM25
+from cache_embeddings import CacheEmbeddings
+from cache_respostas import versao_do_manifesto
+from indices_faiss import TIPOS_COM_REMOCAO, indice_treinado, vetores_armazenados
+from verificar_pdfs import arquivos_excluidos, hash_arquivo, verificar_diretorio
 
 # Carregar variáveis de ambiente (.env)
 load_dotenv()
@@ -16,57 +57,401 @@ load_dotenv()
 PROJECT_ROOT = Path(__file__).parent.parent  # tributec-ai/
 DATA_DIR = PROJECT_ROOT / "data"
 INDEX_DIR = PROJECT_ROOT / "index"
+MANIFESTO = INDEX_DIR / "manifesto.json"
+BM25_ARQUIVO = INDEX_DIR / "bm25.pkl"
+VERSAO_ARQUIVO = INDEX_DIR / "versao.txt"  # muda a cada atualização: invalida o cache de respostas
+CACHE_EMBEDDINGS_DIR = PROJECT_ROOT / "cache" / "embeddings"
 
 CHUNK_SIZE = 1000
 CHUNK_OVERLAP = 200
+MODELO_EMBEDDINGS = "text-embedding-3-small"
+
+# Tipo do índice: "flat" (exato), "ivf_flat", "ivf_pq" ou "hnsw"
+TIPO_INDICE = "flat"
+PARAMETROS_INDICE = {}   # ex.: {"nlist": 1024, "m_pq": 96} ou {"hnsw_m": 32}
+
+# Verifica os PDFs antes (com cache por hash) e deixa de fora corrompidos/só imagem
+VERIFICAR_PDFS = True
+
+WORKERS_LEITURA = None           # processos para ler/dividir (None = nº de CPUs)
+TAMANHO_LOTE_EMBEDDINGS = 256    # chunks por requisição de embedding
+MAX_REQUISICOES_EMBEDDINGS = 4   # requisições de embedding simultâneas
+AMOSTRA_TREINO = 50_000          # vetores guardados para treinar IVF/PQ antes do primeiro add
+FATOR_RETREINO = 4               # IVF/PQ é retreinado quando o corpus passa de 4x o do último treino
+BLOCO_RECONSTRUCAO = 10_000      # vetores lidos do índice por vez ao reconstruir
+
+LOADERS = {
+    ".txt": lambda caminho: TextLoader(caminho, encoding="utf-8"),
+    ".pdf": lambda caminho: PyPDFLoader(str(caminho)),
+    ".csv": lambda caminho: CSVLoader(str(caminho)),
+}
+
+
+def listar_documentos(data_dir: Path = DATA_DIR) -> dict:
+    """Arquivos suportados de data/ -> caminho relativo (chave do manifesto)"""
+    arquivos = {}
+    for extensao in LOADERS:
+        for caminho in sorted(data_dir.glob(f"*{extensao}")):
+            arquivos[caminho.relative_to(data_dir).as_posix()] = caminho
+    return arquivos
+
+
+def carregar_documento(caminho: Path) -> list:
+    print(f"  {caminho.suffix[1:].upper()}: {caminho.name}")
+    return LOADERS[caminho.suffix.lower()](caminho).load()
+
+
+def criar_splitter() -> RecursiveCharacterTextSplitter:
+    return RecursiveCharacterTextSplitter(
+        chunk_size=CHUNK_SIZE,
+        chunk_overlap=CHUNK_OVERLAP,
+        length_function=len,
+    )
+
+
+def ids_dos_chunks(arquivo: str, chunks: list) -> list:
+    """
+    Id estável por chunk: hash de (arquivo, página, texto).
+
+    Trechos que não mudaram mantêm o id entre execuções, então só os
+    alterados são embedados de novo. Repetições exatas no mesmo arquivo
+    recebem um sufixo de ocorrência.
+    """
+    ids, vistos = [], {}
+    for chunk in chunks:
+        chave = f"{arquivo}\0{chunk.metadata.get('page', '')}\0{chunk.page_content}"
+        base = hashlib.sha256(chave.encode("utf-8")).hexdigest()[:32]
+        vistos[base] = vistos.get(base, 0) + 1
+        ids.append(base if vistos[base] == 1 else f"{base}-{vistos[base]}")
+    return ids
+
+
+def _processar_arquivo(tarefa: tuple) -> tuple:
+    """Lê e divide um arquivo (roda num processo do pool)"""
+    nome, caminho = tarefa
+    chunks = criar_splitter().split_documents(carregar_documento(Path(caminho)))
+    return nome, chunks, ids_dos_chunks(nome, chunks)
+
+
+def processar_documentos(tarefas: list, workers: int = WORKERS_LEITURA):
+    """Gera (nome, chunks, ids) de cada arquivo conforme cada um fica pronto"""
+    if workers == 1 or len(tarefas) <= 1:
+        for tarefa in tarefas:
+            yield _processar_arquivo(tarefa)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futuros = [pool.submit(_processar_arquivo, tarefa) for tarefa in tarefas]
+        for futuro in as_completed(futuros):
+            yield futuro.result()
+
+
+class EmbedderEmLotes:
+    """
+    Agrupa chunks em lotes, embeda cada lote numa thread e entrega os
+    vetores a `gravar(pares, metadados, ids)` na ordem de envio.
+
+    No máximo 2 x `max_requisicoes` lotes ficam em andamento ou esperando
+    gravação; passado esse limite adicionar() espera o mais antigo, o que
+    segura a leitura dos arquivos em vez de acumular chunks e vetores.
+    """
+
+    def __init__(self, embeddings, gravar, tamanho_lote: int = TAMANHO_LOTE_EMBEDDINGS,
+                 max_requisicoes: int = MAX_REQUISICOES_EMBEDDINGS):
+        self.embeddings = embeddings
+        self.gravar = gravar
+        self.tamanho_lote = tamanho_lote
+        self.limite = 2 * max_requisicoes
+        self._pool = ThreadPoolExecutor(max_workers=max_requisicoes)
+        self._lote = []
+        self._enviados = deque()  # (chunks, ids, futuro) na ordem de envio
+
+    def adicionar(self, chunk, id_chunk: str):
+        self._lote.append((chunk, id_chunk))
+        if len(self._lote) >= self.tamanho_lote:
+            self._enviar()
+
+    def _enviar(self):
+        if not self._lote:
+            return
+        while len(self._enviados) >= self.limite:
+            self._gravar_primeiro()
+        chunks, ids = zip(*self._lote)
+        self._lote = []
+        futuro = self._pool.submit(self.embeddings.embed_documents, [c.page_content for c in chunks])
+        self._enviados.append((chunks, ids, futuro))
+        while self._enviados and self._enviados[0][2].done():
+            self._gravar_primeiro()
+
+    def _gravar_primeiro(self):
+        chunks, ids, futuro = self._enviados.popleft()
+        vetores = futuro.result()
+        self.gravar([(c.page_content, v) for c, v in zip(chunks, vetores)],
+                    [c.metadata for c in chunks], list(ids))
+
+    def cancelar(self):
+        self._pool.shutdown(cancel_futures=True)
+
+    def finalizar(self):
+        """Espera e grava os lotes que faltam"""
+        self._enviar()
+        try:
+            while self._enviados:
+                self._gravar_primeiro()
+        finally:
+            self._pool.shutdown()
+
+
+class GravadorIndice:
+    """
+    Recebe os lotes embedados e grava no FAISS e no BM25.
+
+    Sem índice anterior, o FAISS nasce no primeiro lote (flat/HNSW) ou, para
+    IVF/PQ, que precisam de treino antes do primeiro add, depois de juntar
+    AMOSTRA_TREINO vetores (ou no fim, se o corpus for menor).
+    """
+
+    def __init__(self, db, embeddings, bm25: IndiceBM25 = None, n_vetores: int = None):
+        self.db = db
+        self.embeddings = embeddings
+        self.bm25 = bm25
+        self.n_vetores = n_vetores  # tamanho final do corpus, se conhecido (dimensiona o IVF)
+        self.novos = 0
+        self._pendentes = []  # (textos, vetores, metadados, ids) esperando o treino
+        self._n_pendentes = 0
+
+    def __call__(self, pares: list, metadados: list, ids: list):
+        if self.bm25 is not None:
+            for (texto, _), id_chunk in zip(pares, ids):
+                self.bm25.adicionar(id_chunk, texto)
+        self.novos += len(ids)
+        if self.db is not None:
+            self.db.add_embeddings(pares, metadatas=metadados, ids=ids)
+            return
+        vetores = np.array([vetor for _, vetor in pares], dtype=np.float32)
+        self._pendentes.append(([texto for texto, _ in pares], vetores, metadados, ids))
+        self._n_pendentes += len(ids)
+        if TIPO_INDICE in ("flat", "hnsw") or self._n_pendentes >= AMOSTRA_TREINO:
+            self._criar_indice()
+
+    def _criar_indice(self):
+        vetores = np.concatenate([v for _, v, _, _ in self._pendentes])
+        if TIPO_INDICE not in ("flat", "hnsw"):
+            print(f"Treinando índice {TIPO_INDICE} com {len(vetores)} vetores...")
+        indice = indice_treinado(vetores, TIPO_INDICE, n_vetores=self.n_vetores, **PARAMETROS_INDICE)
+        self.db = FAISS(self.embeddings, indice, InMemoryDocstore(), {})
+        pendentes, self._pendentes, self._n_pendentes = self._pendentes, [], 0
+        for textos, vetores, metadados, ids in pendentes:
+            self.db.add_embeddings(zip(textos, vetores), metadatas=metadados, ids=ids)
+
+    def finalizar(self):
+        """FAISS com todos os lotes gravados (None se nenhum chegou)"""
+        if self._pendentes:
+            self._criar_indice()
+        return self.db
+
+
+def carregar_manifesto() -> dict:
+    if not MANIFESTO.exists():
+        return {}
+    return json.loads(MANIFESTO.read_text(encoding="utf-8"))
+
+
+def salvar_manifesto(manifesto: dict):
+    # Escrita atômica: um manifesto pela metade forçaria reconstrução
+    temporario = MANIFESTO.with_suffix(".tmp")
+    temporario.write_text(json.dumps(manifesto, ensure_ascii=False, indent=1), encoding="utf-8")
+    os.replace(temporario, MANIFESTO)
+
+
+def gravar_versao(manifesto: dict):
+    """Versão do índice lida pelo cache de respostas; só é reescrita se mudou"""
+    versao = versao_do_manifesto(manifesto)
+    if not VERSAO_ARQUIVO.exists() or VERSAO_ARQUIVO.read_text(encoding="utf-8") != versao:
+        VERSAO_ARQUIVO.write_text(versao, encoding="utf-8")
+
+
+def apagar_indice():
+    """Remove índice, manifesto e BM25 antigos: sem documentos, nada pode ser recuperado"""
+    for arquivo in (INDEX_DIR / "index.faiss", INDEX_DIR / "index.pkl", BM25_ARQUIVO, MANIFESTO,
+                    VERSAO_ARQUIVO):
+        if arquivo.exists():
+            print(f"  Apagando {arquivo.name}")
+            arquivo.unlink()
+
+
+def parametros_indice() -> dict:
+    """Parâmetros que, se mudarem, invalidam todos os vetores"""
+    return {"modelo": MODELO_EMBEDDINGS, "chunk_size": CHUNK_SIZE, "chunk_overlap": CHUNK_OVERLAP,
+            "tipo_indice": TIPO_INDICE, "parametros_indice": PARAMETROS_INDICE}
+
+
+def criar_embeddings():
+    """OpenAI com cache local: chunks já embedados não voltam para a API"""
+    return CacheEmbeddings(OpenAIEmbeddings(model=MODELO_EMBEDDINGS), MODELO_EMBEDDINGS,
+                           CACHE_EMBEDDINGS_DIR)
+
+
+def _indice_consistente(db, manifesto: dict) -> bool:
+    ids_manifesto = {i for info in manifesto["arquivos"].values() for i in info["chunks"]}
+    return ids_manifesto == set(db.index_to_docstore_id.values())
+
+
+def reconstruir_sem(db, ids_remover, embeddings):
+    """
+    Novo índice só com os chunks que ficam, sem chamar o embedder. Serve ao
+    HNSW, que não tem remove_ids, e ao retreino do IVF/PQ quando o corpus
+    cresce.
+
+    Os vetores vêm do CacheEmbeddings (os originais, em float32); só os que
+    saíram do cache são lidos do próprio índice. No IVF-PQ esses voltam
+    decodificados dos códigos, e retreinar com eles somaria o erro do PQ.
+    """
+    remover = set(ids_remover)
+    posicoes = db.index_to_docstore_id  # posição no FAISS -> id, contíguas de 0 a n-1
+    gravador = GravadorIndice(None, embeddings, n_vetores=len(posicoes) - len(remover))
+    for inicio in range(0, len(posicoes), BLOCO_RECONSTRUCAO):
+        fim = min(inicio + BLOCO_RECONSTRUCAO, len(posicoes))
+        vetores = vetores_armazenados(db.index, inicio, fim)
+        ficam = [(posicao, posicoes[posicao]) for posicao in range(inicio, fim)
+                 if posicoes[posicao] not in remover]
+        if not ficam:
+            continue
+        documentos = [db.docstore.search(id_chunk) for _, id_chunk in ficam]
+        textos = [doc.page_content for doc in documentos]
+        originais = (embeddings.vetores_guardados(textos) if hasattr(embeddings, "vetores_guardados")
+                     else [None] * len(textos))
+        pares = [(texto, vetores[posicao - inicio] if original is None else original)
+                 for (posicao, _), texto, original in zip(ficam, textos, originais)]
+        gravador(pares, [doc.metadata for doc in documentos], [id_chunk for _, id_chunk in ficam])
+    return gravador.finalizar()
+
+
+def precisa_retreinar(db, manifesto: dict) -> bool:
+    """IVF/PQ treinado com um corpus bem menor que o atual: listas desbalanceadas"""
+    if TIPO_INDICE not in ("ivf_flat", "ivf_pq"):
+        return False
+    return db.index.ntotal > FATOR_RETREINO * manifesto.get("vetores_no_treino", db.index.ntotal)
+
+
+def carregar_bm25(do_zero: bool = False) -> IndiceBM25:
+    if not do_zero and BM25_ARQUIVO.exists():
+        return IndiceBM25.carregar(BM25_ARQUIVO)
+    return IndiceBM25()
+
+
+def salvar_bm25(bm25: IndiceBM25, db, ids_remover=()) -> IndiceBM25:
+    """Aplica as remoções do FAISS no BM25 e grava; reconstrói do docstore se divergir"""
+    for id_chunk in ids_remover:
+        bm25.remover(id_chunk)
+    ids_faiss = set(db.index_to_docstore_id.values())
+    if set(bm25.tamanhos) != ids_faiss:
+        print("Reconstruindo índice BM25 a partir do docstore...")
+        bm25 = IndiceBM25()
+        for id_chunk in ids_faiss:
+            bm25.adicionar(id_chunk, db.docstore.search(id_chunk).page_content)
+    bm25.salvar(BM25_ARQUIVO)
+    return bm25
+
+
+def indexar(completo: bool = False, embeddings=None, workers: int = WORKERS_LEITURA,
+            tamanho_lote: int = TAMANHO_LOTE_EMBEDDINGS,
+            max_requisicoes: int = MAX_REQUISICOES_EMBEDDINGS):
+    """
+    Atualiza o índice de INDEX_DIR com os documentos de DATA_DIR.
+
+    Retorna o FAISS atualizado, ou None se não houver documentos (nesse caso
+    os arquivos do índice anterior são apagados).
+    """
+    INDEX_DIR.mkdir(exist_ok=True)
+    embeddings = criar_embeddings() if embeddings is None else embeddings  # CacheEmbeddings vazio é falsy
+    arquivos = listar_documentos(DATA_DIR)
+    if VERIFICAR_PDFS and any(nome.lower().endswith(".pdf") for nome in arquivos):
+        for nome, status in arquivos_excluidos(verificar_diretorio(DATA_DIR, workers=workers)).items():
+            if arquivos.pop(nome, None) is not None:
+                print(f"  ⚠️ Ignorando {nome}: {status}")
+    hashes = {nome: hash_arquivo(caminho) for nome, caminho in arquivos.items()}
+
+    manifesto = carregar_manifesto()
+    db = None
+    if (not completo and manifesto.get("parametros") == parametros_indice()
+            and (INDEX_DIR / "index.faiss").exists()):
+        db = FAISS.load_local(INDEX_DIR, embeddings, allow_dangerous_deserialization=True)
+        if not _indice_consistente(db, manifesto):
+            print("⚠️ Manifesto e índice divergem: reconstruindo do zero.")
+            db = None
+    if db is None:
+        manifesto = {"parametros": parametros_indice(), "arquivos": {}}
+    else:
+        manifesto.setdefault("vetores_no_treino", db.index.ntotal)
+    novo_indice = db is None
+
+    anteriores = manifesto["arquivos"]
+    alterados = [nome for nome in arquivos if anteriores.get(nome, {}).get("hash") != hashes[nome]]
+    removidos = [nome for nome in anteriores if nome not in arquivos]
+
+    if db is not None and not alterados and not removidos:
+        print("✅ Índice já está em dia: nenhum documento novo, alterado ou removido.")
+        if not BM25_ARQUIVO.exists():
+            salvar_bm25(IndiceBM25(), db)
+        gravar_versao(manifesto)
+        return db
+
+    print(f"Carregando {len(alterados)} documento(s) novo(s)/alterado(s) de 'data/'...")
+    gravador = GravadorIndice(db, embeddings, carregar_bm25(do_zero=db is None))
+    embedder = EmbedderEmLotes(embeddings, gravador, tamanho_lote, max_requisicoes)
+    ids_remover = []
+    tarefas = [(nome, str(arquivos[nome])) for nome in alterados]
+    try:
+        for nome, chunks, ids in processar_documentos(tarefas, workers):
+            antigos = set(anteriores.get(nome, {}).get("chunks", []))
+            for chunk, id_chunk in zip(chunks, ids):
+                if id_chunk not in antigos:
+                    embedder.adicionar(chunk, id_chunk)
+            ids_remover.extend(antigos - set(ids))
+            anteriores[nome] = {"hash": hashes[nome], "chunks": ids}
+    except BaseException:
+        embedder.cancelar()
+        raise
+    embedder.finalizar()
+    db = gravador.finalizar()
+    if hasattr(embeddings, "salvar"):
+        embeddings.salvar()  # o cache de embeddings grava o índice uma vez por indexação
+    for nome in removidos:
+        print(f"  Removido: {nome}")
+        ids_remover.extend(anteriores.pop(nome)["chunks"])
+
+    if ids_remover and TIPO_INDICE not in TIPOS_COM_REMOCAO:
+        db = reconstruir_sem(db, ids_remover, embeddings)
+        novo_indice = True
+    elif ids_remover:
+        db.delete(ids_remover)
+    if db is not None and not novo_indice and precisa_retreinar(db, manifesto):
+        print(f"Corpus passou de {FATOR_RETREINO}x o do último treino: retreinando o {TIPO_INDICE}...")
+        db = reconstruir_sem(db, [], embeddings)
+        novo_indice = True
+
+    if not anteriores or db is None or not db.index_to_docstore_id:
+        print("Nenhum arquivo .txt, .pdf ou .csv encontrado em data/!")
+        apagar_indice()
+        return None
+
+    print(f"Chunks novos: {gravador.novos} | vetores removidos: {len(ids_remover)}")
+    print("Salvando índice...")
+    if novo_indice:
+        manifesto["vetores_no_treino"] = db.index.ntotal
+    db.save_local(INDEX_DIR)
+    salvar_bm25(gravador.bm25, db, ids_remover)
+    salvar_manifesto(manifesto)
+    gravar_versao(manifesto)
+    return db
+
+
+# === EXECUÇÃO ===
+if __name__ == "__main__":
+    db = indexar(completo="--completo" in sys.argv[1:])
+    if db is None:
+        sys.exit(1)
 
-# Criar pastas
-INDEX_DIR.mkdir(exist_ok=True)
-
-print("Carregando documentos de 'data/'...")
-
-documents = []
-
-# --- TXT ---
-for file_path in DATA_DIR.glob("*.txt"):
-    print(f"  TXT: {file_path.name}")
-    loader = TextLoader(file_path, encoding="utf-8")
-    documents.extend(loader.load())
-
-# --- PDF ---
-for file_path in DATA_DIR.glob("*.pdf"):
-    print(f"  PDF: {file_path.name}")
-    loader = PyPDFLoader(str(file_path))
-    documents.extend(loader.load())
-
-# --- CSV ---
-for file_path in DATA_DIR.glob("*.csv"):
-    print(f"  CSV: {file_path.name}")
-    loader = CSVLoader(str(file_path))
-    documents.extend(loader.load())
-
-if not documents:
-    print("Nenhum arquivo .txt, .pdf ou .csv encontrado em data/!")
-    exit()
-
-print(f"Total de páginas/documentos carregados: {len(documents)}")
-
-# Dividir em chunks
-print("Dividindo em chunks...")
-splitter = RecursiveCharacterTextSplitter(
-    chunk_size=CHUNK_SIZE,
-    chunk_overlap=CHUNK_OVERLAP,
-    length_function=len,
-)
-chunks = splitter.split_documents(documents)
-print(f"Total de chunks: {len(chunks)}")
-
-# Criar índice FAISS
-print("Gerando embeddings e salvando índice...")
-embeddings = OpenAIEmbeddings(model="text-embedding-3-small")
-db = FAISS.from_documents(chunks, embeddings)
-db.save_local(INDEX_DIR)
-
-print(f"\nÍNDICE CRIADO COM SUCESSO!")
-print(f"Local: {INDEX_DIR}")
-print(f"Pronto para perguntas com query_rag.py!")
\ No newline at end of file
+    print(f"\nÍNDICE PRONTO! ({db.index.ntotal} vetores)")
+    print(f"Local: {INDEX_DIR}")
+    print(f"Pronto para perguntas com query_rag.py!")
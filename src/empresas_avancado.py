@@ -1,10 +1,12 @@
 # empresas_avancado.py - SISTEMA DE CONSULTORIA TRIBUTÁRIA AVANÇADO
-import random
+import heapq
 import matplotlib.pyplot as plt
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
-from icms_importacao_rj import icms_importacao_rj
+from icms_rj import CHAVES_RESULTADO, icms_importacao_rj_lote
+from motor_tributario import arredondar_decimal
+from ptax import armazem_padrao
 
 # 🎯 CONFIGURAÇÃO
 import matplotlib
@@ -15,32 +17,32 @@ empresas_avancado = {
     'TechGlobal Inc': {
         'cnpj': '12.345.678/0001-90', 'setor': 'Tecnologia', 'regime': 'Lucro Real',
         'porte': 'Grande', 'estado': 'SP', 'faturamento_anual': 500000000,
-        'historico_importacoes': [], 'consultor_tributario': 'Dr. Silva'
+        'consultor_tributario': 'Dr. Silva'
     },
     'AutoParts BR': {
         'cnpj': '98.765.432/0001-10', 'setor': 'Automotivo', 'regime': 'Lucro Presumido', 
         'porte': 'Médio', 'estado': 'RJ', 'faturamento_anual': 150000000,
-        'historico_importacoes': [], 'consultor_tributario': 'Dra. Santos'
+        'consultor_tributario': 'Dra. Santos'
     },
     'PharmaCorp LTDA': {
         'cnpj': '45.678.901/0001-23', 'setor': 'Farmacêutico', 'regime': 'Lucro Real',
         'porte': 'Grande', 'estado': 'SP', 'faturamento_anual': 800000000,
-        'historico_importacoes': [], 'consultor_tributario': 'Dr. Costa'
+        'consultor_tributario': 'Dr. Costa'
     },
     'AgroFortaleza': {
         'cnpj': '34.567.890/0001-34', 'setor': 'Agronegócio', 'regime': 'Simples Nacional',
         'porte': 'Pequeno', 'estado': 'MT', 'faturamento_anual': 200000000,
-        'historico_importacoes': [], 'consultor_tributario': 'Dra. Oliveira'
+        'consultor_tributario': 'Dra. Oliveira'
     },
     'VarejoMax': {
         'cnpj': '23.456.789/0001-45', 'setor': 'Varejo', 'regime': 'Lucro Presumido',
         'porte': 'Grande', 'estado': 'SP', 'faturamento_anual': 1200000000,
-        'historico_importacoes': [], 'consultor_tributario': 'Dr. Rodrigues'
+        'consultor_tributario': 'Dr. Rodrigues'
     },
     'QuimicaBrasil': {
         'cnpj': '56.789.012/0001-56', 'setor': 'Química', 'regime': 'Lucro Real',
         'porte': 'Médio', 'estado': 'RS', 'faturamento_anual': 300000000,
-        'historico_importacoes': [], 'consultor_tributario': 'Dra. Fernandes'
+        'consultor_tributario': 'Dra. Fernandes'
     }
 }
 
@@ -78,109 +80,257 @@ produtos_detalhados = {
     }
 }
 
-def simular_importacao_inteligente(nome_empresa, num_operacoes=50):
+# 🗃️ ARMAZÉM COLUNAR DE OPERAÇÕES
+COLUNAS_OPERACAO = ('valor_fob_usd', 'cambio', 'aliquota_icms') + CHAVES_RESULTADO
+
+# 📊 AGREGADOS POR EMPRESA (atualizados a cada lote)
+TOP_OPERACOES = 3
+
+class AgregadosEmpresas:
+    """
+    Totais por empresa mantidos de forma incremental.
+
+    Cada lote gravado no armazém soma suas contagens/totais aqui (bincount
+    pelo código da empresa) e atualiza as operações mais tributadas de cada
+    empresa. Os relatórios só leem estes arrays: custo proporcional ao
+    número de empresas, não ao de operações.
+    """
+
+    def __init__(self):
+        self.total_operacoes = np.zeros(0, dtype=np.int64)
+        self.total_tributos = np.zeros(0)
+        self.total_icms = np.zeros(0)
+        self.total_valor_brl = np.zeros(0)
+        self.top_operacoes = []  # por empresa: [(total_tributos, linha)] do maior pro menor
+
+    def _garantir_empresas(self, n):
+        falta = n - len(self.total_operacoes)
+        if falta <= 0:
+            return
+        self.total_operacoes = np.concatenate([self.total_operacoes, np.zeros(falta, dtype=np.int64)])
+        self.total_tributos = np.concatenate([self.total_tributos, np.zeros(falta)])
+        self.total_icms = np.concatenate([self.total_icms, np.zeros(falta)])
+        self.total_valor_brl = np.concatenate([self.total_valor_brl, np.zeros(falta)])
+        self.top_operacoes.extend([] for _ in range(falta))
+
+    def atualizar(self, codigos, linhas, total_tributos, icms_devido, valor_brl, n_empresas):
+        """Soma um lote (arrays alinhados) aos totais das empresas"""
+        self._garantir_empresas(n_empresas)
+        self.total_operacoes += np.bincount(codigos, minlength=n_empresas)
+        self.total_tributos += np.bincount(codigos, weights=total_tributos, minlength=n_empresas)
+        self.total_icms += np.bincount(codigos, weights=icms_devido, minlength=n_empresas)
+        self.total_valor_brl += np.bincount(codigos, weights=valor_brl, minlength=n_empresas)
+        for codigo in np.unique(codigos):
+            mascara = codigos == codigo
+            candidatos = self.top_operacoes[codigo] + list(zip(total_tributos[mascara].tolist(),
+                                                                linhas[mascara].tolist()))
+            self.top_operacoes[codigo] = heapq.nlargest(TOP_OPERACOES, candidatos, key=lambda c: c[0])
+
+    def metricas(self, empresas) -> pd.DataFrame:
+        """Métricas por empresa (só as que têm operações), indexadas pelo nome"""
+        with np.errstate(divide='ignore', invalid='ignore'):
+            metricas = pd.DataFrame({
+                'total_operacoes': self.total_operacoes,
+                'total_tributos': self.total_tributos,
+                'total_icms': self.total_icms,
+                'total_valor_brl': self.total_valor_brl,
+                'eficiencia_tributaria': self.total_tributos / self.total_valor_brl * 100,
+                'tributos_por_operacao': self.total_tributos / self.total_operacoes,
+            }, index=pd.Index(empresas, name='empresa'))
+        return metricas[metricas['total_operacoes'] > 0]
+
+class ArmazemOperacoes:
+    """
+    Operações de todas as empresas em colunas (struct-of-arrays).
+
+    Cada coluna numérica é um array float64 com capacidade que dobra quando
+    enche; empresa e produto ficam como códigos inteiros. Os relatórios
+    leem os totais de `agregados`, atualizados a cada lote; o DataFrame
+    completo só é montado para exportar as operações.
+    """
+
+    def __init__(self, capacidade_inicial=1024):
+        self.n = 0
+        self._capacidade = capacidade_inicial
+        self._colunas = {c: np.empty(capacidade_inicial) for c in COLUNAS_OPERACAO}
+        self._empresa = np.empty(capacidade_inicial, dtype=np.int32)
+        self._produto = np.empty(capacidade_inicial, dtype=np.int32)
+        self._data = np.empty(capacidade_inicial, dtype='datetime64[D]')
+        self._sequencia = np.empty(capacidade_inicial, dtype=np.int32)
+        self.empresas, self._codigo_empresa = [], {}
+        self.produtos, self._codigo_produto = [], {}
+        self.agregados = AgregadosEmpresas()
+        self._df = None
+
+    def __len__(self):
+        return self.n
+
+    @staticmethod
+    def _codificar(valor, lista, codigos):
+        if valor not in codigos:
+            codigos[valor] = len(lista)
+            lista.append(valor)
+        return codigos[valor]
+
+    def _garantir_capacidade(self, necessario):
+        if necessario <= self._capacidade:
+            return
+        while self._capacidade < necessario:
+            self._capacidade *= 2
+        for nome in ('_empresa', '_produto', '_data', '_sequencia'):
+            antigo = getattr(self, nome)
+            novo = np.empty(self._capacidade, dtype=antigo.dtype)
+            novo[:self.n] = antigo[:self.n]
+            setattr(self, nome, novo)
+        for c, antigo in self._colunas.items():
+            novo = np.empty(self._capacidade)
+            novo[:self.n] = antigo[:self.n]
+            self._colunas[c] = novo
+
+    def adicionar(self, empresa, produtos, datas, colunas) -> slice:
+        """Acrescenta um lote de operações de uma empresa; retorna a fatia ocupada"""
+        k = len(produtos)
+        self._garantir_capacidade(self.n + k)
+        fatia = slice(self.n, self.n + k)
+        self._empresa[fatia] = self._codificar(empresa, self.empresas, self._codigo_empresa)
+        self._produto[fatia] = [self._codificar(p, self.produtos, self._codigo_produto) for p in produtos]
+        self._data[fatia] = np.asarray(datas, dtype='datetime64[D]')
+        self._sequencia[fatia] = np.arange(1, k + 1)
+        for c in COLUNAS_OPERACAO:
+            self._colunas[c][fatia] = colunas[c]
+        self.agregados.atualizar(
+            self._empresa[fatia], np.arange(self.n, self.n + k),
+            self._colunas['total_tributos'][fatia], self._colunas['icms_devido'][fatia],
+            self._colunas['valor_brl'][fatia], len(self.empresas)
+        )
+        self.n += k
+        self._df = None
+        return fatia
+
+    def mais_tributadas(self, empresa) -> pd.DataFrame:
+        """Operações mais tributadas da empresa (via agregados, sem montar o DataFrame todo)"""
+        top = self.agregados.top_operacoes[self._codigo_empresa[empresa]]
+        linhas = np.array([linha for _, linha in top], dtype=np.int64)
+        return pd.DataFrame({
+            'produto': [self.produtos[c] for c in self._produto[linhas]],
+            **{c: self._colunas[c][linhas] for c in COLUNAS_OPERACAO}
+        }, index=linhas)
+
+    def para_dataframe(self) -> pd.DataFrame:
+        """Todas as operações (uma linha cada), com empresa/produto categóricos"""
+        if self._df is None:
+            n = self.n
+            empresa = pd.Categorical.from_codes(self._empresa[:n], categories=self.empresas)
+            datas = pd.Series(self._data[:n])
+            prefixo = pd.Series(empresa).str[:3].str.upper().astype(str)
+            id_operacao = (prefixo + '-' + datas.dt.strftime('%Y%m%d') + '-'
+                           + pd.Series(self._sequencia[:n]).astype(str).str.zfill(3))
+            self._df = pd.DataFrame({
+                'empresa': empresa,
+                'id_operacao': id_operacao.to_numpy(),
+                'data_operacao': datas.dt.strftime('%Y-%m-%d').to_numpy(),
+                'produto': pd.Categorical.from_codes(self._produto[:n], categories=self.produtos),
+                **{c: self._colunas[c][:n] for c in COLUNAS_OPERACAO}
+            })
+        return self._df
+
+ARMAZEM = ArmazemOperacoes()
+
+def cadastro_empresas() -> pd.DataFrame:
+    """Dados cadastrais das empresas, indexados pelo nome"""
+    return pd.DataFrame.from_dict(empresas_avancado, orient='index').rename_axis('empresa')
+
+def simular_importacao_inteligente(nome_empresa, num_operacoes=50, rng=None, armazem=None, ptax=None):
     """
     🧠 SIMULAÇÃO INTELIGENTE COM DATAS E PADRÕES REALISTAS
+
+    Gera as operações em lote (numpy) e grava no armazém colunar. Com um
+    ArmazemPTAX (ptax.py), o câmbio é a PTAX do dia de cada operação.
     """
+    rng = rng if rng is not None else np.random.default_rng()
+    armazem = armazem if armazem is not None else ARMAZEM
     empresa = empresas_avancado[nome_empresa]
     setor = empresa['setor']
     
     print(f"🚀 Simulando {num_operacoes} importações inteligentes para {nome_empresa}...")
     
     # 🎯 DATA INICIAL ALEATÓRIA (últimos 2 anos)
-    data_base = datetime.now() - timedelta(days=730)
-    
-    for i in range(num_operacoes):
-        # 🎯 PRODUTO E VALOR ESPECÍFICO
-        produto = random.choice(list(produtos_detalhados[setor].keys()))
-        min_val, max_val = produtos_detalhados[setor][produto]
-        valor_fob = random.randint(min_val, max_val)
-        
-        # 🎯 DATA REALISTA (evita operações no mesmo dia)
-        data_operacao = data_base + timedelta(days=random.randint(0, 730))
-        
-        # 🎯 CÂMBIO HISTÓRICO (variação realista)
-        cambio = round(random.uniform(4.8, 6.2), 2)
-        
-        # 🎯 ALÍQUOTA INTELIGENTE (baseada em estado e porte)
-        aliquota_base = 0.18
-        if empresa['estado'] in ['SP', 'RJ']:
-            aliquota_base += 0.01  # Estados com ICMS mais alto
-        if empresa['porte'] == 'Grande':
-            aliquota_base += 0.01  # Grandes empresas pagam mais
-            
-        aliquota_icms = round(aliquota_base + random.uniform(-0.01, 0.01), 2)
-        
-        # 🎯 CÁLCULO TRIBUTÁRIO
-        resultado = icms_importacao_rj(valor_fob, cambio, aliquota_icms=aliquota_icms)
-        
-        # 🎯 OPERAÇÃO COMPLETA COM METADADOS
-        operacao = {
-            'id_operacao': f"{nome_empresa[:3].upper()}-{data_operacao.strftime('%Y%m%d')}-{i+1:03d}",
-            'data_operacao': data_operacao.strftime('%Y-%m-%d'),
-            'produto': produto,
-            'valor_fob_usd': valor_fob,
-            'cambio': cambio,
-            'aliquota_icms': aliquota_icms,
-            'setor': setor,
-            'estado': empresa['estado'],
-            'porte': empresa['porte'],
-            'consultor': empresa['consultor_tributario'],
-            **resultado
-        }
-        
-        empresa['historico_importacoes'].append(operacao)
+    data_base = np.datetime64(datetime.now() - timedelta(days=730), 'D')
+    
+    # 🎯 PRODUTO E VALOR ESPECÍFICO
+    nomes_produtos = list(produtos_detalhados[setor].keys())
+    faixas = np.array([produtos_detalhados[setor][p] for p in nomes_produtos])
+    escolhidos = rng.integers(0, len(nomes_produtos), num_operacoes)
+    valor_fob = rng.integers(faixas[escolhidos, 0], faixas[escolhidos, 1] + 1)
+    
+    # 🎯 DATA REALISTA (espalhada nos últimos 2 anos)
+    datas = data_base + rng.integers(0, 731, num_operacoes).astype('timedelta64[D]')
+    
+    # 🎯 CÂMBIO HISTÓRICO (PTAX do dia quando disponível, senão variação realista)
+    cambio = arredondar_decimal(rng.uniform(4.8, 6.2, num_operacoes), 2)
+    if ptax is not None and 'USD' in ptax:
+        cotacoes = ptax.cotacoes(datas, 'USD')
+        cambio = np.where(np.isnan(cotacoes), cambio, cotacoes)
+    
+    # 🎯 ALÍQUOTA INTELIGENTE (baseada em estado e porte)
+    aliquota_base = 0.18
+    if empresa['estado'] in ['SP', 'RJ']:
+        aliquota_base += 0.01  # Estados com ICMS mais alto
+    if empresa['porte'] == 'Grande':
+        aliquota_base += 0.01  # Grandes empresas pagam mais
+    aliquota_icms = arredondar_decimal(aliquota_base + rng.uniform(-0.01, 0.01, num_operacoes), 2)
+    
+    # 🎯 CÁLCULO TRIBUTÁRIO (lote inteiro de uma vez)
+    resultado = icms_importacao_rj_lote(valor_fob, cambio, aliquota_icms=aliquota_icms)
+    
+    armazem.adicionar(nome_empresa, [nomes_produtos[i] for i in escolhidos], datas, {
+        'valor_fob_usd': valor_fob,
+        'cambio': cambio,
+        'aliquota_icms': aliquota_icms,
+        **resultado
+    })
+
+def metricas_por_empresa(armazem=None) -> pd.DataFrame:
+    """
+    Totais por empresa (camada de agregados) já com os dados cadastrais.
+
+    Só empresas com operações aparecem; ordem do cadastro.
+    """
+    armazem = armazem if armazem is not None else ARMAZEM
+    metricas = armazem.agregados.metricas(armazem.empresas)
+    cadastro = cadastro_empresas()
+    metricas = metricas.join(cadastro, how='inner')
+    ordem = [nome for nome in cadastro.index if nome in metricas.index]
+    return metricas.loc[ordem]
 
-def analise_consultoria_tributaria():
+def analise_consultoria_tributaria(top_ranking=10):
     """
     💼 ANÁLISE DE CONSULTORIA PROFISSIONAL
     """
     print("\n💼 RELATÓRIO DE CONSULTORIA TRIBUTÁRIA - TRIBUTEC AI")
     print("=" * 70)
     
-    # 📊 MÉTRICAS GLOBAIS
-    total_operacoes = sum(len(emp['historico_importacoes']) for emp in empresas_avancado.values())
-    total_tributos_geral = sum(
-        sum(op['total_tributos'] for op in emp['historico_importacoes']) 
-        for emp in empresas_avancado.values()
-    )
+    metricas = metricas_por_empresa()
     
+    # 📊 MÉTRICAS GLOBAIS
     print(f"📈 RESUMO GERAL:")
     print(f"   🏢 Empresas Analisadas: {len(empresas_avancado)}")
-    print(f"   📦 Total de Operações: {total_operacoes}")
-    print(f"   💰 Tributos Totais: R$ {total_tributos_geral:,.2f}")
-    print(f"   🏛️ ICMS Total: R$ {sum(sum(op['icms_devido'] for op in emp['historico_importacoes']) for emp in empresas_avancado.values()):,.2f}")
+    print(f"   📦 Total de Operações: {len(ARMAZEM)}")
+    print(f"   💰 Tributos Totais: R$ {metricas['total_tributos'].sum():,.2f}")
+    print(f"   🏛️ ICMS Total: R$ {metricas['total_icms'].sum():,.2f}")
     
-    # 🏆 RANKING DAS EMPRESAS
+    # 🏆 RANKING DAS EMPRESAS (do maior pro menor)
     print(f"\n🏆 RANKING POR TRIBUTAÇÃO TOTAL:")
-    ranking = []
-    for nome, dados in empresas_avancado.items():
-        historico = dados['historico_importacoes']
-        if historico:
-            total_tributos = sum(op['total_tributos'] for op in historico)
-            media_por_operacao = total_tributos / len(historico)
-            ranking.append((nome, total_tributos, media_por_operacao, dados['setor']))
-    
-    # 🎯 ORDENA DO MAIOR PRO MENOR
-    ranking.sort(key=lambda x: x[1], reverse=True)
-    
-    for i, (nome, total, media, setor) in enumerate(ranking, 1):
-        medal = ['🥇', '🥈', '🥉', '4️⃣', '5️⃣', '6️⃣'][i-1]
-        print(f"   {medal} {nome} ({setor}): R$ {total:,.2f} | Média: R$ {media:,.2f}/op")
+    ranking = metricas.sort_values('total_tributos', ascending=False, kind='stable').head(top_ranking)
+    medalhas = ['🥇', '🥈', '🥉', '4️⃣', '5️⃣', '6️⃣']
+    for i, (nome, emp) in enumerate(ranking.iterrows(), 1):
+        medal = medalhas[i-1] if i <= len(medalhas) else f"{i}."
+        print(f"   {medal} {nome} ({emp['setor']}): R$ {emp['total_tributos']:,.2f} | Média: R$ {emp['tributos_por_operacao']:,.2f}/op")
     
     # 📊 ANÁLISE POR SETOR
     print(f"\n📊 ANÁLISE POR SETOR:")
-    tributos_por_setor = {}
-    for nome, dados in empresas_avancado.items():
-        setor = dados['setor']
-        historico = dados['historico_importacoes']
-        if historico:
-            total_setor = sum(op['total_tributos'] for op in historico)
-            if setor not in tributos_por_setor:
-                tributos_por_setor[setor] = 0
-            tributos_por_setor[setor] += total_setor
-    
-    for setor, total in sorted(tributos_por_setor.items(), key=lambda x: x[1], reverse=True):
+    tributos_por_setor = metricas.groupby('setor', sort=False)['total_tributos'].sum()
+    for setor, total in tributos_por_setor.sort_values(ascending=False, kind='stable').items():
         print(f"   📈 {setor}: R$ {total:,.2f}")
 
 def identificar_oportunidades_otimizacao():
@@ -190,20 +340,12 @@ def identificar_oportunidades_otimizacao():
     print(f"\n🔍 OPORTUNIDADES DE OTIMIZAÇÃO TRIBUTÁRIA")
     print("=" * 60)
     
-    for nome, dados in empresas_avancado.items():
-        historico = dados['historico_importacoes']
-        if not historico:
-            continue
-            
-        # 🎯 CALCULA EFICIÊNCIA TRIBUTÁRIA
-        total_tributos = sum(op['total_tributos'] for op in historico)
-        total_valor_brl = sum(op['valor_brl'] for op in historico)
-        eficiencia_tributaria = (total_tributos / total_valor_brl) * 100
-        
-        # 🎯 ENCONTRA OPERAÇÕES MAIS CARAS
-        operacoes_caras = sorted(historico, key=lambda x: x['total_tributos'], reverse=True)[:3]
+    metricas = metricas_por_empresa()
+    
+    for nome, emp in metricas.iterrows():
+        eficiencia_tributaria = emp['eficiencia_tributaria']
         
-        print(f"\n🏢 {nome} ({dados['setor']}) - Consultor: {dados['consultor_tributario']}")
+        print(f"\n🏢 {nome} ({emp['setor']}) - Consultor: {emp['consultor_tributario']}")
         print(f"   📊 Eficiência Tributária: {eficiencia_tributaria:.1f}%")
         
         if eficiencia_tributaria > 60:
@@ -211,8 +353,8 @@ def identificar_oportunidades_otimizacao():
             print(f"   💡 SUGESTÃO: Revisar estratégia de importação")
         
         print(f"   🎯 TOP 3 OPERAÇÕES MAIS TRIBUTADAS:")
-        for i, op in enumerate(operacoes_caras, 1):
-            print(f"      {i}. {op['produto']} - R$ {op['total_tributos']:,.2f}")
+        for i, op in enumerate(ARMAZEM.mais_tributadas(nome).itertuples(), 1):
+            print(f"      {i}. {op.produto} - R$ {op.total_tributos:,.2f}")
 
 def criar_dashboard_avancado():
     """
@@ -221,25 +363,9 @@ def criar_dashboard_avancado():
     print(f"\n🎨 Criando dashboard avançado...")
     
     # 📊 PREPARA DADOS
-    dados_graficos = []
-    for nome, dados in empresas_avancado.items():
-        historico = dados['historico_importacoes']
-        if historico:
-            total_tributos = sum(op['total_tributos'] for op in historico)
-            total_icms = sum(op['icms_devido'] for op in historico)
-            eficiencia = (total_tributos / sum(op['valor_brl'] for op in historico)) * 100
-            
-            dados_graficos.append({
-                'empresa': nome,
-                'setor': dados['setor'],
-                'total_tributos': total_tributos,
-                'total_icms': total_icms,
-                'eficiencia': eficiencia,
-                'porte': dados['porte'],
-                'consultor': dados['consultor_tributario']
-            })
-    
-    df = pd.DataFrame(dados_graficos)
+    df = metricas_por_empresa().reset_index().rename(columns={
+        'eficiencia_tributaria': 'eficiencia', 'consultor_tributario': 'consultor'
+    })
     
     # 1. 📊 GRÁFICO DE BARRAS - TRIBUTAÇÃO POR SETOR
     plt.figure(figsize=(15, 10))
@@ -294,47 +420,24 @@ def gerar_relatorio_executivo():
     """
     print(f"\n💾 Gerando relatório executivo...")
     
-    # 📊 COMPILA TODOS OS DADOS
-    todos_dados = []
-    metricas_empresas = []
-    
-    for nome, dados in empresas_avancado.items():
-        historico = dados['historico_importacoes']
-        
-        if historico:
-            # 🎯 DADOS DETALHADOS
-            for operacao in historico:
-                todos_dados.append({
-                    'empresa': nome,
-                    'setor': dados['setor'],
-                    'porte': dados['porte'],
-                    'estado': dados['estado'],
-                    'regime_tributario': dados['regime'],
-                    'consultor': dados['consultor_tributario'],
-                    'faturamento_anual': dados['faturamento_anual'],
-                    **operacao
-                })
-            
-            # 🎯 MÉTRICAS CONSOLIDADAS
-            total_tributos = sum(op['total_tributos'] for op in historico)
-            total_icms = sum(op['icms_devido'] for op in historico)
-            eficiencia = (total_tributos / sum(op['valor_brl'] for op in historico)) * 100
-            
-            metricas_empresas.append({
-                'empresa': nome,
-                'setor': dados['setor'],
-                'porte': dados['porte'],
-                'consultor': dados['consultor_tributario'],
-                'total_operacoes': len(historico),
-                'total_tributos': total_tributos,
-                'total_icms': total_icms,
-                'eficiencia_tributaria': eficiencia,
-                'tributos_por_operacao': total_tributos / len(historico)
-            })
+    # 📊 DADOS DETALHADOS: operações + cadastro da empresa (join vetorizado)
+    cadastro = cadastro_empresas().rename(columns={
+        'regime': 'regime_tributario', 'consultor_tributario': 'consultor'
+    })
+    operacoes = ARMAZEM.para_dataframe()
+    colunas_empresa = ['setor', 'porte', 'estado', 'regime_tributario', 'consultor', 'faturamento_anual']
+    detalhes = operacoes[['empresa']].join(cadastro[colunas_empresa], on='empresa')
+    detalhes = pd.concat([detalhes, operacoes.drop(columns='empresa')], axis=1)
+    
+    # 🎯 MÉTRICAS CONSOLIDADAS
+    metricas_empresas = metricas_por_empresa().reset_index().rename(
+        columns={'consultor_tributario': 'consultor'}
+    )[['empresa', 'setor', 'porte', 'consultor', 'total_operacoes', 'total_tributos',
+       'total_icms', 'eficiencia_tributaria', 'tributos_por_operacao']]
     
     # 💾 EXPORTA OS DADOS
-    pd.DataFrame(todos_dados).to_csv('dados_detalhados_consultoria.csv', index=False, encoding='utf-8')
-    pd.DataFrame(metricas_empresas).to_csv('metricas_empresas_consultoria.csv', index=False, encoding='utf-8')
+    detalhes.to_csv('dados_detalhados_consultoria.csv', index=False, encoding='utf-8')
+    metricas_empresas.to_csv('metricas_empresas_consultoria.csv', index=False, encoding='utf-8')
     
     print("✅ Relatórios exportados:")
     print("   - 'dados_detalhados_consultoria.csv' (dados completos)")
@@ -345,9 +448,10 @@ if __name__ == "__main__":
     print("🚀 SISTEMA AVANÇADO DE CONSULTORIA TRIBUTÁRIA - TRIBUTEC AI")
     print("=" * 70)
     
-    # 1. 🧠 SIMULAÇÃO INTELIGENTE
+    # 1. 🧠 SIMULAÇÃO INTELIGENTE (câmbio PTAX local, se houver)
+    ptax = armazem_padrao()
     for empresa in empresas_avancado.keys():
-        simular_importacao_inteligente(empresa, 40)  # 40 operações por empresa
+        simular_importacao_inteligente(empresa, 40, ptax=ptax)  # 40 operações por empresa
     
     # 2. 💼 ANÁLISE DE CONSULTORIA
     analise_consultoria_tributaria()
@@ -362,7 +466,7 @@ if __name__ == "__main__":
     gerar_relatorio_executivo()
     
     # 🎯 RESUMO FINAL
-    total_ops = sum(len(emp['historico_importacoes']) for emp in empresas_avancado.values())
+    total_ops = len(ARMAZEM)
     print(f"\n🎊 CONSULTORIA TRIBUTÁRIA CONCLUÍDA!")
     print(f"📈 {total_ops} operações analisadas")
     print(f"🏢 {len(empresas_avancado)} empresas consultadas")
@@ -1,4 +1,48 @@
-importacoes = []  # LISTA PRINCIPAL - ADICIONE AQUI!
+from collections import deque
+
+from icms_rj import icms_importacao_rj as _icms_rj
+
+
+class RegistroImportacoes:
+    """
+    Registro opcional e limitado das importações calculadas.
+
+    Guarda no máximo `tamanho_maximo` registros (buffer circular: os mais
+    antigos são descartados) e, se informado, repassa cada registro para
+    `callback` — útil para gravar em disco/fila sem acumular em memória.
+    Com tamanho_maximo=0 nada é guardado, só o callback é chamado.
+
+    Exemplo:
+    >>> registro = RegistroImportacoes(tamanho_maximo=1000)
+    >>> _ = icms_importacao_rj(100000, 5.60, registro=registro)
+    >>> len(registro)
+    1
+    """
+
+    def __init__(self, tamanho_maximo=10_000, callback=None):
+        self.registros = deque(maxlen=tamanho_maximo)
+        self.callback = callback
+        self.total_registrado = 0
+
+    def __call__(self, registro):
+        self.total_registrado += 1
+        if self.registros.maxlen != 0:
+            self.registros.append(registro)
+        if self.callback is not None:
+            self.callback(registro)
+
+    def __len__(self):
+        return len(self.registros)
+
+    def __iter__(self):
+        return iter(self.registros)
+
+    def ultimo(self):
+        return self.registros[-1] if self.registros else None
+
+    def limpar(self):
+        self.registros.clear()
+
 
 def icms_importacao_rj(
     valor_fob_usd,
@@ -7,7 +51,8 @@ def icms_importacao_rj(
     ii_percent=0.60,
     ipi_percent=0.10,
     iof_cambio_percent=0.0038,  # IOF câmbio: 0,38%
-    despesas_aduaneiras=0.0     # Taxas de despachante, armazenagem, etc.
+    despesas_aduaneiras=0.0,    # Taxas de despachante, armazenagem, etc.
+    registro=None               # Opcional: RegistroImportacoes ou qualquer callable
 ):
     """
     Calcula ICMS de importação para o RJ conforme Lei 2.657/96.
@@ -19,74 +64,46 @@ def icms_importacao_rj(
     - IOF Câmbio
     - Despesas aduaneiras
     - ICMS (cálculo por dentro)
+
+    Mesmo cálculo de icms_rj.icms_importacao_rj (motor tributário canônico).
+    Se `registro` for informado, ele recebe um dict resumido da operação;
+    sem ele nada é guardado (o módulo não mantém estado global).
     
     Exemplo:
     >>> icms_importacao_rj(100000, 5.60)
     {'icms_devido': 218456.0, 'total_tributos': 644456.0}
     """
-    global importacoes  # 🔥 ADICIONE ESTA LINHA!
-    
-    # 1. Valor em reais
-    valor_brl = round(valor_fob_usd * cambio, 2)
-    
-    # 2. IOF Câmbio (0,38% sobre o valor em reais)
-    iof_cambio = round(valor_brl * iof_cambio_percent, 2)
-    
-    # 3. II (60% sobre valor FOB convertido)
-    ii_valor = round(valor_brl * ii_percent, 2)
-    
-    # 4. Base para IPI (valor + II + IOF + despesas)
-    base_ipi = valor_brl + ii_valor + iof_cambio + despesas_aduaneiras
-    ipi_valor = round(base_ipi * ipi_percent, 2)
-    
-    # 5. Base do ICMS SEM o ICMS próprio
-    base_icms_sem_icms = (
-        valor_brl +
-        ii_valor +
-        ipi_valor +
-        iof_cambio +
-        despesas_aduaneiras
-    )
-    
-    # 6. ICMS com cálculo por dentro
-    icms_devido = round(
-        base_icms_sem_icms * aliquota_icms / (1 - aliquota_icms), 2
+    resultado = _icms_rj(
+        valor_fob_usd, cambio,
+        aliquota_icms=aliquota_icms,
+        ii_percent=ii_percent,
+        ipi_percent=ipi_percent,
+        iof_cambio_percent=iof_cambio_percent,
+        despesas_aduaneiras=despesas_aduaneiras
     )
+
+    # Registro opcional (sem registro, nenhum dict extra é criado)
+    if registro is not None:
+        registro({
+            'valor_fob_usd': valor_fob_usd,
+            'cambio': cambio,
+            'valor_brl': resultado['valor_brl'],
+            'ii_valor': resultado['ii_valor'],
+            'ipi_valor': resultado['ipi_valor'],
+            'icms_devido': resultado['icms_devido'],
+            'total_tributos': resultado['total_tributos'],
+            'aliquota_icms': aliquota_icms
+        })
     
-    # 7. Total de tributos
-    total_tributos = ii_valor + ipi_valor + icms_devido + iof_cambio + despesas_aduaneiras
-
-    # 🔥 ADICIONE ESTE BLOCO ANTES DO RETURN!
-    registro = {
-        'valor_fob_usd': valor_fob_usd,
-        'cambio': cambio,
-        'valor_brl': valor_brl,
-        'ii_valor': ii_valor,
-        'ipi_valor': ipi_valor,
-        'icms_devido': icms_devido,
-        'total_tributos': total_tributos,
-        'aliquota_icms': aliquota_icms
-    }
-    importacoes.append(registro)  # ADICIONA À LISTA
-    
-    return {
-        'valor_brl': valor_brl,
-        'iof_cambio': iof_cambio,
-        'ii_valor': ii_valor,
-        'ipi_valor': ipi_valor,
-        'despesas_aduaneiras': despesas_aduaneiras,
-        'base_icms_sem_icms': base_icms_sem_icms,
-        'icms_devido': icms_devido,
-        'total_tributos': total_tributos
-    }
-
-# No final do icms_importacao_rj.py, adicione:
+    return resultado
+
 if __name__ == "__main__":
     print("🚀 Módulo ICMS Importação RJ carregado com sucesso!")
     
     # Teste rápido
-    resultado = icms_importacao_rj(100000, 5.60)
+    registro = RegistroImportacoes(tamanho_maximo=100)
+    resultado = icms_importacao_rj(100000, 5.60, registro=registro)
     print("📊 Resultado:", resultado)
-    print(f"📁 Registros na lista: {len(importacoes)}")
-    if importacoes:
-        print("📋 Último registro:", importacoes[-1])
\ No newline at end of file
+    print(f"📁 Registros guardados: {len(registro)}")
+    if len(registro):
+        print("📋 Último registro:", registro.ultimo())
\ No newline at end of file
@@ -1,3 +1,13 @@
+import pandas as pd
+
+from motor_tributario import MOTOR_RJ
+
+CHAVES_RESULTADO = (
+    'valor_brl', 'iof_cambio', 'ii_valor', 'ipi_valor', 'despesas_aduaneiras',
+    'base_icms_sem_icms', 'icms_devido', 'total_tributos'
+)
+
+
 def icms_importacao_rj(
     valor_fob_usd,
     cambio,
@@ -17,48 +27,68 @@ def icms_importacao_rj(
     - IOF Câmbio
     - Despesas aduaneiras
     - ICMS (cálculo por dentro)
+
+    O cálculo é o do motor canônico (motor_tributario.PERFIL_RJ_LEI_2657).
     
     Exemplo:
     >>> icms_importacao_rj(100000, 5.60)
     {'icms_devido': 218456.0, 'total_tributos': 644456.0}
     """
-    # 1. Valor em reais
-    valor_brl = round(valor_fob_usd * cambio, 2)
-    
-    # 2. IOF Câmbio (0,38% sobre o valor em reais)
-    iof_cambio = round(valor_brl * iof_cambio_percent, 2)
-    
-    # 3. II (60% sobre valor FOB convertido)
-    ii_valor = round(valor_brl * ii_percent, 2)
-    
-    # 4. Base para IPI (valor + II + IOF + despesas)
-    base_ipi = valor_brl + ii_valor + iof_cambio + despesas_aduaneiras
-    ipi_valor = round(base_ipi * ipi_percent, 2)
-    
-    # 5. Base do ICMS SEM o ICMS próprio
-    base_icms_sem_icms = (
-        valor_brl +
-        ii_valor +
-        ipi_valor +
-        iof_cambio +
-        despesas_aduaneiras
+    r = MOTOR_RJ.calcular_escalar(
+        valor_fob_usd, cambio,
+        despesas_aduaneiras=despesas_aduaneiras,
+        aliquota_icms=aliquota_icms,
+        ii_percent=ii_percent,
+        ipi_percent=ipi_percent,
+        iof_cambio_percent=iof_cambio_percent
     )
-    
-    # 6. ICMS com cálculo por dentro
-    icms_devido = round(
-        base_icms_sem_icms * aliquota_icms / (1 - aliquota_icms), 2
+    return {chave: r[chave] for chave in CHAVES_RESULTADO}
+
+
+def icms_importacao_rj_lote(
+    valor_fob_usd,
+    cambio,
+    aliquota_icms=0.18,
+    ii_percent=0.60,
+    ipi_percent=0.10,
+    iof_cambio_percent=0.0038,
+    despesas_aduaneiras=0.0
+):
+    """
+    Versão vetorizada de icms_importacao_rj: recebe arrays (ou escalares,
+    com broadcasting) e devolve um dict de arrays com as mesmas chaves.
+
+    Cada etapa é arredondada em centavos como na versão escalar, então o
+    resultado bate centavo a centavo com icms_importacao_rj linha a linha.
+
+    Exemplo:
+    >>> r = icms_importacao_rj_lote([100000, 50000], [5.60, 5.10])
+    >>> r['icms_devido'].shape
+    (2,)
+    """
+    r = MOTOR_RJ.calcular(
+        valor_fob_usd, cambio,
+        despesas_aduaneiras=despesas_aduaneiras,
+        aliquota_icms=aliquota_icms,
+        ii_percent=ii_percent,
+        ipi_percent=ipi_percent,
+        iof_cambio_percent=iof_cambio_percent
     )
-    
-    # 7. Total de tributos
-    total_tributos = ii_valor + ipi_valor + icms_devido + iof_cambio + despesas_aduaneiras
-    
-    return {
-        'valor_brl': valor_brl,
-        'iof_cambio': iof_cambio,
-        'ii_valor': ii_valor,
-        'ipi_valor': ipi_valor,
-        'despesas_aduaneiras': despesas_aduaneiras,
-        'base_icms_sem_icms': base_icms_sem_icms,
-        'icms_devido': icms_devido,
-        'total_tributos': total_tributos
-    }
\ No newline at end of file
+    return {chave: r[chave] for chave in CHAVES_RESULTADO}
+
+
+def icms_importacao_rj_df(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Calcula o ICMS de importação para um DataFrame inteiro de operações.
+
+    Usa as colunas com os mesmos nomes dos parâmetros de icms_importacao_rj
+    ('valor_fob_usd', 'cambio', 'aliquota_icms', ...); colunas ausentes
+    assumem o valor padrão. Retorna um DataFrame com o mesmo índice.
+    """
+    parametros = [
+        'valor_fob_usd', 'cambio', 'aliquota_icms', 'ii_percent',
+        'ipi_percent', 'iof_cambio_percent', 'despesas_aduaneiras'
+    ]
+    colunas = {p: df[p].to_numpy(dtype=float) for p in parametros if p in df.columns}
+    resultado = icms_importacao_rj_lote(**colunas)
+    return pd.DataFrame(resultado, index=df.index)
@@ -0,0 +1,114 @@
+# src/indices_faiss.py
+"""
+Tipos de índice FAISS para corpora grandes.
+
+    flat      busca exata (IndexFlatL2), memória = n x d x 4 bytes
+    ivf_flat  k-means em `nlist` listas; a busca visita só `nprobe` listas
+    ivf_pq    IVF + Product Quantization: vetores comprimidos em m x nbits bits
+    hnsw      grafo navegável; `ef_search` troca latência por recall
+
+IVF e PQ precisam de treino (k-means) antes de receber vetores; HNSW não
+precisa de treino, mas não aceita remoção de vetores. Use
+benchmark_indices.py para escolher parâmetros (recall@k x latência).
+"""
+import math
+
+import numpy as np
+import faiss
+
+TIPOS_INDICE = ("flat", "ivf_flat", "ivf_pq", "hnsw")
+
+# Tipos que suportam remove_ids (atualização incremental com remoção)
+TIPOS_COM_REMOCAO = ("flat", "ivf_flat", "ivf_pq")
+
+
+def nlist_sugerido(n_vetores: int, n_treino: int = None) -> int:
+    """~4·√n listas, garantindo pelo menos 39 vetores de treino por lista"""
+    n_treino = n_vetores if n_treino is None else n_treino
+    return max(1, min(int(4 * math.sqrt(n_vetores)), n_treino // 39))
+
+
+def criar_indice(tipo: str, dimensao: int, n_vetores: int, nlist: int = None,
+                 m_pq: int = None, nbits: int = 8, hnsw_m: int = 32,
+                 ef_construcao: int = 200):
+    if tipo == "flat":
+        return faiss.IndexFlatL2(dimensao)
+    if tipo == "hnsw":
+        indice = faiss.IndexHNSWFlat(dimensao, hnsw_m)
+        indice.hnsw.efConstruction = ef_construcao
+        return indice
+    if tipo not in TIPOS_INDICE:
+        raise ValueError(f"Tipo de índice desconhecido: {tipo} (use um de {TIPOS_INDICE})")
+
+    nlist = nlist or nlist_sugerido(n_vetores)
+    quantizador = faiss.IndexFlatL2(dimensao)
+    if tipo == "ivf_flat":
+        return faiss.IndexIVFFlat(quantizador, dimensao, nlist)
+    # PQ: m subvetores precisa dividir a dimensão (1536 -> 96 subvetores de 16)
+    m_pq = m_pq or next(m for m in (96, 64, 48, 32, 24, 16, 8, 4, 2, 1) if dimensao % m == 0)
+    if dimensao % m_pq:
+        raise ValueError(f"m_pq={m_pq} não divide a dimensão {dimensao}")
+    # Cada subquantizador tem 2^nbits centróides: corpus pequeno pede menos bits
+    nbits = min(nbits, max(1, int(math.log2(max(n_vetores // 39, 2)))))
+    return faiss.IndexIVFPQ(quantizador, dimensao, nlist, m_pq, nbits)
+
+
+def ajustar_busca(indice, nprobe: int = None, ef_search: int = None):
+    """Parâmetros de busca (não fazem parte do treino; valem após carregar o índice)"""
+    if nprobe is not None and hasattr(indice, "nprobe"):
+        indice.nprobe = nprobe
+    if ef_search is not None and hasattr(indice, "hnsw"):
+        indice.hnsw.efSearch = ef_search
+    return indice
+
+
+def indice_treinado(vetores, tipo: str = "flat", amostra_treino: int = 100_000, seed: int = 0,
+                    n_vetores: int = None, **parametros):
+    """
+    Cria o índice e treina (IVF/PQ) com `vetores` (n x d), ainda vazio.
+
+    O treino usa no máximo `amostra_treino` vetores sorteados: o k-means do
+    IVF/PQ converge bem com dezenas de vetores por lista. `n_vetores` é o
+    tamanho do corpus que o índice vai receber, quando os vetores de treino
+    são só uma amostra dele (dimensiona nlist).
+    """
+    vetores = np.ascontiguousarray(vetores, dtype=np.float32)
+    n, dimensao = vetores.shape
+    n_treino = min(n, amostra_treino)
+    if tipo in ("ivf_flat", "ivf_pq") and not parametros.get("nlist"):
+        parametros["nlist"] = nlist_sugerido(max(n, n_vetores or 0), n_treino)
+    indice = criar_indice(tipo, dimensao, n_treino, **parametros)
+    if not indice.is_trained:
+        treino = vetores
+        if n > amostra_treino:
+            rng = np.random.default_rng(seed)
+            treino = vetores[rng.choice(n, amostra_treino, replace=False)]
+        indice.train(treino)
+    return indice
+
+
+def construir_indice(vetores, tipo: str = "flat", nprobe: int = None, ef_search: int = None,
+                     **parametros):
+    """Índice treinado e já preenchido com `vetores`"""
+    vetores = np.ascontiguousarray(vetores, dtype=np.float32)
+    indice = indice_treinado(vetores, tipo, **parametros)
+    indice.add(vetores)
+    return ajustar_busca(indice, nprobe, ef_search)
+
+
+def vetores_armazenados(indice, inicio: int, fim: int) -> np.ndarray:
+    """
+    Vetores das posições [inicio, fim) lidos do próprio índice.
+
+    IVF precisa do mapa direto (criado aqui na primeira vez); no IVF-PQ o
+    vetor volta decodificado dos códigos, portanto aproximado.
+    """
+    ivf = faiss.try_extract_index_ivf(indice)
+    if ivf is not None and ivf.direct_map.no():
+        ivf.make_direct_map()
+    return indice.reconstruct_n(inicio, fim - inicio)
+
+
+def bytes_indice(indice) -> int:
+    """Tamanho serializado do índice (aproxima a memória ocupada)"""
+    return int(faiss.serialize_index(indice).nbytes)
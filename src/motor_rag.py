@@ -0,0 +1,164 @@
+# src/motor_rag.py
+"""
+Motor RAG: índice FAISS + LLM carregados uma única vez.
+
+Usado pelo servidor residente (servidor_rag.py) e, quando o servidor não
+está no ar, direto pelo query_rag.py. As etapas ficam separadas (embedding
+da pergunta, recuperação, geração) para o servidor poder agrupar os
+embeddings de perguntas que chegam juntas.
+
+A recuperação é híbrida quando existe index/bm25.pkl: candidatos densos
+(FAISS) e lexicais (BM25) fundidos por RRF, para que referências exatas
+(artigos, leis, NCMs) apareçam já com k pequeno.
+
+Respostas ficam no cache de respostas (cache/respostas.json) até o índice
+mudar; perguntas idênticas ou quase idênticas não chamam o LLM de novo.
+Quando o create_index.py grava uma nova versão (index/versao.txt), o motor
+recarrega FAISS e BM25 antes da próxima pergunta, e respostas geradas com
+o índice antigo não entram no cache da versão nova.
+"""
+import threading
+from pathlib import Path
+from dotenv import load_dotenv
+
+import numpy as np
+
+from langchain.vectorstores import FAISS
+from langchain.embeddings import OpenAIEmbeddings
+from langchain.chains.question_answering import load_qa_chain
+from langchain_openai import ChatOpenAI
+
+from bm25 import IndiceBM25, buscar_hibrido
+from cache_embeddings import CacheEmbeddings
+from cache_respostas import CacheRespostas
+from indices_faiss import ajustar_busca
+
+# Carregar .env
+load_dotenv()
+
+# Configurações
+PROJECT_ROOT = Path(__file__).parent.parent
+INDEX_DIR = PROJECT_ROOT / "index"
+CACHE_EMBEDDINGS_DIR = PROJECT_ROOT / "cache" / "embeddings"
+CACHE_RESPOSTAS = PROJECT_ROOT / "cache" / "respostas.json"
+MODELO_EMBEDDINGS = "text-embedding-3-small"
+MODELO_LLM = "gpt-3.5-turbo"
+K_DOCUMENTOS = 4
+K_CANDIDATOS = 20  # candidatos de cada busca antes da fusão
+NPROBE = 16        # listas visitadas em índices IVF (ver benchmark_indices.py)
+EF_SEARCH = 64     # tamanho da busca em índices HNSW
+
+
+def fontes_dos_documentos(documentos: list) -> list:
+    return [{"fonte": doc.metadata.get("source", "desconhecida"),
+             "pagina": doc.metadata.get("page", "N/A")} for doc in documentos]
+
+
+class MotorRAG:
+    def __init__(self, index_dir: Path = INDEX_DIR, k: int = K_DOCUMENTOS, usar_cache: bool = True,
+                 embeddings=None, llm=None):
+        if not Path(index_dir).exists():
+            raise FileNotFoundError("Índice não encontrado! Rode primeiro: python src/create_index.py")
+        self.index_dir = Path(index_dir)
+        self.arquivo_versao = self.index_dir / "versao.txt"
+        self.k = k
+        # Perguntas repetidas saem do cache local de embeddings
+        if embeddings is None:
+            embeddings = CacheEmbeddings(OpenAIEmbeddings(model=MODELO_EMBEDDINGS), MODELO_EMBEDDINGS,
+                                         CACHE_EMBEDDINGS_DIR)
+        self.embeddings = embeddings
+        self._lock_indice = threading.Lock()
+        self._carregar_indice()
+        self.cache_respostas = CacheRespostas(CACHE_RESPOSTAS, self.arquivo_versao) if usar_cache else None
+        # Mesma cadeia "stuff" do RetrievalQA, mas com a recuperação feita à parte
+        self.llm = ChatOpenAI(model=MODELO_LLM, temperature=0) if llm is None else llm
+        self.cadeia = load_qa_chain(self.llm, chain_type="stuff")
+
+    def _ler_versao(self):
+        if not self.arquivo_versao.exists():
+            return None
+        return self.arquivo_versao.read_text(encoding="utf-8").strip()
+
+    def _carregar_indice(self):
+        print("Carregando índice FAISS...")
+        versao = self._ler_versao()  # lida antes: se o índice mudar no meio, a próxima conferência recarrega
+        db = FAISS.load_local(self.index_dir, self.embeddings, allow_dangerous_deserialization=True)
+        ajustar_busca(db.index, nprobe=NPROBE, ef_search=EF_SEARCH)
+        arquivo_bm25 = self.index_dir / "bm25.pkl"
+        bm25 = IndiceBM25.carregar(arquivo_bm25) if arquivo_bm25.exists() else None
+        # Uma atribuição só: perguntas em andamento nunca veem FAISS de uma versão e BM25 de outra
+        self.indice = (db, bm25, versao)
+
+    @property
+    def db(self):
+        return self.indice[0]
+
+    @property
+    def bm25(self):
+        return self.indice[1]
+
+    @property
+    def versao_indice(self):
+        return self.indice[2]
+
+    def conferir_indice(self) -> tuple:
+        """(db, bm25, versão) atuais, recarregados se o create_index.py gravou outra versão"""
+        indice = self.indice
+        if self._ler_versao() != indice[2]:
+            with self._lock_indice:
+                if self._ler_versao() != self.indice[2]:
+                    print("🔄 Índice atualizado: recarregando...")
+                    self._carregar_indice()
+                indice = self.indice
+        return indice
+
+    def resposta_em_cache(self, pergunta: str):
+        """Resposta guardada para a pergunta idêntica (normalizada), sem embedding; ou None"""
+        if self.cache_respostas is None:
+            return None
+        self.conferir_indice()
+        return self.cache_respostas.buscar(pergunta)
+
+    def salvar(self):
+        """Grava o cache de embeddings (o índice dele só é gravado a cada tantos lotes)"""
+        if hasattr(self.embeddings, "salvar"):
+            self.embeddings.salvar()
+
+    def embed_perguntas(self, perguntas: list) -> list:
+        return self.embeddings.embed_queries(perguntas)
+
+    def ids_densos(self, vetor: list, k: int, db=None) -> list:
+        db = db or self.db
+        _, posicoes = db.index.search(np.asarray([vetor], dtype=np.float32), k)
+        return [db.index_to_docstore_id[i] for i in posicoes[0] if i != -1]
+
+    def recuperar(self, pergunta: str, vetor: list, indice: tuple = None) -> list:
+        db, bm25, _ = indice or self.indice
+        if bm25 is None:
+            return db.similarity_search_by_vector(vetor, k=self.k)
+        ids = buscar_hibrido(bm25, pergunta, self.ids_densos(vetor, K_CANDIDATOS, db),
+                             k=self.k, candidatos=K_CANDIDATOS)
+        return [db.docstore.search(id_doc) for id_doc in ids]
+
+    def gerar(self, pergunta: str, documentos: list) -> str:
+        return self.cadeia({"input_documents": documentos, "question": pergunta})["output_text"]
+
+    def responder(self, pergunta: str, vetor: list = None) -> dict:
+        cache = self.cache_respostas
+        indice = self.conferir_indice()
+        # Pergunta idêntica (normalizada): nem precisa do embedding
+        if cache is not None and (resultado := cache.buscar(pergunta)) is not None:
+            return resultado
+        if vetor is None:
+            vetor = self.embed_perguntas([pergunta])[0]
+        if cache is not None and (resultado := cache.buscar(pergunta, vetor)) is not None:
+            return resultado
+        documentos = self.recuperar(pergunta, vetor, indice)
+        resultado = {
+            "pergunta": pergunta,
+            "resposta": self.gerar(pergunta, documentos),
+            "fontes": fontes_dos_documentos(documentos),
+        }
+        if cache is not None:
+            cache.guardar(pergunta, resultado, vetor, versao=indice[2])
+        return resultado
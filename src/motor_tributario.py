@@ -0,0 +1,457 @@
+# motor_tributario.py
+"""
+Motor tributário canônico do Projeto Tributec.
+
+Um único cálculo de tributos de importação, vetorizado com NumPy e
+parametrizado por um conjunto de regras (UF, NCM, regime e vigência).
+Todos os simuladores usam este motor — só muda o conjunto de regras:
+
+- PERFIL_RJ_LEI_2657: ICMS RJ por dentro, com IOF e despesas (icms_rj.py)
+- PERFIL_SIMPLIFICADO: II 5% e ICMS sobre FOB + II (tributec_core.py)
+- regras_taxas_fixas(config['taxas']): taxas fixas sobre o FOB
+  (analise_simulacoes_v2.py e analise_dados_reais.py)
+
+Cada regra é um dict. Campos de seleção (None = qualquer valor):
+    'uf', 'regime'                       -> valor exato ou lista de valores
+    'ncm'                                -> prefixo ou lista de prefixos
+    'vigencia_inicio', 'vigencia_fim'    -> datas ISO, inclusivas
+Campos de cálculo:
+    'ii_percent', 'ipi_percent', 'pis_cofins_percent',
+    'iof_cambio_percent', 'aliquota_icms' -> None = vem da operação
+    'base_ipi', 'base_icms'   -> componentes somados ao valor em reais
+                                 ('ii', 'ipi', 'iof', 'despesas', 'pis_cofins')
+    'icms_por_dentro'         -> ICMS incluído na própria base (gross-up)
+    'arredondar'              -> arredonda cada etapa em centavos
+
+A primeira regra que casa com a operação é aplicada (ordem = prioridade).
+"""
+
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+ALIQUOTAS = (
+    'ii_percent', 'ipi_percent', 'pis_cofins_percent',
+    'iof_cambio_percent', 'aliquota_icms'
+)
+COMPONENTES_BASE = ('ii', 'ipi', 'iof', 'despesas', 'pis_cofins')
+
+REGRA_BASE = {
+    'nome': 'Regra sem nome',
+    'uf': None,
+    'ncm': None,
+    'regime': None,
+    'vigencia_inicio': None,
+    'vigencia_fim': None,
+    'ii_percent': 0.0,
+    'ipi_percent': 0.0,
+    'pis_cofins_percent': 0.0,
+    'iof_cambio_percent': 0.0,
+    'aliquota_icms': None,
+    'base_ipi': (),
+    'base_icms': (),
+    'icms_por_dentro': False,
+    'arredondar': False,
+}
+
+# ICMS importação RJ — Lei 2.657/96 (cálculo por dentro)
+PERFIL_RJ_LEI_2657 = [{
+    'nome': 'RJ — Lei 2.657/96',
+    'ii_percent': 0.60,
+    'ipi_percent': 0.10,
+    'iof_cambio_percent': 0.0038,
+    'aliquota_icms': 0.18,
+    'base_ipi': ('ii', 'iof', 'despesas'),
+    'base_icms': ('ii', 'ipi', 'iof', 'despesas'),
+    'icms_por_dentro': True,
+    'arredondar': True,
+}]
+
+# Modelo simplificado do tributec_core (II 5%, ICMS sobre FOB + II)
+PERFIL_SIMPLIFICADO = [{
+    'nome': 'Simplificado — II 5%',
+    'ii_percent': 0.05,
+    'aliquota_icms': 0.20,
+    'base_icms': ('ii',),
+}]
+
+
+def regras_taxas_fixas(taxas: dict) -> list:
+    """Monta o perfil de taxas fixas sobre o FOB a partir de config['taxas']"""
+    return [{
+        'nome': 'Taxas fixas (config.json)',
+        'ii_percent': taxas['ii_fixo'],
+        'ipi_percent': taxas['ipi_fixo'],
+        'pis_cofins_percent': taxas['pis_cofins_fixo'],
+    }]
+
+
+def arredondar_decimal(valores, casas=2):
+    """
+    Arredonda um array com o mesmo resultado do round(valor, casas) do Python.
+
+    np.round escala por 10**casas antes de arredondar e pode divergir na
+    última casa nos empates (ex.: 2.675); esses poucos casos são refeitos
+    com round().
+    """
+    valores = np.asarray(valores, dtype=float)
+    fator = 10.0 ** casas
+    escalado = valores * fator
+    inteiro = np.rint(escalado)
+    distancia = np.abs(escalado - inteiro, out=escalado)
+    tolerancia = 0.5 - 1e-6 - (np.abs(inteiro).max(initial=0.0) * 1e-15)
+    empates = distancia >= tolerancia
+    arredondado = np.divide(inteiro, fator, out=inteiro)
+    if empates.any():
+        arredondado[empates] = [round(v, casas) for v in valores[empates].tolist()]
+    return arredondado
+
+
+def arredondar_centavos(valores):
+    """Arredonda um array para centavos, idêntico ao round(valor, 2) do Python"""
+    return arredondar_decimal(valores, 2)
+
+
+def _como_lista(valor):
+    if valor is None:
+        return None
+    if isinstance(valor, (list, tuple, set)):
+        return [str(v) for v in valor]
+    return [str(valor)]
+
+
+def _casar(valores, aceitos, prefixo=False):
+    """Máscara das operações cujo valor está em `aceitos` (ou começa com eles)"""
+    unicos, inverso = np.unique(np.asarray(valores).astype(str), return_inverse=True)
+    if prefixo:
+        casa = np.zeros(len(unicos), dtype=bool)
+        for p in aceitos:
+            casa |= np.char.startswith(unicos, p)
+    else:
+        casa = np.isin(unicos, aceitos)
+    return casa[inverso.ravel()]
+
+
+class MotorTributario:
+    """
+    Conjunto de regras "compilado" em arrays NumPy.
+
+    A seleção de regra e o cálculo são feitos para o lote inteiro de uma vez:
+    o custo em Python é proporcional ao número de regras, não de operações.
+
+    Exemplo:
+    >>> motor = MotorTributario(PERFIL_RJ_LEI_2657)
+    >>> r = motor.calcular([100000, 50000], [5.60, 5.10])
+    >>> r['icms_devido'].shape
+    (2,)
+    """
+
+    def __init__(self, regras: list):
+        if not regras:
+            raise ValueError("O motor precisa de pelo menos uma regra")
+        self.regras = []
+        for regra in regras:
+            desconhecidos = set(regra) - set(REGRA_BASE)
+            if desconhecidos:
+                raise ValueError(f"Campos desconhecidos na regra: {sorted(desconhecidos)}")
+            for campo in ('base_ipi', 'base_icms'):
+                invalidos = set(regra.get(campo, ())) - set(COMPONENTES_BASE)
+                if invalidos:
+                    raise ValueError(f"Componentes inválidos em {campo}: {sorted(invalidos)}")
+            self.regras.append({**REGRA_BASE, **regra})
+
+        # Parâmetros por regra (NaN = alíquota vem da operação)
+        self._aliquotas = {
+            campo: np.array([np.nan if r[campo] is None else r[campo] for r in self.regras])
+            for campo in ALIQUOTAS
+        }
+        self._bases = {
+            campo: {
+                comp: np.array([float(comp in r[campo]) for r in self.regras])
+                for comp in COMPONENTES_BASE
+            }
+            for campo in ('base_ipi', 'base_icms')
+        }
+        self._por_dentro = np.array([bool(r['icms_por_dentro']) for r in self.regras])
+        self._arredondar = np.array([bool(r['arredondar']) for r in self.regras])
+        self._criterios = [
+            {
+                'uf': _como_lista(r['uf']),
+                'ncm': _como_lista(r['ncm']),
+                'regime': _como_lista(r['regime']),
+                'inicio': None if r['vigencia_inicio'] is None else np.datetime64(r['vigencia_inicio'], 'D'),
+                'fim': None if r['vigencia_fim'] is None else np.datetime64(r['vigencia_fim'], 'D'),
+            }
+            for r in self.regras
+        ]
+        # Mesmos parâmetros em tipos do Python, para o caminho escalar
+        self._parametros_escalares = [
+            {
+                'aliquotas': {campo: r[campo] for campo in ALIQUOTAS},
+                'bases': {
+                    campo: {comp: float(comp in r[campo]) for comp in COMPONENTES_BASE}
+                    for campo in ('base_ipi', 'base_icms')
+                },
+                'por_dentro': bool(r['icms_por_dentro']),
+                'arredondar': bool(r['arredondar']),
+            }
+            for r in self.regras
+        ]
+        self._regra_unica = all(v is None for v in self._criterios[0].values())
+        self._regra_escalar = lru_cache(maxsize=4096)(self._selecionar_escalar)
+
+    def _selecionar_escalar(self, uf, ncm, regime, data) -> int:
+        """Índice da regra de uma operação (valores já convertidos em str/datetime64)"""
+        valores = {'uf': uf, 'ncm': ncm, 'regime': regime}
+        for i, criterio in enumerate(self._criterios):
+            casa = True
+            for campo in ('uf', 'ncm', 'regime'):
+                aceitos = criterio[campo]
+                if aceitos is None:
+                    continue
+                valor = valores[campo]
+                if valor is None:
+                    casa = False
+                elif campo == 'ncm':
+                    casa = valor.startswith(tuple(aceitos))
+                else:
+                    casa = valor in aceitos
+                if not casa:
+                    break
+            if casa and criterio['inicio'] is not None:
+                casa = data is not None and data >= criterio['inicio']
+            if casa and criterio['fim'] is not None:
+                casa = data is not None and data <= criterio['fim']
+            if casa:
+                return i
+        raise ValueError("Nenhuma regra tributária se aplica à operação 0")
+
+    def selecionar_regras(self, forma, uf=None, ncm=None, regime=None, data=None) -> np.ndarray:
+        """Índice da regra aplicada a cada operação (primeira que casa)"""
+        forma = tuple(np.atleast_1d(forma))
+        if all(v is None for v in self._criterios[0].values()):
+            return np.zeros(forma, dtype=np.intp)  # primeira regra vale para tudo
+
+        n = int(np.prod(forma))
+        if data is not None:
+            data = np.broadcast_to(np.asarray(data, dtype='datetime64[D]'), forma).ravel()
+        colunas = {'uf': uf, 'ncm': ncm, 'regime': regime}
+        colunas = {k: None if v is None else np.broadcast_to(np.asarray(v), forma).ravel()
+                   for k, v in colunas.items()}
+
+        indice = np.full(n, -1, dtype=np.intp)
+        # De trás pra frente: regras anteriores sobrescrevem (têm prioridade)
+        for i in range(len(self.regras) - 1, -1, -1):
+            criterio = self._criterios[i]
+            mascara = np.ones(n, dtype=bool)
+            for campo in ('uf', 'ncm', 'regime'):
+                if criterio[campo] is None:
+                    continue
+                if colunas[campo] is None:
+                    mascara[:] = False
+                    break
+                mascara &= _casar(colunas[campo], criterio[campo], prefixo=(campo == 'ncm'))
+            for campo, comparar in (('inicio', np.greater_equal), ('fim', np.less_equal)):
+                if criterio[campo] is None:
+                    continue
+                if data is None:
+                    mascara[:] = False
+                else:
+                    mascara &= comparar(data, criterio[campo])
+            indice[mascara] = i
+
+        if (indice < 0).any():
+            primeira = int(np.argmax(indice < 0))
+            raise ValueError(f"Nenhuma regra tributária se aplica à operação {primeira}")
+        return indice.reshape(forma)
+
+    def calcular(self, valor_fob_usd, cambio, despesas_aduaneiras=0.0,
+                 uf=None, ncm=None, regime=None, data=None, **aliquotas) -> dict:
+        """
+        Calcula os tributos de um lote de operações.
+
+        Entradas são arrays de qualquer forma (ou escalares, com broadcasting)
+        e o resultado tem a mesma forma. Alíquotas
+        passadas como argumento (ex.: aliquota_icms=array) prevalecem sobre
+        as da regra. Retorna um dict de arrays, incluindo 'regra' (índice).
+        """
+        desconhecidas = set(aliquotas) - set(ALIQUOTAS)
+        if desconhecidas:
+            raise TypeError(f"Alíquotas desconhecidas: {sorted(desconhecidas)}")
+
+        valor_fob_usd, cambio, despesas = np.broadcast_arrays(
+            *(np.atleast_1d(np.asarray(x, dtype=float))
+              for x in (valor_fob_usd, cambio, despesas_aduaneiras))
+        )
+        forma = valor_fob_usd.shape
+        regra = self.selecionar_regras(forma, uf=uf, ncm=ncm, regime=regime, data=data)
+
+        # Lote com uma só regra: parâmetros escalares, sem arrays por operação
+        sel = regra
+        if regra.size and (regra == regra.flat[0]).all():
+            sel = int(regra.flat[0])
+
+        taxa = {}
+        for campo in ALIQUOTAS:
+            if aliquotas.get(campo) is not None:
+                taxa[campo] = np.broadcast_to(np.asarray(aliquotas[campo], dtype=float), forma)
+            else:
+                taxa[campo] = self._aliquotas[campo][sel]
+                if np.isnan(taxa[campo]).any():
+                    raise ValueError(f"'{campo}' não definida na regra nem informada na operação")
+
+        arredondar = self._arredondar[sel]
+        if arredondar.all():
+            arred = arredondar_centavos
+        elif not arredondar.any():
+            arred = lambda x: x
+        else:
+            arred = lambda x: np.where(arredondar, arredondar_centavos(x), x)
+
+        def flag(base, comp):
+            return self._bases[base][comp][sel]
+
+        # 1. Valor em reais
+        valor_brl = arred(valor_fob_usd * cambio)
+
+        # 2. IOF câmbio, II e PIS/COFINS sobre o valor em reais
+        iof_cambio = arred(valor_brl * taxa['iof_cambio_percent'])
+        ii_valor = arred(valor_brl * taxa['ii_percent'])
+        pis_cofins_valor = arred(valor_brl * taxa['pis_cofins_percent'])
+
+        # 3. IPI
+        base_ipi = (
+            valor_brl +
+            ii_valor * flag('base_ipi', 'ii') +
+            iof_cambio * flag('base_ipi', 'iof') +
+            despesas * flag('base_ipi', 'despesas') +
+            pis_cofins_valor * flag('base_ipi', 'pis_cofins')
+        )
+        ipi_valor = arred(base_ipi * taxa['ipi_percent'])
+
+        # 4. Base do ICMS sem o ICMS próprio
+        base_icms_sem_icms = (
+            valor_brl +
+            ii_valor * flag('base_icms', 'ii') +
+            ipi_valor * flag('base_icms', 'ipi') +
+            iof_cambio * flag('base_icms', 'iof') +
+            despesas * flag('base_icms', 'despesas') +
+            pis_cofins_valor * flag('base_icms', 'pis_cofins')
+        )
+
+        # 5. ICMS (por dentro ou sobre a base)
+        aliquota_icms = taxa['aliquota_icms']
+        divisor = np.where(self._por_dentro[sel], 1 - aliquota_icms, 1.0)
+        icms_devido = arred(base_icms_sem_icms * aliquota_icms / divisor)
+
+        # 6. Total de tributos
+        total_tributos = ii_valor + ipi_valor + icms_devido + iof_cambio + despesas + pis_cofins_valor
+
+        return {
+            'valor_brl': valor_brl,
+            'iof_cambio': iof_cambio,
+            'ii_valor': ii_valor,
+            'ipi_valor': ipi_valor,
+            'pis_cofins_valor': pis_cofins_valor,
+            'despesas_aduaneiras': np.array(despesas),
+            'base_icms_sem_icms': base_icms_sem_icms,
+            'icms_devido': icms_devido,
+            'total_tributos': total_tributos,
+            'regra': regra,
+        }
+
+    def calcular_escalar(self, valor_fob_usd, cambio, despesas_aduaneiras=0.0,
+                         uf=None, ncm=None, regime=None, data=None, **aliquotas) -> dict:
+        """
+        Calcula os tributos de uma única operação, com floats do Python.
+
+        Mesmas etapas e mesmo resultado de calcular() (elemento 0), sem o
+        custo fixo de montar arrays; a seleção de regra fica em cache.
+        Retorna um dict de floats, com 'regra' como int.
+        """
+        desconhecidas = set(aliquotas) - set(ALIQUOTAS)
+        if desconhecidas:
+            raise TypeError(f"Alíquotas desconhecidas: {sorted(desconhecidas)}")
+
+        if self._regra_unica:
+            regra = 0
+        else:
+            if data is not None:
+                data = np.asarray(data, dtype='datetime64[D]')[()]
+            regra = self._regra_escalar(
+                *(None if v is None else str(v) for v in (uf, ncm, regime)), data
+            )
+        parametros = self._parametros_escalares[regra]
+
+        taxa = {}
+        for campo in ALIQUOTAS:
+            valor = aliquotas.get(campo)
+            if valor is None:
+                valor = parametros['aliquotas'][campo]
+                if valor is None:
+                    raise ValueError(f"'{campo}' não definida na regra nem informada na operação")
+            taxa[campo] = float(valor)
+
+        arred = (lambda x: round(x, 2)) if parametros['arredondar'] else (lambda x: x)
+        base_ipi_flag = parametros['bases']['base_ipi']
+        base_icms_flag = parametros['bases']['base_icms']
+        despesas = float(despesas_aduaneiras)
+
+        valor_brl = arred(float(valor_fob_usd) * float(cambio))
+        iof_cambio = arred(valor_brl * taxa['iof_cambio_percent'])
+        ii_valor = arred(valor_brl * taxa['ii_percent'])
+        pis_cofins_valor = arred(valor_brl * taxa['pis_cofins_percent'])
+
+        base_ipi = (
+            valor_brl +
+            ii_valor * base_ipi_flag['ii'] +
+            iof_cambio * base_ipi_flag['iof'] +
+            despesas * base_ipi_flag['despesas'] +
+            pis_cofins_valor * base_ipi_flag['pis_cofins']
+        )
+        ipi_valor = arred(base_ipi * taxa['ipi_percent'])
+
+        base_icms_sem_icms = (
+            valor_brl +
+            ii_valor * base_icms_flag['ii'] +
+            ipi_valor * base_icms_flag['ipi'] +
+            iof_cambio * base_icms_flag['iof'] +
+            despesas * base_icms_flag['despesas'] +
+            pis_cofins_valor * base_icms_flag['pis_cofins']
+        )
+
+        aliquota_icms = taxa['aliquota_icms']
+        divisor = 1 - aliquota_icms if parametros['por_dentro'] else 1.0
+        icms_devido = arred(base_icms_sem_icms * aliquota_icms / divisor)
+
+        total_tributos = ii_valor + ipi_valor + icms_devido + iof_cambio + despesas + pis_cofins_valor
+
+        return {
+            'valor_brl': valor_brl,
+            'iof_cambio': iof_cambio,
+            'ii_valor': ii_valor,
+            'ipi_valor': ipi_valor,
+            'pis_cofins_valor': pis_cofins_valor,
+            'despesas_aduaneiras': despesas,
+            'base_icms_sem_icms': base_icms_sem_icms,
+            'icms_devido': icms_devido,
+            'total_tributos': total_tributos,
+            'regra': regra,
+        }
+
+    def calcular_df(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Calcula os tributos de um DataFrame de operações.
+
+        Usa as colunas 'valor_fob_usd', 'cambio', 'despesas_aduaneiras',
+        'uf', 'ncm', 'regime', 'data' e as de alíquota, quando existirem.
+        """
+        entradas = ('valor_fob_usd', 'cambio', 'despesas_aduaneiras',
+                    'uf', 'ncm', 'regime', 'data') + ALIQUOTAS
+        colunas = {c: df[c].to_numpy() for c in entradas if c in df.columns}
+        return pd.DataFrame(self.calcular(**colunas), index=df.index)
+
+
+MOTOR_RJ = MotorTributario(PERFIL_RJ_LEI_2657)
+MOTOR_SIMPLIFICADO = MotorTributario(PERFIL_SIMPLIFICADO)
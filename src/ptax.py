@@ -0,0 +1,261 @@
+# src/ptax.py
+"""
+Armazém local de cotações PTAX (BRL por unidade de moeda estrangeira).
+
+Cada moeda é um array diário em disco (data/ptax/<MOEDA>.cotacao.f8), lido
+por memória mapeada: a posição i é a cotação do dia `inicio + i`. Fins de
+semana e feriados repetem a cotação do último dia útil, então a consulta
+de qualquer data é um acesso direto ao array (O(1)), e um lote inteiro de
+datas é uma indexação numpy. Um segundo array (.dia_util.u1) marca os dias
+com cotação publicada, usados como histórico pelo risco_cambial.py.
+
+O armazém só cresce para frente: importar um snapshot (CSV/Parquet) ou
+baixar do Bacen acrescenta apenas as datas posteriores à última gravada.
+Consultas não acessam a rede.
+
+Uso:
+    python src/ptax.py importar cotacoes.csv     # colunas data, moeda, cotacao
+    python src/ptax.py atualizar                 # baixa do Bacen até hoje (USD)
+    python src/ptax.py 2025-03-10                # consulta
+"""
+import json
+import os
+import sys
+from datetime import date
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+PROJECT_ROOT = Path(__file__).parent.parent
+PTAX_DIR = PROJECT_ROOT / "data" / "ptax"
+
+URL_BACEN = "https://olinda.bcb.gov.br/olinda/servico/PTAX/versao/v1/odata"
+
+
+def _dias(datas) -> np.ndarray:
+    return np.asarray(pd.to_datetime(datas), dtype="datetime64[D]")
+
+
+def ler_snapshot(caminho) -> pd.DataFrame:
+    """
+    Snapshot de cotações em formato longo (data, moeda, cotacao).
+
+    Aceita CSV ou Parquet; colunas no formato do Bacen (dataHoraCotacao,
+    cotacaoVenda) também servem, assumindo USD quando não há 'moeda'.
+    """
+    caminho = Path(caminho)
+    df = pd.read_parquet(caminho) if caminho.suffix == ".parquet" else pd.read_csv(caminho)
+    df = df.rename(columns={"dataHoraCotacao": "data", "cotacaoVenda": "cotacao", "simbolo": "moeda"})
+    if "moeda" not in df.columns:
+        df["moeda"] = "USD"
+    df["data"] = pd.to_datetime(df["data"]).dt.normalize()
+    return df[["data", "moeda", "cotacao"]]
+
+
+def _gravar_depois_de(arquivo: Path, n: int, dados: np.ndarray):
+    """
+    Grava `dados` logo após os `n` primeiros itens do arquivo.
+
+    O meta.json só é atualizado depois dos arrays: bytes além de `n` são
+    restos de uma gravação interrompida e são descartados antes.
+    """
+    with open(arquivo, "r+b" if arquivo.exists() else "wb") as f:
+        f.truncate(n * dados.itemsize)
+        f.seek(0, os.SEEK_END)
+        f.write(dados.tobytes())
+
+
+class ArmazemPTAX:
+    def __init__(self, diretorio=PTAX_DIR):
+        self.diretorio = Path(diretorio)
+        self._arquivo_meta = self.diretorio / "meta.json"
+        self.meta = {}  # moeda -> {"inicio": "AAAA-MM-DD", "dias": n}
+        if self._arquivo_meta.exists():
+            self.meta = json.loads(self._arquivo_meta.read_text(encoding="utf-8"))
+        self._arrays = {}
+
+    @property
+    def moedas(self) -> list:
+        return sorted(self.meta)
+
+    def __contains__(self, moeda):
+        return moeda in self.meta
+
+    def _caminhos(self, moeda):
+        return (self.diretorio / f"{moeda}.cotacao.f8", self.diretorio / f"{moeda}.dia_util.u1")
+
+    def _abrir(self, moeda):
+        """(início, cotações, dias úteis) da moeda, por memória mapeada"""
+        if moeda not in self.meta:
+            raise KeyError(f"Moeda sem cotações no armazém: {moeda}")
+        if moeda not in self._arrays:
+            n = self.meta[moeda]["dias"]
+            arquivo_cotacao, arquivo_dia_util = self._caminhos(moeda)
+            self._arrays[moeda] = (
+                np.datetime64(self.meta[moeda]["inicio"], "D"),
+                np.memmap(arquivo_cotacao, dtype=np.float64, mode="r", shape=(n,)),
+                np.memmap(arquivo_dia_util, dtype=np.uint8, mode="r", shape=(n,)),
+            )
+        return self._arrays[moeda]
+
+    def cobertura(self, moeda: str = "USD") -> tuple:
+        """(primeira, última) data com cotação"""
+        inicio, cotacoes, _ = self._abrir(moeda)
+        return inicio, inicio + np.timedelta64(len(cotacoes) - 1, "D")
+
+    # --- consultas ---
+
+    def cotacao(self, data, moeda: str = "USD") -> float:
+        """Cotação do dia (ou do último dia útil anterior)"""
+        inicio, cotacoes, _ = self._abrir(moeda)
+        i = int((np.datetime64(pd.Timestamp(data).date(), "D") - inicio).astype(np.int64))
+        if not 0 <= i < len(cotacoes):
+            raise KeyError(f"{data} fora do período do armazém para {moeda}: {self.cobertura(moeda)}")
+        return float(cotacoes[i])
+
+    def cotacoes(self, datas, moeda: str = "USD") -> np.ndarray:
+        """Cotações de um lote de datas; NaN para datas fora do período gravado"""
+        inicio, cotacoes, _ = self._abrir(moeda)
+        indice = (_dias(datas) - inicio).astype(np.int64)
+        dentro = (indice >= 0) & (indice < len(cotacoes))
+        resultado = np.full(indice.shape, np.nan)
+        resultado[dentro] = cotacoes[indice[dentro]]
+        return resultado
+
+    def historico(self, moedas=None) -> pd.DataFrame:
+        """Cotações publicadas (só dias úteis comuns a todas as moedas): data x moeda"""
+        series = {}
+        for moeda in moedas or self.moedas:
+            inicio, cotacoes, dia_util = self._abrir(moeda)
+            util = np.flatnonzero(dia_util)
+            series[moeda] = pd.Series(np.asarray(cotacoes[util]),
+                                      index=pd.DatetimeIndex(inicio + util.astype("timedelta64[D]")))
+        return pd.DataFrame(series).dropna().rename_axis("data")
+
+    # --- gravação (só acrescenta) ---
+
+    def acrescentar(self, moeda: str, datas, cotacoes) -> int:
+        """
+        Acrescenta cotações posteriores à última gravada; datas já cobertas
+        são ignoradas. Retorna quantos dias úteis entraram.
+        """
+        serie = pd.Series(np.asarray(cotacoes, dtype=float), index=_dias(datas)).dropna()
+        serie = serie[~serie.index.duplicated(keep="last")].sort_index()
+        anterior = None
+        if moeda in self.meta:
+            inicio, valores, _ = self._abrir(moeda)
+            proximo = inicio + np.timedelta64(len(valores), "D")
+            anterior = float(valores[-1])
+            serie = serie[serie.index >= proximo]
+        if serie.empty:
+            return 0
+        if anterior is None:
+            proximo = serie.index[0].to_datetime64().astype("datetime64[D]")
+
+        # Trecho novo, dia a dia: lacunas repetem a cotação do último dia útil
+        fim = serie.index[-1].to_datetime64().astype("datetime64[D]")
+        n = int((fim - proximo).astype(np.int64)) + 1
+        posicoes = (_dias(serie.index) - proximo).astype(np.int64)
+        dia_util = np.zeros(n, dtype=np.uint8)
+        dia_util[posicoes] = 1
+        valores = np.full(n, np.nan)
+        valores[posicoes] = serie.to_numpy()
+        if anterior is not None and np.isnan(valores[0]):
+            valores[0] = anterior
+        ultimo_valido = np.maximum.accumulate(np.where(np.isnan(valores), 0, np.arange(n)))
+        valores = valores[ultimo_valido]
+
+        self.diretorio.mkdir(parents=True, exist_ok=True)
+        arquivo_cotacao, arquivo_dia_util = self._caminhos(moeda)
+        self._arrays.pop(moeda, None)
+        gravados = self.meta.get(moeda, {}).get("dias", 0)
+        _gravar_depois_de(arquivo_cotacao, gravados, valores.astype(np.float64))
+        _gravar_depois_de(arquivo_dia_util, gravados, dia_util)
+        registro = self.meta.setdefault(moeda, {"inicio": str(proximo), "dias": 0})
+        registro["dias"] += n
+        self._salvar_meta()
+        return len(serie)
+
+    def importar(self, df: pd.DataFrame) -> dict:
+        """Acrescenta um DataFrame longo (data, moeda, cotacao); moeda -> dias novos"""
+        return {moeda: self.acrescentar(moeda, grupo["data"], grupo["cotacao"])
+                for moeda, grupo in df.groupby("moeda")}
+
+    def importar_snapshot(self, caminho) -> dict:
+        return self.importar(ler_snapshot(caminho))
+
+    def _salvar_meta(self):
+        temporario = self._arquivo_meta.with_suffix(".tmp")
+        temporario.write_text(json.dumps(self.meta, indent=1), encoding="utf-8")
+        os.replace(temporario, self._arquivo_meta)
+
+
+def baixar_bacen(moeda: str, data_inicial, data_final) -> pd.DataFrame:
+    """Cotações de venda (fechamento) do Bacen no período, em formato longo"""
+    import requests
+
+    formato = "%m-%d-%Y"
+    if moeda == "USD":
+        url = f"{URL_BACEN}/CotacaoDolarPeriodo(dataInicial=@dataInicial,dataFinalCotacao=@dataFinalCotacao)"
+        params = {}
+    else:
+        url = (f"{URL_BACEN}/CotacaoMoedaPeriodo(moeda=@moeda,dataInicial=@dataInicial,"
+               f"dataFinalCotacao=@dataFinalCotacao)")
+        params = {"@moeda": f"'{moeda}'", "$filter": "tipoBoletim eq 'Fechamento'"}
+    params.update({
+        "@dataInicial": f"'{pd.Timestamp(data_inicial).strftime(formato)}'",
+        "@dataFinalCotacao": f"'{pd.Timestamp(data_final).strftime(formato)}'",
+        "$format": "json",
+    })
+    resposta = requests.get(url, params=params, timeout=60)
+    resposta.raise_for_status()
+    df = pd.DataFrame(resposta.json()["value"])
+    if df.empty:
+        return pd.DataFrame(columns=["data", "moeda", "cotacao"])
+    df["data"] = pd.to_datetime(df["dataHoraCotacao"]).dt.normalize()
+    df["moeda"] = moeda
+    df["cotacao"] = df["cotacaoVenda"].astype(float)
+    # Moedas com vários boletins no dia: fica o último (fechamento)
+    return df.drop_duplicates("data", keep="last")[["data", "moeda", "cotacao"]]
+
+
+def atualizar_do_bacen(armazem: ArmazemPTAX, moedas=("USD",), inicio_padrao="2015-01-01",
+                       ate=None) -> dict:
+    """Baixa só o período depois da última data gravada de cada moeda"""
+    ate = pd.Timestamp(ate or date.today())
+    novos = {}
+    for moeda in moedas:
+        inicio = (pd.Timestamp(armazem.cobertura(moeda)[1]) + pd.Timedelta(days=1)
+                  if moeda in armazem else pd.Timestamp(inicio_padrao))
+        if inicio > ate:
+            novos[moeda] = 0
+            continue
+        df = baixar_bacen(moeda, inicio, ate)
+        novos[moeda] = armazem.acrescentar(moeda, df["data"], df["cotacao"])
+    return novos
+
+
+def armazem_padrao():
+    """O armazém em data/ptax, ou None se ainda não houver cotações gravadas"""
+    armazem = ArmazemPTAX()
+    return armazem if armazem.moedas else None
+
+
+# === EXECUÇÃO ===
+if __name__ == "__main__":
+    armazem = ArmazemPTAX()
+    comando = sys.argv[1] if len(sys.argv) > 1 else "atualizar"
+    if comando == "importar":
+        novos = armazem.importar_snapshot(sys.argv[2])
+        print(f"📥 Dias úteis acrescentados: {novos}")
+    elif comando == "atualizar":
+        print("🌐 Baixando cotações PTAX do Bacen...")
+        novos = atualizar_do_bacen(armazem, moedas=sys.argv[2:] or ("USD",))
+        print(f"📥 Dias úteis acrescentados: {novos}")
+    else:
+        for moeda in armazem.moedas:
+            print(f"💱 {moeda} em {comando}: R$ {armazem.cotacao(comando, moeda):.4f}")
+    for moeda in armazem.moedas:
+        inicio, fim = armazem.cobertura(moeda)
+        print(f"   {moeda}: {inicio} a {fim}")
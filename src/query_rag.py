@@ -1,53 +1,58 @@
 # src/query_rag.py
-import os
+"""
+Cliente de perguntas do RAG.
+
+Envia a pergunta ao servidor residente (python src/servidor_rag.py), que já
+está com o índice e o LLM carregados. Se o servidor não estiver no ar,
+carrega o motor localmente e responde do jeito antigo (mais lento).
+"""
+import json
+import socket
 import sys
-from pathlib import Path
-from dotenv import load_dotenv
-
-from langchain.vectorstores import FAISS
-from langchain.embeddings import OpenAIEmbeddings
-from langchain.chains import RetrievalQA
-from langchain_openai import ChatOpenAI
-
-# Carregar .env
-load_dotenv()
-
-# Configurações
-PROJECT_ROOT = Path(__file__).parent.parent
-INDEX_DIR = PROJECT_ROOT / "index"
-
-# Verificar se o índice existe
-if not INDEX_DIR.exists():
-    print("Erro: Índice não encontrado!")
-    print("Rode primeiro: python src/create_index.py")
-    sys.exit(1)
-
-print("Carregando índice FAISS...")
-embeddings = OpenAIEmbeddings(model="text-embedding-3-small")
-db = FAISS.load_local(INDEX_DIR, embeddings, allow_dangerous_deserialization=True)
-
-# Configurar o modelo de resposta
-llm = ChatOpenAI(model="gpt-3.5-turbo", temperature=0)
-
-# Criar pipeline RAG
-qa = RetrievalQA.from_chain_type(
-    llm=llm,
-    chain_type="stuff",
-    retriever=db.as_retriever(search_kwargs={"k": 4}),
-    return_source_documents=True
-)
+
+from servidor_rag import HOST, PORTA
+
+TIMEOUT_SERVIDOR = 120  # segundos (inclui o tempo de geração do LLM)
+
+
+def consultar_servidor(pergunta: str, host: str = HOST, porta: int = PORTA,
+                       timeout: float = TIMEOUT_SERVIDOR) -> dict:
+    with socket.create_connection((host, porta), timeout=timeout) as conexao:
+        conexao.sendall(json.dumps({"pergunta": pergunta}, ensure_ascii=False).encode("utf-8") + b"\n")
+        with conexao.makefile("rb") as leitor:
+            linha = leitor.readline()
+    if not linha:
+        raise ConnectionError("Servidor RAG fechou a conexão sem responder")
+    resposta = json.loads(linha)
+    if "erro" in resposta:
+        raise RuntimeError(f"Servidor RAG: {resposta['erro']}")
+    return resposta
+
+
+def responder_localmente(pergunta: str) -> dict:
+    # Import tardio: carregar LangChain e o índice é justamente o custo que o servidor evita
+    from motor_rag import MotorRAG
+    motor = MotorRAG()
+    try:
+        return motor.responder(pergunta)
+    finally:
+        motor.salvar()  # uma pergunta por processo: sem isso o embedding nunca iria para o disco
+
 
 def perguntar(pergunta):
     print(f"\nPergunta: {pergunta}")
     print("-" * 50)
-    result = qa({"query": pergunta})
-    print(f"Resposta: {result['result']}")
+    try:
+        result = consultar_servidor(pergunta)
+    except ConnectionRefusedError:
+        print("⚠️ Servidor RAG não encontrado: carregando o índice localmente...")
+        result = responder_localmente(pergunta)
+    print(f"Resposta: {result['resposta']}")
     print("-" * 50)
     print("Fontes usadas:")
-    for i, doc in enumerate(result["source_documents"], 1):
-        fonte = doc.metadata.get("source", "desconhecida")
-        pagina = doc.metadata.get("page", "N/A")
-        print(f"  {i}. {fonte} (pág. {pagina})")
+    for i, fonte in enumerate(result["fontes"], 1):
+        print(f"  {i}. {fonte['fonte']} (pág. {fonte['pagina']})")
+    return result
 
 # === EXECUÇÃO ===
 if __name__ == "__main__":
@@ -58,4 +63,4 @@ if __name__ == "__main__":
         sys.exit(1)
 
     pergunta = " ".join(sys.argv[1:])
-    perguntar(pergunta)
\ No newline at end of file
+    perguntar(pergunta)
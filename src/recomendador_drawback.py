@@ -6,44 +6,333 @@ Compatível com 'operacoes_reais_simuladas.csv' gerado por 'analise_dados_reais.
 
 import pandas as pd
 import numpy as np
-from datetime import datetime, timedelta
+from datetime import datetime
 import os
+from bisect import bisect_left, insort
+from collections import defaultdict
+
+from motor_tributario import arredondar_decimal
+from ptax import armazem_padrao
+from relatorio_html import LINHAS_POR_PAGINA, Modelo, cabecalho, escrever_relatorio, registros
+
+def _segundos(datas: pd.Series, origem) -> np.ndarray:
+    return ((datas - origem) // pd.Timedelta(seconds=1)).to_numpy(dtype=np.int64)
+
+def vincular_importacoes_exportacoes(importacoes: pd.DataFrame, exportacoes: pd.DataFrame,
+                                     tolerancia_tempo_dias: int = 365,
+                                     proporcao_minima: float = 0.9,
+                                     max_pares_por_bloco: int = 5_000_000) -> pd.DataFrame:
+    """
+    Vinculação importação-exportação de TODAS as empresas em uma passada.
+
+    Mesma regra de verificar_vinculacao (mesmo CNPJ e NCM, exportação até
+    `tolerancia_tempo_dias` após a importação, com ≥90% da quantidade), mas
+    com junção por intervalos ordenados: as exportações são ordenadas uma vez
+    por (CNPJ, NCM, data) e a janela de cada importação vira duas buscas
+    binárias (searchsorted). Os pares candidatos são expandidos em blocos de
+    até `max_pares_por_bloco` para limitar a memória.
+
+    Os vínculos saem na ordem das importações e, dentro delas, das exportações.
+    """
+    if importacoes.empty or exportacoes.empty:
+        return pd.DataFrame()
+
+    # Chave (CNPJ, NCM) comum às duas bases
+    chaves = pd.concat([
+        importacoes[['cnpj_basico', 'ncm']], exportacoes[['cnpj_basico', 'ncm']]
+    ], ignore_index=True)
+    # Chave com CNPJ ou NCM ausente fica sem grupo (NaN ou -1, conforme o pandas)
+    codigo = chaves.groupby(['cnpj_basico', 'ncm'], sort=False).ngroup().fillna(-1).to_numpy(dtype=np.int64)
+    chave_imp, chave_exp = codigo[:len(importacoes)], codigo[len(importacoes):]
+
+    # Datas em segundos desde a menor data: chave * 2^32 + segundos ordena por (chave, data)
+    data_imp = pd.to_datetime(importacoes['data_importacao'])
+    data_exp = pd.to_datetime(exportacoes['data_exportacao'])
+    origem = min(data_imp.min(), data_exp.min())
+    t_imp, t_exp = _segundos(data_imp, origem), _segundos(data_exp, origem)
+    deslocamento = np.int64(2 ** 32)
+
+    composta_exp = chave_exp * deslocamento + t_exp
+    ordem_exp = np.argsort(composta_exp, kind='stable')
+    composta_exp = composta_exp[ordem_exp]
+
+    inicio_janela = chave_imp * deslocamento + t_imp
+    fim_janela = inicio_janela + tolerancia_tempo_dias * 86400
+    lo = np.searchsorted(composta_exp, inicio_janela, side='left')
+    hi = np.searchsorted(composta_exp, fim_janela, side='right')
+    # Sem grupo não casa com nada, nem com outro ausente
+    sem_chave = chave_imp < 0
+    hi[sem_chave] = lo[sem_chave]
+    candidatos = hi - lo
+
+    qtd_imp = importacoes['quantidade'].to_numpy(dtype=float)
+    qtd_exp = exportacoes['quantidade'].to_numpy(dtype=float)
+
+    pares_imp, pares_exp = [], []
+    acumulado = np.cumsum(candidatos)
+    inicio = 0
+    while inicio < len(importacoes):
+        # Bloco de importações cujo total de candidatos cabe no limite
+        base = acumulado[inicio - 1] if inicio else 0
+        fim = max(int(np.searchsorted(acumulado, base + max_pares_por_bloco, side='right')), inicio + 1)
+        contagem = candidatos[inicio:fim]
+        total = int(contagem.sum())
+        if total:
+            idx_imp = np.repeat(np.arange(inicio, fim), contagem)
+            offsets = np.arange(total) - np.repeat(np.cumsum(contagem) - contagem, contagem)
+            idx_exp = ordem_exp[np.repeat(lo[inicio:fim], contagem) + offsets]
+            ok = qtd_exp[idx_exp] >= proporcao_minima * qtd_imp[idx_imp]
+            pares_imp.append(idx_imp[ok])
+            pares_exp.append(idx_exp[ok])
+        inicio = fim
+
+    if not pares_imp:
+        return pd.DataFrame()
+    idx_imp = np.concatenate(pares_imp)
+    idx_exp = np.concatenate(pares_exp)
+    if len(idx_imp) == 0:
+        return pd.DataFrame()
+    ordem = np.lexsort((idx_exp, idx_imp))
+    idx_imp, idx_exp = idx_imp[ordem], idx_exp[ordem]
+
+    imp = importacoes.iloc[idx_imp]
+    return pd.DataFrame({
+        'cnpj_basico': imp['cnpj_basico'].to_numpy(),
+        'ncm': imp['ncm'].to_numpy(),
+        'data_importacao': imp['data_importacao'].to_numpy(),
+        'valor_fob_brl_imp': imp['valor_fob_brl'].to_numpy(),
+        'ii_pago': imp['ii_valor'].to_numpy(),
+        'ipi_pago': imp['ipi_valor'].to_numpy(),
+        'data_exportacao': exportacoes['data_exportacao'].to_numpy()[idx_exp],
+        'quantidade_imp': imp['quantidade'].to_numpy(),
+        'quantidade_exp': exportacoes['quantidade'].to_numpy()[idx_exp],
+        'proporcao': arredondar_decimal(qtd_exp[idx_exp] / qtd_imp[idx_imp], 2)
+    })
 
 def verificar_vinculacao(importacoes: pd.DataFrame, exportacoes: pd.DataFrame,
                         cnpj: str, tolerancia_tempo_dias: int = 365) -> pd.DataFrame:
     """
     Verifica vinculação importação-exportação por CNPJ, NCM e janela temporal.
     Regra: exportação até 365 dias após importação, com ≥90% da quantidade.
+    Para todas as empresas de uma vez, use vincular_importacoes_exportacoes.
     """
-    imp = importacoes[importacoes['cnpj_basico'] == cnpj].copy()
-    exp = exportacoes[exportacoes['cnpj_basico'] == cnpj].copy()
-    
-    if imp.empty or exp.empty:
-        return pd.DataFrame()
-    
-    vinculos = []
-    for _, imp_row in imp.iterrows():
-        exp_match = exp[
-            (exp['ncm'] == imp_row['ncm']) &
-            (exp['data_exportacao'] >= imp_row['data_importacao']) &
-            (exp['data_exportacao'] <= imp_row['data_importacao'] + timedelta(days=tolerancia_tempo_dias)) &
-            (exp['quantidade'] >= 0.9 * imp_row['quantidade'])
-        ]
-        
-        for _, exp_row in exp_match.iterrows():
-            vinculos.append({
-                'cnpj_basico': cnpj,
-                'ncm': imp_row['ncm'],
-                'data_importacao': imp_row['data_importacao'],
-                'valor_fob_brl_imp': imp_row['valor_fob_brl'],
-                'ii_pago': imp_row['ii_valor'],
-                'ipi_pago': imp_row['ipi_valor'],
-                'data_exportacao': exp_row['data_exportacao'],
-                'quantidade_imp': imp_row['quantidade'],
-                'quantidade_exp': exp_row['quantidade'],
-                'proporcao': round(exp_row['quantidade'] / imp_row['quantidade'], 2)
-            })
-    return pd.DataFrame(vinculos)
+    imp = importacoes[importacoes['cnpj_basico'] == cnpj]
+    exp = exportacoes[exportacoes['cnpj_basico'] == cnpj]
+    return vincular_importacoes_exportacoes(imp, exp, tolerancia_tempo_dias)
+
+def _em_segundos(data) -> int:
+    return pd.Timestamp(data).value // 10**9
+
+class RazaoDrawback:
+    """
+    Razão de alocação do drawback: consome as quantidades exportadas (DU-E)
+    contra as importações (DI) de mesmo CNPJ e NCM, em ordem FIFO.
+
+    Diferente de verificar_vinculacao, cada unidade exportada comprova uma
+    única importação: a DU-E abate primeiro a DI mais antiga ainda com saldo
+    cuja janela (data da DI até +`tolerancia_tempo_dias`) cobre a exportação.
+    A DI fica comprovada quando ≥`proporcao_minima` da quantidade foi alocada,
+    e a economia de II/IPI é proporcional à quantidade alocada.
+
+    Por (CNPJ, NCM) ficam listas ordenadas por data só dos registros com
+    saldo, então cada novo registro custa uma busca binária mais os registros
+    que ele efetivamente consome. Registros novos entram com
+    registrar_importacao/registrar_exportacao (ou em lote com adicionar) sem
+    recalcular o que já foi alocado.
+    """
+
+    def __init__(self, tolerancia_tempo_dias: int = 365, proporcao_minima: float = 0.9):
+        self.tolerancia = tolerancia_tempo_dias * 86400
+        self.proporcao_minima = proporcao_minima
+        self.importacoes = {}   # id -> dados da DI (com 'alocado')
+        self.exportacoes = {}   # id -> dados da DU-E (com 'alocado')
+        self.lancamentos = []   # (id_importacao, id_exportacao, quantidade)
+        self._imp_abertas = defaultdict(list)  # (cnpj, ncm) -> [(segundos, seq, id)]
+        self._exp_abertas = defaultdict(list)
+        self._seq = 0
+        self._lotes = 0
+
+    def _proximo(self) -> int:
+        self._seq += 1
+        return self._seq
+
+    def _alocar(self, id_imp, id_exp, quantidade) -> tuple:
+        self.importacoes[id_imp]['alocado'] += quantidade
+        self.exportacoes[id_exp]['alocado'] += quantidade
+        lancamento = (id_imp, id_exp, quantidade)
+        self.lancamentos.append(lancamento)
+        return lancamento
+
+    @staticmethod
+    def _saldo(registro) -> float:
+        return registro['quantidade'] - registro['alocado']
+
+    def registrar_importacao(self, cnpj, ncm, data, quantidade, ii_valor=0.0,
+                             ipi_valor=0.0, valor_fob_brl=0.0, id_registro=None) -> list:
+        """Registra uma DI e consome DU-Es ainda com saldo na sua janela"""
+        seq = self._proximo()
+        id_registro = seq if id_registro is None else id_registro
+        if id_registro in self.importacoes:
+            raise ValueError(f"Importação já registrada: {id_registro}")
+        t = _em_segundos(data)
+        registro = {'cnpj_basico': cnpj, 'ncm': ncm, 'data_importacao': pd.Timestamp(data),
+                    'quantidade': quantidade, 'ii_valor': ii_valor, 'ipi_valor': ipi_valor,
+                    'valor_fob_brl': valor_fob_brl, 'alocado': 0}
+        self.importacoes[id_registro] = registro
+
+        novos = []
+        abertas = self._exp_abertas[(cnpj, ncm)]
+        i = bisect_left(abertas, (t,))
+        while i < len(abertas) and abertas[i][0] <= t + self.tolerancia and self._saldo(registro) > 0:
+            id_exp = abertas[i][2]
+            quantidade_alocada = min(self._saldo(registro), self._saldo(self.exportacoes[id_exp]))
+            novos.append(self._alocar(id_registro, id_exp, quantidade_alocada))
+            if self._saldo(self.exportacoes[id_exp]) <= 0:
+                del abertas[i]
+            else:
+                i += 1
+        if self._saldo(registro) > 0:
+            insort(self._imp_abertas[(cnpj, ncm)], (t, seq, id_registro))
+        return novos
+
+    def registrar_exportacao(self, cnpj, ncm, data, quantidade, id_registro=None) -> list:
+        """Registra uma DU-E e abate das DIs mais antigas com saldo (FIFO)"""
+        seq = self._proximo()
+        id_registro = seq if id_registro is None else id_registro
+        if id_registro in self.exportacoes:
+            raise ValueError(f"Exportação já registrada: {id_registro}")
+        t = _em_segundos(data)
+        registro = {'cnpj_basico': cnpj, 'ncm': ncm, 'data_exportacao': pd.Timestamp(data),
+                    'quantidade': quantidade, 'alocado': 0}
+        self.exportacoes[id_registro] = registro
+
+        novos = []
+        abertas = self._imp_abertas[(cnpj, ncm)]
+        i = bisect_left(abertas, (t - self.tolerancia,))
+        while i < len(abertas) and abertas[i][0] <= t and self._saldo(registro) > 0:
+            id_imp = abertas[i][2]
+            quantidade_alocada = min(self._saldo(registro), self._saldo(self.importacoes[id_imp]))
+            novos.append(self._alocar(id_imp, id_registro, quantidade_alocada))
+            if self._saldo(self.importacoes[id_imp]) <= 0:
+                del abertas[i]
+            else:
+                i += 1
+        if self._saldo(registro) > 0:
+            insort(self._exp_abertas[(cnpj, ncm)], (t, seq, id_registro))
+        return novos
+
+    @staticmethod
+    def _conferir_ids(ids, registrados, tipo):
+        vistos = set()
+        for id_registro in ids:
+            if id_registro in vistos or id_registro in registrados:
+                raise ValueError(f"{tipo} já registrada: {id_registro}")
+            vistos.add(id_registro)
+
+    def adicionar(self, importacoes: pd.DataFrame = None, exportacoes: pd.DataFrame = None,
+                  coluna_id_importacao: str = 'numero_di', coluna_id_exportacao: str = 'numero_due') -> int:
+        """
+        Adiciona lotes de DIs/DU-Es.
+
+        O id de cada registro vem da coluna `coluna_id_importacao` /
+        `coluna_id_exportacao` (número da DI / DU-E). Sem ela, o id é gerado
+        por lote ('L<lote>-<índice do DataFrame>'), então lotes lidos com
+        índices que se repetem (RangeIndex novo a cada arquivo) não colidem.
+
+        Os registros do lote entram em ordem cronológica (DIs antes das DU-Es
+        no mesmo dia), o que dá o FIFO clássico quando a base chega inteira.
+        Um id repetido (no lote ou já registrado) gera ValueError sem alterar
+        o razão. Retorna o número de lançamentos novos.
+        """
+        self._lotes += 1
+        eventos = []
+        if importacoes is not None and not importacoes.empty:
+            eventos.append(pd.DataFrame({'data': pd.to_datetime(importacoes['data_importacao']),
+                                         'tipo': 0, 'pos': np.arange(len(importacoes))}))
+        if exportacoes is not None and not exportacoes.empty:
+            eventos.append(pd.DataFrame({'data': pd.to_datetime(exportacoes['data_exportacao']),
+                                         'tipo': 1, 'pos': np.arange(len(exportacoes))}))
+        if not eventos:
+            return 0
+        eventos = pd.concat(eventos, ignore_index=True).sort_values(['data', 'tipo'], kind='stable')
+
+        def colunas(df, nomes, coluna_id):
+            if coluna_id in df.columns:
+                ids = df[coluna_id].tolist()
+            else:
+                ids = [f"L{self._lotes}-{indice}" for indice in df.index]
+            return [df[c].tolist() if c in df.columns else [0.0] * len(df) for c in nomes] + [ids]
+
+        if importacoes is not None:
+            imp = colunas(importacoes, ['cnpj_basico', 'ncm', 'quantidade', 'ii_valor', 'ipi_valor', 'valor_fob_brl'],
+                          coluna_id_importacao)
+        if exportacoes is not None:
+            exp = colunas(exportacoes, ['cnpj_basico', 'ncm', 'quantidade'], coluna_id_exportacao)
+
+        # Ids conferidos antes de aplicar qualquer registro: um repetido no
+        # meio do lote deixaria o razão aplicado pela metade
+        if importacoes is not None:
+            self._conferir_ids(imp[-1], self.importacoes, 'Importação')
+        if exportacoes is not None:
+            self._conferir_ids(exp[-1], self.exportacoes, 'Exportação')
+
+        antes = len(self.lancamentos)
+        for data, tipo, pos in eventos.itertuples(index=False):
+            if tipo == 0:
+                cnpj, ncm, qtd, ii, ipi, fob, ids = (c[pos] for c in imp)
+                self.registrar_importacao(cnpj, ncm, data, qtd, ii, ipi, fob, ids)
+            else:
+                cnpj, ncm, qtd, ids = (c[pos] for c in exp)
+                self.registrar_exportacao(cnpj, ncm, data, qtd, ids)
+        return len(self.lancamentos) - antes
+
+    def alocacoes(self) -> pd.DataFrame:
+        """Razão completo: uma linha por lançamento DI x DU-E"""
+        colunas = ['id_importacao', 'id_exportacao', 'cnpj_basico', 'ncm',
+                   'data_importacao', 'data_exportacao', 'quantidade']
+        linhas = []
+        for id_imp, id_exp, quantidade in self.lancamentos:
+            imp = self.importacoes[id_imp]
+            linhas.append((id_imp, id_exp, imp['cnpj_basico'], imp['ncm'], imp['data_importacao'],
+                           self.exportacoes[id_exp]['data_exportacao'], quantidade))
+        return pd.DataFrame(linhas, columns=colunas)
+
+    def saldos_importacoes(self) -> pd.DataFrame:
+        """Saldo de cada DI, se está comprovada e a economia proporcional"""
+        df = pd.DataFrame.from_dict(self.importacoes, orient='index')
+        if df.empty:
+            return df
+        df['saldo'] = df['quantidade'] - df['alocado']
+        fracao = (df['alocado'] / df['quantidade']).clip(upper=1.0)
+        df['comprovada'] = fracao >= self.proporcao_minima
+        df['economia_ii'] = df['ii_valor'] * fracao
+        df['economia_ipi'] = df['ipi_valor'] * fracao
+        return df
+
+    def saldos_exportacoes(self) -> pd.DataFrame:
+        """Saldo de cada DU-E ainda não usado para comprovar importações"""
+        df = pd.DataFrame.from_dict(self.exportacoes, orient='index')
+        if not df.empty:
+            df['saldo'] = df['quantidade'] - df['alocado']
+        return df
+
+    def resumo_por_empresa(self) -> pd.DataFrame:
+        """Economia proporcional, NCMs e lançamentos por CNPJ (só DIs com alocação)"""
+        saldos = self.saldos_importacoes()
+        if saldos.empty:
+            return saldos
+        saldos = saldos[saldos['alocado'] > 0]
+        por_empresa = saldos.groupby('cnpj_basico', sort=False)
+        resumo = por_empresa[['economia_ii', 'economia_ipi']].sum()
+        resumo['ncms'] = por_empresa['ncm'].agg(lambda x: ', '.join(sorted(x.astype(str).unique())))
+        resumo['importacoes_comprovadas'] = por_empresa['comprovada'].sum()
+        resumo['qtd_vinculos'] = pd.Series(
+            [self.importacoes[id_imp]['cnpj_basico'] for id_imp, _, _ in self.lancamentos]
+        ).value_counts()
+        return resumo
+
+# 'fifo': consome quantidades via RazaoDrawback | 'todos': todo par DI x DU-E elegível
+MODO_VINCULACAO = 'fifo'
 
 def calcular_economia_drawback(ii_valor: float, ipi_valor: float,
                              tipo_drawback: str = 'isencao') -> dict:
@@ -55,6 +344,31 @@ def calcular_economia_drawback(ii_valor: float, ipi_valor: float,
         'tipo_drawback_aplicavel': tipo_drawback
     }
 
+def precificar_pela_ptax(importacoes: pd.DataFrame, ptax, moeda: str = 'USD') -> pd.DataFrame:
+    """
+    Reprecifica as importações pela PTAX da data_importacao (ArmazemPTAX).
+
+    valor_fob_brl, ii_valor e ipi_valor mudam na proporção do novo câmbio;
+    datas fora do período do armazém mantêm os valores originais.
+    """
+    importacoes = importacoes.copy()
+    cotacoes = ptax.cotacoes(importacoes['data_importacao'], moeda)
+    encontradas = ~np.isnan(cotacoes)
+    if 'valor_fob_usd' in importacoes.columns:
+        usd = importacoes['valor_fob_usd'].to_numpy(dtype=float)
+    else:
+        usd = importacoes['valor_fob_brl'].to_numpy(dtype=float) / importacoes['cambio'].to_numpy(dtype=float)
+    novo_brl = np.where(encontradas, arredondar_decimal(usd * np.nan_to_num(cotacoes), 2),
+                        importacoes['valor_fob_brl'].to_numpy(dtype=float))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        fator = np.where(importacoes['valor_fob_brl'] > 0, novo_brl / importacoes['valor_fob_brl'], 1.0)
+    for coluna in ('ii_valor', 'ipi_valor'):
+        if coluna in importacoes.columns:
+            importacoes[coluna] = arredondar_decimal(importacoes[coluna].to_numpy(dtype=float) * fator, 2)
+    importacoes['valor_fob_brl'] = novo_brl
+    importacoes['cambio'] = np.where(encontradas, cotacoes, importacoes.get('cambio', np.nan))
+    return importacoes
+
 def checklist_documentos(empresa: pd.Series) -> list:
     faltantes = []
     # Dados fictícios, já que não temos no CSV atual — só exemplo funcional
@@ -64,6 +378,50 @@ def checklist_documentos(empresa: pd.Series) -> list:
         faltantes.append("✅ Registro no CMC (Manifestante)")
     return faltantes
 
+# 📄 RELATÓRIO HTML (modelos compilados uma vez, ver relatorio_html.py)
+CSS_DRAWBACK = """body { font-family: Arial, sans-serif; margin: 20px; background: #f8f9fa; }
+.container { max-width: 1000px; margin: auto; background: white; padding: 25px; border-radius: 10px; box-shadow: 0 2px 10px rgba(0,0,0,0.1); }
+.header { background: #2980b9; color: white; padding: 20px; text-align: center; border-radius: 8px; margin-bottom: 20px; }
+.empresa { border-left: 4px solid #3498db; margin: 15px 0; padding: 15px; background: #f8f9fa; }
+.highlight { color: #c0392b; font-weight: bold; }
+.paginacao { text-align: center; margin: 20px 0; }
+.paginacao a { margin: 0 10px; }
+"""
+
+INICIO_DRAWBACK = Modelo("""<div class="container">
+    <div class="header">
+        <h1>🎯 ANÁLISE DRAWBACK — ELEGIBILIDADE REAL</h1>
+        <p>Gerado em {gerado_em}</p>
+    </div>
+    <p><strong>{n}</strong> empresas elegíveis | Economia potencial: 
+       <span class="highlight">R$ {total_economia:,.2f}</span></p>
+""")
+
+CARTAO_DRAWBACK = Modelo("""
+    <div class="empresa">
+        <h3>🏭 {razao_social}</h3>
+        <p><strong>CNPJ:</strong> {cnpj_basico} | <strong>Porte:</strong> {porte} | <strong>Capital:</strong> R$ {capital_social:,.0f}</p>
+        <p>💰 <strong>Economia:</strong> R$ {economia_drawback_estimada:,.2f} (II: R$ {total_ii_importado:,.2f} + IPI: R$ {total_ipi_importado:,.2f})</p>
+        <p>📦 <strong>NCMs:</strong> {ncms_vinculaveis}</p>
+        <p>📋 <strong>Documentos:</strong> {documentos_faltantes}</p>
+    </div>""")
+
+def _cartoes_drawback(df_drawback: pd.DataFrame):
+    for emp in registros(df_drawback):
+        emp['documentos_faltantes'] = emp['documentos_faltantes'] or 'Nenhum crítico'
+        yield CARTAO_DRAWBACK(**emp)
+
+def gerar_relatorio_html(df_drawback: pd.DataFrame, caminho: str, linhas_por_pagina: int = None) -> list:
+    """
+    Relatório HTML das empresas elegíveis, uma linha por vez direto no arquivo
+    (tempo linear, memória constante); com linhas_por_pagina, um arquivo por página.
+    """
+    inicio = cabecalho("Drawback - Análise de Elegibilidade", CSS_DRAWBACK) + INICIO_DRAWBACK(
+        gerado_em=datetime.now().strftime('%d/%m/%Y %H:%M'), n=len(df_drawback),
+        total_economia=df_drawback['economia_drawback_estimada'].sum())
+    return escrever_relatorio(caminho, inicio, _cartoes_drawback(df_drawback), "</div></body></html>",
+                              linhas_por_pagina=linhas_por_pagina)
+
 # --- EXECUÇÃO PRINCIPAL ---
 if __name__ == "__main__":
     print("🔍 INICIANDO ANÁLISE DE ELEGIBILIDADE AO DRAWBACK...")
@@ -94,6 +452,12 @@ if __name__ == "__main__":
     )
     df['quantidade'] = 100  # 100 unidades por operação (base)
 
+    # 💱 Câmbio do dia de cada importação (PTAX local, sem acessar a rede)
+    ptax = armazem_padrao()
+    if ptax is not None and 'USD' in ptax:
+        df = precificar_pela_ptax(df, ptax)
+        print(f"💱 Importações reprecificadas pela PTAX de {ptax.cobertura('USD')[0]} a {ptax.cobertura('USD')[1]}.")
+
     # 🔄 GERA EXPORTAÇÕES SIMULADAS (apenas para teste de Drawback)
     print("🔄 Gerando exportações simuladas para análise de vinculação...")
     df_imp = df[df['tipo_operacao'] == 'importacao'].copy()
@@ -122,15 +486,31 @@ if __name__ == "__main__":
     cnpjs_candidatos = set(importacoes['cnpj_basico']) & set(exportacoes['cnpj_basico'])
     print(f"📌 {len(cnpjs_candidatos)} empresas com operações de importação e exportação.")
 
+    if MODO_VINCULACAO == 'fifo':
+        # Cada unidade exportada comprova uma única importação
+        razao = RazaoDrawback()
+        razao.adicionar(importacoes, exportacoes)
+        totais = razao.resumo_por_empresa()
+        print(f"📒 {len(razao.lancamentos)} lançamentos no razão de drawback (FIFO).")
+    else:
+        # Todos os vínculos de todas as empresas em uma única passada
+        todos_vinculos = vincular_importacoes_exportacoes(importacoes, exportacoes)
+        totais = pd.DataFrame()
+        if not todos_vinculos.empty:
+            por_empresa = todos_vinculos.groupby('cnpj_basico', sort=False)
+            totais = por_empresa[['ii_pago', 'ipi_pago']].sum().set_axis(['economia_ii', 'economia_ipi'], axis=1)
+            totais['ncms'] = por_empresa['ncm'].agg(lambda x: ', '.join(sorted(x.astype(str).unique())))
+            totais['qtd_vinculos'] = por_empresa.size()
+    dados_empresas = df_completo.drop_duplicates('cnpj_basico').set_index('cnpj_basico', drop=False)
+
     resultados = []
-    for cnpj in cnpjs_candidatos:
-        vinculos = verificar_vinculacao(importacoes, exportacoes, cnpj)
-        if not vinculos.empty:
-            ii_total = vinculos['ii_pago'].sum()
-            ipi_total = vinculos['ipi_pago'].sum()
+    if not totais.empty:
+        for cnpj in totais.index:
+            ii_total = totais.at[cnpj, 'economia_ii']
+            ipi_total = totais.at[cnpj, 'economia_ipi']
             economia = calcular_economia_drawback(ii_total, ipi_total)
             
-            emp_data = df_completo[df_completo['cnpj_basico'] == cnpj].iloc[0]
+            emp_data = dados_empresas.loc[cnpj]
             
             resultado = {
                 'cnpj_basico': cnpj,
@@ -141,8 +521,8 @@ if __name__ == "__main__":
                 'total_ipi_importado': ipi_total,
                 'economia_drawback_estimada': economia['economia_total'],
                 'tipo_drawback_recomendado': economia['tipo_drawback_aplicavel'],
-                'ncms_vinculaveis': ', '.join(sorted(vinculos['ncm'].astype(str).unique())),
-                'qtd_vinculos': len(vinculos),
+                'ncms_vinculaveis': totais.at[cnpj, 'ncms'],
+                'qtd_vinculos': int(totais.at[cnpj, 'qtd_vinculos']),
                 'documentos_faltantes': '; '.join(checklist_documentos(emp_data))
             }
             resultados.append(resultado)
@@ -158,38 +538,9 @@ if __name__ == "__main__":
         print(f"✅ {len(df_drawback)} empresas elegíveis ao Drawback identificadas.")
         print(f"💰 Economia total estimada: R$ {total_economia:,.2f}")
         
-        # Gera HTML (minimalista, mas claro)
-        html = f"""<!DOCTYPE html>
-<html><head><meta charset="utf-8"><title>Drawback - Análise de Elegibilidade</title>
-<style>
-body {{ font-family: Arial, sans-serif; margin: 20px; background: #f8f9fa; }}
-.container {{ max-width: 1000px; margin: auto; background: white; padding: 25px; border-radius: 10px; box-shadow: 0 2px 10px rgba(0,0,0,0.1); }}
-.header {{ background: #2980b9; color: white; padding: 20px; text-align: center; border-radius: 8px; margin-bottom: 20px; }}
-.empresa {{ border-left: 4px solid #3498db; margin: 15px 0; padding: 15px; background: #f8f9fa; }}
-.highlight {{ color: #c0392b; font-weight: bold; }}
-</style></head><body>
-<div class="container">
-    <div class="header">
-        <h1>🎯 ANÁLISE DRAWBACK — ELEGIBILIDADE REAL</h1>
-        <p>Gerado em {datetime.now().strftime('%d/%m/%Y %H:%M')}</p>
-    </div>
-    <p><strong>{len(df_drawback)}</strong> empresas elegíveis | Economia potencial: 
-       <span class="highlight">R$ {total_economia:,.2f}</span></p>
-"""
-        for _, emp in df_drawback.iterrows():
-            html += f"""
-    <div class="empresa">
-        <h3>🏭 {emp['razao_social']}</h3>
-        <p><strong>CNPJ:</strong> {emp['cnpj_basico']} | <strong>Porte:</strong> {emp['porte']} | <strong>Capital:</strong> R$ {emp['capital_social']:,.0f}</p>
-        <p>💰 <strong>Economia:</strong> R$ {emp['economia_drawback_estimada']:,.2f} (II: R$ {emp['total_ii_importado']:,.2f} + IPI: R$ {emp['total_ipi_importado']:,.2f})</p>
-        <p>📦 <strong>NCMs:</strong> {emp['ncms_vinculaveis']}</p>
-        <p>📋 <strong>Documentos:</strong> {emp['documentos_faltantes'] or 'Nenhum crítico'}</p>
-    </div>"""
-        
-        html += "</div></body></html>"
-        
-        with open('./output/relatorio_drawback.html', 'w', encoding='utf-8') as f:
-            f.write(html)
+        # Gera HTML (minimalista, mas claro), em páginas para listas grandes
+        paginas = gerar_relatorio_html(df_drawback, './output/relatorio_drawback.html',
+                                       linhas_por_pagina=LINHAS_POR_PAGINA)
         
         print("📁 Arquivos gerados:")
             # 🔥 ABRE O RELATÓRIO AUTOMATICAMENTE (Windows)
@@ -198,7 +549,7 @@ body {{ font-family: Arial, sans-serif; margin: 20px; background: #f8f9fa; }}
         print(f"\n🚀 Abrindo relatório em seu navegador...")
         os.startfile(relatorio_path)  # Windows-only, mas perfeito pro seu setup!
         print("   - ./output/empresas_drawback_elegiveis.csv")
-        print("   - ./output/relatorio_drawback.html")
+        print("   - ./output/relatorio_drawback.html" + (f" (+{len(paginas) - 1} páginas)" if len(paginas) > 1 else ""))
     
     else:
         print("❌ Nenhuma empresa elegível ao Drawback encontrada.")
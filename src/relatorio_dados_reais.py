@@ -6,6 +6,8 @@ import matplotlib.pyplot as plt
 import os
 from datetime import datetime
 
+from relatorio_html import CSS_BASE, Modelo, cabecalho, escrever_relatorio, registros, renderizar
+
 print("📊 Gerando relatório executivo com dados REAIS (modo servidor)...")
 
 # Carrega os dados reais simulados
@@ -70,91 +72,53 @@ plt.close()
 
 print("✅ Gráficos criados com sucesso!")
 
-# Gera HTML do relatório
-html_content = f"""
-<!DOCTYPE html>
-<html>
-<head>
-    <meta charset="utf-8">
-    <title>Relatório Tributec - Dados REAIS</title>
-    <style>
-        body {{ 
-            font-family: 'Segoe UI', Arial, sans-serif; 
-            max-width: 1200px; 
-            margin: 0 auto; 
-            padding: 20px;
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            color: #333;
-        }}
-        .container {{
-            background: white;
-            border-radius: 15px;
-            padding: 30px;
-            box-shadow: 0 10px 30px rgba(0,0,0,0.2);
-        }}
-        .header {{
-            text-align: center;
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            color: white;
-            padding: 20px;
-            border-radius: 10px;
-            margin-bottom: 30px;
-        }}
-        .grid {{
+# Gera HTML do relatório (modelos do relatorio_html.py, gravado em streaming)
+CSS_DADOS_REAIS = CSS_BASE + """        .grid {
             display: grid;
             grid-template-columns: repeat(auto-fit, minmax(300px, 1fr));
             gap: 20px;
             margin: 20px 0;
-        }}
-        .card {{
+        }
+        .card {
             background: #f8f9fa;
             padding: 20px;
             border-radius: 10px;
             border-left: 5px solid #667eea;
             box-shadow: 0 4px 6px rgba(0,0,0,0.1);
-        }}
-        .metric {{
+        }
+        .metric {
             font-size: 2.5em;
             font-weight: bold;
             color: #667eea;
             text-align: center;
-        }}
-        .label {{
+        }
+        .label {
             text-align: center;
             font-size: 1.1em;
             color: #666;
-        }}
-        .alerta {{ color: #e74c3c; font-weight: bold; }}
-        .sucesso {{ color: #27ae60; font-weight: bold; }}
-        .destaque {{ 
-            background: linear-gradient(135deg, #ffd89b 0%, #19547b 100%);
-            color: white;
-            padding: 15px;
-            border-radius: 10px;
-            text-align: center;
-            margin: 20px 0;
-        }}
-        .dashboard-img {{
+        }
+        .alerta { color: #e74c3c; font-weight: bold; }
+        .sucesso { color: #27ae60; font-weight: bold; }
+        .dashboard-img {
             width: 100%;
             border-radius: 10px;
             box-shadow: 0 6px 15px rgba(0,0,0,0.1);
             margin: 20px 0;
-        }}
-        .empresa-destaque {{
+        }
+        .empresa-destaque {
             background: #e8f4fd;
             border-left: 5px solid #3498db;
             padding: 15px;
             margin: 10px 0;
             border-radius: 5px;
-        }}
-    </style>
-</head>
-<body>
-    <div class="container">
+        }
+"""
+
+INICIO = Modelo("""    <div class="container">
         <div class="header">
             <h1>🎯 RELATÓRIO TRIBUTEC - DADOS REAIS</h1>
             <p>Análise baseada em 10.000 empresas da Receita Federal</p>
-            <p><em>Gerado em {datetime.now().strftime('%d/%m/%Y às %H:%M')}</em></p>
+            <p><em>Gerado em {gerado_em}</em></p>
         </div>
 
         <div class="destaque">
@@ -204,18 +168,18 @@ html_content = f"""
         <div class="grid">
             <div class="card">
                 <h3>🏢 PERFIL DAS EMPRESAS</h3>
-                <p><strong>Microempresas:</strong> {porte_1} ({porte_1/10:.1f}%)</p>
-                <p><strong>Pequenas:</strong> {porte_3} ({porte_3/10:.1f}%)</p>
-                <p><strong>Demais:</strong> {porte_5} ({porte_5/10:.1f}%)</p>
+                <p><strong>Microempresas:</strong> {porte_1} ({pct_porte_1:.1f}%)</p>
+                <p><strong>Pequenas:</strong> {porte_3} ({pct_porte_3:.1f}%)</p>
+                <p><strong>Demais:</strong> {porte_5} ({pct_porte_5:.1f}%)</p>
                 <p><strong>Capital Social Médio:</strong> R$ {capital_medio:,.0f}</p>
-                <p><strong>Capital Máximo Encontrado:</strong> R$ {df_operacoes['capital_social_real'].max():,.0f}</p>
+                <p><strong>Capital Máximo Encontrado:</strong> R$ {capital_maximo:,.0f}</p>
             </div>
             
             <div class="card">
                 <h3>🎯 RECOMENDAÇÕES ESTRATÉGICAS</h3>
                 <p>✅ <strong>ICT {ict_medio:.2f}</strong> indica carga tributária saudável</p>
                 <p>✅ <strong>Foco em {alto_potencial} empresas</strong> com alto potencial de otimização</p>
-                <p>✅ <strong>Microempresas ({porte_1/10:.1f}%)</strong> - Manter estratégia atual</p>
+                <p>✅ <strong>Microempresas ({pct_porte_1:.1f}%)</strong> - Manter estratégia atual</p>
                 <p>✅ <strong>Empresas acima de R$200k</strong> - Estudar benefícios fiscais</p>
                 <p>✅ <strong>Zero operações críticas</strong> - Situação controlada</p>
             </div>
@@ -223,20 +187,16 @@ html_content = f"""
 
         <div class="card">
             <h3>📋 TOP 5 EMPRESAS COM MAIOR POTENCIAL</h3>
-"""
+""")
 
-# Adiciona top 5 empresas com maior potencial
-top_empresas = df_operacoes.nlargest(5, 'capital_social_real')[['razao_social', 'capital_social_real', 'ict']]
-for _, emp in top_empresas.iterrows():
-    html_content += f"""
+EMPRESA_DESTAQUE = Modelo("""
             <div class="empresa-destaque">
-                <strong>{emp['razao_social']}</strong><br>
-                Capital: R$ {emp['capital_social_real']:,.0f} | ICT: {emp['ict']:.2f}
+                <strong>{razao_social}</strong><br>
+                Capital: R$ {capital_social_real:,.0f} | ICT: {ict:.2f}
             </div>
-"""
+""")
 
-html_content += f"""
-        </div>
+FIM = """        </div>
 
         <div class="card" style="text-align: center; background: #e8f5e8;">
             <h2>🎉 CONCLUSÃO: TUDO DENTRO DOS CONFORMES!</h2>
@@ -257,9 +217,17 @@ html_content += f"""
 </html>
 """
 
-# Salva o relatório HTML
-with open('./output/relatorio_dados_reais.html', 'w', encoding='utf-8') as f:
-    f.write(html_content)
+inicio = cabecalho("Relatório Tributec - Dados REAIS", CSS_DADOS_REAIS) + INICIO(
+    gerado_em=datetime.now().strftime('%d/%m/%Y às %H:%M'),
+    ict_medio=ict_medio, carga_media=carga_media, alto_potencial=alto_potencial,
+    porte_1=porte_1, porte_3=porte_3, porte_5=porte_5,
+    pct_porte_1=porte_1 / 10, pct_porte_3=porte_3 / 10, pct_porte_5=porte_5 / 10,
+    capital_medio=capital_medio, capital_maximo=df_operacoes['capital_social_real'].max())
+
+# Adiciona top 5 empresas com maior potencial
+top_empresas = df_operacoes.nlargest(5, 'capital_social_real')[['razao_social', 'capital_social_real', 'ict']]
+escrever_relatorio('./output/relatorio_dados_reais.html', inicio,
+                   renderizar(EMPRESA_DESTAQUE, registros(top_empresas)), FIM)
 
 print("✅ RELATÓRIO GERADO COM SUCESSO!")
 print("📁 Arquivos criados:")
@@ -0,0 +1,194 @@
+# src/relatorio_html.py
+"""
+Renderizador compartilhado dos relatórios HTML.
+
+Os modelos são compilados uma vez (o texto é quebrado em trechos fixos e
+campos {nome:formato}) e cada linha do relatório é só um join desses
+trechos. As linhas vêm de geradores e vão direto para o arquivo, então
+gerar o relatório é linear no número de empresas e a memória não depende
+dele: nada de html += dentro de loops.
+
+Listas muito grandes podem ser quebradas em páginas (relatorio.html,
+relatorio_p2.html, ...) com links de navegação entre elas.
+
+Valores de texto são escapados (& < > "); trechos de HTML já prontos
+(CSS, cartões montados por outro modelo) entram como Bruto(...).
+"""
+import numbers
+from html import escape
+from pathlib import Path
+from string import Formatter
+
+TAMANHO_BLOCO = 10_000        # registros convertidos do DataFrame por vez
+BUFFER_ESCRITA = 1 << 16      # bytes
+LINHAS_POR_PAGINA = 500       # empresas por arquivo nos relatórios grandes
+
+# Estilos comuns aos relatórios de empresas (analise_top_empresas, relatorio_dados_reais)
+CSS_BASE = """        body {
+            font-family: 'Segoe UI', Arial, sans-serif;
+            max-width: 1200px;
+            margin: 0 auto;
+            padding: 20px;
+            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+            color: #333;
+        }
+        .container {
+            background: white;
+            border-radius: 15px;
+            padding: 30px;
+            box-shadow: 0 10px 30px rgba(0,0,0,0.2);
+        }
+        .header {
+            text-align: center;
+            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+            color: white;
+            padding: 20px;
+            border-radius: 10px;
+            margin-bottom: 30px;
+        }
+        .destaque {
+            background: linear-gradient(135deg, #ffd89b 0%, #19547b 100%);
+            color: white;
+            padding: 15px;
+            border-radius: 10px;
+            text-align: center;
+            margin: 20px 0;
+        }
+        .paginacao { text-align: center; margin: 20px 0; }
+        .paginacao a { margin: 0 10px; }
+"""
+
+
+class Bruto(str):
+    """Texto que já é HTML e entra no modelo sem escape"""
+
+
+class Modelo:
+    """
+    Modelo no formato do str.format, compilado uma vez.
+
+    Modelo('<h3>{nome}</h3><p>R$ {valor:,.2f}</p>')(nome='A & B', valor=10)
+    """
+
+    def __init__(self, texto: str):
+        self.texto = texto
+        self._partes = []  # (trecho fixo, campo, formato, conversão)
+        for literal, campo, formato, conversao in Formatter().parse(texto):
+            self._partes.append((literal, campo, formato or '', conversao))
+
+    @property
+    def campos(self) -> list:
+        return [campo for _, campo, _, _ in self._partes if campo is not None]
+
+    def __call__(self, **valores) -> str:
+        pedacos = []
+        for literal, campo, formato, conversao in self._partes:
+            pedacos.append(literal)
+            if campo is None:
+                continue
+            valor = valores[campo]
+            if conversao == 'r':
+                valor = repr(valor)
+            elif conversao == 's':
+                valor = str(valor)
+            if isinstance(valor, Bruto):
+                pedacos.append(format(str(valor), formato))
+            elif isinstance(valor, numbers.Number):
+                pedacos.append(format(valor, formato))
+            else:
+                pedacos.append(escape(format(valor, formato)))
+        return ''.join(pedacos)
+
+
+CABECALHO = Modelo("""<!DOCTYPE html>
+<html>
+<head>
+    <meta charset="utf-8">
+    <title>{titulo}</title>
+    <style>
+{css}    </style>
+</head>
+<body>
+""")
+
+NAVEGACAO = Modelo("""
+        <div class="paginacao">
+            {anterior}<strong>Página {pagina}</strong>{proxima}
+        </div>
+""")
+
+
+def cabecalho(titulo: str, css: str = CSS_BASE) -> str:
+    """Início do documento até o <body>"""
+    return CABECALHO(titulo=titulo, css=Bruto(css))
+
+
+def registros(df, tamanho_bloco: int = TAMANHO_BLOCO):
+    """Linhas do DataFrame como dicts, convertidas em blocos (sem iterrows)"""
+    for inicio in range(0, len(df), tamanho_bloco):
+        yield from df.iloc[inicio:inicio + tamanho_bloco].to_dict('records')
+
+
+def renderizar(modelo: Modelo, linhas):
+    """Gerador: uma string por registro"""
+    for linha in linhas:
+        yield modelo(**linha)
+
+
+def arquivo_pagina(caminho, pagina: int) -> Path:
+    """relatorio.html, relatorio_p2.html, relatorio_p3.html, ..."""
+    caminho = Path(caminho)
+    return caminho if pagina == 1 else caminho.with_name(f"{caminho.stem}_p{pagina}{caminho.suffix}")
+
+
+def _navegacao(caminho, pagina: int, tem_proxima: bool) -> str:
+    anterior = proxima = ''
+    if pagina > 1:
+        anterior = f'<a href="{arquivo_pagina(caminho, pagina - 1).name}">← Anterior</a>'
+    if tem_proxima:
+        proxima = f'<a href="{arquivo_pagina(caminho, pagina + 1).name}">Próxima →</a>'
+    return NAVEGACAO(anterior=Bruto(anterior), pagina=pagina, proxima=Bruto(proxima))
+
+
+_FIM = object()
+
+
+def escrever_relatorio(caminho, inicio: str, linhas, fim: str,
+                       linhas_por_pagina: int = None) -> list:
+    """
+    Grava inicio + linhas + fim em `caminho`, consumindo `linhas` (qualquer
+    iterável de strings, de preferência um gerador) à medida que escreve.
+
+    Com linhas_por_pagina, cada página vira um arquivo próprio com o mesmo
+    início e fim e links para a anterior/próxima. Retorna os arquivos gravados.
+    """
+    caminho = Path(caminho)
+    caminho.parent.mkdir(parents=True, exist_ok=True)
+    linhas = iter(linhas)
+    seguinte = next(linhas, _FIM)
+    paginado = bool(linhas_por_pagina)
+    arquivos = []
+    pagina = 1
+    while True:
+        arquivo = arquivo_pagina(caminho, pagina)
+        with open(arquivo, 'w', encoding='utf-8', buffering=BUFFER_ESCRITA) as f:
+            f.write(inicio)
+            escritas = 0
+            while seguinte is not _FIM and (not paginado or escritas < linhas_por_pagina):
+                f.write(seguinte)
+                escritas += 1
+                seguinte = next(linhas, _FIM)
+            if paginado and (pagina > 1 or seguinte is not _FIM):
+                f.write(_navegacao(caminho, pagina, seguinte is not _FIM))
+            f.write(fim)
+        arquivos.append(arquivo)
+        if seguinte is _FIM:
+            break
+        pagina += 1
+    # Páginas que sobraram de uma execução anterior com mais empresas
+    sobra = arquivo_pagina(caminho, pagina + 1)
+    while sobra.exists():
+        sobra.unlink()
+        pagina += 1
+        sobra = arquivo_pagina(caminho, pagina + 1)
+    return arquivos
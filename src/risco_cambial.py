@@ -0,0 +1,405 @@
+# src/risco_cambial.py
+"""
+Risco cambial de uma carteira de importações em aberto (Monte Carlo).
+
+Cada operação tem valor FOB numa moeda, um prazo (dias úteis até o
+fechamento do câmbio) e, opcionalmente, alíquotas próprias. Os caminhos de
+câmbio saem de um modelo:
+
+    ModeloGBM        movimento browniano geométrico, moedas correlacionadas
+                     (Cholesky da correlação dos retornos diários), caminhos
+                     construídos por ponte browniana
+    ModeloBootstrap  sorteia dias inteiros do histórico PTAX (preserva caudas
+                     e a correlação entre as moedas); o histórico vem do
+                     ArmazemPTAX (ptax.py) ou de um CSV
+
+O custo de cada caminho passa pelo cálculo do ICMS por dentro
+(icms_rj.icms_importacao_rj_lote) e a perda é a diferença para o custo no
+câmbio de hoje. VaR e CVaR saem de um histograma adaptativo
+(QuantilStreaming): caminhos são gerados em lotes e operações processadas
+em blocos, então a memória fica em tamanho_chunk x bloco_operacoes,
+qualquer que seja caminhos x operações.
+
+Uso:
+    python src/risco_cambial.py                 # carteira sintética de 5.000 operações
+    python src/risco_cambial.py 20000 50000     # operações e caminhos
+"""
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from icms_rj import icms_importacao_rj_lote
+from ptax import armazem_padrao
+
+PROJECT_ROOT = Path(__file__).parent.parent
+HISTORICO_PTAX = PROJECT_ROOT / "data" / "ptax.csv"
+SAIDA = PROJECT_ROOT / "output" / "risco_cambial_carteira.csv"
+
+NIVEIS = (0.95, 0.99)
+METRICAS = ("custo_total", "total_tributos", "icms_devido")
+PARAMETROS_OPERACAO = ("aliquota_icms", "ii_percent", "ipi_percent",
+                       "iof_cambio_percent", "despesas_aduaneiras")
+
+
+# ===========================
+# HISTÓRICO E MODELOS DE CÂMBIO
+# ===========================
+
+def carregar_historico(caminho=HISTORICO_PTAX) -> pd.DataFrame:
+    """
+    Histórico de cotações: uma linha por data, uma coluna por moeda.
+
+    Aceita o formato longo (data, moeda, cotacao) ou já largo (data, USD, EUR, ...).
+    """
+    df = pd.read_csv(caminho, parse_dates=["data"])
+    if "moeda" in df.columns:
+        df = df.pivot_table(index="data", columns="moeda", values="cotacao", aggfunc="last")
+    else:
+        df = df.set_index("data")
+    return df.sort_index().dropna()
+
+
+def retornos_log(historico: pd.DataFrame) -> pd.DataFrame:
+    return np.log(historico).diff().dropna()
+
+
+def ponte_browniana(prazos) -> list:
+    """
+    Ordem de construção de W nos prazos (ordenados, únicos) por ponte browniana.
+
+    Passo k: (ponto, vizinho à esquerda, vizinho à direita, peso_esq, peso_dir,
+    desvio), com W[ponto] = peso_esq·W[esq] + peso_dir·W[dir] + desvio·Z_k
+    (vizinho -1 = W_0 = 0, None = sem vizinho). O primeiro passo é o último
+    prazo; os seguintes bissectam os intervalos em largura, então os
+    primeiros choques concentram quase toda a variância do caminho.
+    """
+    tempos = np.asarray(prazos, dtype=float)
+    if not len(tempos):
+        return []
+    passos = [(len(tempos) - 1, -1, None, 0.0, 0.0, float(np.sqrt(tempos[-1])))]
+    intervalos = [(-1, len(tempos) - 1)]
+    while intervalos:
+        proximos = []
+        for esq, dir in intervalos:
+            if dir - esq < 2:
+                continue
+            meio = (esq + dir) // 2
+            t_esq = tempos[esq] if esq >= 0 else 0.0
+            t_meio, t_dir = tempos[meio], tempos[dir]
+            largura = t_dir - t_esq
+            passos.append((meio, esq, dir, (t_dir - t_meio) / largura, (t_meio - t_esq) / largura,
+                           float(np.sqrt((t_meio - t_esq) * (t_dir - t_meio) / largura))))
+            proximos += [(esq, meio), (meio, dir)]
+        intervalos = proximos
+    return passos
+
+
+def _prazos_unicos(prazos):
+    prazos = np.asarray(prazos, dtype=np.int64)
+    if (prazos < 0).any():
+        raise ValueError("prazo_dias não pode ser negativo")
+    return np.unique(prazos)
+
+
+class ModeloGBM:
+    """
+    Câmbio lognormal: ln S_t = ln S_0 + (μ - σ²/2)·t + σ·W_t, por moeda.
+
+    volatilidade e drift são diários (dias úteis); correlacao é a matriz
+    entre os choques das moedas, na ordem de `moedas`.
+    """
+
+    def __init__(self, spot: dict, volatilidade: dict, correlacao=None, drift: dict = None):
+        self.moedas = list(spot)
+        self.spot = np.array([spot[m] for m in self.moedas], dtype=float)
+        self.volatilidade = np.array([volatilidade[m] for m in self.moedas], dtype=float)
+        self.drift = np.array([(drift or {}).get(m, 0.0) for m in self.moedas], dtype=float)
+        correlacao = np.eye(len(self.moedas)) if correlacao is None else np.asarray(correlacao, dtype=float)
+        self._cholesky = np.linalg.cholesky(correlacao)
+
+    @classmethod
+    def do_historico(cls, historico: pd.DataFrame, drift_zero: bool = True):
+        """Spot = última cotação; σ e correlação dos retornos diários"""
+        retornos = retornos_log(historico)
+        moedas = list(historico.columns)
+        drift = None if drift_zero else dict(zip(moedas, retornos.mean()))
+        return cls(dict(historico.iloc[-1]), dict(retornos.std()), retornos.corr().to_numpy(), drift)
+
+    def simular(self, rng: np.random.Generator, n_caminhos: int, prazos) -> np.ndarray:
+        """
+        Cotações (n_caminhos, len(prazos), moedas) nos prazos (ordenados, únicos).
+
+        Os choques vêm na ordem da ponte browniana, uma moeda após a outra:
+        as primeiras dimensões do rng dão o câmbio no último prazo de cada
+        moeda, que é onde um Amostrador Sobol/Halton precisa estar.
+        """
+        prazos = np.asarray(prazos, dtype=float)
+        n_moedas = len(self.moedas)
+        choques = rng.standard_normal((n_caminhos, len(prazos) * n_moedas)).reshape(
+            n_caminhos, len(prazos), n_moedas)
+        w = np.zeros((n_caminhos, len(prazos), n_moedas))
+        for k, (ponto, esq, dir, peso_esq, peso_dir, desvio) in enumerate(ponte_browniana(prazos)):
+            w[:, ponto] = desvio * choques[:, k]
+            if esq >= 0:
+                w[:, ponto] += peso_esq * w[:, esq]
+            if dir is not None:
+                w[:, ponto] += peso_dir * w[:, dir]
+        w = w @ self._cholesky.T
+        return self.spot * np.exp((self.drift - 0.5 * self.volatilidade ** 2) * prazos[:, None]
+                                  + self.volatilidade * w)
+
+
+class ModeloBootstrap:
+    """
+    Cada dia simulado repete um dia sorteado do histórico (todas as moedas
+    juntas), então caudas gordas e correlação vêm dos dados, sem supor normal.
+    """
+
+    def __init__(self, historico: pd.DataFrame):
+        self.moedas = list(historico.columns)
+        self.spot = historico.iloc[-1].to_numpy(dtype=float)
+        self.retornos = retornos_log(historico).to_numpy()
+        if not len(self.retornos):
+            raise ValueError("histórico precisa de pelo menos duas datas")
+
+    def simular(self, rng: np.random.Generator, n_caminhos: int, prazos) -> np.ndarray:
+        prazos = np.asarray(prazos, dtype=np.int64)
+        horizonte = int(prazos.max(initial=0))
+        sorteados = self.retornos[rng.integers(0, len(self.retornos), (n_caminhos, horizonte))]
+        acumulado = np.zeros((n_caminhos, horizonte + 1, len(self.moedas)))
+        np.cumsum(sorteados, axis=1, out=acumulado[:, 1:])
+        return self.spot * np.exp(acumulado[:, prazos])
+
+
+# ===========================
+# QUANTIS EM STREAMING
+# ===========================
+
+class QuantilStreaming:
+    """
+    Quantis e CVaR de um fluxo de valores em memória constante.
+
+    Histograma de `bins` faixas iguais que dobra de largura (juntando faixas
+    vizinhas) quando chega um valor fora do intervalo. Cada faixa guarda a
+    contagem e a soma dos valores, então o CVaR usa as médias reais da cauda.
+    O erro do quantil fica abaixo da largura de uma faixa.
+    """
+
+    def __init__(self, bins: int = 8192):
+        if bins % 2:
+            raise ValueError("bins precisa ser par")
+        self.bins = bins
+        self.n = 0
+        self.soma = 0.0
+        self.soma_quadrados = 0.0
+        self.minimo = np.inf
+        self.maximo = -np.inf
+        self.inicio = None
+        self.largura = None
+        self.contagens = np.zeros(bins, dtype=np.int64)
+        self.somas = np.zeros(bins)
+
+    def _dobrar(self, para_baixo: bool):
+        metade = self.bins // 2
+        contagens = self.contagens.reshape(metade, 2).sum(axis=1)
+        somas = self.somas.reshape(metade, 2).sum(axis=1)
+        self.contagens[:] = 0
+        self.somas[:] = 0.0
+        destino = slice(metade, None) if para_baixo else slice(None, metade)
+        self.contagens[destino] = contagens
+        self.somas[destino] = somas
+        if para_baixo:
+            self.inicio -= self.largura * self.bins
+        self.largura *= 2
+
+    def atualizar(self, valores):
+        valores = np.asarray(valores, dtype=float).ravel()
+        if not valores.size:
+            return
+        menor, maior = float(valores.min()), float(valores.max())
+        if self.inicio is None:
+            amplitude = (maior - menor) or max(abs(maior), 1.0)
+            # Folga de meia amplitude para cada lado: os próximos lotes raramente saem dela
+            self.inicio = menor - 0.5 * amplitude
+            self.largura = 2 * amplitude / self.bins
+        while menor < self.inicio:
+            self._dobrar(para_baixo=True)
+        while maior >= self.inicio + self.largura * self.bins:
+            self._dobrar(para_baixo=False)
+
+        indice = ((valores - self.inicio) / self.largura).astype(np.int64)
+        np.clip(indice, 0, self.bins - 1, out=indice)
+        self.contagens += np.bincount(indice, minlength=self.bins)
+        self.somas += np.bincount(indice, weights=valores, minlength=self.bins)
+        self.n += valores.size
+        self.soma += float(valores.sum())
+        self.soma_quadrados += float(valores @ valores)
+        self.minimo = min(self.minimo, menor)
+        self.maximo = max(self.maximo, maior)
+
+    def _posicao(self, p: float):
+        """Faixa onde cai o quantil p e a fração da faixa abaixo dele"""
+        if not self.n:
+            raise ValueError("nenhum valor acumulado")
+        alvo = p * self.n
+        acumulado = np.cumsum(self.contagens)
+        faixa = min(int(np.searchsorted(acumulado, alvo, side="left")), self.bins - 1)
+        while self.contagens[faixa] == 0 and faixa < self.bins - 1:
+            faixa += 1
+        anteriores = acumulado[faixa] - self.contagens[faixa]
+        fracao = (alvo - anteriores) / self.contagens[faixa] if self.contagens[faixa] else 1.0
+        return faixa, min(max(fracao, 0.0), 1.0)
+
+    def quantil(self, p: float) -> float:
+        faixa, fracao = self._posicao(p)
+        valor = self.inicio + (faixa + fracao) * self.largura
+        return float(min(max(valor, self.minimo), self.maximo))
+
+    def cvar(self, p: float) -> float:
+        """Média dos valores acima do quantil p (expected shortfall)"""
+        faixa, fracao = self._posicao(p)
+        resto = 1.0 - fracao
+        quantidade = self.contagens[faixa + 1:].sum() + resto * self.contagens[faixa]
+        if quantidade <= 0:
+            return self.quantil(p)
+        return float((self.somas[faixa + 1:].sum() + resto * self.somas[faixa]) / quantidade)
+
+    @property
+    def media(self) -> float:
+        return self.soma / self.n if self.n else 0.0
+
+    @property
+    def desvio(self) -> float:
+        if self.n < 2:
+            return 0.0
+        variancia = (self.soma_quadrados - self.n * self.media ** 2) / (self.n - 1)
+        return float(np.sqrt(max(variancia, 0.0)))
+
+
+# ===========================
+# CARTEIRA
+# ===========================
+
+def _custos(valor_fob, cambio, parametros: dict) -> dict:
+    """Custo total, tributos e ICMS de cada operação (qualquer forma, com broadcasting)"""
+    r = icms_importacao_rj_lote(valor_fob, cambio, **parametros)
+    return {
+        "custo_total": r["valor_brl"] + r["total_tributos"],
+        "total_tributos": r["total_tributos"],
+        "icms_devido": r["icms_devido"],
+    }
+
+
+def perdas_em_lotes(operacoes: pd.DataFrame, modelo, n_caminhos: int = 10_000,
+                    tamanho_chunk: int = 1_000, bloco_operacoes: int = 1_000, rng=None):
+    """
+    Gera, lote a lote, as perdas da carteira por caminho: dict métrica -> array
+    (tamanho do lote,), com perda = valor no caminho - valor no câmbio de hoje.
+    """
+    rng = rng if rng is not None else np.random.default_rng()
+    coluna_valor = "valor_fob" if "valor_fob" in operacoes.columns else "valor_fob_usd"
+    valor_fob = operacoes[coluna_valor].to_numpy(dtype=float)
+    moedas = operacoes["moeda"].to_numpy() if "moeda" in operacoes.columns else np.full(len(operacoes), "USD")
+    desconhecidas = set(moedas) - set(modelo.moedas)
+    if desconhecidas:
+        raise ValueError(f"Moedas sem cotação no modelo: {sorted(desconhecidas)}")
+    indice_moeda = pd.Index(modelo.moedas).get_indexer(moedas)
+    prazos = operacoes["prazo_dias"].to_numpy(dtype=np.int64)
+    prazos_unicos = _prazos_unicos(prazos)
+    indice_prazo = np.searchsorted(prazos_unicos, prazos)
+    parametros = {p: operacoes[p].to_numpy(dtype=float) for p in PARAMETROS_OPERACAO
+                  if p in operacoes.columns}
+
+    blocos = [slice(i, min(i + bloco_operacoes, len(operacoes)))
+              for i in range(0, len(operacoes), bloco_operacoes)]
+    no_spot = {m: 0.0 for m in METRICAS}
+    for bloco in blocos:
+        custos = _custos(valor_fob[bloco], modelo.spot[indice_moeda[bloco]],
+                         {p: v[bloco] for p, v in parametros.items()})
+        for m in METRICAS:
+            no_spot[m] += float(custos[m].sum())
+
+    restante = n_caminhos
+    while restante > 0:
+        n = min(tamanho_chunk, restante)
+        cotacoes = modelo.simular(rng, n, prazos_unicos)
+        totais = {m: np.zeros(n) for m in METRICAS}
+        for bloco in blocos:
+            cambio = cotacoes[:, indice_prazo[bloco], indice_moeda[bloco]]  # (n, operações do bloco)
+            custos = _custos(valor_fob[bloco], cambio, {p: v[bloco] for p, v in parametros.items()})
+            for m in METRICAS:
+                totais[m] += custos[m].sum(axis=1)
+        yield {m: totais[m] - no_spot[m] for m in METRICAS}
+        restante -= n
+
+
+def simular_risco_carteira(operacoes: pd.DataFrame, modelo, n_caminhos: int = 10_000,
+                           niveis=NIVEIS, tamanho_chunk: int = 1_000,
+                           bloco_operacoes: int = 1_000, seed: int = None,
+                           rng: np.random.Generator = None) -> pd.DataFrame:
+    """
+    VaR e CVaR da carteira: uma linha por métrica (custo_total, total_tributos,
+    icms_devido), com média e desvio da perda e VaR/CVaR em cada nível.
+    Perda positiva = a carteira fica mais cara que no câmbio de hoje.
+
+    `rng` pode ser um amostragem.Amostrador (Sobol/Halton/antitéticas) para
+    o mesmo erro com menos caminhos.
+    """
+    rng = rng if rng is not None else np.random.default_rng(seed)
+    estimadores = {m: QuantilStreaming() for m in METRICAS}
+    for perdas in perdas_em_lotes(operacoes, modelo, n_caminhos, tamanho_chunk, bloco_operacoes, rng):
+        for m in METRICAS:
+            estimadores[m].atualizar(perdas[m])
+
+    linhas = []
+    for m, est in estimadores.items():
+        linha = {"metrica": m, "caminhos": est.n, "perda_media": est.media, "desvio": est.desvio}
+        for nivel in niveis:
+            rotulo = f"{nivel * 100:g}"
+            linha[f"var_{rotulo}"] = est.quantil(nivel)
+            linha[f"cvar_{rotulo}"] = est.cvar(nivel)
+        linha["pior_caso"] = est.maximo
+        linhas.append(linha)
+    return pd.DataFrame(linhas).set_index("metrica")
+
+
+def carteira_sintetica(n: int, moedas=("USD", "EUR", "CNY"), seed: int = 0) -> pd.DataFrame:
+    """Operações em aberto para testes e demonstração"""
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "valor_fob": rng.lognormal(np.log(100_000), 1.0, n).round(2),
+        "moeda": rng.choice(list(moedas), n),
+        "prazo_dias": rng.integers(1, 181, n),
+        "aliquota_icms": rng.choice([0.18, 0.20, 0.22], n),
+    })
+
+
+# === EXECUÇÃO ===
+if __name__ == "__main__":
+    argumentos = [int(a) for a in sys.argv[1:]]
+    n_operacoes = argumentos[0] if argumentos else 5_000
+    n_caminhos = argumentos[1] if len(argumentos) > 1 else 10_000
+
+    armazem = armazem_padrao()
+    if armazem is not None or HISTORICO_PTAX.exists():
+        historico = armazem.historico() if armazem is not None else carregar_historico()
+        modelo = ModeloBootstrap(historico)
+        print(f"📂 Bootstrap do histórico PTAX ({len(historico)} dias, moedas {modelo.moedas})")
+    else:
+        # Sem histórico: parâmetros aproximados (vol diária ~1%, correlação moderada)
+        modelo = ModeloGBM({"USD": 5.60, "EUR": 6.05, "CNY": 0.78},
+                           {"USD": 0.010, "EUR": 0.009, "CNY": 0.008},
+                           [[1.0, 0.6, 0.7], [0.6, 1.0, 0.5], [0.7, 0.5, 1.0]])
+        print("⚠️ Sem histórico PTAX (data/ptax ou data/ptax.csv): usando GBM com parâmetros aproximados")
+
+    carteira = carteira_sintetica(n_operacoes, moedas=modelo.moedas)
+    print(f"🎲 {n_caminhos} caminhos x {n_operacoes} operações em aberto...")
+    resultado = simular_risco_carteira(carteira, modelo, n_caminhos, seed=42)
+
+    pd.options.display.float_format = "{:,.0f}".format
+    print(f"\n{resultado.to_string()}")
+    SAIDA.parent.mkdir(exist_ok=True)
+    resultado.to_csv(SAIDA, encoding="utf-8")
+    print(f"\n📁 Resultado salvo em {SAIDA}")
@@ -0,0 +1,145 @@
+# src/servidor_rag.py
+"""
+Servidor RAG residente (asyncio, TCP local, uma linha JSON por mensagem).
+
+Carrega o motor (índice FAISS + LLM) uma única vez e atende perguntas
+concorrentes. Perguntas que chegam dentro da mesma janela curta têm os
+embeddings calculados numa única chamada; recuperação e geração rodam em
+threads, com limite de perguntas simultâneas.
+
+Protocolo:
+    -> {"pergunta": "..."}
+    <- {"pergunta": "...", "resposta": "...", "fontes": [{"fonte": ..., "pagina": ...}]}
+    <- {"erro": "..."}
+
+Uso:
+    python src/servidor_rag.py
+"""
+import asyncio
+import json
+
+HOST = "127.0.0.1"
+PORTA = 8765
+JANELA_LOTE = 0.01        # segundos esperando outras perguntas para o mesmo lote
+MAX_LOTE = 32             # perguntas por chamada de embedding
+MAX_CONCORRENTES = 8      # perguntas em recuperação/geração ao mesmo tempo
+
+
+class LoteadorEmbeddings:
+    """
+    Junta pedidos de embedding que chegam juntos numa única chamada.
+
+    O primeiro pedido abre uma janela de `janela` segundos; o lote é enviado
+    quando ela fecha ou quando atinge `max_lote` textos.
+    """
+
+    def __init__(self, funcao_lote, janela: float = JANELA_LOTE, max_lote: int = MAX_LOTE):
+        self.funcao_lote = funcao_lote
+        self.janela = janela
+        self.max_lote = max_lote
+        self._fila = []
+        self._timer = None
+        self._tarefas = set()  # o loop só guarda referência fraca às tarefas
+        self.lotes_enviados = 0
+
+    async def embed(self, texto: str) -> list:
+        loop = asyncio.get_running_loop()
+        futuro = loop.create_future()
+        self._fila.append((texto, futuro))
+        if len(self._fila) >= self.max_lote:
+            self._disparar()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.janela, self._disparar)
+        return await futuro
+
+    def _disparar(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        lote, self._fila = self._fila, []
+        if lote:
+            tarefa = asyncio.ensure_future(self._executar(lote))
+            self._tarefas.add(tarefa)
+            tarefa.add_done_callback(self._tarefas.discard)
+
+    async def _executar(self, lote: list):
+        self.lotes_enviados += 1
+        try:
+            vetores = await asyncio.to_thread(self.funcao_lote, [texto for texto, _ in lote])
+        except Exception as e:
+            for _, futuro in lote:
+                if not futuro.done():
+                    futuro.set_exception(e)
+            return
+        for (_, futuro), vetor in zip(lote, vetores):
+            if not futuro.done():
+                futuro.set_result(vetor)
+
+
+class ServidorRAG:
+    """
+    Atende perguntas usando um motor com embed_perguntas/responder (ver
+    motor_rag); resposta_em_cache e salvar são usados se existirem.
+    """
+
+    def __init__(self, motor, host: str = HOST, porta: int = PORTA,
+                 janela_lote: float = JANELA_LOTE, max_lote: int = MAX_LOTE,
+                 max_concorrentes: int = MAX_CONCORRENTES):
+        self.motor = motor
+        self.host = host
+        self.porta = porta
+        self.loteador = LoteadorEmbeddings(motor.embed_perguntas, janela_lote, max_lote)
+        self._vagas = asyncio.Semaphore(max_concorrentes)
+        self.servidor = None
+
+    async def responder(self, pergunta: str) -> dict:
+        # Pergunta idêntica já respondida: não entra no lote de embeddings
+        if hasattr(self.motor, "resposta_em_cache"):
+            resultado = await asyncio.to_thread(self.motor.resposta_em_cache, pergunta)
+            if resultado is not None:
+                return resultado
+        vetor = await self.loteador.embed(pergunta)
+        async with self._vagas:
+            return await asyncio.to_thread(self.motor.responder, pergunta, vetor)
+
+    async def _atender(self, reader, writer):
+        try:
+            while linha := await reader.readline():
+                try:
+                    pedido = json.loads(linha)
+                    resposta = await self.responder(str(pedido["pergunta"]))
+                except Exception as e:
+                    resposta = {"erro": f"{type(e).__name__}: {e}"}
+                writer.write(json.dumps(resposta, ensure_ascii=False).encode("utf-8") + b"\n")
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def iniciar(self):
+        self.servidor = await asyncio.start_server(self._atender, self.host, self.porta)
+        # Porta 0 = escolhida pelo sistema (útil em testes)
+        self.porta = self.servidor.sockets[0].getsockname()[1]
+        return self.servidor
+
+    async def servir(self):
+        await self.iniciar()
+        print(f"🚀 Servidor RAG ouvindo em {self.host}:{self.porta}")
+        try:
+            async with self.servidor:
+                await self.servidor.serve_forever()
+        finally:
+            # Embeddings desde a última gravação periódica do cache não se perdem ao encerrar
+            if hasattr(self.motor, "salvar"):
+                self.motor.salvar()
+
+
+# === EXECUÇÃO ===
+if __name__ == "__main__":
+    from motor_rag import MotorRAG
+
+    try:
+        asyncio.run(ServidorRAG(MotorRAG()).servir())
+    except KeyboardInterrupt:
+        print("\n👋 Servidor RAG encerrado.")
@@ -0,0 +1,71 @@
+import json
+import math
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from amostragem import (MAX_DIMENSOES_SOBOL, Amostrador, RiscoICMS, normal_inversa, relatorio_convergencia,
+                        sobol)
+from analise_simulacoes_v2 import simular_lote
+from risco_cambial import ModeloGBM, carteira_sintetica, simular_risco_carteira
+
+CONFIG = json.loads((Path(__file__).parent.parent / "config.json").read_text(encoding="utf-8"))
+
+
+def test_sobol_estratifica_cada_dimensao():
+    pontos = sobol(1024, 16)
+    for d in range(16):
+        assert (np.bincount((pontos[:, d] * 1024).astype(int), minlength=1024) == 1).all()
+
+
+def test_normal_inversa():
+    u = np.array([1e-12, 0.001, 0.025, 0.5, 0.9, 0.99, 1 - 1e-9])
+    cdf = np.array([0.5 * math.erfc(-z / math.sqrt(2)) for z in normal_inversa(u)])
+    np.testing.assert_allclose(cdf, u, rtol=1e-6)
+
+
+def test_amostrador_continua_a_sequencia_e_espelha_antiteticas():
+    a = Amostrador("sobol", seed=3)
+    em_lotes = np.vstack([a.uniformes(100, 3), a.uniformes(28, 3)])
+    np.testing.assert_array_equal(em_lotes, Amostrador("sobol", seed=3).uniformes(128, 3))
+
+    z = Amostrador("pseudo", antiteticas=True, seed=1).standard_normal((10, 2))
+    np.testing.assert_allclose(z[:5], -z[5:])
+
+
+def test_qmc_e_controle_reduzem_o_erro_do_var():
+    relatorio = relatorio_convergencia(RiscoICMS(), tamanhos=(1024,), replicas=16).set_index("configuracao")
+    assert relatorio.loc["sobol", "ganho_var_99"] > 10
+    assert relatorio.loc["controle", "ganho_var_99"] > 100
+    assert relatorio.loc["sobol", "var_99"] == pytest.approx(relatorio.loc["pseudo", "var_99"], rel=0.01)
+
+
+def test_simuladores_aceitam_amostrador():
+    lote = simular_lote(256, CONFIG, amostrador=Amostrador("halton", seed=0))
+    assert len(lote) == 256
+    assert set(np.unique(lote.colunas["aliquota_icms"])) <= {0.12, 0.17, 0.18}
+
+
+def test_carteira_padrao_com_sobol_usa_poucas_dimensoes_qmc():
+    # 200 operações em 3 moedas: ~170 prazos x 3 moedas = centenas de dimensões
+    modelo = ModeloGBM({"USD": 5.6, "EUR": 6.0, "CNY": 0.78}, {"USD": 0.010, "EUR": 0.009, "CNY": 0.008},
+                       [[1.0, 0.6, 0.7], [0.6, 1.0, 0.5], [0.7, 0.5, 1.0]])
+    carteira = carteira_sintetica(200, moedas=("USD", "EUR", "CNY"))
+    assert carteira["prazo_dias"].nunique() * 3 > MAX_DIMENSOES_SOBOL
+
+    sobol_ = simular_risco_carteira(carteira, modelo, 4096, tamanho_chunk=1024, rng=Amostrador("sobol", seed=0))
+    pseudo = simular_risco_carteira(carteira, modelo, 50_000, tamanho_chunk=10_000, seed=1)
+    assert sobol_.loc["custo_total", "caminhos"] == 4096
+    for coluna in ("var_95", "var_99"):
+        assert sobol_.loc["custo_total", coluna] == pytest.approx(pseudo.loc["custo_total", coluna], rel=0.05)
+
+
+def test_dimensoes_alem_do_limite_sao_pseudoaleatorias():
+    for metodo in ("sobol", "halton"):
+        pontos = Amostrador(metodo, seed=0).uniformes(4096, 600)
+        assert abs(np.corrcoef(pontos[:, 539], pontos[:, 540])[0, 1]) < 0.1
+    pontos = Amostrador("sobol", seed=0).uniformes(4096, 600)
+    assert (np.bincount((pontos[:, 15] * 4096).astype(int), minlength=4096) == 1).all()
+    with pytest.raises(ValueError, match="16 dimensões"):
+        sobol(8, 17)
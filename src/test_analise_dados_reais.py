@@ -0,0 +1,40 @@
+import numpy as np
+import pandas as pd
+
+from analise_dados_reais import (calcular_ict, classificar_ict, simular_operacoes_reais,
+                                 simular_operacoes_reais_lote)
+
+
+def _empresas(n=50, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'cnpj_basico': np.arange(n, dtype='int64'),
+        'razao_social': [f'EMPRESA {i} COMERCIO IMPORTACAO E EXPORTACAO LTDA'[:12 + i] for i in range(n)],
+        'capital_social': np.r_[0.0, rng.uniform(1e3, 1e9, n - 1)],
+        'porte_empresa': pd.Categorical(rng.choice(['01', '03', '05'], n)),
+    })
+
+
+def test_lote_tem_as_colunas_do_loop():
+    empresas = _empresas()
+    np.random.seed(0)
+    linha = simular_operacoes_reais(empresas, 3)
+    lote = simular_operacoes_reais_lote(empresas, 500, seed=1)
+    assert list(lote.columns) == list(linha[0])
+    assert len(lote) == 500
+    assert (lote['capital_social_real'] > 0).all()
+    assert lote['valor_fob_usd'].between(5000, 5e6).all()
+    assert lote['razao_social'].str.len().max() <= 33
+
+
+def test_ict_linha_a_linha():
+    lote = simular_operacoes_reais_lote(_empresas(), 2000, seed=2)
+    ict = [calcular_ict(t, b) for t, b in zip(lote['total_tributos'], lote['valor_fob_brl'])]
+    np.testing.assert_array_equal(lote['ict'].to_numpy(), ict)
+    assert list(lote['classificacao_ict'].astype(str)) == [classificar_ict(x) for x in ict]
+
+
+def test_sem_empresas_com_capital():
+    empresas = _empresas(5).assign(capital_social=0.0)
+    assert simular_operacoes_reais_lote(empresas, 10, seed=0).empty
+    assert simular_operacoes_reais_lote(_empresas().iloc[:0], 10, seed=0).empty
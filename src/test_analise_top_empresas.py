@@ -0,0 +1,90 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from analise_top_empresas import (agregar_por_empresa, analisar_top_empresas, avaliar_cenarios, calcular_ict,
+                                  gerar_relatorio_html, indices_top, matriz_economias)
+
+
+def _operacoes(n, seed=0):
+    rng = np.random.default_rng(seed)
+    brl = rng.uniform(1e4, 1e7, n)
+    return pd.DataFrame({
+        'cnpj_basico': np.arange(n), 'razao_social': [f'Empresa {i}' for i in range(n)],
+        'capital_social_real': rng.uniform(1e5, 1e8, n), 'porte_empresa': '05',
+        'valor_fob_usd': brl / 5.3, 'valor_fob_brl': brl,
+        'total_tributos': brl * rng.uniform(0.5, 1.0, n), 'ict': rng.uniform(1, 3, n),
+    })
+
+
+def test_indices_top_igual_ordenacao_completa():
+    valores = np.random.default_rng(1).normal(size=10_000)
+    np.testing.assert_array_equal(indices_top(valores, 25), np.argsort(-valores)[:25])
+    assert list(indices_top([3.0, 1.0], 5)) == [0, 1]
+
+
+def test_cenarios_padrao_batem_com_as_formulas_originais():
+    df = _operacoes(50)
+    analise = avaliar_cenarios(df)
+    np.testing.assert_allclose(analise['economia_drawback'], df['valor_fob_brl'] * 0.01)
+    np.testing.assert_allclose(analise['economia_icms'], df['valor_fob_brl'] * 0.051)
+    np.testing.assert_allclose(analise['carga_otimizada'], df['total_tributos'] * 0.7)
+    assert analise['ict_otimizado'].iloc[0] == round(df['total_tributos'].iloc[0] * 0.7
+                                                     / df['valor_fob_brl'].iloc[0] / 0.35, 3)
+
+
+def test_top_por_capital_e_por_economia():
+    df = _operacoes(2_000)
+    top = analisar_top_empresas(df, 5)
+    esperado = df.nlargest(5, 'capital_social_real')
+    assert list(top['cnpj_basico']) == list(esperado['cnpj_basico'])
+
+    cenarios = [{'nome': 'combo', 'rotulo': 'Combo',
+                 'coeficientes': {'valor_fob_brl': 0.02, 'total_tributos': 0.1}}]
+    top = analisar_top_empresas(df, 3, cenarios, ordenar_por='economia_combo', cenario_otimizado='combo')
+    economia = df['valor_fob_brl'] * 0.02 + df['total_tributos'] * 0.1
+    assert list(top['cnpj_basico']) == list(df.loc[economia.nlargest(3).index, 'cnpj_basico'])
+    assert top['economia_combo'].iloc[0] == pytest.approx(economia.max())
+
+
+def test_empresas_repetidas_somadas_antes_do_ranking():
+    empresas = _operacoes(20, seed=4)
+    # Operações sorteadas com reposição: as maiores empresas aparecem várias vezes
+    operacoes = empresas.iloc[np.random.default_rng(5).integers(0, 20, 300)].reset_index(drop=True)
+    top = analisar_top_empresas(operacoes, 5)
+    assert top['cnpj_basico'].is_unique
+    presentes = empresas[empresas['cnpj_basico'].isin(operacoes['cnpj_basico'])]
+    assert list(top['cnpj_basico']) == list(presentes.nlargest(5, 'capital_social_real')['cnpj_basico'])
+
+    somas = operacoes.groupby('cnpj_basico')[['valor_fob_brl', 'total_tributos']].sum()
+    por_economia = analisar_top_empresas(operacoes, 3, ordenar_por='economia_total')
+    assert por_economia['cnpj_basico'].is_unique
+    assert list(por_economia['cnpj_basico']) == list((somas['total_tributos'] * 0.3).nlargest(3).index)
+    np.testing.assert_allclose(por_economia['valor_fob_brl'],
+                               somas.loc[por_economia['cnpj_basico'], 'valor_fob_brl'])
+
+    agregado = agregar_por_empresa(operacoes)
+    assert agregado['operacoes'].sum() == 300
+    assert len(agregado) == operacoes['cnpj_basico'].nunique()
+
+
+def test_ict_arredonda_como_round():
+    # 0.000875 / 0.35 = 0.0025: np.round dá 0.002, round() dá 0.003
+    cargas = np.array([0.000875, 0.2625875, 1.0, 2.675 * 0.35])
+    assert calcular_ict(0.000875, 1.0) == round(0.000875 / 0.35, 3) == 0.003
+    assert list(calcular_ict(cargas, np.ones(4))) == [round(float(c) / 0.35, 3) for c in cargas]
+
+
+def test_economia_limitada_a_carga():
+    df = _operacoes(3)
+    cenarios = [{'nome': 'tudo', 'rotulo': 'Tudo', 'coeficientes': {'total_tributos': 2.0}}]
+    np.testing.assert_allclose(matriz_economias(df, cenarios)[:, 0], df['total_tributos'])
+
+
+def test_relatorio_html_um_cartao_por_empresa(tmp_path):
+    top = analisar_top_empresas(_operacoes(30), 12)
+    arquivos = gerar_relatorio_html(top, tmp_path / 'top.html', linhas_por_pagina=5)
+    assert len(arquivos) == 3
+    textos = [a.read_text(encoding='utf-8') for a in arquivos]
+    assert sum(t.count('class="empresa-card"') - 1 for t in textos) == 12  # -1: resumo executivo
+    assert f"Contatar {top['razao_social'].iloc[0]}" in textos[2]
@@ -0,0 +1,85 @@
+import pandas as pd
+import pytest
+
+from base_receita_federal import carregar_empresas_rf, ler_empresas_rf
+
+LINHAS_A = [
+    '"00000000";"BANCO DO BRASIL SA";"2038";"10";"120000000000,00";"05";""',
+    '"00000191";"EMPRESA TESTE LTDA";"2062";"49";"1500,50";"01";""',
+]
+LINHAS_B = [
+    '"12345678";"COMERCIO DE PECAS ÇÃO";"2135";"50";"0,00";"03";""',
+]
+
+
+@pytest.fixture
+def dump_rf(tmp_path):
+    for nome, linhas in (("Empresas0.EMPRECSV", LINHAS_A), ("Empresas1.EMPRECSV", LINHAS_B)):
+        (tmp_path / nome).write_bytes("\n".join(linhas).encode("latin1"))
+    return tmp_path
+
+
+def test_leitura_com_tipos_explicitos(dump_rf):
+    """Vários arquivos, CNPJ int64, capital com vírgula decimal e porte categórico"""
+    df = ler_empresas_rf(str(dump_rf / "Empresas*"), tamanho_chunk=1)
+
+    assert len(df) == 3
+    assert df['cnpj_basico'].dtype == 'int64'
+    assert list(df['cnpj_basico']) == [0, 191, 12345678]
+    assert list(df['capital_social']) == [120000000000.0, 1500.5, 0.0]
+    assert isinstance(df['porte_empresa'].dtype, pd.CategoricalDtype)
+    assert list(df['porte_empresa']) == [5, 1, 3]
+    assert df['razao_social'].iloc[2] == "COMERCIO DE PECAS ÇÃO"
+
+
+def test_cache_colunar_reaproveitado(dump_rf):
+    pytest.importorskip("pyarrow")
+    cache = dump_rf / "cache" / "empresas.feather"
+
+    primeira = carregar_empresas_rf(str(dump_rf / "Empresas*"), cache=cache)
+    assert cache.exists()
+    segunda = carregar_empresas_rf(str(dump_rf / "Empresas*"), cache=cache)
+
+    pd.testing.assert_frame_equal(primeira, segunda)
+
+
+def test_cache_refeito_quando_os_arquivos_mudam(dump_rf):
+    pytest.importorskip("pyarrow")
+    cache = dump_rf / "cache" / "empresas.feather"
+
+    so_a = carregar_empresas_rf(str(dump_rf / "Empresas0*"), cache=cache, tamanho_chunk=1)
+    assert len(so_a) == 2
+    # Outro conjunto de arquivos com o mesmo cache: não reaproveita
+    todas = carregar_empresas_rf(str(dump_rf / "Empresas*"), cache=cache, tamanho_chunk=1)
+    assert list(todas['cnpj_basico']) == [0, 191, 12345678]
+    pd.testing.assert_frame_equal(todas, ler_empresas_rf(str(dump_rf / "Empresas*")))
+
+    # Arquivo fonte alterado (tamanho diferente)
+    (dump_rf / "Empresas1.EMPRECSV").write_bytes("\n".join(LINHAS_B * 2).encode("latin1"))
+    assert len(carregar_empresas_rf(str(dump_rf / "Empresas*"), cache=cache)) == 4
+
+
+def test_filtro_por_chunk(dump_rf):
+    df = ler_empresas_rf(str(dump_rf / "Empresas*"), tamanho_chunk=1,
+                         filtro=lambda chunk: chunk['capital_social'] > 0)
+    assert list(df['cnpj_basico']) == [0, 191]
+
+
+def test_cache_grava_categoricas_com_dicionario(dump_rf):
+    """A leitura do cache já sai categórica, igual à do CSV, inclusive com nulos"""
+    pa = pytest.importorskip("pyarrow")
+    import pyarrow.feather as feather
+
+    (dump_rf / "Empresas2.EMPRECSV").write_bytes(
+        '"87654321";"ORGAO PUBLICO";"1015";"";"10,00";"";"RIO DE JANEIRO"'.encode("latin1"))
+    cache = dump_rf / "cache" / "empresas.feather"
+
+    carregar_empresas_rf(str(dump_rf / "Empresas*"), cache=cache, tamanho_chunk=1)
+    esquema = feather.read_table(cache).schema
+    for coluna in ('natureza_juridica', 'qualificacao_responsavel', 'porte_empresa', 'ente_federativo'):
+        assert pa.types.is_dictionary(esquema.field(coluna).type)
+
+    do_cache = carregar_empresas_rf(str(dump_rf / "Empresas*"), cache=cache)
+    pd.testing.assert_frame_equal(do_cache, ler_empresas_rf(str(dump_rf / "Empresas*")))
+    assert do_cache['porte_empresa'].isna().tolist() == [False, False, False, True]
+    assert list(do_cache['ente_federativo'].cat.categories) == ["RIO DE JANEIRO"]
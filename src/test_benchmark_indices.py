@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("faiss")
+
+import benchmark_indices
+from benchmark_indices import corpus_sintetico, executar_benchmark, recall_em_k
+
+
+def test_corpus_sintetico_normalizado_e_reprodutivel():
+    vetores = corpus_sintetico(500, 24, grupos=5)
+    assert vetores.shape == (500, 24) and vetores.dtype == np.float32
+    np.testing.assert_allclose(np.linalg.norm(vetores, axis=1), 1, atol=1e-5)
+    np.testing.assert_array_equal(vetores, corpus_sintetico(500, 24, grupos=5))
+
+
+def test_recall_em_k():
+    verdade = np.array([[1, 2], [3, 4]])
+    assert recall_em_k(verdade, verdade) == 1
+    assert recall_em_k(np.array([[2, 9], [9, 9]]), verdade) == 0.25
+
+
+def test_executar_benchmark_corpus_pequeno():
+    resultado = executar_benchmark(corpus_sintetico(3000, 32, grupos=20), k=4, n_perguntas=50)
+    linhas = sum(len(buscas) for _, _, buscas in benchmark_indices.CONFIGURACOES)
+    assert len(resultado) == linhas
+    assert set(resultado["tipo"]) == {"flat", "ivf_flat", "ivf_pq", "hnsw"}
+    assert resultado.loc[resultado["tipo"] == "flat", "recall@4"].iloc[0] == 1
+    assert resultado["recall@4"].between(0, 1).all()
+    # Mais listas visitadas, recall maior ou igual
+    ivf = resultado[resultado["tipo"] == "ivf_flat"]["recall@4"].to_numpy()
+    assert (np.diff(ivf) >= 0).all()
+
+
+def test_vetores_do_indice_atual(tmp_path, monkeypatch):
+    import faiss
+    from indices_faiss import construir_indice
+
+    monkeypatch.setattr(benchmark_indices, "INDEX_DIR", tmp_path)
+    assert benchmark_indices.vetores_do_indice_atual() is None
+    vetores = corpus_sintetico(800, 16, grupos=8)
+    faiss.write_index(construir_indice(vetores, "ivf_flat"), str(tmp_path / "index.faiss"))
+    lidos = benchmark_indices.vetores_do_indice_atual()
+    assert lidos.shape == vetores.shape
+    assert np.isin(lidos[:, 0], vetores[:, 0]).all()
@@ -0,0 +1,53 @@
+from bm25 import IndiceBM25, buscar_hibrido, fundir_rrf, tokenizar
+
+CHUNKS = {
+    "c1": "Art. 14. A alíquota do ICMS na importação é de 18%, nos termos da Lei 2.657/96.",
+    "c2": "Art. 41. O contribuinte deverá emitir nota fiscal de entrada na importação.",
+    "c3": "Mercadorias da NCM 8471.30.12 (computadores portáteis) têm redução de base.",
+    "c4": "O regime de drawback suspende o II e o IPI na importação de insumos.",
+}
+
+
+def _indice():
+    indice = IndiceBM25()
+    for id_chunk, texto in CHUNKS.items():
+        indice.adicionar(id_chunk, texto)
+    return indice
+
+
+def test_tokenizacao_preserva_referencias_legais():
+    tokens = tokenizar("art. 14 da Lei 2.657/96, NCM 8471.30.12, Alíquota")
+    for esperado in ["art_14", "2657/96", "2657", "96", "84713012", "aliquota"]:
+        assert esperado in tokens
+    assert "da" not in tokens
+
+
+def test_busca_encontra_artigo_e_ncm_exatos():
+    indice = _indice()
+    assert indice.buscar("o que diz o art. 14 da Lei 2.657?", k=1)[0][0] == "c1"
+    assert indice.buscar("NCM 84713012", k=1)[0][0] == "c3"
+
+
+def test_remocao_e_reinclusao():
+    indice = _indice()
+    indice.remover("c3")
+    assert "c3" not in indice
+    assert indice.buscar("NCM 84713012") == []
+    indice.adicionar("c3", CHUNKS["c3"])
+    assert indice.buscar("NCM 84713012", k=1)[0][0] == "c3"
+    assert indice.total_tokens == sum(indice.tamanhos.values())
+
+
+def test_fusao_hibrida_prioriza_termos_exatos():
+    indice = _indice()
+    assert fundir_rrf(["a", "b"], ["b", "c"])[0] == "b"
+    # A busca densa trouxe o artigo errado primeiro: o híbrido corrige com k=1
+    ids = buscar_hibrido(indice, "alíquota do art. 14", ["c2", "c4", "c1"], k=1)
+    assert ids == ["c1"]
+
+
+def test_salvar_e_carregar(tmp_path):
+    indice = _indice()
+    indice.salvar(tmp_path / "bm25.pkl")
+    carregado = IndiceBM25.carregar(tmp_path / "bm25.pkl")
+    assert carregado.buscar("drawback IPI") == indice.buscar("drawback IPI")
@@ -0,0 +1,89 @@
+import numpy as np
+
+from cache_embeddings import CacheEmbeddings, EmbeddingsDeterministicos, chave_embedding
+
+
+def test_textos_repetidos_nao_voltam_ao_backend(tmp_path):
+    backend = EmbeddingsDeterministicos(dimensao=32)
+    cache = CacheEmbeddings(backend, "modelo-teste", tmp_path)
+
+    textos = ["ICMS na importação", "drawback isenção", "ICMS na importação"]
+    primeiro = cache.embed_documents(textos)
+    assert backend.textos_embedados == 2
+    assert primeiro == backend.embed_documents(textos)
+
+    backend.textos_embedados = 0
+    assert cache.embed_documents(textos) == primeiro
+    assert backend.textos_embedados == 0
+
+    # Pergunta repetida também sai do cache
+    cache.embed_query("qual a alíquota?")
+    cache.embed_query("qual a alíquota?")
+    assert backend.textos_embedados == 1
+
+
+def test_cache_persiste_entre_instancias(tmp_path):
+    backend = EmbeddingsDeterministicos(dimensao=32)
+    cache = CacheEmbeddings(backend, "modelo-teste", tmp_path)
+    vetores = cache.embed_documents(["Convênio ICMS 52/91"])
+    cache.salvar()
+
+    outro_backend = EmbeddingsDeterministicos(dimensao=32)
+    reaberto = CacheEmbeddings(outro_backend, "modelo-teste", tmp_path)
+    assert len(reaberto) == 1
+    assert reaberto.embed_documents(["Convênio ICMS 52/91"]) == vetores
+    assert outro_backend.chamadas == 0
+
+
+def test_despejo_lru(tmp_path):
+    backend = EmbeddingsDeterministicos(dimensao=8)
+    cache = CacheEmbeddings(backend, "modelo-teste", tmp_path, capacidade=2)
+    cache.embed_documents(["a"])
+    cache.embed_documents(["b"])
+    cache.embed_documents(["a"])   # "a" passa a ser a mais recente
+    cache.embed_documents(["c"])   # despeja "b"
+
+    backend.textos_embedados = 0
+    cache.embed_documents(["a", "c"])
+    assert backend.textos_embedados == 0
+    cache.embed_documents(["b"])
+    assert backend.textos_embedados == 1
+    assert len(cache) == 2
+
+
+def test_embedder_deterministico_normalizado():
+    e = EmbeddingsDeterministicos(dimensao=64)
+    v = np.array(e.embed_query("Lei 2.657 ICMS RJ"))
+    assert np.isclose(np.linalg.norm(v), 1.0)
+    assert e.embed_query("Lei 2.657 ICMS RJ") == v.tolist()
+
+
+def test_indice_gravado_a_cada_n_lotes(tmp_path):
+    backend = EmbeddingsDeterministicos(dimensao=8)
+    cache = CacheEmbeddings(backend, "modelo-teste", tmp_path, salvar_a_cada=3)
+    indice = cache.diretorio / "indice.json"
+    cache.embed_documents(["a"])
+    cache.embed_documents(["b"])
+    assert not indice.exists()
+    cache.embed_documents(["c"])
+    assert len(CacheEmbeddings(backend, "modelo-teste", tmp_path)) == 3
+
+
+def test_queda_sem_salvar_nao_troca_vetores(tmp_path):
+    """Despejos depois da última gravação não sobrescrevem linhas do índice publicado"""
+    backend = EmbeddingsDeterministicos(dimensao=16)
+    cache = CacheEmbeddings(backend, "modelo-teste", tmp_path, capacidade=10, salvar_a_cada=1000)
+    textos = [f"texto {i}" for i in range(10)]
+    cache.embed_documents(textos)
+    cache.salvar()
+    # Enche de novo (despeja tudo) e "cai" sem salvar; a folga obriga a publicar no meio
+    cache.embed_documents([f"novo {i}" for i in range(25)])
+
+    reaberto = CacheEmbeddings(EmbeddingsDeterministicos(dimensao=16), "modelo-teste", tmp_path,
+                               capacidade=10)
+    assert 0 < len(reaberto) <= 10
+    esperado = EmbeddingsDeterministicos(dimensao=16)
+    for chave, slot in reaberto._slots.items():
+        texto = next(t for t in textos + [f"novo {i}" for i in range(25)]
+                     if chave_embedding("modelo-teste", t) == chave)
+        np.testing.assert_allclose(reaberto._vetores[slot], esperado.embed_query(texto), rtol=1e-6)
@@ -0,0 +1,93 @@
+import json
+import os
+
+import numpy as np
+
+from cache_embeddings import EmbeddingsDeterministicos
+from cache_respostas import CacheRespostas, normalizar_pergunta
+
+RESPOSTA = {
+    "pergunta": "Qual o prazo do drawback?",
+    "resposta": "Um ano, prorrogável por igual período.",
+    "fontes": [{"fonte": "data/portaria_secex_44.pdf", "pagina": 12}],
+}
+
+
+def _cache(tmp_path, versao="v1", **kwargs):
+    (tmp_path / "versao.txt").write_text(versao, encoding="utf-8")
+    return CacheRespostas(tmp_path / "respostas.json", tmp_path / "versao.txt", **kwargs)
+
+
+def test_normalizacao():
+    assert normalizar_pergunta("  Qual o PRAZO do Drawback?? ") == "qual o prazo do drawback"
+    assert normalizar_pergunta("Alíquota ICMS 2.657/96?") == "aliquota icms 2.657/96"
+
+
+def test_acerto_exato_mantem_fontes_e_persiste(tmp_path):
+    cache = _cache(tmp_path)
+    assert cache.buscar("Qual o prazo do drawback?") is None
+    cache.guardar("Qual o prazo do drawback?", RESPOSTA)
+
+    reaberto = _cache(tmp_path)
+    resultado = reaberto.buscar("qual o prazo do DRAWBACK")
+    assert resultado["resposta"] == RESPOSTA["resposta"]
+    assert resultado["fontes"] == RESPOSTA["fontes"]
+    assert resultado["pergunta"] == "qual o prazo do DRAWBACK"
+
+
+def test_pergunta_quase_igual_por_similaridade(tmp_path):
+    embeddings = EmbeddingsDeterministicos(dimensao=128)
+    cache = _cache(tmp_path)
+    cache.guardar("Qual o prazo do drawback?", RESPOSTA, embeddings.embed_query("Qual o prazo do drawback?"))
+
+    parecida = "O prazo do drawback, qual?"
+    assert cache.buscar(parecida) is None
+    assert cache.buscar(parecida, embeddings.embed_query(parecida))["fontes"] == RESPOSTA["fontes"]
+    diferente = "Qual a alíquota de ICMS no RJ?"
+    assert cache.buscar(diferente, embeddings.embed_query(diferente)) is None
+
+
+def test_reconstrucao_do_indice_invalida(tmp_path):
+    cache = _cache(tmp_path)
+    cache.guardar("Qual o prazo do drawback?", RESPOSTA)
+    versao = tmp_path / "versao.txt"
+    versao.write_text("v2", encoding="utf-8")
+    os.utime(versao, (1, 1))  # garante mtime diferente mesmo em sistemas de arquivos grosseiros
+    assert cache.buscar("Qual o prazo do drawback?") is None
+    assert len(cache) == 0
+
+
+def test_acerto_semantico_exige_mesmos_artigos_e_ncms(tmp_path):
+    embeddings = EmbeddingsDeterministicos(dimensao=128)
+    cache = _cache(tmp_path, limiar_semantico=0.8)
+    pergunta = "O que diz o art. 14 da Lei 2.657/96?"
+    cache.guardar(pergunta, RESPOSTA, embeddings.embed_query(pergunta))
+
+    mesma_lei = "O art. 14 da Lei 2.657/96 diz o quê?"
+    assert cache.buscar(mesma_lei, embeddings.embed_query(mesma_lei)) is not None
+    outro_artigo = "O que diz o art. 15 da Lei 2.657/96?"
+    vetor = embeddings.embed_query(outro_artigo)
+    assert float(np.dot(vetor, embeddings.embed_query(pergunta))) >= 0.8  # o embedding não separa
+    assert cache.buscar(outro_artigo, vetor) is None
+
+
+def test_vetores_fora_do_json_e_linhas_reaproveitadas(tmp_path):
+    embeddings = EmbeddingsDeterministicos(dimensao=32)
+    cache = _cache(tmp_path, max_entradas=3)
+    perguntas = [f"Qual o prazo do drawback {tipo}?" for tipo in ("suspensão", "isenção", "restituição",
+                                                                    "intermediário", "web")]
+    for pergunta in perguntas:
+        cache.guardar(pergunta, dict(RESPOSTA, resposta=pergunta), embeddings.embed_query(pergunta))
+
+    dados = json.loads((tmp_path / "respostas.json").read_text(encoding="utf-8"))
+    assert all("vetor" not in e for e in dados["entradas"].values())
+    assert np.load(tmp_path / "respostas.npy").shape == (4, 32)
+    assert len({e["linha"] for e in dados["entradas"].values()}) == 3
+
+    reaberto = _cache(tmp_path, max_entradas=3)
+    assert len(reaberto) == 3
+    parecidas = {p: p.replace("Qual o prazo", "O prazo").replace("?", ", qual?") for p in perguntas}
+    for pergunta in perguntas[2:]:
+        resultado = reaberto.buscar(parecidas[pergunta], embeddings.embed_query(parecidas[pergunta]))
+        assert resultado["resposta"] == pergunta
+    assert reaberto.buscar(parecidas[perguntas[0]], embeddings.embed_query(parecidas[perguntas[0]])) is None
@@ -0,0 +1,160 @@
+import json
+import time
+
+import pytest
+
+pytest.importorskip("faiss")
+pytest.importorskip("langchain")
+pytest.importorskip("dotenv")
+
+import create_index
+from cache_embeddings import EmbeddingsDeterministicos
+
+
+@pytest.fixture
+def projeto(tmp_path, monkeypatch):
+    dados, indice = tmp_path / "data", tmp_path / "index"
+    dados.mkdir()
+    monkeypatch.setattr(create_index, "DATA_DIR", dados)
+    monkeypatch.setattr(create_index, "INDEX_DIR", indice)
+    monkeypatch.setattr(create_index, "MANIFESTO", indice / "manifesto.json")
+    monkeypatch.setattr(create_index, "BM25_ARQUIVO", indice / "bm25.pkl")
+    monkeypatch.setattr(create_index, "VERSAO_ARQUIVO", indice / "versao.txt")
+    monkeypatch.setattr(create_index, "VERIFICAR_PDFS", False)
+    monkeypatch.setattr(create_index, "CHUNK_SIZE", 200)
+    monkeypatch.setattr(create_index, "CHUNK_OVERLAP", 0)
+    return dados, indice
+
+
+def _texto(tema: str, n: int = 6) -> str:
+    return "\n\n".join(f"Parágrafo {i} sobre {tema}: alíquota, base de cálculo e prazo {i}." * 2
+                       for i in range(n))
+
+
+def _indexar(embeddings, **kwargs):
+    return create_index.indexar(embeddings=embeddings, workers=1, tamanho_lote=4, max_requisicoes=2, **kwargs)
+
+
+def _ids_no_indice(db) -> set:
+    return set(db.index_to_docstore_id.values())
+
+
+@pytest.mark.parametrize("tipo", ["flat", "ivf_flat", "hnsw"])
+def test_inclusao_alteracao_e_remocao(projeto, monkeypatch, tipo):
+    monkeypatch.setattr(create_index, "TIPO_INDICE", tipo)
+    dados, indice = projeto
+    embeddings = EmbeddingsDeterministicos(dimensao=32)
+    (dados / "icms.txt").write_text(_texto("ICMS"), encoding="utf-8")
+    (dados / "drawback.txt").write_text(_texto("drawback"), encoding="utf-8")
+
+    db = _indexar(embeddings)
+    manifesto = json.loads((indice / "manifesto.json").read_text(encoding="utf-8"))
+    assert set(manifesto["arquivos"]) == {"icms.txt", "drawback.txt"}
+    chunks_icms = manifesto["arquivos"]["icms.txt"]["chunks"]
+    todos = {i for info in manifesto["arquivos"].values() for i in info["chunks"]}
+    assert _ids_no_indice(db) == todos
+    versao = (indice / "versao.txt").read_text(encoding="utf-8")
+
+    # Nada mudou: nenhum texto vai para o embedder, e a versão perdida é regravada
+    (indice / "versao.txt").unlink()
+    embeddings.textos_embedados = 0
+    _indexar(embeddings)
+    assert embeddings.textos_embedados == 0
+    assert (indice / "versao.txt").read_text(encoding="utf-8") == versao
+
+    # Um parágrafo alterado: só os chunks novos são embedados (HNSW reconstrói
+    # com os vetores do próprio índice), o antigo sai
+    (dados / "icms.txt").write_text(_texto("ICMS").replace("Parágrafo 5", "Parágrafo quinto"),
+                                    encoding="utf-8")
+    db = _indexar(embeddings)
+    manifesto = json.loads((indice / "manifesto.json").read_text(encoding="utf-8"))
+    novos_icms = manifesto["arquivos"]["icms.txt"]["chunks"]
+    assert 0 < embeddings.textos_embedados < len(novos_icms)
+    assert set(chunks_icms) - set(novos_icms)
+    assert _ids_no_indice(db) == {i for info in manifesto["arquivos"].values() for i in info["chunks"]}
+    assert (indice / "versao.txt").read_text(encoding="utf-8") != versao
+
+    # Arquivo apagado: seus vetores e chunks BM25 saem do índice
+    (dados / "drawback.txt").unlink()
+    db = _indexar(embeddings)
+    assert _ids_no_indice(db) == set(novos_icms)
+    assert set(create_index.IndiceBM25.carregar(indice / "bm25.pkl").tamanhos) == set(novos_icms)
+
+    # Todos apagados: nada de índice velho respondendo por documentos removidos
+    (dados / "icms.txt").unlink()
+    assert _indexar(embeddings) is None
+    for nome in ("index.faiss", "index.pkl", "bm25.pkl", "manifesto.json", "versao.txt"):
+        assert not (indice / nome).exists()
+
+
+def test_ivf_retreina_quando_o_corpus_cresce(projeto, monkeypatch):
+    monkeypatch.setattr(create_index, "TIPO_INDICE", "ivf_flat")
+    dados, indice = projeto
+    embeddings = EmbeddingsDeterministicos(dimensao=32)
+    (dados / "icms.txt").write_text(_texto("ICMS", 3), encoding="utf-8")
+    _indexar(embeddings)
+    treino = json.loads((indice / "manifesto.json").read_text(encoding="utf-8"))["vetores_no_treino"]
+
+    (dados / "drawback.txt").write_text(_texto("drawback", 100), encoding="utf-8")
+    embeddings.textos_embedados = 0
+    db = _indexar(embeddings)
+    manifesto = json.loads((indice / "manifesto.json").read_text(encoding="utf-8"))
+    assert db.index.ntotal > create_index.FATOR_RETREINO * treino
+    assert manifesto["vetores_no_treino"] == db.index.ntotal
+    assert db.index.nlist > 1
+    # O retreino usa os vetores armazenados: só os chunks novos foram embedados
+    assert embeddings.textos_embedados == len(manifesto["arquivos"]["drawback.txt"]["chunks"])
+    assert db.similarity_search("drawback alíquota", k=1)[0].metadata["source"].endswith("drawback.txt")
+
+
+def test_embedder_grava_lotes_em_ordem_sem_acumular():
+    from langchain.schema import Document
+
+    class Lento(EmbeddingsDeterministicos):
+        def embed_documents(self, texts):
+            time.sleep(0.002)
+            return super().embed_documents(texts)
+
+    gravados = []
+    embedder = create_index.EmbedderEmLotes(Lento(dimensao=8), lambda p, m, ids: gravados.append(ids),
+                                            tamanho_lote=3, max_requisicoes=2)
+    for i in range(40):
+        embedder.adicionar(Document(page_content=f"chunk {i}", metadata={"i": i}), f"id{i}")
+        assert len(embedder._enviados) <= embedder.limite
+    assert gravados  # lotes já gravados antes do fim
+    embedder.finalizar()
+    assert [i for lote in gravados for i in lote] == [f"id{i}" for i in range(40)]
+
+
+def test_reconstrucao_do_ivf_pq_usa_os_vetores_originais_do_cache(projeto, monkeypatch, tmp_path):
+    """Retreino do IVF-PQ parte dos vetores do cache, não dos decodificados do PQ"""
+    import numpy as np
+    from cache_embeddings import CacheEmbeddings
+
+    monkeypatch.setattr(create_index, "TIPO_INDICE", "ivf_pq")
+    monkeypatch.setattr(create_index, "PARAMETROS_INDICE", {"nbits": 4})
+    dados, _ = projeto
+    backend = EmbeddingsDeterministicos(dimensao=32)
+    cache = CacheEmbeddings(backend, "teste", tmp_path / "cache")
+    (dados / "icms.txt").write_text(_texto("ICMS", 30), encoding="utf-8")
+    db = _indexar(cache)
+
+    gravados = []
+    original = create_index.GravadorIndice.__call__
+
+    def espiar(self, pares, metadados, ids):
+        gravados.extend(pares)
+        return original(self, pares, metadados, ids)
+
+    monkeypatch.setattr(create_index.GravadorIndice, "__call__", espiar)
+    create_index.reconstruir_sem(db, [], cache)
+    assert len(gravados) == db.index.ntotal
+    for texto, vetor in gravados:
+        assert np.array_equal(vetor, np.asarray(backend._vetor(texto), dtype=np.float32))
+
+    # Fora do cache: cai nos vetores decodificados do próprio índice
+    gravados.clear()
+    create_index.reconstruir_sem(db, [], CacheEmbeddings(backend, "teste", tmp_path / "vazio"))
+    decodificados = create_index.vetores_armazenados(db.index, 0, db.index.ntotal)
+    assert np.array_equal(np.array([v for _, v in gravados]), decodificados)
+    assert not np.allclose(decodificados, [backend._vetor(t) for t, _ in gravados])
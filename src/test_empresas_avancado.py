@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+import empresas_avancado as ea
+
+
+def test_armazem_cresce_e_agrega_por_empresa():
+    armazem = ea.ArmazemOperacoes(capacidade_inicial=4)
+    rng = np.random.default_rng(0)
+    for nome in ('TechGlobal Inc', 'VarejoMax'):
+        ea.simular_importacao_inteligente(nome, 7, rng=rng, armazem=armazem)
+    assert len(armazem) == 14
+
+    df = armazem.para_dataframe()
+    assert df['id_operacao'].iloc[0].startswith('TEC-')
+    assert df['id_operacao'].iloc[6].endswith('-007')
+
+    metricas = ea.metricas_por_empresa(armazem)
+    assert list(metricas.index) == ['TechGlobal Inc', 'VarejoMax']
+    varejo = df[df['empresa'] == 'VarejoMax']
+    assert metricas.loc['VarejoMax', 'total_operacoes'] == 7
+    assert metricas.loc['VarejoMax', 'total_tributos'] == pytest.approx(varejo['total_tributos'].sum())
+    assert metricas.loc['VarejoMax', 'eficiencia_tributaria'] == pytest.approx(
+        varejo['total_tributos'].sum() / varejo['valor_brl'].sum() * 100)
+    assert metricas.loc['VarejoMax', 'setor'] == 'Varejo'
+
+
+def test_agregados_incrementais_batem_com_recalculo():
+    armazem = ea.ArmazemOperacoes(capacidade_inicial=2)
+    rng = np.random.default_rng(1)
+    for nome in ('AutoParts BR', 'QuimicaBrasil', 'AutoParts BR'):
+        ea.simular_importacao_inteligente(nome, 5, rng=rng, armazem=armazem)
+
+    df = armazem.para_dataframe()
+    recalculado = df.groupby('empresa', observed=True)['total_tributos'].agg(['size', 'sum'])
+    metricas = ea.metricas_por_empresa(armazem)
+    assert metricas.loc['AutoParts BR', 'total_operacoes'] == 10
+    assert metricas['total_tributos'].to_dict() == pytest.approx(recalculado['sum'].to_dict())
+
+    top = armazem.mais_tributadas('AutoParts BR')
+    esperado = df[df['empresa'] == 'AutoParts BR'].nlargest(3, 'total_tributos')
+    assert list(top['total_tributos']) == list(esperado['total_tributos'])
+    assert list(top['produto']) == list(esperado['produto'])
+
+
+def test_ptax_sem_dolar_usa_cambio_simulado(tmp_path):
+    from ptax import ArmazemPTAX
+
+    ptax = ArmazemPTAX(tmp_path / 'ptax')
+    ptax.acrescentar('EUR', ['2025-01-02'], [6.4])
+    armazem = ea.ArmazemOperacoes(capacidade_inicial=4)
+    ea.simular_importacao_inteligente('VarejoMax', 5, rng=np.random.default_rng(0), armazem=armazem, ptax=ptax)
+    assert armazem.para_dataframe()['cambio'].between(4.8, 6.2).all()
@@ -0,0 +1,31 @@
+from icms_importacao_rj import RegistroImportacoes, icms_importacao_rj
+from icms_rj import icms_importacao_rj as icms_rj
+
+
+def test_registro_descarta_os_mais_antigos():
+    registro = RegistroImportacoes(tamanho_maximo=3)
+    for fob in (1000, 2000, 3000, 4000, 5000):
+        icms_importacao_rj(fob, 5.0, registro=registro)
+    assert len(registro) == 3
+    assert [r['valor_fob_usd'] for r in registro] == [3000, 4000, 5000]
+    assert registro.total_registrado == 5
+    assert registro.ultimo()['valor_fob_usd'] == 5000
+
+
+def test_tamanho_zero_so_chama_o_callback():
+    recebidos = []
+    registro = RegistroImportacoes(tamanho_maximo=0, callback=recebidos.append)
+    resultado = icms_importacao_rj(100000, 5.60, aliquota_icms=0.20, registro=registro)
+    assert len(registro) == 0 and registro.ultimo() is None
+    assert len(recebidos) == 1
+    assert recebidos[0]['icms_devido'] == resultado['icms_devido']
+    assert recebidos[0]['total_tributos'] == resultado['total_tributos']
+    assert recebidos[0]['aliquota_icms'] == 0.20
+
+
+def test_sem_registro_mesmo_resultado():
+    registro = RegistroImportacoes()
+    com = icms_importacao_rj(100000, 5.60, despesas_aduaneiras=5000, registro=registro)
+    sem = icms_importacao_rj(100000, 5.60, despesas_aduaneiras=5000)
+    assert com == sem == icms_rj(100000, 5.60, despesas_aduaneiras=5000)
+    assert len(registro) == 1
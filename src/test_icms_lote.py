@@ -0,0 +1,40 @@
+import numpy as np
+import pandas as pd
+
+from icms_rj import icms_importacao_rj, icms_importacao_rj_lote, icms_importacao_rj_df
+
+
+def test_lote_bate_com_escalar_centavo_a_centavo():
+    """
+    O cálculo em lote deve reproduzir exatamente a versão escalar,
+    inclusive nos empates de arredondamento (valores com meio centavo).
+    """
+    rng = np.random.default_rng(2657)
+    n = 5000
+    fob = np.round(rng.uniform(100, 2_000_000, n), 3)  # força empates de meio centavo
+    cambio = np.round(rng.uniform(4.5, 6.5, n), 4)
+    aliquota = rng.choice([0.07, 0.12, 0.17, 0.18, 0.20], n)
+    despesas = np.round(rng.uniform(0, 10_000, n), 2)
+
+    lote = icms_importacao_rj_lote(fob, cambio, aliquota_icms=aliquota,
+                                   despesas_aduaneiras=despesas)
+
+    # A versão escalar recebe floats do Python (com np.float64 o round() seria o do NumPy)
+    linhas = zip(fob.tolist(), cambio.tolist(), aliquota.tolist(), despesas.tolist())
+    for i, (f, c, a, d) in enumerate(linhas):
+        esperado = icms_importacao_rj(f, c, aliquota_icms=a, despesas_aduaneiras=d)
+        for chave, valor in esperado.items():
+            assert lote[chave][i] == valor, \
+                f"Linha {i}, campo {chave}: lote={lote[chave][i]!r}, escalar={valor!r}"
+
+
+def test_lote_dataframe_usa_padroes_para_colunas_ausentes():
+    """Colunas ausentes no DataFrame assumem os padrões da função escalar."""
+    df = pd.DataFrame({'valor_fob_usd': [100000.0, 2500.5], 'cambio': [5.60, 4.98]})
+
+    resultado = icms_importacao_rj_df(df)
+
+    esperado = icms_importacao_rj(100000, 5.60)
+    assert list(resultado.index) == list(df.index)
+    assert resultado.loc[0, 'icms_devido'] == esperado['icms_devido']
+    assert resultado.loc[0, 'total_tributos'] == esperado['total_tributos']
@@ -0,0 +1,79 @@
+import numpy as np
+import pytest
+
+faiss = pytest.importorskip("faiss")
+
+from benchmark_indices import corpus_sintetico
+from indices_faiss import (TIPOS_COM_REMOCAO, TIPOS_INDICE, ajustar_busca, construir_indice, criar_indice,
+                           indice_treinado, nlist_sugerido, vetores_armazenados)
+
+
+def test_nlist_sugerido_garante_vetores_por_lista():
+    assert nlist_sugerido(10) == 1
+    assert nlist_sugerido(10_000) == 256
+    assert nlist_sugerido(1_000_000) == 4000
+    for n in (100, 5_000, 200_000):
+        assert nlist_sugerido(n) * 39 <= n
+    # Corpus grande treinado com amostra: mais listas, mas nunca menos de 39 vetores de treino por lista
+    assert nlist_sugerido(1_000_000, 50_000) == 1282
+    assert nlist_sugerido(40_000, 500) == 12
+
+
+def test_criar_indice_por_tipo():
+    assert isinstance(criar_indice("flat", 16, 1000), faiss.IndexFlatL2)
+    assert isinstance(criar_indice("hnsw", 16, 1000), faiss.IndexHNSWFlat)
+    assert isinstance(criar_indice("ivf_flat", 16, 1000), faiss.IndexIVFFlat)
+    pq = criar_indice("ivf_pq", 24, 1000)
+    assert isinstance(pq, faiss.IndexIVFPQ) and pq.pq.M == 24
+    with pytest.raises(ValueError):
+        criar_indice("lsh", 16, 1000)
+    with pytest.raises(ValueError):
+        criar_indice("ivf_pq", 24, 1000, m_pq=5)
+
+
+@pytest.mark.parametrize("tipo", TIPOS_INDICE)
+def test_indice_construido_encontra_o_proprio_vetor(tipo):
+    vetores = corpus_sintetico(2000, 32, grupos=20)
+    indice = construir_indice(vetores, tipo, nprobe=8, ef_search=64)
+    assert indice.ntotal == len(vetores)
+    _, ids = indice.search(vetores[:50], 1)
+    assert (ids[:, 0] == np.arange(50)).mean() >= (0.9 if tipo == "ivf_pq" else 0.98)
+
+
+def test_treino_com_amostra_limita_listas_ao_treino():
+    vetores = corpus_sintetico(2000, 16)
+    indice = indice_treinado(vetores, "ivf_flat", amostra_treino=500, n_vetores=40_000)
+    assert indice.is_trained and indice.ntotal == 0
+    assert indice.nlist == nlist_sugerido(40_000, 500)
+    assert indice_treinado(vetores, "ivf_flat", nlist=20).nlist == 20
+
+
+def test_ajustar_busca_ignora_parametros_de_outro_tipo():
+    ivf = ajustar_busca(criar_indice("ivf_flat", 8, 1000), nprobe=7, ef_search=99)
+    assert ivf.nprobe == 7
+    hnsw = ajustar_busca(criar_indice("hnsw", 8, 1000), nprobe=7, ef_search=99)
+    assert hnsw.hnsw.efSearch == 99
+    ajustar_busca(criar_indice("flat", 8, 1000), nprobe=7, ef_search=99)
+
+
+@pytest.mark.parametrize("tipo", TIPOS_COM_REMOCAO)
+def test_remocao_de_vetores(tipo):
+    vetores = corpus_sintetico(1000, 16, grupos=10)
+    indice = construir_indice(vetores, tipo)
+    assert indice.remove_ids(np.arange(100, dtype=np.int64)) == 100
+    assert indice.ntotal == 900
+
+
+@pytest.mark.parametrize("tipo", ["flat", "ivf_flat", "hnsw"])
+def test_vetores_armazenados_reconstroi_exato(tipo):
+    vetores = corpus_sintetico(1000, 16, grupos=10)
+    indice = construir_indice(vetores, tipo)
+    np.testing.assert_allclose(vetores_armazenados(indice, 100, 300), vetores[100:300], atol=1e-6)
+
+
+def test_vetores_armazenados_pq_e_aproximado():
+    vetores = corpus_sintetico(2000, 16, grupos=10)
+    reconstruidos = vetores_armazenados(construir_indice(vetores, "ivf_pq"), 0, 2000)
+    assert reconstruidos.shape == vetores.shape
+    erro = np.linalg.norm(reconstruidos - vetores, axis=1).mean()
+    assert 0 < erro < 0.5
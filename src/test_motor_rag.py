@@ -0,0 +1,65 @@
+import pytest
+
+pytest.importorskip("faiss")
+pytest.importorskip("langchain")
+pytest.importorskip("langchain_openai")
+pytest.importorskip("dotenv")
+
+from langchain.llms.fake import FakeListLLM
+
+import create_index
+import motor_rag
+from cache_embeddings import CacheEmbeddings, EmbeddingsDeterministicos
+
+
+@pytest.fixture
+def projeto(tmp_path, monkeypatch):
+    dados, indice = tmp_path / "data", tmp_path / "index"
+    dados.mkdir()
+    monkeypatch.setattr(create_index, "DATA_DIR", dados)
+    monkeypatch.setattr(create_index, "INDEX_DIR", indice)
+    monkeypatch.setattr(create_index, "MANIFESTO", indice / "manifesto.json")
+    monkeypatch.setattr(create_index, "BM25_ARQUIVO", indice / "bm25.pkl")
+    monkeypatch.setattr(create_index, "VERSAO_ARQUIVO", indice / "versao.txt")
+    monkeypatch.setattr(motor_rag, "CACHE_RESPOSTAS", tmp_path / "cache" / "respostas.json")
+    embeddings = CacheEmbeddings(EmbeddingsDeterministicos(dimensao=32), "teste", tmp_path / "cache" / "emb")
+    return dados, indice, embeddings
+
+
+def _indexar(embeddings):
+    return create_index.indexar(embeddings=embeddings, workers=1)
+
+
+def test_motor_recarrega_indice_reconstruido_e_nao_guarda_resposta_velha(projeto):
+    dados, indice, embeddings = projeto
+    (dados / "prazos.txt").write_text("O prazo do drawback suspensão é de um ano.", encoding="utf-8")
+    _indexar(embeddings)
+
+    motor = motor_rag.MotorRAG(indice, k=1, embeddings=embeddings, llm=FakeListLLM(responses=["-"]))
+    motor.gerar = lambda pergunta, documentos: documentos[0].page_content
+    pergunta = "Qual o prazo do drawback suspensão?"
+    assert motor.responder(pergunta)["resposta"] == "O prazo do drawback suspensão é de um ano."
+    versao = motor.versao_indice
+    assert motor.resposta_em_cache(pergunta.upper())["resposta"] == "O prazo do drawback suspensão é de um ano."
+
+    # create_index.py roda com o motor (servidor) no ar
+    (dados / "prazos.txt").write_text("O prazo do drawback suspensão é de dois anos.", encoding="utf-8")
+    _indexar(embeddings)
+
+    resultado = motor.responder(pergunta)
+    assert resultado["resposta"] == "O prazo do drawback suspensão é de dois anos."
+    assert motor.versao_indice != versao
+    assert motor.bm25 is motor.indice[1] and len(motor.bm25) == 1
+    # E a resposta nova é a que fica no cache
+    assert motor.cache_respostas.buscar(pergunta)["resposta"] == resultado["resposta"]
+
+
+def test_cache_nao_guarda_resposta_de_versao_antiga(tmp_path):
+    from cache_respostas import CacheRespostas
+
+    (tmp_path / "versao.txt").write_text("v2", encoding="utf-8")
+    cache = CacheRespostas(tmp_path / "respostas.json", tmp_path / "versao.txt")
+    cache.guardar("Qual o prazo?", {"resposta": "velha"}, versao="v1")
+    assert cache.buscar("Qual o prazo?") is None
+    cache.guardar("Qual o prazo?", {"resposta": "nova"}, versao="v2")
+    assert cache.buscar("Qual o prazo?")["resposta"] == "nova"
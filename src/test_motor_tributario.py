@@ -0,0 +1,125 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from motor_tributario import (
+    MotorTributario, PERFIL_RJ_LEI_2657, PERFIL_SIMPLIFICADO, regras_taxas_fixas
+)
+from tributec_core import icms_importacao_rj as icms_simplificado
+
+
+def test_perfil_simplificado_reproduz_formula_do_tributec_core():
+    """II 5% sobre o FOB convertido e ICMS sobre FOB + II, sem gross-up"""
+    resultado = icms_simplificado(100000, 5.30, aliquota=0.18)
+
+    valor_fob_brl = 100000 * 5.30
+    ii_valor = valor_fob_brl * 0.05
+    icms_valor = (valor_fob_brl + ii_valor) * 0.18
+    assert resultado['ii_valor'] == ii_valor
+    assert resultado['icms_valor'] == icms_valor
+    assert resultado['total_tributos'] == ii_valor + icms_valor
+
+
+def test_taxas_fixas_reproduzem_formula_do_simulador_v2():
+    """Taxas fixas do config.json aplicadas direto sobre o FOB em reais"""
+    taxas = {'ii_fixo': 0.02, 'ipi_fixo': 0.05, 'pis_cofins_fixo': 0.034}
+    motor = MotorTributario(regras_taxas_fixas(taxas))
+    fob = np.array([10000.0, 750000.0])
+    cambio = np.array([5.1, 4.9])
+    aliquota = np.array([0.12, 0.18])
+
+    r = motor.calcular(fob, cambio, aliquota_icms=aliquota)
+
+    brl = fob * cambio
+    esperado = brl * 0.02 + brl * 0.05 + brl * 0.034 + brl * aliquota
+    assert np.allclose(r['total_tributos'], esperado, rtol=1e-12)
+
+
+def test_selecao_de_regra_por_uf_ncm_e_vigencia():
+    """A primeira regra que casa tem prioridade; NCM casa por prefixo"""
+    regras = [
+        {'nome': 'RJ informática 2025', 'uf': 'RJ', 'ncm': '8471',
+         'vigencia_inicio': '2025-01-01', 'aliquota_icms': 0.07},
+        {'nome': 'RJ geral', 'uf': 'RJ', 'aliquota_icms': 0.20},
+        {'nome': 'Demais UFs', 'aliquota_icms': 0.17},
+    ]
+    motor = MotorTributario(regras)
+    ops = pd.DataFrame({
+        'valor_fob_usd': [1000.0] * 4,
+        'cambio': [5.0] * 4,
+        'uf': ['RJ', 'RJ', 'RJ', 'SP'],
+        'ncm': ['84713012', '84713012', '85171231', '84713012'],
+        'data': ['2025-03-10', '2024-12-31', '2025-03-10', '2025-03-10'],
+    })
+
+    r = motor.calcular_df(ops)
+
+    assert list(r['regra']) == [0, 1, 1, 2]
+    assert np.allclose(r['icms_devido'], 5000.0 * np.array([0.07, 0.20, 0.20, 0.17]))
+
+
+def test_operacao_sem_regra_aplicavel_gera_erro():
+    motor = MotorTributario([{'uf': 'RJ', 'aliquota_icms': 0.20}])
+    with pytest.raises(ValueError):
+        motor.calcular([1000.0, 1000.0], 5.0, uf=['RJ', 'SP'])
+
+
+def test_perfil_rj_aceita_lote_bidimensional():
+    """Lotes 2D (ex.: cenários x operações) mantêm a forma da entrada"""
+    motor = MotorTributario(PERFIL_RJ_LEI_2657)
+    cambios = np.array([[5.0], [5.5], [6.0]])
+    r = motor.calcular(np.array([1000.0, 2000.0]), cambios)
+    assert r['icms_devido'].shape == (3, 2)
+    assert (np.diff(r['icms_devido'], axis=0) > 0).all()
+
+
+@pytest.mark.parametrize('regras', [
+    PERFIL_RJ_LEI_2657,
+    PERFIL_SIMPLIFICADO,
+    regras_taxas_fixas({'ii_fixo': 0.02, 'ipi_fixo': 0.05, 'pis_cofins_fixo': 0.034}),
+])
+def test_calculo_escalar_bate_com_o_lote(regras):
+    """calcular_escalar devolve exatamente o elemento do lote, inclusive nos empates"""
+    motor = MotorTributario(regras)
+    rng = np.random.default_rng(7)
+    fob = np.concatenate([rng.uniform(100, 1e6, 300).round(2), [1.0, 2.675, 0.125]])
+    cambio = np.concatenate([rng.uniform(4.5, 6.5, 300).round(4), [2.675, 1.0, 1.0]])
+    despesas = rng.uniform(0, 5000, fob.size).round(2)
+    aliquota = rng.choice([0.12, 0.17, 0.18, 0.20], fob.size)
+
+    lote = motor.calcular(fob, cambio, despesas_aduaneiras=despesas, aliquota_icms=aliquota)
+
+    for i in range(fob.size):
+        r = motor.calcular_escalar(fob[i], cambio[i], despesas_aduaneiras=despesas[i],
+                                   aliquota_icms=aliquota[i])
+        for chave, valores in lote.items():
+            assert r[chave] == valores[i], (chave, i)
+            assert type(r[chave]) in (float, int)
+
+
+def test_calculo_escalar_seleciona_a_mesma_regra_do_lote():
+    regras = [
+        {'nome': 'RJ informática 2025', 'uf': 'RJ', 'ncm': ['8471', '8517'],
+         'vigencia_inicio': '2025-01-01', 'vigencia_fim': '2025-12-31', 'aliquota_icms': 0.07},
+        {'nome': 'RJ geral', 'uf': 'RJ', 'aliquota_icms': 0.20, 'icms_por_dentro': True},
+        {'nome': 'Demais UFs', 'aliquota_icms': 0.17, 'arredondar': True},
+    ]
+    motor = MotorTributario(regras)
+    ops = pd.DataFrame({
+        'valor_fob_usd': [1000.0, 1000.0, 1234.56, 1000.0, 987.65],
+        'cambio': [5.0, 5.0, 5.4321, 5.0, 5.1234],
+        'uf': ['RJ', 'RJ', 'RJ', 'SP', 'RJ'],
+        'ncm': ['84713012', '84713012', '85171231', '84713012', '30049099'],
+        'data': ['2025-03-10', '2024-12-31', '2025-12-31', '2025-03-10', '2026-01-01'],
+    })
+
+    lote = motor.calcular_df(ops)
+
+    for i, op in enumerate(ops.to_dict('records')):
+        r = motor.calcular_escalar(**op)
+        assert r['regra'] == lote['regra'].iloc[i]
+        assert r['icms_devido'] == lote['icms_devido'].iloc[i]
+        assert r['total_tributos'] == lote['total_tributos'].iloc[i]
+
+    with pytest.raises(ValueError):
+        MotorTributario([{'uf': 'RJ', 'aliquota_icms': 0.20}]).calcular_escalar(1000.0, 5.0, uf='SP')
@@ -0,0 +1,80 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from ptax import ArmazemPTAX, ler_snapshot
+from recomendador_drawback import precificar_pela_ptax
+
+
+def _snapshot(tmp_path):
+    # 2025-01-03 é sexta: sábado e domingo repetem a sexta
+    df = pd.DataFrame({
+        'data': ['2025-01-02', '2025-01-03', '2025-01-06', '2025-01-02', '2025-01-06'],
+        'moeda': ['USD', 'USD', 'USD', 'EUR', 'EUR'],
+        'cotacao': [6.1, 6.2, 6.15, 6.4, 6.5],
+    })
+    caminho = tmp_path / 'snapshot.csv'
+    df.to_csv(caminho, index=False)
+    return caminho
+
+
+def test_consulta_por_data_e_em_lote(tmp_path):
+    armazem = ArmazemPTAX(tmp_path / 'ptax')
+    assert armazem.importar_snapshot(_snapshot(tmp_path)) == {'EUR': 2, 'USD': 3}
+
+    assert armazem.cotacao('2025-01-04') == 6.2
+    assert armazem.cotacao('2025-01-05', 'EUR') == 6.4
+    with pytest.raises(KeyError):
+        armazem.cotacao('2025-01-01')
+
+    lote = armazem.cotacoes(pd.Series(pd.to_datetime(['2025-01-06', '2024-12-31', '2025-01-03', '2025-02-01'])))
+    np.testing.assert_array_equal(lote[[0, 2]], [6.15, 6.2])
+    assert np.isnan(lote[[1, 3]]).all()
+
+    # Reaberto do disco (memória mapeada), só com os dias úteis no histórico
+    historico = ArmazemPTAX(tmp_path / 'ptax').historico()
+    assert list(historico.index.strftime('%Y-%m-%d')) == ['2025-01-02', '2025-01-06']
+    assert list(historico['USD']) == [6.1, 6.15]
+
+
+def test_so_acrescenta_datas_novas(tmp_path):
+    armazem = ArmazemPTAX(tmp_path / 'ptax')
+    armazem.importar(ler_snapshot(_snapshot(tmp_path)))
+    novos = armazem.acrescentar('USD', ['2025-01-03', '2025-01-09'], [9.99, 6.3])
+    assert novos == 1
+    assert armazem.cotacao('2025-01-03') == 6.2      # já gravada: não muda
+    assert armazem.cotacao('2025-01-08') == 6.15     # lacuna repete o último dia útil
+    assert armazem.cotacao('2025-01-09') == 6.3
+    assert armazem.cobertura('USD')[1] == np.datetime64('2025-01-09')
+
+
+def test_drawback_reprecifica_pela_data_de_importacao(tmp_path):
+    armazem = ArmazemPTAX(tmp_path / 'ptax')
+    armazem.importar_snapshot(_snapshot(tmp_path))
+    importacoes = pd.DataFrame({
+        'data_importacao': pd.to_datetime(['2025-01-03', '2030-01-01']),
+        'valor_fob_usd': [1000.0, 1000.0],
+        'cambio': [5.0, 5.0],
+        'valor_fob_brl': [5000.0, 5000.0],
+        'ii_valor': [100.0, 100.0],
+    })
+    resultado = precificar_pela_ptax(importacoes, armazem)
+    assert list(resultado['valor_fob_brl']) == [6200.0, 5000.0]
+    assert list(resultado['ii_valor']) == [124.0, 100.0]
+    assert list(resultado['cambio']) == [6.2, 5.0]
+
+
+def test_gravacao_interrompida_nao_desalinha_as_datas(tmp_path):
+    armazem = ArmazemPTAX(tmp_path / 'ptax')
+    armazem.acrescentar('USD', ['2025-01-02', '2025-01-03'], [5.0, 5.1])
+    # Queda entre gravar os arrays e o meta.json: bytes órfãos no fim dos arquivos
+    with open(tmp_path / 'ptax' / 'USD.cotacao.f8', 'ab') as f:
+        f.write(np.array([9.9, 9.9]).tobytes())
+    with open(tmp_path / 'ptax' / 'USD.dia_util.u1', 'ab') as f:
+        f.write(bytes([1, 1]))
+
+    reaberto = ArmazemPTAX(tmp_path / 'ptax')
+    assert reaberto.acrescentar('USD', ['2025-01-06'], [6.0]) == 1
+    datas = pd.date_range('2025-01-02', '2025-01-06')
+    np.testing.assert_array_equal(ArmazemPTAX(tmp_path / 'ptax').cotacoes(datas), [5.0, 5.1, 5.1, 5.1, 6.0])
+    assert (tmp_path / 'ptax' / 'USD.cotacao.f8').stat().st_size == 5 * 8
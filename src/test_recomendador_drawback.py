@@ -0,0 +1,169 @@
+import copy
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from recomendador_drawback import (
+    RazaoDrawback, vincular_importacoes_exportacoes, verificar_vinculacao
+)
+
+
+def _bases(n_imp=400, n_exp=600, seed=3):
+    rng = np.random.default_rng(seed)
+    base = pd.Timestamp('2023-01-01')
+    imp = pd.DataFrame({
+        'numero_di': [f'DI{i}' for i in range(n_imp)],
+        'cnpj_basico': rng.integers(1, 15, n_imp),
+        'ncm': rng.choice(['84713012', '85171231', '30049099'], n_imp),
+        'data_importacao': base + pd.to_timedelta(rng.integers(0, 700, n_imp), unit='D'),
+        'quantidade': rng.integers(100, 1000, n_imp),
+        'valor_fob_brl': rng.uniform(1e4, 1e6, n_imp),
+        'ii_valor': rng.uniform(1e3, 1e5, n_imp),
+        'ipi_valor': rng.uniform(1e2, 1e4, n_imp),
+    })
+    exp = pd.DataFrame({
+        'numero_due': [f'DUE{i}' for i in range(n_exp)],
+        'cnpj_basico': rng.integers(1, 15, n_exp),
+        'ncm': rng.choice(['84713012', '85171231', '30049099'], n_exp),
+        'data_exportacao': base + pd.to_timedelta(rng.integers(0, 1100, n_exp), unit='D'),
+        'quantidade': rng.integers(100, 1000, n_exp),
+    })
+    return imp, exp
+
+
+def _vinculos_referencia(imp, exp, tolerancia=365):
+    """Laço ingênuo (regra original com iterrows)"""
+    vinculos = []
+    for _, i in imp.iterrows():
+        candidatos = exp[
+            (exp['cnpj_basico'] == i['cnpj_basico']) &
+            (exp['ncm'] == i['ncm']) &
+            (exp['data_exportacao'] >= i['data_importacao']) &
+            (exp['data_exportacao'] <= i['data_importacao'] + timedelta(days=tolerancia)) &
+            (exp['quantidade'] >= 0.9 * i['quantidade'])
+        ]
+        for _, e in candidatos.iterrows():
+            vinculos.append((i['cnpj_basico'], i['ncm'], i['data_importacao'], e['data_exportacao'],
+                             i['quantidade'], e['quantidade'],
+                             round(e['quantidade'] / i['quantidade'], 2)))
+    return vinculos
+
+
+def test_juncao_por_intervalos_bate_com_laco_ingenuo():
+    imp, exp = _bases()
+    # Blocos pequenos para exercitar a expansão em partes
+    vinculos = vincular_importacoes_exportacoes(imp, exp, max_pares_por_bloco=50)
+    obtidos = list(zip(vinculos['cnpj_basico'], vinculos['ncm'], vinculos['data_importacao'],
+                       vinculos['data_exportacao'], vinculos['quantidade_imp'],
+                       vinculos['quantidade_exp'], vinculos['proporcao']))
+    assert obtidos == _vinculos_referencia(imp, exp)
+
+
+def test_verificar_vinculacao_por_cnpj():
+    imp, exp = _bases()
+    todos = vincular_importacoes_exportacoes(imp, exp)
+    por_cnpj = verificar_vinculacao(imp, exp, 5)
+    esperado = todos[todos['cnpj_basico'] == 5].reset_index(drop=True)
+    pd.testing.assert_frame_equal(por_cnpj, esperado)
+    assert verificar_vinculacao(imp, exp, 999).empty
+
+
+def test_razao_fifo_consome_quantidades():
+    """Uma DU-E abate a DI mais antiga primeiro e não é reutilizada"""
+    razao = RazaoDrawback()
+    razao.registrar_importacao(1, '8471', '2024-01-10', 100, ii_valor=1000.0, ipi_valor=500.0, id_registro='DI1')
+    razao.registrar_importacao(1, '8471', '2024-02-10', 100, ii_valor=2000.0, id_registro='DI2')
+    novos = razao.registrar_exportacao(1, '8471', '2024-03-01', 150, id_registro='DUE1')
+    assert novos == [('DI1', 'DUE1', 100), ('DI2', 'DUE1', 50)]
+
+    # Exportação fora da janela de 365 dias da DI2 não a comprova
+    assert razao.registrar_exportacao(1, '8471', '2025-03-01', 50, id_registro='DUE2') == []
+    # Importação nova consome o saldo da DUE2, que ficou em aberto
+    assert razao.registrar_importacao(1, '8471', '2025-01-01', 40, id_registro='DI3') == [('DI3', 'DUE2', 40)]
+
+    saldos = razao.saldos_importacoes()
+    assert saldos.loc['DI1', 'comprovada'] and saldos.loc['DI3', 'comprovada']
+    assert not saldos.loc['DI2', 'comprovada']
+    assert saldos.loc['DI2', 'economia_ii'] == 1000.0
+    assert razao.saldos_exportacoes().loc['DUE2', 'saldo'] == 10
+
+
+def test_razao_incremental_igual_ao_lote():
+    """Lote inteiro = mesmo lote entregue em partes cronológicas"""
+    imp, exp = _bases()
+    inteiro = RazaoDrawback()
+    inteiro.adicionar(imp, exp)
+
+    corte = pd.Timestamp('2024-01-01')
+    partes = RazaoDrawback()
+    partes.adicionar(imp[imp['data_importacao'] < corte], exp[exp['data_exportacao'] < corte])
+    partes.adicionar(imp[imp['data_importacao'] >= corte], exp[exp['data_exportacao'] >= corte])
+
+    pd.testing.assert_frame_equal(
+        inteiro.alocacoes().sort_values(['id_importacao', 'id_exportacao']).reset_index(drop=True),
+        partes.alocacoes().sort_values(['id_importacao', 'id_exportacao']).reset_index(drop=True))
+
+    # Nenhuma quantidade é usada duas vezes
+    alocacoes = inteiro.alocacoes()
+    assert (alocacoes.groupby('id_exportacao')['quantidade'].sum()
+            <= exp.set_index('numero_due').loc[alocacoes['id_exportacao'].unique(), 'quantidade'].sort_index()).all()
+    assert (inteiro.saldos_importacoes()['saldo'] >= 0).all()
+
+
+def test_razao_lotes_com_indices_independentes():
+    """Dois arquivos lidos separadamente (RangeIndex novo em cada) não colidem"""
+    imp, exp = _bases()
+    corte = pd.Timestamp('2024-01-01')
+    lotes = [(imp[imp['data_importacao'] < corte], exp[exp['data_exportacao'] < corte]),
+             (imp[imp['data_importacao'] >= corte], exp[exp['data_exportacao'] >= corte])]
+
+    com_numero = RazaoDrawback()
+    sem_numero = RazaoDrawback()
+    for lote_imp, lote_exp in lotes:
+        lote_imp, lote_exp = lote_imp.reset_index(drop=True), lote_exp.reset_index(drop=True)
+        com_numero.adicionar(lote_imp, lote_exp)
+        sem_numero.adicionar(lote_imp.drop(columns='numero_di'), lote_exp.drop(columns='numero_due'))
+
+    assert len(com_numero.importacoes) == len(sem_numero.importacoes) == len(imp)
+    assert len(com_numero.exportacoes) == len(sem_numero.exportacoes) == len(exp)
+    assert {'L1-0', 'L2-0'} <= set(sem_numero.importacoes)
+    assert len(com_numero.lancamentos) == len(sem_numero.lancamentos)
+    assert [q for _, _, q in com_numero.lancamentos] == [q for _, _, q in sem_numero.lancamentos]
+    # Mesmo número de DI entregue de novo é rejeitado
+    with pytest.raises(ValueError, match='DI0'):
+        com_numero.adicionar(imp.iloc[:1])
+
+
+def test_razao_rejeita_lote_com_id_repetido_sem_aplicar_nada():
+    """Id repetido no meio do lote (ou já registrado) não deixa o razão pela metade"""
+    imp, exp = _bases()
+    razao = RazaoDrawback()
+    razao.adicionar(imp.iloc[:10], exp.iloc[:10])
+    estado = copy.deepcopy((razao.importacoes, razao.exportacoes, razao.lancamentos))
+
+    repetido = pd.concat([imp.iloc[10:20], imp.iloc[[15]]], ignore_index=True)
+    with pytest.raises(ValueError, match='Importação'):
+        razao.adicionar(repetido, exp.iloc[10:20])
+    with pytest.raises(ValueError, match='Exportação'):
+        razao.adicionar(imp.iloc[10:20], exp.iloc[5:20])
+
+    assert (razao.importacoes, razao.exportacoes, razao.lancamentos) == estado
+    razao.adicionar(imp.iloc[10:20], exp.iloc[10:20])
+    assert len(razao.importacoes) == 20
+
+
+def test_ncm_ausente_nao_vincula():
+    """NCM ausente (NaN) dos dois lados não vira uma chave comum"""
+    imp, exp = _bases(n_imp=60, n_exp=90)
+    imp['ncm'] = imp['ncm'].where(np.arange(len(imp)) % 3 != 0)
+    exp['ncm'] = exp['ncm'].where(np.arange(len(exp)) % 3 != 0)
+
+    vinculos = vincular_importacoes_exportacoes(imp, exp)
+
+    assert vinculos['ncm'].notna().all()
+    obtidos = list(zip(vinculos['cnpj_basico'], vinculos['ncm'], vinculos['data_importacao'],
+                       vinculos['data_exportacao'], vinculos['quantidade_imp'],
+                       vinculos['quantidade_exp'], vinculos['proporcao']))
+    assert obtidos == _vinculos_referencia(imp, exp)
@@ -0,0 +1,43 @@
+import pandas as pd
+
+from relatorio_html import Bruto, Modelo, arquivo_pagina, escrever_relatorio, registros, renderizar
+
+
+def test_modelo_formata_e_escapa():
+    modelo = Modelo('<h3>{nome}</h3><p>R$ {valor:,.2f}</p>{extra}')
+    assert modelo.campos == ['nome', 'valor', 'extra']
+    html = modelo(nome='Ferro & Aço <SA>', valor=1234.5, extra=Bruto('<b>ok</b>'))
+    assert html == '<h3>Ferro &amp; Aço &lt;SA&gt;</h3><p>R$ 1,234.50</p><b>ok</b>'
+    assert modelo(nome='x', valor=1, extra='') == '<h3>x</h3><p>R$ 1.00</p>'
+
+
+def test_escrita_consome_gerador_sob_demanda(tmp_path):
+    consumidas = []
+
+    def linhas():
+        for i in range(5):
+            consumidas.append(i)
+            yield f'<p>{i}</p>'
+
+    gerador = linhas()
+    arquivos = escrever_relatorio(tmp_path / 'r.html', '<body>', gerador, '</body>')
+    assert arquivos == [tmp_path / 'r.html']
+    assert (tmp_path / 'r.html').read_text(encoding='utf-8') == \
+        '<body>' + ''.join(f'<p>{i}</p>' for i in range(5)) + '</body>'
+    assert consumidas == list(range(5))
+
+
+def test_paginacao_em_arquivos(tmp_path):
+    df = pd.DataFrame({'nome': [f'E{i}' for i in range(7)], 'valor': range(7)})
+    linhas = renderizar(Modelo('<li>{nome}={valor}</li>'), registros(df, tamanho_bloco=2))
+    arquivos = escrever_relatorio(tmp_path / 'r.html', '<ul>', linhas, '</ul>', linhas_por_pagina=3)
+    assert [a.name for a in arquivos] == ['r.html', 'r_p2.html', 'r_p3.html']
+    textos = [a.read_text(encoding='utf-8') for a in arquivos]
+    assert [t.count('<li>') for t in textos] == [3, 3, 1]
+    assert 'E6=6' in textos[2] and 'href="r_p2.html"' in textos[0] and 'href="r_p2.html"' in textos[2]
+    assert 'Próxima' not in textos[2]
+
+    # Lista menor na execução seguinte: páginas que sobraram são apagadas, sem navegação
+    escrever_relatorio(tmp_path / 'r.html', '<ul>', ['<li>x</li>'], '</ul>', linhas_por_pagina=3)
+    assert not arquivo_pagina(tmp_path / 'r.html', 2).exists()
+    assert (tmp_path / 'r.html').read_text(encoding='utf-8') == '<ul><li>x</li></ul>'
@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from icms_rj import icms_importacao_rj
+from risco_cambial import (ModeloBootstrap, ModeloGBM, QuantilStreaming, carteira_sintetica,
+                           perdas_em_lotes, ponte_browniana, simular_risco_carteira)
+
+
+def test_quantil_streaming_bate_com_numpy_mesmo_com_lotes_fora_do_intervalo():
+    rng = np.random.default_rng(0)
+    valores = np.concatenate([rng.normal(0, 1, 5_000), rng.normal(0, 10, 20_000)])
+    est = QuantilStreaming(bins=4096)
+    for lote in np.array_split(valores, 25):
+        est.atualizar(lote)
+
+    assert est.n == valores.size
+    assert est.media == pytest.approx(valores.mean())
+    for p in (0.5, 0.95, 0.99):
+        q = np.quantile(valores, p)
+        assert est.quantil(p) == pytest.approx(q, abs=0.05)
+        assert est.cvar(p) == pytest.approx(valores[valores >= q].mean(), abs=0.05)
+
+
+def test_var_de_uma_operacao_acompanha_o_quantil_do_cambio():
+    modelo = ModeloGBM({"USD": 5.60}, {"USD": 0.01})
+    carteira = pd.DataFrame({"valor_fob": [100_000.0], "moeda": ["USD"], "prazo_dias": [25]})
+    resultado = simular_risco_carteira(carteira, modelo, n_caminhos=20_000, tamanho_chunk=3_000, seed=1)
+
+    # Custo é ~linear no câmbio: VaR 95% ≈ custo(câmbio no quantil 95%) - custo(spot)
+    cambio_95 = 5.60 * np.exp(-0.5 * 0.01 ** 2 * 25 + 1.6449 * 0.01 * 5)
+    custo = lambda c: (lambda r: r["valor_brl"] + r["total_tributos"])(icms_importacao_rj(100_000, c))
+    assert resultado.loc["custo_total", "var_95"] == pytest.approx(custo(cambio_95) - custo(5.60), rel=0.03)
+    assert resultado.loc["custo_total", "cvar_95"] > resultado.loc["custo_total", "var_95"]
+
+
+def test_blocos_de_operacoes_nao_mudam_o_resultado():
+    historico = pd.DataFrame(
+        {"USD": 5.0 + np.random.default_rng(2).normal(0, 0.05, 60).cumsum(),
+         "EUR": 5.5 + np.random.default_rng(3).normal(0, 0.05, 60).cumsum()},
+        index=pd.date_range("2025-01-01", periods=60, freq="B"))
+    modelo = ModeloBootstrap(historico)
+    carteira = carteira_sintetica(50, moedas=("USD", "EUR"))
+
+    inteiro = list(perdas_em_lotes(carteira, modelo, 500, tamanho_chunk=500, bloco_operacoes=50,
+                                   rng=np.random.default_rng(4)))
+    em_blocos = list(perdas_em_lotes(carteira, modelo, 500, tamanho_chunk=500, bloco_operacoes=7,
+                                     rng=np.random.default_rng(4)))
+    np.testing.assert_allclose(inteiro[0]["icms_devido"], em_blocos[0]["icms_devido"], rtol=1e-12)
+
+
+def test_ponte_browniana_tem_as_distribuicoes_do_gbm():
+    prazos = np.array([0, 1, 3, 7, 30, 90, 180])
+    passos = ponte_browniana(prazos)
+    assert passos[0][0] == len(prazos) - 1  # último prazo primeiro
+    assert sorted(p[0] for p in passos) == list(range(len(prazos)))
+
+    modelo = ModeloGBM({"USD": 5.6, "EUR": 6.0}, {"USD": 0.01, "EUR": 0.02}, [[1.0, 0.6], [0.6, 1.0]])
+    retornos = np.log(modelo.simular(np.random.default_rng(0), 100_000, prazos) / modelo.spot)
+    np.testing.assert_allclose(retornos[:, 0], 0, atol=1e-12)
+    np.testing.assert_allclose(retornos[:, 1:].std(axis=0),
+                               np.sqrt(prazos[1:, None]) * modelo.volatilidade, rtol=0.02)
+    assert np.corrcoef(retornos[:, -1, 0], retornos[:, -1, 1])[0, 1] == pytest.approx(0.6, abs=0.02)
+    # Incrementos independentes: corr(W_7, W_180) = sqrt(7/180)
+    assert np.corrcoef(retornos[:, 3, 0], retornos[:, -1, 0])[0, 1] == pytest.approx(np.sqrt(7 / 180), abs=0.02)
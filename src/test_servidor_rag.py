@@ -0,0 +1,99 @@
+import asyncio
+import sys
+import types
+from concurrent.futures import ThreadPoolExecutor
+
+from cache_embeddings import EmbeddingsDeterministicos
+from query_rag import consultar_servidor, responder_localmente
+from servidor_rag import ServidorRAG
+
+
+class MotorFalso:
+    """Motor sem LangChain: embeddings locais e resposta fixa"""
+
+    def __init__(self):
+        self.embeddings = EmbeddingsDeterministicos(dimensao=16)
+        self.lotes = []
+        self.salvamentos = 0
+
+        self.respostas_guardadas = {}
+
+    def salvar(self):
+        self.salvamentos += 1
+
+    def resposta_em_cache(self, pergunta):
+        return self.respostas_guardadas.get(pergunta)
+
+    def embed_perguntas(self, perguntas):
+        self.lotes.append(list(perguntas))
+        return self.embeddings.embed_documents(perguntas)
+
+    def responder(self, pergunta, vetor=None):
+        assert vetor == self.embeddings.embed_query(pergunta)
+        return {"pergunta": pergunta, "resposta": f"eco: {pergunta}",
+                "fontes": [{"fonte": "data/lei_2657.pdf", "pagina": 3}]}
+
+
+def test_perguntas_simultaneas_num_unico_lote_de_embeddings():
+    motor = MotorFalso()
+
+    async def cenario():
+        servidor = ServidorRAG(motor, porta=0, janela_lote=0.05)
+        await servidor.iniciar()
+        perguntas = [f"qual a alíquota {i}?" for i in range(5)]
+        loop = asyncio.get_running_loop()
+        # Clientes em threads próprias: o executor padrão fica para o servidor
+        with ThreadPoolExecutor(max_workers=len(perguntas)) as clientes:
+            respostas = await asyncio.gather(*[
+                loop.run_in_executor(clientes, consultar_servidor, p, servidor.host, servidor.porta)
+                for p in perguntas
+            ])
+        servidor.servidor.close()
+        await servidor.servidor.wait_closed()
+        return perguntas, respostas
+
+    perguntas, respostas = asyncio.run(cenario())
+    assert [r["resposta"] for r in respostas] == [f"eco: {p}" for p in perguntas]
+    assert respostas[0]["fontes"] == [{"fonte": "data/lei_2657.pdf", "pagina": 3}]
+    assert sum(len(lote) for lote in motor.lotes) == 5
+    assert len(motor.lotes) < 5
+
+
+def test_servidor_grava_cache_de_embeddings_ao_encerrar():
+    motor = MotorFalso()
+
+    async def cenario():
+        servidor = ServidorRAG(motor, porta=0)
+        tarefa = asyncio.ensure_future(servidor.servir())
+        while servidor.servidor is None:
+            await asyncio.sleep(0.01)
+        tarefa.cancel()
+        try:
+            await tarefa
+        except asyncio.CancelledError:
+            pass
+
+    asyncio.run(cenario())
+    assert motor.salvamentos == 1
+
+
+def test_resposta_local_grava_cache_de_embeddings(monkeypatch):
+    motor = MotorFalso()
+    monkeypatch.setitem(sys.modules, "motor_rag", types.SimpleNamespace(MotorRAG=lambda: motor))
+    motor.responder = lambda pergunta: {"pergunta": pergunta, "resposta": "ok", "fontes": []}
+    assert responder_localmente("qual o prazo?")["resposta"] == "ok"
+    assert motor.salvamentos == 1
+
+
+def test_pergunta_em_cache_nao_passa_pelo_embedding():
+    motor = MotorFalso()
+    motor.respostas_guardadas["qual o prazo?"] = {"pergunta": "qual o prazo?", "resposta": "um ano", "fontes": []}
+
+    async def cenario():
+        servidor = ServidorRAG(motor, porta=0)
+        return await servidor.responder("qual o prazo?"), await servidor.responder("e a alíquota?")
+
+    em_cache, nova = asyncio.run(cenario())
+    assert em_cache["resposta"] == "um ano"
+    assert nova["resposta"] == "eco: e a alíquota?"
+    assert motor.lotes == [["e a alíquota?"]]
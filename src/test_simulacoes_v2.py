@@ -0,0 +1,62 @@
+import json
+from pathlib import Path
+
+import numpy as np
+
+from analise_simulacoes_v2 import (
+    simular_lote, calcular_ict, classificar_ict,
+    classificar_carga_tributaria, recomendar_estrategia
+)
+
+CONFIG = json.loads((Path(__file__).parent.parent / "config.json").read_text(encoding="utf-8"))
+
+
+def test_lote_vetorizado_bate_com_funcoes_escalares():
+    """ICT, classificações e recomendação do lote = funções escalares por operação"""
+    operacoes = simular_lote(5000, CONFIG, seed=7).materializar()
+
+    for op in operacoes:
+        ict = calcular_ict(op['total_tributos'], op['valor_fob_brl'], CONFIG['benchmark_ict'])
+        assert op['ict'] == ict
+        assert op['classificacao_ict'] == classificar_ict(ict)
+        assert op['classificacao_carga'] == classificar_carga_tributaria(
+            op['total_tributos'], CONFIG['faixas_valor_fob'])
+        assert op['recomendacao'] == recomendar_estrategia(op, CONFIG)
+
+
+def test_lote_reprodutivel_pela_semente():
+    a = simular_lote(1000, CONFIG, seed=42)
+    b = simular_lote(1000, CONFIG, seed=42)
+    for campo, valores in a.colunas.items():
+        assert np.array_equal(valores, b.colunas[campo]), campo
+
+
+def test_streaming_grava_todas_as_operacoes_e_agrega_online(tmp_path):
+    """Contagens e médias acumuladas lote a lote = recalculadas a partir do CSV"""
+    import pandas as pd
+    from analise_simulacoes_v2 import simular_em_streaming
+
+    caminho = tmp_path / "simulacoes.csv"
+    agregado = simular_em_streaming(2500, CONFIG, str(caminho), tamanho_chunk=600, seed=3)
+
+    df = pd.read_csv(caminho, dtype={'ncm': str})
+    assert len(df) == agregado.n == 2500
+    assert agregado.histograma.sum() == 2500
+    for classificacao, quantidade in df['classificacao_carga'].value_counts().items():
+        assert agregado.contagem_carga(classificacao) == quantidade
+    assert np.isclose(agregado.media_tributos, df['total_tributos'].mean())
+    assert np.isclose(agregado.media_ict, df['ict'].mean())
+
+
+def test_paralelo_reprodutivel_para_mesma_semente_e_workers():
+    """Mesma semente + mesmo número de processos = agregados idênticos bit a bit"""
+    from analise_simulacoes_v2 import simular_em_paralelo
+
+    a = simular_em_paralelo(3001, CONFIG, workers=2, seed=11, tamanho_chunk=500)
+    b = simular_em_paralelo(3001, CONFIG, workers=2, seed=11, tamanho_chunk=500)
+
+    assert a.n == b.n == 3001
+    assert a.soma_tributos == b.soma_tributos
+    assert a.soma_ict == b.soma_ict
+    assert np.array_equal(a.histograma, b.histograma)
+    assert np.array_equal(a.contagens_carga, b.contagens_carga)
@@ -0,0 +1,73 @@
+import json
+
+from verificar_pdfs import (
+    arquivos_excluidos, classificar_pdf, hash_arquivo, histograma_tempos, verificar_diretorio
+)
+
+
+def test_classificacao_por_densidade_de_texto():
+    assert classificar_pdf([1200, 800, 30], [False, False, False]) == "ok"
+    assert classificar_pdf([0, 5, 0], [True, True, True]) == "escaneado"
+    assert classificar_pdf([0, 0], [False, False]) == "vazio"
+    assert classificar_pdf([], []) == "vazio"
+
+
+def test_histograma_de_tempos():
+    hist = histograma_tempos([0.05, 0.07, 0.3, 12.0])
+    assert hist["0-0.1s"] == 2
+    assert hist["0.1-0.5s"] == 1
+    assert hist[">10s"] == 1
+    assert sum(hist.values()) == 4
+
+
+def test_pdfs_inalterados_saem_do_cache(tmp_path):
+    pasta = tmp_path / "data"
+    pasta.mkdir()
+    (pasta / "lei.pdf").write_bytes(b"%PDF-1.4 conteudo")
+    (pasta / "scan.pdf").write_bytes(b"%PDF-1.4 imagem")
+    relatorio = tmp_path / "relatorio.json"
+    anteriores = {
+        "lei.pdf": {"hash": hash_arquivo(pasta / "lei.pdf"), "status": "ok", "paginas": 3, "tempo_s": 0.2},
+        "scan.pdf": {"hash": hash_arquivo(pasta / "scan.pdf"), "status": "escaneado", "paginas": 9, "tempo_s": 1.5},
+    }
+    relatorio.write_text(json.dumps({"arquivos": anteriores}), encoding="utf-8")
+
+    # Nada a ler: tudo vem do relatório anterior (o hash confirma e a data é guardada)
+    saida = verificar_diretorio(pasta, relatorio, workers=1)
+    for nome, anterior in anteriores.items():
+        assert saida["arquivos"][nome] == {**anterior, "tamanho_bytes": (pasta / nome).stat().st_size,
+                                           "mtime_ns": (pasta / nome).stat().st_mtime_ns}
+    assert saida["resumo"] == {"ok": 1, "escaneado": 1}
+    assert arquivos_excluidos(saida) == {"scan.pdf": "escaneado"}
+    assert json.loads(relatorio.read_text(encoding="utf-8"))["arquivos"] == saida["arquivos"]
+
+
+def test_hash_so_quando_tamanho_ou_data_mudam(tmp_path, monkeypatch):
+    import verificar_pdfs
+
+    pasta = tmp_path / "data"
+    pasta.mkdir()
+    (pasta / "lei.pdf").write_bytes(b"%PDF-1.4 conteudo")
+    relatorio = tmp_path / "relatorio.json"
+    anterior = {"hash": "abc", "status": "ok", "paginas": 3, "tempo_s": 0.2,
+                "tamanho_bytes": (pasta / "lei.pdf").stat().st_size,
+                "mtime_ns": (pasta / "lei.pdf").stat().st_mtime_ns}
+    relatorio.write_text(json.dumps({"arquivos": {"lei.pdf": anterior}}), encoding="utf-8")
+
+    calculados = []
+    original = verificar_pdfs.hash_arquivo
+    monkeypatch.setattr(verificar_pdfs, "hash_arquivo", lambda c: calculados.append(c) or original(c))
+    lidos = []
+    monkeypatch.setattr(verificar_pdfs, "analisar_pdf",
+                        lambda caminho, hash_conhecido: lidos.append(hash_conhecido) or
+                        {"hash": hash_conhecido, "status": "ok", "tempo_s": 0.1})
+
+    # Mesmo tamanho e mtime: nem abre o arquivo
+    assert verificar_diretorio(pasta, relatorio, workers=1)["arquivos"]["lei.pdf"] == anterior
+    assert calculados == [] and lidos == []
+
+    # Conteúdo novo: um único hash, repassado para a leitura
+    (pasta / "lei.pdf").write_bytes(b"%PDF-1.4 conteudo alterado")
+    verificar_diretorio(pasta, relatorio, workers=1)
+    assert len(calculados) == 1
+    assert lidos == [original(pasta / "lei.pdf")]
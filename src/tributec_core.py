@@ -7,19 +7,18 @@ import random
 from pathlib import Path
 from typing import List, Dict
 
+from motor_tributario import MOTOR_SIMPLIFICADO
+
 def icms_importacao_rj(valor_fob_usd: float, cambio: float, aliquota: float = 0.20) -> Dict:
-    """Calcula ICMS de importação para RJ (baseado em legislação vigente)"""
-    valor_fob_brl = valor_fob_usd * cambio
-    ii_valor = valor_fob_brl * 0.05
-    base_icms = valor_fob_brl + ii_valor
-    icms_valor = base_icms * aliquota
+    """Calcula ICMS de importação para RJ (perfil simplificado do motor tributário)"""
+    r = MOTOR_SIMPLIFICADO.calcular_escalar(valor_fob_usd, cambio, aliquota_icms=aliquota)
     return {
         "valor_fob_usd": valor_fob_usd,
         "cambio": cambio,
-        "valor_fob_brl": valor_fob_brl,
-        "ii_valor": ii_valor,
-        "icms_valor": icms_valor,
-        "total_tributos": ii_valor + icms_valor
+        "valor_fob_brl": r['valor_brl'],
+        "ii_valor": r['ii_valor'],
+        "icms_valor": r['icms_devido'],
+        "total_tributos": r['total_tributos']
     }
 
 def gerar_importacao(config: dict) -> Dict:
@@ -1,26 +1,219 @@
+# src/verificar_pdfs.py
+"""
+Verificador de integridade dos PDFs de um diretório (paralelo, com cache).
+
+Para cada PDF informa número de páginas, caracteres de texto por página,
+páginas vazias e escaneadas (só imagem, sem texto extraível) e o tempo de
+leitura; no fim mostra um histograma dos tempos. Os resultados ficam num
+relatório JSON que também serve de cache: PDFs com o mesmo hash não são
+lidos de novo.
+
+O create_index.py usa o relatório para deixar de fora arquivos corrompidos
+ou só com imagem antes de gastar com embeddings.
+
+Uso:
+    python src/verificar_pdfs.py                 # data/
+    python src/verificar_pdfs.py caminho/da/pasta
+"""
+import hashlib
+import json
 import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
 from pathlib import Path
-from PyPDF2 import PdfReader
 
-# Caminho da pasta de PDFs
-DATA_DIR = Path("c:/Users/Edcarlos/Desktop/cip_works/tributec-ai/data/exatas_logica")
+try:
+    from pypdf import PdfReader
+except ImportError:
+    try:
+        from PyPDF2 import PdfReader
+    except ImportError:
+        PdfReader = None
+
+PROJECT_ROOT = Path(__file__).parent.parent
+DATA_DIR = PROJECT_ROOT / "data"
+RELATORIO = PROJECT_ROOT / "output" / "verificacao_pdfs.json"
+
+MIN_CARACTERES_PAGINA = 50      # abaixo disso a página conta como sem texto
+PROPORCAO_ESCANEADO = 0.9       # fração de páginas sem texto para o PDF ser "escaneado"
+FAIXAS_TEMPO = [0, 0.1, 0.5, 1, 2, 5, 10, float("inf")]  # segundos
+STATUS_EXCLUIDOS = ("corrompido", "escaneado", "vazio")
+
+
+def hash_arquivo(caminho: Path) -> str:
+    """SHA-256 do conteúdo do arquivo, lido em blocos"""
+    h = hashlib.sha256()
+    with open(caminho, "rb") as f:
+        for bloco in iter(lambda: f.read(1 << 20), b""):
+            h.update(bloco)
+    return h.hexdigest()
 
-print("🔍 Verificando integridade dos PDFs...\n")
 
-for pdf in DATA_DIR.glob("*.pdf"):
+def _tem_imagem(pagina) -> bool:
     try:
-        reader = PdfReader(str(pdf))
-        num_pages = len(reader.pages)
-        print(f"✅ {pdf.name} - {num_pages} páginas")
-        
-        # Testa extrair texto da primeira página
-        page = reader.pages[0]
-        text = page.extract_text()
-        if not text or len(text) < 50:
-            print(f"   ⚠️  AVISO: Texto muito curto ou vazio na primeira página")
-            
+        recursos = pagina.get("/Resources") or {}
+        objetos = recursos.get("/XObject") or {}
+        return any(objetos[nome].get_object().get("/Subtype") == "/Image" for nome in objetos)
+    except Exception:
+        return False
+
+
+def classificar_pdf(caracteres: list, imagens: list) -> str:
+    """
+    'vazio'      sem texto e sem imagens
+    'escaneado'  ≥90% das páginas sem texto, com imagens (precisa de OCR)
+    'ok'         o resto
+    """
+    if not caracteres:
+        return "vazio"
+    sem_texto = [c < MIN_CARACTERES_PAGINA for c in caracteres]
+    if sum(sem_texto) / len(caracteres) >= PROPORCAO_ESCANEADO:
+        return "escaneado" if any(imagens) else "vazio"
+    return "ok"
+
+
+def _assinatura(caminho: Path) -> dict:
+    info = caminho.stat()
+    return {"tamanho_bytes": info.st_size, "mtime_ns": info.st_mtime_ns}
+
+
+def analisar_pdf(caminho, hash_conhecido: str = None) -> dict:
+    """Lê um PDF inteiro (roda num processo do pool)"""
+    caminho = Path(caminho)
+    inicio = time.perf_counter()
+    resultado = {"hash": hash_conhecido or hash_arquivo(caminho), **_assinatura(caminho)}
+    try:
+        if PdfReader is None:
+            raise ImportError("instale pypdf (ou PyPDF2) para ler PDFs")
+        leitor = PdfReader(str(caminho))
+        caracteres, imagens = [], []
+        for pagina in leitor.pages:
+            texto = pagina.extract_text() or ""
+            caracteres.append(len(texto.strip()))
+            imagens.append(_tem_imagem(pagina))
+        resultado.update({
+            "status": classificar_pdf(caracteres, imagens),
+            "paginas": len(caracteres),
+            "caracteres_por_pagina": caracteres,
+            "densidade_media": round(sum(caracteres) / len(caracteres), 1) if caracteres else 0.0,
+            "paginas_vazias": sum(1 for c, img in zip(caracteres, imagens)
+                                  if c < MIN_CARACTERES_PAGINA and not img),
+            "paginas_escaneadas": sum(1 for c, img in zip(caracteres, imagens)
+                                      if c < MIN_CARACTERES_PAGINA and img),
+        })
+    except ImportError:
+        raise
     except Exception as e:
-        print(f"❌ {pdf.name} - CORROMPIDO: {e}")
-        print(f"   → Baixe uma nova versão desse arquivo.\n")
+        resultado.update({"status": "corrompido", "erro": f"{type(e).__name__}: {e}"})
+    resultado["tempo_s"] = round(time.perf_counter() - inicio, 4)
+    return resultado
+
+
+def histograma_tempos(tempos: list, faixas: list = FAIXAS_TEMPO) -> dict:
+    contagem = {}
+    for inicio, fim in zip(faixas[:-1], faixas[1:]):
+        rotulo = f"{inicio}-{fim}s" if fim != float("inf") else f">{inicio}s"
+        contagem[rotulo] = sum(1 for t in tempos if inicio <= t < fim)
+    return contagem
+
+
+def carregar_relatorio(caminho=RELATORIO) -> dict:
+    caminho = Path(caminho)
+    if not caminho.exists():
+        return {}
+    return json.loads(caminho.read_text(encoding="utf-8"))
+
+
+def verificar_diretorio(diretorio=DATA_DIR, relatorio=RELATORIO, workers: int = None,
+                        recursivo: bool = False) -> dict:
+    """
+    Verifica os PDFs de `diretorio` e grava o relatório JSON.
+
+    Só PDFs novos ou alterados são lidos. Arquivos com o mesmo tamanho e
+    mtime do relatório anterior nem são abertos; os demais têm o hash
+    calculado uma vez (e repassado para a leitura) e, se o conteúdo for o
+    mesmo, só a data é atualizada.
+    """
+    diretorio = Path(diretorio)
+    padrao = "**/*.pdf" if recursivo else "*.pdf"
+    arquivos = {p.relative_to(diretorio).as_posix(): p for p in sorted(diretorio.glob(padrao))}
+    anteriores = carregar_relatorio(relatorio).get("arquivos", {})
+
+    resultados, pendentes = {}, {}  # pendentes: nome -> hash
+    for nome, caminho in arquivos.items():
+        anterior = anteriores.get(nome)
+        assinatura = _assinatura(caminho)
+        if anterior is not None and all(anterior.get(k) == v for k, v in assinatura.items()):
+            resultados[nome] = anterior
+            continue
+        hash_atual = hash_arquivo(caminho)
+        if anterior is not None and anterior.get("hash") == hash_atual:
+            resultados[nome] = {**anterior, **assinatura}
+        else:
+            pendentes[nome] = hash_atual
+
+    if pendentes:
+        print(f"🔍 Lendo {len(pendentes)} PDF(s) novo(s)/alterado(s) ({len(resultados)} do cache)...")
+        tarefas = [arquivos[nome] for nome in pendentes]
+        hashes = list(pendentes.values())
+        if workers == 1 or len(tarefas) == 1:
+            lidos = list(map(analisar_pdf, tarefas, hashes))
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                lidos = list(pool.map(analisar_pdf, tarefas, hashes, chunksize=4))
+        resultados.update(zip(pendentes, lidos))
+    resultados = dict(sorted(resultados.items()))
+
+    resumo = {}
+    for resultado in resultados.values():
+        resumo[resultado["status"]] = resumo.get(resultado["status"], 0) + 1
+    saida = {
+        "diretorio": str(diretorio),
+        "gerado_em": datetime.now().isoformat(timespec="seconds"),
+        "resumo": resumo,
+        "histograma_tempos": histograma_tempos([r["tempo_s"] for r in resultados.values()]),
+        "arquivos": resultados,
+    }
+    relatorio = Path(relatorio)
+    relatorio.parent.mkdir(parents=True, exist_ok=True)
+    temporario = relatorio.with_suffix(".tmp")
+    temporario.write_text(json.dumps(saida, ensure_ascii=False, indent=1), encoding="utf-8")
+    os.replace(temporario, relatorio)
+    return saida
+
+
+def arquivos_excluidos(relatorio: dict) -> dict:
+    """nome -> status dos PDFs que não devem ir para o índice"""
+    return {nome: r["status"] for nome, r in relatorio.get("arquivos", {}).items()
+            if r["status"] in STATUS_EXCLUIDOS}
+
+
+def imprimir_relatorio(relatorio: dict):
+    for nome, r in relatorio["arquivos"].items():
+        if r["status"] == "corrompido":
+            print(f"❌ {nome} - CORROMPIDO: {r['erro']}")
+            print(f"   → Baixe uma nova versão desse arquivo.")
+        elif r["status"] == "ok":
+            print(f"✅ {nome} - {r['paginas']} páginas, {r['densidade_media']:.0f} caracteres/página")
+            if r["paginas_vazias"] or r["paginas_escaneadas"]:
+                print(f"   ⚠️  {r['paginas_vazias']} página(s) vazia(s), "
+                      f"{r['paginas_escaneadas']} escaneada(s)")
+        else:
+            print(f"⚠️  {nome} - {r['status'].upper()} ({r.get('paginas', 0)} páginas sem texto extraível)")
+
+    print("\n⏱️ Tempo de leitura por arquivo:")
+    maior = max(relatorio["histograma_tempos"].values(), default=0) or 1
+    for faixa, n in relatorio["histograma_tempos"].items():
+        print(f"   {faixa:>8} | {'█' * round(30 * n / maior)} {n}")
+    print(f"\n📊 Resumo: {relatorio['resumo']}")
+
 
-print("\n✔️ Verificação concluída!")
\ No newline at end of file
+# === EXECUÇÃO ===
+if __name__ == "__main__":
+    diretorio = Path(sys.argv[1]) if len(sys.argv) > 1 else DATA_DIR
+    print(f"🔍 Verificando integridade dos PDFs em {diretorio}...\n")
+    relatorio = verificar_diretorio(diretorio)
+    imprimir_relatorio(relatorio)
+    print(f"\n✔️ Verificação concluída! Relatório: {RELATORIO}")